@@ -10,7 +10,11 @@ Fonctionnalités :
 - Réponse aux mentions (@Kira)
 - Auto-reply dans canaux configurés
 - Intégration complète avec système IA Desktop-Mate
-- Rate limiting pour éviter spam
+- Rate limiting pour éviter spam (message trop rapproché mis en attente,
+  au-delà l'utilisateur est prévenu)
+- File d'inférence partagée (InferenceScheduler) : équité entre utilisateurs,
+  priorité au desktop, réponse "occupée" quand la file est pleine
+- Réponses en streaming (message édité par paliers, sans dépasser le rate limit Discord)
 - Réaction émotionnelle VRM en temps réel
 """
 
@@ -31,6 +35,11 @@ load_dotenv()
 # Import modules Desktop-Mate
 from src.ai.chat_engine import get_chat_engine
 from src.ai.emotion_analyzer import get_emotion_analyzer
+from src.ai.inference_scheduler import (
+    PRIORITY_DISCORD,
+    QueueFullError,
+    get_inference_scheduler,
+)
 from src.ipc.unity_bridge import UnityBridge
 from src.utils.config import Config
 
@@ -38,6 +47,9 @@ from src.utils.config import Config
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Longueur max d'un message Discord
+DISCORD_MESSAGE_LIMIT = 2000
+
 
 class KiraDiscordBot(commands.Bot):
     """
@@ -52,7 +64,8 @@ class KiraDiscordBot(commands.Bot):
         chat_engine=None,
         emotion_analyzer=None,
         unity_bridge=None,
-        config=None
+        config=None,
+        scheduler=None
     ):
         """
         Initialise le bot Discord Kira
@@ -62,6 +75,7 @@ class KiraDiscordBot(commands.Bot):
             emotion_analyzer: EmotionAnalyzer pour émotions (si None, utilise singleton)
             unity_bridge: UnityBridge pour VRM (si None, crée nouvelle instance)
             config: Config pour paramètres (si None, charge depuis config.json)
+            scheduler: InferenceScheduler partagé (si None, utilise singleton)
         """
         # Configuration Discord Intents
         intents = discord.Intents.default()
@@ -80,20 +94,26 @@ class KiraDiscordBot(commands.Bot):
         self.emotion_analyzer = emotion_analyzer or get_emotion_analyzer()
         self.unity_bridge = unity_bridge or UnityBridge()
         self.config = config or Config()
+        self.scheduler = scheduler or get_inference_scheduler()
         
         # Configuration Discord depuis config.json
         discord_config = self.config.get("discord", {})
         self.auto_reply_enabled = discord_config.get("auto_reply_enabled", False)
         self.auto_reply_channels = discord_config.get("auto_reply_channels", [])
         self.rate_limit_seconds = discord_config.get("rate_limit_seconds", 3)
+        self.stream_responses = discord_config.get("stream_responses", True)
+        # Discord limite les éditions (~5 / 5 s par canal) : une édition max par intervalle
+        self.stream_edit_interval = discord_config.get("stream_edit_interval", 1.5)
         
-        # Rate limiting par utilisateur
+        # Rate limiting par utilisateur (créneau réservé, éventuellement futur)
         self.last_response_time: Dict[int, float] = {}
         
         # Statistiques
         self.start_time = datetime.now()
         self.messages_processed = 0
         self.responses_sent = 0
+        self.responses_rejected = 0
+        self.responses_rate_limited = 0
         
         logger.info(
             f"✅ KiraDiscordBot initialisé "
@@ -142,13 +162,22 @@ class KiraDiscordBot(commands.Bot):
         if not should_reply:
             return
         
-        # Vérifier rate limiting
-        if not self._check_rate_limit(message.author.id):
+        # Vérifier rate limiting : attendre son créneau, ou prévenir
+        delay = self._rate_limit_delay(message.author.id)
+        if delay is None:
+            self.responses_rate_limited += 1
             logger.debug(
-                f"⏱️ Rate limit : Ignorer message de {message.author.name} "
-                f"(trop rapide)"
+                f"⏱️ Rate limit : message de {message.author.name} refusé "
+                f"(un message attend déjà)"
+            )
+            await message.channel.send(
+                "Doucement ! Je réponds d'abord à ton message précédent, "
+                "renvoie celui-ci dans quelques secondes ⏳"
             )
             return
+        if delay > 0:
+            logger.debug(f"⏱️ Rate limit : message de {message.author.name} différé de {delay:.1f}s")
+            await asyncio.sleep(delay)
         
         # Nettoyer le prompt (enlever mention si présente)
         prompt = self._clean_prompt(message.content)
@@ -160,15 +189,24 @@ class KiraDiscordBot(commands.Bot):
         # Afficher typing indicator pendant traitement
         async with message.channel.typing():
             try:
-                # Générer réponse via ChatEngine
-                response = await self._generate_response(
-                    prompt=prompt,
-                    user_id=str(message.author.id),
-                    username=message.author.name
-                )
-                
-                # Envoyer réponse
-                await message.channel.send(response)
+                if self.stream_responses:
+                    # Générer et afficher la réponse au fil des tokens
+                    response = await self._stream_response(
+                        prompt=prompt,
+                        user_id=str(message.author.id),
+                        username=message.author.name,
+                        channel=message.channel
+                    )
+                else:
+                    # Générer réponse via ChatEngine
+                    response = await self._generate_response(
+                        prompt=prompt,
+                        user_id=str(message.author.id),
+                        username=message.author.name
+                    )
+                    
+                    # Envoyer réponse
+                    await message.channel.send(response)
                 
                 self.responses_sent += 1
                 logger.info(
@@ -176,6 +214,12 @@ class KiraDiscordBot(commands.Bot):
                     f"({len(response)} chars)"
                 )
                 
+            except QueueFullError as e:
+                self.responses_rejected += 1
+                logger.warning(f"⚠️ File d'inférence pleine : {e}")
+                await message.channel.send(
+                    "Je suis très demandée en ce moment, réessaie dans un instant ! ⏳"
+                )
             except Exception as e:
                 logger.error(f"❌ Erreur génération/envoi réponse : {e}")
                 await message.channel.send(
@@ -207,26 +251,30 @@ class KiraDiscordBot(commands.Bot):
         
         return False
     
-    def _check_rate_limit(self, user_id: int) -> bool:
+    def _rate_limit_delay(self, user_id: int) -> Optional[float]:
         """
-        Vérifie le rate limiting pour un utilisateur
+        Réserve le prochain créneau de réponse d'un utilisateur
+        
+        Un message trop rapproché n'est pas ignoré : il attend la fin du
+        délai minimum. Un seul message peut attendre à la fois.
         
         Args:
             user_id: ID utilisateur Discord
         
         Returns:
-            True si peut répondre, False si trop rapide
+            Secondes à attendre avant de répondre (0.0 = tout de suite),
+            None si un message de cet utilisateur attend déjà
         """
         current_time = time.time()
         last_time = self.last_response_time.get(user_id, 0)
         
-        # Vérifier délai minimum
-        if current_time - last_time < self.rate_limit_seconds:
-            return False
+        # Créneau futur déjà réservé par un message en attente
+        if last_time > current_time:
+            return None
         
-        # Mettre à jour timestamp
-        self.last_response_time[user_id] = current_time
-        return True
+        delay = max(0.0, last_time + self.rate_limit_seconds - current_time)
+        self.last_response_time[user_id] = current_time + delay
+        return delay
     
     def _clean_prompt(self, content: str) -> str:
         """
@@ -263,14 +311,16 @@ class KiraDiscordBot(commands.Bot):
         """
         logger.info(f"🤖 Génération réponse pour {username} : '{prompt[:50]}...'")
         
-        # Générer réponse avec ChatEngine (bloquant, à exécuter dans executor)
-        loop = asyncio.get_event_loop()
-        chat_result = await loop.run_in_executor(
-            None,
-            lambda: self.chat_engine.chat(
-                user_input=prompt,
+        # Générer réponse avec ChatEngine (bloquant, via la file d'inférence)
+        chat_result = await asyncio.wrap_future(
+            self.scheduler.submit(
+                lambda: self.chat_engine.chat(
+                    user_input=prompt,
+                    user_id=user_id,
+                    source="discord"
+                ),
                 user_id=user_id,
-                source="discord"
+                priority=PRIORITY_DISCORD
             )
         )
         
@@ -281,6 +331,103 @@ class KiraDiscordBot(commands.Bot):
             f"émotion={chat_result.emotion}"
         )
         
+        self._react_to_response(response_text, user_id)
+        
+        return response_text
+    
+    async def _stream_response(
+        self,
+        prompt: str,
+        user_id: str,
+        username: str,
+        channel
+    ) -> str:
+        """
+        Génère une réponse en streaming et l'affiche dans le canal
+        
+        Le premier morceau est envoyé après `stream_edit_interval`, puis le
+        message est édité au plus une fois par intervalle (les tokens arrivés
+        entre-temps sont regroupés). Une réponse courte n'est envoyée qu'une fois.
+        
+        Args:
+            prompt: Message de l'utilisateur
+            user_id: ID utilisateur Discord
+            username: Nom utilisateur Discord
+            channel: Canal Discord où répondre
+        
+        Returns:
+            Réponse finale (post-traitement ChatEngine terminé)
+        """
+        logger.info(f"🤖 Génération (stream) pour {username} : '{prompt[:50]}...'")
+        
+        loop = asyncio.get_event_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()  # Marqueur de fin
+        
+        def produce():
+            """Itère chat_stream (thread d'inférence) et transmet les morceaux à la boucle"""
+            stream = self.chat_engine.chat_stream(
+                user_input=prompt,
+                user_id=user_id,
+                source="discord"
+            )
+            while True:
+                try:
+                    chunk = next(stream)
+                except StopIteration as stop:
+                    return stop.value
+                loop.call_soon_threadsafe(queue.put_nowait, chunk)
+        
+        producer = asyncio.wrap_future(
+            self.scheduler.submit(produce, user_id=user_id, priority=PRIORITY_DISCORD)
+        )
+        # Fin (succès, erreur ou annulation) : après les morceaux déjà transmis
+        producer.add_done_callback(lambda _: queue.put_nowait(done))
+        
+        text = ""
+        sent_message = None
+        last_update = time.monotonic()
+        while True:
+            chunk = await queue.get()
+            if chunk is done:
+                break
+            text += chunk
+            
+            now = time.monotonic()
+            if now - last_update < self.stream_edit_interval or not text.strip():
+                continue
+            preview = text[:DISCORD_MESSAGE_LIMIT - 2] + " ▌"
+            if sent_message is None:
+                sent_message = await channel.send(preview)
+            else:
+                await sent_message.edit(content=preview)
+            last_update = time.monotonic()
+        
+        chat_result = await producer  # Relance une éventuelle erreur de génération
+        response_text = chat_result.response[:DISCORD_MESSAGE_LIMIT]
+        
+        if sent_message is None:
+            await channel.send(response_text)
+        else:
+            await sent_message.edit(content=response_text)
+        
+        logger.info(
+            f"✅ Réponse générée (stream) : {len(response_text)} chars, "
+            f"émotion={chat_result.emotion}"
+        )
+        
+        self._react_to_response(chat_result.response, user_id)
+        
+        return chat_result.response
+    
+    def _react_to_response(self, response_text: str, user_id: str):
+        """
+        Analyse l'émotion d'une réponse et la transmet à l'avatar
+        
+        Args:
+            response_text: Réponse générée
+            user_id: ID utilisateur Discord
+        """
         # Analyser émotion avec EmotionAnalyzer avancé
         emotion_result = self.emotion_analyzer.analyze(
             text=response_text,
@@ -295,8 +442,6 @@ class KiraDiscordBot(commands.Bot):
         
         # Envoyer émotion à Unity (si connecté)
         self._send_emotion_to_unity(emotion_result.emotion, emotion_result.intensity)
-        
-        return response_text
     
     def _send_emotion_to_unity(self, emotion: str, intensity: float):
         """
@@ -343,6 +488,9 @@ class KiraDiscordBot(commands.Bot):
             'uptime_seconds': uptime.total_seconds(),
             'messages_processed': self.messages_processed,
             'responses_sent': self.responses_sent,
+            'responses_rejected': self.responses_rejected,
+            'responses_rate_limited': self.responses_rate_limited,
+            'scheduler': self.scheduler.get_stats(),
             'auto_reply_enabled': self.auto_reply_enabled,
             'auto_reply_channels': self.auto_reply_channels,
             'rate_limit_seconds': self.rate_limit_seconds
@@ -2,9 +2,10 @@
 Configuration IA pour Desktop-Mate (Kira)
 
 Gestion de la configuration IA :
-- Profils GPU adaptatifs (Performance, Balanced, CPU Fallback)
+- Profils GPU adaptatifs (Performance, Balanced, CPU Fallback, Auto calibré)
 - Paramètres LLM (temperature, top_p, max_tokens)
 - System prompt personnalisable
+- Décodage spéculatif optionnel (modèle brouillon GGUF)
 - Chargement depuis config.json avec valeurs par défaut
 """
 
@@ -30,6 +31,7 @@ GPU_PROFILES = {
         "n_batch": 512,          # Batch size élevé
         "n_threads": 6,          # Threads CPU
         "use_mlock": True,       # Lock memory pour éviter swap
+        "draft_n_gpu_layers": -1,  # Modèle brouillon (spéculatif) sur GPU
         "vram_estimate": "5-5.5 GB",
         "speed_estimate": "25-35 tokens/sec",
         "recommended_for": "Réponses ultra-rapides, autres apps fermées"
@@ -42,6 +44,7 @@ GPU_PROFILES = {
         "n_batch": 256,          # Batch size modéré
         "n_threads": 6,          # Threads CPU
         "use_mlock": True,       # Lock memory
+        "draft_n_gpu_layers": -1,  # Brouillon petit : tient en VRAM
         "vram_estimate": "3-4 GB",
         "speed_estimate": "15-25 tokens/sec",
         "recommended_for": "Usage quotidien, conversations longues"
@@ -54,9 +57,24 @@ GPU_PROFILES = {
         "n_batch": 128,          # Batch size réduit
         "n_threads": 8,          # Plus de threads CPU
         "use_mlock": False,      # Pas de memory lock
+        "draft_n_gpu_layers": 0,   # Brouillon sur CPU aussi
         "vram_estimate": "0 GB (RAM: 4-6 GB)",
         "speed_estimate": "2-5 tokens/sec",
         "recommended_for": "Fallback si erreur VRAM ou sans GPU NVIDIA"
+    },
+    "auto": {
+        "name": "Auto",
+        "description": "Estimé d'après la VRAM, puis calibré en arrière-plan (cf. profile_tuner)",
+        # Valeurs de repli : remplacées par le réglage estimé ou calibré au chargement
+        "n_gpu_layers": 35,
+        "n_ctx": 2048,
+        "n_batch": 256,
+        "n_threads": 6,
+        "use_mlock": False,
+        "draft_n_gpu_layers": 0,
+        "vram_estimate": "Selon calibration",
+        "speed_estimate": "Meilleur réglage mesuré",
+        "recommended_for": "Matériel différent des profils prédéfinis"
     }
 }
 
@@ -69,11 +87,18 @@ class AIConfig:
     Attributes:
         model_path: Chemin vers le modèle LLM (gguf)
         context_limit: Nombre de messages d'historique à inclure
-        gpu_profile: Profil GPU ("performance", "balanced", "cpu_fallback")
+        gpu_profile: Profil GPU ("performance", "balanced", "cpu_fallback", "auto")
         temperature: Créativité des réponses (0.0-2.0)
         top_p: Nucleus sampling (0.0-1.0)
         max_tokens: Nombre maximum de tokens générés
         system_prompt: Prompt système définissant la personnalité de Kira
+        kv_cache_mb: Budget RAM (MB) des états KV sauvegardés par conversation (0 = désactivé)
+        draft_model_path: Modèle brouillon GGUF pour le décodage spéculatif ("" = désactivé)
+        draft_tokens: Tokens proposés par le brouillon à chaque étape
+        preload_on_startup: Charger le modèle en arrière-plan dès le lancement de l'app
+        response_cache: Réutiliser les réponses aux messages courts répétés (opt-in)
+        response_cache_ttl: Durée de vie (secondes) d'une réponse en cache
+        response_cache_similarity: Similarité cosinus minimale pour une entrée non identique
     """
     
     model_path: str = "models/zephyr-7b-beta.Q5_K_M.gguf"
@@ -83,6 +108,13 @@ class AIConfig:
     top_p: float = 0.9
     max_tokens: int = 512
     system_prompt: str = field(default="Tu es Kira, un assistant virtuel amical.")
+    kv_cache_mb: int = 512
+    draft_model_path: str = ""
+    draft_tokens: int = 8
+    preload_on_startup: bool = False
+    response_cache: bool = False
+    response_cache_ttl: int = 600
+    response_cache_similarity: float = 0.95
     
     def __post_init__(self):
         """Validation après initialisation"""
@@ -132,7 +164,16 @@ class AIConfig:
                 temperature=ai_config.get("temperature", cls.temperature),
                 top_p=ai_config.get("top_p", cls.top_p),
                 max_tokens=ai_config.get("max_tokens", cls.max_tokens),
-                system_prompt=ai_config.get("system_prompt", cls.system_prompt)
+                system_prompt=ai_config.get("system_prompt", cls.system_prompt),
+                kv_cache_mb=ai_config.get("kv_cache_mb", cls.kv_cache_mb),
+                draft_model_path=ai_config.get("draft_model_path", cls.draft_model_path),
+                draft_tokens=ai_config.get("draft_tokens", cls.draft_tokens),
+                preload_on_startup=ai_config.get("preload_on_startup", cls.preload_on_startup),
+                response_cache=ai_config.get("response_cache", cls.response_cache),
+                response_cache_ttl=ai_config.get("response_cache_ttl", cls.response_cache_ttl),
+                response_cache_similarity=ai_config.get(
+                    "response_cache_similarity", cls.response_cache_similarity
+                )
             )
             
             logger.info(
@@ -267,6 +308,35 @@ class AIConfig:
                 f"Génération peut être longue."
             )
         
+        # Validation kv_cache_mb
+        if not isinstance(self.kv_cache_mb, int) or self.kv_cache_mb < 0:
+            raise ValueError(
+                f"kv_cache_mb doit être un entier >= 0 (reçu: {self.kv_cache_mb})"
+            )
+        
+        # Validation décodage spéculatif
+        if not isinstance(self.draft_model_path, str):
+            raise ValueError(
+                f"draft_model_path doit être une chaîne (reçu: {type(self.draft_model_path)})"
+            )
+        
+        if not isinstance(self.draft_tokens, int) or not 1 <= self.draft_tokens <= 32:
+            raise ValueError(
+                f"draft_tokens doit être un entier entre 1 et 32 (reçu: {self.draft_tokens})"
+            )
+        
+        # Validation cache de réponses
+        if not isinstance(self.response_cache_ttl, int) or self.response_cache_ttl <= 0:
+            raise ValueError(
+                f"response_cache_ttl doit être un entier > 0 (reçu: {self.response_cache_ttl})"
+            )
+        
+        if not 0.0 < self.response_cache_similarity <= 1.0:
+            raise ValueError(
+                f"response_cache_similarity doit être entre 0.0 et 1.0 "
+                f"(reçu: {self.response_cache_similarity})"
+            )
+        
         # Validation system_prompt
         if not isinstance(self.system_prompt, str) or not self.system_prompt.strip():
             raise ValueError("system_prompt ne peut pas être vide")
@@ -288,7 +358,14 @@ class AIConfig:
             "temperature": self.temperature,
             "top_p": self.top_p,
             "max_tokens": self.max_tokens,
-            "system_prompt": self.system_prompt
+            "system_prompt": self.system_prompt,
+            "kv_cache_mb": self.kv_cache_mb,
+            "draft_model_path": self.draft_model_path,
+            "draft_tokens": self.draft_tokens,
+            "preload_on_startup": self.preload_on_startup,
+            "response_cache": self.response_cache,
+            "response_cache_ttl": self.response_cache_ttl,
+            "response_cache_similarity": self.response_cache_similarity
         }
     
     def save_to_json(self, config_path: str = "data/config.json"):
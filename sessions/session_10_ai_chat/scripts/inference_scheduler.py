@@ -0,0 +1,290 @@
+"""
+Inference Scheduler pour Desktop-Mate (Kira)
+
+Ordonnanceur des requêtes LLM devant ModelManager :
+- Un seul thread d'inférence (une instance Llama n'est pas thread-safe)
+- File à priorités : desktop > Discord > tâches d'arrière-plan
+- Équité par utilisateur : round-robin entre utilisateurs d'une même priorité
+  (un utilisateur Discord bavard ne bloque pas les autres)
+- Backpressure : profondeur de file bornée (globale et par utilisateur),
+  refus explicite (QueueFullError) plutôt qu'un message ignoré
+- Statistiques : attente moyenne / max, refus, profondeur de file
+
+llama-cpp-python n'expose qu'une séquence par contexte via Llama.__call__ :
+le décodage reste séquentiel, l'ordonnanceur rend l'ordre prévisible
+et conserve la réutilisation du KV-cache par conversation.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Priorités (plus petit = servi en premier)
+PRIORITY_DESKTOP = 0
+PRIORITY_DISCORD = 1
+PRIORITY_BACKGROUND = 2
+
+
+class QueueFullError(RuntimeError):
+    """File d'inférence pleine (globalement ou pour cet utilisateur)"""
+
+
+@dataclass
+class _Job:
+    """Requête en attente"""
+
+    fn: Callable[[], Any]
+    future: Future
+    user_id: str
+    priority: int
+    submitted_at: float = field(default_factory=time.monotonic)
+
+
+class InferenceScheduler:
+    """
+    File d'inférence à priorités avec équité par utilisateur
+
+    Les tâches (ex: lambda: chat_engine.chat(...)) sont exécutées une par
+    une dans le thread d'inférence ; submit() retourne un Future
+    (asyncio.wrap_future côté Discord, .result() côté GUI).
+    """
+
+    def __init__(self, max_pending: int = 32, max_pending_per_user: int = 3):
+        """
+        Initialise l'ordonnanceur
+
+        Args:
+            max_pending: Nombre max de requêtes en attente (toutes priorités)
+            max_pending_per_user: Nombre max de requêtes en attente par utilisateur
+        """
+        self.max_pending = max_pending
+        self.max_pending_per_user = max_pending_per_user
+
+        # priorité → {user_id: file FIFO}, ordre des clés = tour de rôle
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Job]]"] = {}
+        self._pending = 0
+        self._pending_per_user: Dict[str, int] = {}
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._stopping = False
+
+        # Statistiques
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def submit(
+        self,
+        fn: Callable[[], Any],
+        user_id: str = "anonymous",
+        priority: int = PRIORITY_DISCORD,
+    ) -> Future:
+        """
+        Ajoute une requête à la file
+
+        Args:
+            fn: Tâche à exécuter dans le thread d'inférence
+            user_id: Utilisateur (équité et limite par utilisateur)
+            priority: PRIORITY_DESKTOP, PRIORITY_DISCORD ou PRIORITY_BACKGROUND
+
+        Returns:
+            Future du résultat de fn
+
+        Raises:
+            QueueFullError: Si la file (ou la part de l'utilisateur) est pleine
+            RuntimeError: Si l'ordonnanceur est arrêté
+        """
+        job = _Job(fn=fn, future=Future(), user_id=user_id, priority=priority)
+
+        with self._condition:
+            if self._stopping:
+                raise RuntimeError("Ordonnanceur d'inférence arrêté")
+
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise QueueFullError(f"File d'inférence pleine ({self._pending} en attente)")
+            if self._pending_per_user.get(user_id, 0) >= self.max_pending_per_user:
+                self.rejected += 1
+                raise QueueFullError(f"Trop de requêtes en attente pour {user_id}")
+
+            users = self._queues.setdefault(priority, OrderedDict())
+            users.setdefault(user_id, deque()).append(job)
+            self._pending += 1
+            self._pending_per_user[user_id] = self._pending_per_user.get(user_id, 0) + 1
+            self.submitted += 1
+
+            self._ensure_worker()
+            self._condition.notify()
+
+        logger.debug(
+            f"📥 Requête en file : user={user_id[:8]}, priorité={priority}, "
+            f"en attente={self._pending}"
+        )
+        return job.future
+
+    def call(
+        self,
+        fn: Callable[[], Any],
+        user_id: str = "background",
+        priority: int = PRIORITY_BACKGROUND,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        Exécute fn via la file et attend son résultat (appel bloquant)
+
+        Depuis le thread d'inférence lui-même (ex : flush du MemoryWorker
+        pendant une requête de chat), fn est exécutée directement pour
+        éviter l'interblocage.
+
+        Args:
+            fn: Tâche à exécuter
+            user_id: Utilisateur (équité et limite par utilisateur)
+            priority: Priorité (PRIORITY_BACKGROUND par défaut)
+            timeout: Attente max du résultat en secondes (None = illimitée)
+
+        Returns:
+            Résultat de fn
+        """
+        if threading.current_thread() is self._worker:
+            return fn()
+        return self.submit(fn, user_id=user_id, priority=priority).result(timeout)
+
+    def _ensure_worker(self):
+        """Démarre le thread d'inférence au premier submit (verrou détenu)"""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name="InferenceScheduler", daemon=True
+            )
+            self._worker.start()
+
+    def _next_job(self) -> Optional[_Job]:
+        """
+        Retire la prochaine requête (verrou détenu)
+
+        Priorité la plus haute d'abord, puis tour de rôle entre utilisateurs.
+        """
+        for priority in sorted(self._queues):
+            users = self._queues[priority]
+            if not users:
+                continue
+
+            user_id, jobs = next(iter(users.items()))
+            job = jobs.popleft()
+            if jobs:
+                users.move_to_end(user_id)  # Au tour du suivant
+            else:
+                del users[user_id]
+
+            self._pending -= 1
+            remaining = self._pending_per_user[user_id] - 1
+            if remaining:
+                self._pending_per_user[user_id] = remaining
+            else:
+                del self._pending_per_user[user_id]
+            return job
+        return None
+
+    def _run(self):
+        """Boucle du thread d'inférence"""
+        while True:
+            with self._condition:
+                job = self._next_job()
+                while job is None and not self._stopping:
+                    self._condition.wait()
+                    job = self._next_job()
+                if job is None:
+                    return
+
+            if not job.future.set_running_or_notify_cancel():
+                continue  # Annulée pendant l'attente
+
+            wait = time.monotonic() - job.submitted_at
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+            try:
+                result = job.fn()
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"❌ Erreur requête d'inférence ({job.user_id[:8]}) : {e}")
+                job.future.set_exception(e)
+            else:
+                self.completed += 1
+                job.future.set_result(result)
+
+    def shutdown(self, wait: bool = True):
+        """
+        Arrête l'ordonnanceur (requêtes en attente annulées)
+
+        Args:
+            wait: Attendre la fin de la requête en cours
+        """
+        with self._condition:
+            self._stopping = True
+            while True:
+                job = self._next_job()
+                if job is None:
+                    break
+                job.future.cancel()
+            self._condition.notify_all()
+
+        if wait and self._worker is not None:
+            self._worker.join()
+
+    @property
+    def pending(self) -> int:
+        """Nombre de requêtes en attente"""
+        return self._pending
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Statistiques de l'ordonnanceur
+
+        Returns:
+            Profondeur de file, requêtes traitées / refusées, attentes
+        """
+        with self._condition:
+            pending_by_priority = {
+                priority: sum(len(jobs) for jobs in users.values())
+                for priority, users in self._queues.items()
+            }
+        started = self.completed + self.failed
+        return {
+            "pending": self._pending,
+            "pending_by_priority": pending_by_priority,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_ms": (self.total_wait / started * 1000) if started else 0.0,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+# Instance globale (singleton)
+_scheduler_instance: Optional[InferenceScheduler] = None
+
+
+def get_inference_scheduler() -> InferenceScheduler:
+    """
+    Récupère l'instance globale d'InferenceScheduler (singleton)
+
+    Returns:
+        Instance InferenceScheduler (partagée GUI / Discord)
+    """
+    global _scheduler_instance
+
+    if _scheduler_instance is None:
+        _scheduler_instance = InferenceScheduler()
+
+    return _scheduler_instance
@@ -2,15 +2,20 @@
 Model Manager pour Desktop-Mate (Kira)
 
 Gestion du modèle LLM (Zephyr-7B) avec :
-- Chargement modèle avec llama-cpp-python
+- Chargement modèle avec llama-cpp-python (mmap, progression, annulable, warm-up)
 - Détection GPU NVIDIA avec pynvml
-- Application profils GPU adaptatifs
-- Génération texte avec contexte
+- Application profils GPU adaptatifs (dont "auto", calibré par ProfileTuner)
+- Génération texte avec contexte (complète ou en streaming)
+- Comptage de tokens (tokenizer du modèle) pour le budget des prompts
+- Réutilisation du KV-cache par conversation (PromptStateCache)
+- Décodage spéculatif optionnel (modèle brouillon, cf. speculative.py)
 - Gestion erreurs (OOM, modèle introuvable)
 """
 
 import os
-from typing import Optional, Dict, List, Any
+import threading
+import time
+from typing import Optional, Dict, List, Any, Iterator, Callable, Tuple
 import logging
 from dataclasses import dataclass
 
@@ -31,9 +36,19 @@ except ImportError:
     pynvml = None
 
 from .config import AIConfig, get_config
+from .prompt_cache import PromptStateCache
+from .speculative import GGUFDraftModel
+from .profile_tuner import ProfileTuner
 
 logger = logging.getLogger(__name__)
 
+# Taille des lectures de préchargement du fichier modèle (cache disque de l'OS)
+_PREFETCH_CHUNK = 16 * 1024 * 1024
+
+
+class ModelLoadCancelled(Exception):
+    """Chargement du modèle annulé (cancel_event positionné)"""
+
 
 @dataclass
 class GPUInfo:
@@ -69,6 +84,45 @@ class ModelManager:
         self.model: Optional[Llama] = None
         self.is_loaded = False
         self.gpu_info: Optional[GPUInfo] = None
+        self.model_generation = 0  # Incrémenté à chaque chargement / déchargement
+        
+        # Llama n'est pas thread-safe : chat et résumés d'arrière-plan
+        # (MemoryWorker) partagent la même instance
+        self._generate_lock = threading.RLock()
+        
+        # États KV par conversation : seul le suffixe nouveau est évalué
+        self.prompt_cache: Optional[PromptStateCache] = (
+            PromptStateCache(self.config.kv_cache_mb * 1024 * 1024)
+            if self.config.kv_cache_mb > 0
+            else None
+        )
+        self._active_cache_key: Optional[str] = None  # Conversation dans le contexte
+        
+        # Paramètres Llama effectivement utilisés (profil "auto" : calibrés)
+        self.active_gpu_params: Optional[Dict[str, Any]] = None
+        
+        # Profil "auto" pas encore calibré : calibration en arrière-plan après chargement
+        self._pending_tuner: Optional[ProfileTuner] = None
+        self._calibration_thread: Optional[threading.Thread] = None
+        self._calibration_cancel = threading.Event()
+        
+        # Démarrage à froid : chargement, warm-up, première réponse
+        self._load_started_at: Optional[float] = None
+        self._oom_retry = False  # Relance cpu_fallback après OOM en cours
+        # Fichier déjà lu dans le cache disque : (chemin, taille, mtime)
+        self._prefetched: Optional[Tuple[str, int, float]] = None
+        self.startup_stats: Dict[str, Optional[float]] = {
+            "load_s": None,
+            "warmup_s": None,
+            "first_reply_s": None
+        }
+        
+        # Décodage spéculatif (si draft_model_path configuré)
+        self.draft_model: Optional[GGUFDraftModel] = None
+        
+        # Débit effectif (tokens générés / temps de génération)
+        self.generated_tokens = 0
+        self.generation_time = 0.0
         
         # Vérifier disponibilité llama-cpp-python
         if not LLAMA_CPP_AVAILABLE:
@@ -144,24 +198,45 @@ class ModelManager:
             logger.error(f"❌ Erreur détection GPU : {e}")
             return GPUInfo(available=False)
     
-    def load_model(self, force_profile: Optional[str] = None) -> bool:
+    def load_model(
+        self,
+        force_profile: Optional[str] = None,
+        warm_cache: bool = True,
+        progress_callback: Optional[Callable[[float, str], None]] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> bool:
         """
         Charge le modèle LLM avec le profil GPU configuré
         
+        Conçu pour tourner dans un thread d'arrière-plan : le fichier est
+        d'abord lu dans le cache disque de l'OS (progression réelle, annulable),
+        puis projeté en mémoire par llama.cpp (mmap), enfin le préfixe
+        statique du prompt est pré-évalué (warm-up).
+        
         Args:
             force_profile: Force un profil spécifique (ignore config)
+            warm_cache: Pré-évaluer le system prompt après chargement
+            progress_callback: Appelé avec (fraction 0-1, étape)
+            cancel_event: Annule le chargement dès que positionné
         
         Returns:
             True si chargement réussi
         
         Raises:
             FileNotFoundError: Si le modèle n'existe pas
+            ModelLoadCancelled: Si cancel_event a été positionné
             RuntimeError: Si erreur de chargement (OOM, etc.)
         """
         if self.is_loaded:
             logger.warning("⚠️ Modèle déjà chargé. Utilisez unload_model() d'abord.")
             return True
         
+        def report(fraction: float, step: str):
+            if progress_callback:
+                progress_callback(fraction, step)
+            if cancel_event is not None and cancel_event.is_set():
+                raise ModelLoadCancelled(f"Chargement annulé ({step})")
+        
         # Vérifier existence du modèle
         model_path = self.config.model_path
         if not os.path.exists(model_path):
@@ -169,7 +244,13 @@ class ModelManager:
             logger.error(f"❌ {error_msg}")
             raise FileNotFoundError(error_msg)
         
+        # Fallback OOM : le chrono du premier essai continue
+        if not self._oom_retry or self._load_started_at is None:
+            self._load_started_at = time.perf_counter()
+            self.startup_stats = {"load_s": None, "warmup_s": None, "first_reply_s": None}
+        
         # Détecter GPU
+        report(0.0, "Détection GPU")
         gpu_info = self.detect_gpu()
         
         # Choisir profil
@@ -178,13 +259,28 @@ class ModelManager:
         
         profile_name = self.config.gpu_profile
         gpu_params = self.config.get_gpu_params()
+        if profile_name == "auto":
+            gpu_params = self._get_tuned_params(model_path, gpu_info, gpu_params)
+        self.active_gpu_params = gpu_params
         
         logger.info(
             f"🔄 Chargement modèle : {os.path.basename(model_path)} "
             f"(profil: {profile_name})"
         )
         
+        # Lecture séquentielle du fichier : llama.cpp (mmap) trouve ensuite
+        # les pages en cache au lieu de multiplier les lectures aléatoires
+        self._prefetch_model_file(
+            model_path, lambda done: report(0.1 + 0.5 * done, "Lecture du modèle")
+        )
+        
         try:
+            report(0.6, "Initialisation llama.cpp")
+            
+            # Modèle brouillon (décodage spéculatif), avant le modèle principal
+            self.draft_model = self._load_draft_model(gpu_params)
+            report(0.65, "Initialisation llama.cpp")
+            
             # Charger modèle avec llama-cpp-python
             self.model = Llama(
                 model_path=model_path,
@@ -193,20 +289,49 @@ class ModelManager:
                 n_batch=gpu_params["n_batch"],
                 n_threads=gpu_params["n_threads"],
                 use_mlock=gpu_params["use_mlock"],
+                use_mmap=True,  # Pages projetées à la demande, partagées avec le cache OS
+                draft_model=self.draft_model,
                 verbose=False  # Désactiver logs verbeux
             )
             
+            if self.draft_model and self.draft_model.n_vocab() != self.model.n_vocab():
+                logger.warning(
+                    f"⚠️ Vocabulaire du brouillon incompatible "
+                    f"({self.draft_model.n_vocab()} vs {self.model.n_vocab()}) : "
+                    f"décodage spéculatif désactivé"
+                )
+                self.model.draft_model = None
+                self.draft_model = None
+            
             self.is_loaded = True
+            self.model_generation += 1
+            self.startup_stats["load_s"] = time.perf_counter() - self._load_started_at
             
             logger.info(
                 f"✅ Modèle chargé avec succès ! "
                 f"(profil: {profile_name}, "
                 f"GPU layers: {gpu_params['n_gpu_layers']}, "
-                f"context: {gpu_params['n_ctx']})"
+                f"context: {gpu_params['n_ctx']}, "
+                f"{self.startup_stats['load_s']:.1f}s)"
             )
             
+            if warm_cache:
+                report(0.9, "Warm-up")
+                self.warm_up()
+            
+            if profile_name == "auto" and self._pending_tuner is not None:
+                self._start_calibration(self._pending_tuner, gpu_params)
+            
+            report(1.0, "Prêt")
             return True
             
+        except ModelLoadCancelled:
+            logger.info("⏹️ Chargement du modèle annulé")
+            self.model = None
+            self.draft_model = None
+            self.is_loaded = False
+            raise
+            
         except Exception as e:
             error_msg = str(e)
             
@@ -221,19 +346,101 @@ class ModelManager:
                 # Auto-fallback vers CPU si erreur OOM
                 if profile_name != "cpu_fallback":
                     logger.warning("⚠️ Tentative de fallback vers cpu_fallback...")
-                    return self.load_model(force_profile="cpu_fallback")
+                    self._oom_retry = True
+                    try:
+                        return self.load_model(
+                            force_profile="cpu_fallback",
+                            warm_cache=warm_cache,
+                            progress_callback=progress_callback,
+                            cancel_event=cancel_event
+                        )
+                    finally:
+                        self._oom_retry = False
             
             logger.error(f"❌ Erreur chargement modèle : {error_msg}")
             raise RuntimeError(f"Échec chargement modèle : {error_msg}")
     
+    def _prefetch_model_file(self, model_path: str, on_progress: Callable[[float], None]):
+        """
+        Lit le fichier modèle par blocs pour le placer dans le cache disque
+        
+        Une seule fois par fichier : un rechargement (fallback OOM,
+        changement de profil) trouve les pages déjà en cache.
+        
+        Args:
+            model_path: Fichier GGUF
+            on_progress: Appelé avec la fraction lue (peut lever ModelLoadCancelled)
+        """
+        stat = os.stat(model_path)
+        signature = (os.path.abspath(model_path), stat.st_size, stat.st_mtime)
+        if signature == self._prefetched:
+            on_progress(1.0)
+            return
+        
+        size = stat.st_size
+        done = 0
+        with open(model_path, "rb", buffering=0) as f:
+            while True:
+                chunk = f.read(_PREFETCH_CHUNK)
+                if not chunk:
+                    break
+                done += len(chunk)
+                on_progress(done / size if size else 1.0)
+        self._prefetched = signature
+    
+    def warm_up(self, prompt: Optional[str] = None):
+        """
+        Pré-évalue le début statique du prompt (system prompt)
+        
+        Le contexte contient ensuite ce préfixe : la première vraie requête
+        (même disposition que ChatEngine._plan_prompt) n'évalue que la suite.
+        
+        Args:
+            prompt: Préfixe à évaluer (défaut : system prompt de la config)
+        """
+        if not self.is_loaded or self.model is None:
+            raise RuntimeError("Modèle non chargé ! Appelez load_model() d'abord.")
+        
+        prompt = prompt or f"<|system|>\n{self.config.system_prompt}"
+        start = time.perf_counter()
+        with self._generate_lock:
+            tokens = self.model.tokenize(prompt.encode("utf-8"), add_bos=True, special=True)
+            self.model.reset()
+            self.model.eval(tokens)
+            self._active_cache_key = None  # Préfixe commun à toutes les conversations
+        
+        self.startup_stats["warmup_s"] = time.perf_counter() - start
+        logger.info(
+            f"🔥 Warm-up : {len(tokens)} tokens pré-évalués "
+            f"en {self.startup_stats['warmup_s']:.2f}s"
+        )
+    
+    def _record_first_reply(self):
+        """Mesure démarrage à froid → première réponse (une seule fois)"""
+        if self._load_started_at is not None and self.startup_stats["first_reply_s"] is None:
+            self.startup_stats["first_reply_s"] = time.perf_counter() - self._load_started_at
+            logger.info(
+                f"⏱️ Démarrage à froid → première réponse : "
+                f"{self.startup_stats['first_reply_s']:.1f}s"
+            )
+    
     def unload_model(self):
         """Décharge le modèle de la mémoire"""
         if not self.is_loaded:
             logger.warning("⚠️ Aucun modèle chargé")
             return
         
-        self.model = None
-        self.is_loaded = False
+        self._calibration_cancel.set()
+        
+        # Attendre une génération en cours (ex: résumé en arrière-plan)
+        with self._generate_lock:
+            self.model = None
+            self.draft_model = None
+            self.is_loaded = False
+            self.model_generation += 1
+            self._active_cache_key = None
+            if self.prompt_cache:
+                self.prompt_cache.clear()
         
         logger.info("✅ Modèle déchargé")
     
@@ -243,7 +450,8 @@ class ModelManager:
         temperature: Optional[float] = None,
         top_p: Optional[float] = None,
         max_tokens: Optional[int] = None,
-        stop: Optional[List[str]] = None
+        stop: Optional[List[str]] = None,
+        cache_key: Optional[str] = None
     ) -> str:
         """
         Génère une réponse texte à partir d'un prompt
@@ -254,6 +462,8 @@ class ModelManager:
             top_p: Nucleus sampling (0.0-1.0). Si None, utilise config.
             max_tokens: Nombre max de tokens générés. Si None, utilise config.
             stop: Liste de séquences d'arrêt (ex: ["\n\n", "User:"])
+            cache_key: Conversation (ex: "discord:1234") dont l'état KV est
+                restauré avant génération. None = prompt ponctuel (résumé...)
         
         Returns:
             Texte généré par le modèle
@@ -278,17 +488,25 @@ class ModelManager:
         
         try:
             # Générer avec llama-cpp-python
-            response = self.model(
-                prompt,
-                temperature=temperature,
-                top_p=top_p,
-                max_tokens=max_tokens,
-                stop=stop or [],
-                echo=False  # Ne pas répéter le prompt dans la sortie
-            )
+            with self._generate_lock:
+                self._switch_prompt_state(cache_key)
+                if self.draft_model:
+                    self.draft_model.stats.reset_sequence()
+                start = time.perf_counter()
+                response = self.model(
+                    prompt,
+                    temperature=temperature,
+                    top_p=top_p,
+                    max_tokens=max_tokens,
+                    stop=stop or [],
+                    echo=False  # Ne pas répéter le prompt dans la sortie
+                )
+                self.generation_time += time.perf_counter() - start
+                self.generated_tokens += response.get("usage", {}).get("completion_tokens", 0)
             
             # Extraire le texte généré
             generated_text = response["choices"][0]["text"].strip()
+            self._record_first_reply()
             
             logger.debug(f"✅ Génération terminée : {len(generated_text)} caractères")
             
@@ -298,6 +516,284 @@ class ModelManager:
             logger.error(f"❌ Erreur génération : {e}")
             raise RuntimeError(f"Échec génération : {e}")
     
+    def generate_stream(
+        self,
+        prompt: str,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        stop: Optional[List[str]] = None,
+        cache_key: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Génère une réponse en streaming (morceaux de texte au fil des tokens)
+        
+        Mêmes paramètres que generate(). Le verrou de génération est détenu
+        pendant toute l'itération : consommer le générateur jusqu'au bout
+        (ou le fermer) pour libérer le modèle. Les espaces de tête sont
+        retirés comme dans generate().
+        
+        Yields:
+            Morceaux de texte générés
+        
+        Raises:
+            RuntimeError: Si le modèle n'est pas chargé ou si la génération échoue
+        """
+        if not self.is_loaded or self.model is None:
+            raise RuntimeError(
+                "Modèle non chargé ! Appelez load_model() d'abord."
+            )
+        
+        temperature = temperature if temperature is not None else self.config.temperature
+        top_p = top_p if top_p is not None else self.config.top_p
+        max_tokens = max_tokens if max_tokens is not None else self.config.max_tokens
+        
+        logger.debug(
+            f"🤖 Génération (stream) : "
+            f"temp={temperature}, top_p={top_p}, max_tokens={max_tokens}"
+        )
+        
+        with self._generate_lock:
+            start = time.perf_counter()
+            try:
+                self._switch_prompt_state(cache_key)
+                if self.draft_model:
+                    self.draft_model.stats.reset_sequence()
+                chunks = self.model(
+                    prompt,
+                    temperature=temperature,
+                    top_p=top_p,
+                    max_tokens=max_tokens,
+                    stop=stop or [],
+                    echo=False,
+                    stream=True
+                )
+                started = False
+                for chunk in chunks:
+                    self.generated_tokens += 1  # Un morceau par token
+                    text = chunk["choices"][0]["text"]
+                    if not started:
+                        text = text.lstrip()
+                        if not text:
+                            continue
+                        started = True
+                    yield text
+            except GeneratorExit:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Erreur génération (stream) : {e}")
+                raise RuntimeError(f"Échec génération : {e}")
+            finally:
+                self.generation_time += time.perf_counter() - start
+            self._record_first_reply()
+    
+    def _get_tuned_params(
+        self,
+        model_path: str,
+        gpu_info: GPUInfo,
+        fallback: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Paramètres du profil "auto" : mémorisés, sinon estimés (sans mesure)
+        
+        Sans réglage mémorisé, la calibration est lancée en arrière-plan une
+        fois le modèle chargé (cf. _start_calibration).
+        
+        Args:
+            model_path: Modèle à charger
+            gpu_info: GPU détecté
+            fallback: Paramètres de repli si le tuner échoue
+        
+        Returns:
+            Paramètres Llama
+        """
+        tuner = ProfileTuner(
+            model_path,
+            gpu_name=gpu_info.name if gpu_info.available else None,
+            vram_total=gpu_info.vram_total if gpu_info.available else None,
+            vram_free_fn=self._vram_free
+        )
+        self._pending_tuner = None
+        try:
+            cached = tuner.get_cached()
+            if cached is not None:
+                return cached
+            self._pending_tuner = tuner
+            return tuner.estimate_params(gpu_info.vram_free if gpu_info.available else None)
+        except Exception as e:
+            logger.warning(f"⚠️ Profil auto impossible : {e} (valeurs par défaut)")
+            return fallback
+    
+    def _start_calibration(self, tuner: ProfileTuner, start: Dict[str, Any]):
+        """
+        Calibre le profil "auto" dans un thread d'arrière-plan (une seule fois)
+        
+        Le résultat est mémorisé pour le prochain chargement ; les mesures
+        qui ne tiennent pas dans la VRAM laissée libre par le modèle chargé
+        sont ignorées (cf. ProfileTuner.vram_free_fn).
+        
+        Args:
+            tuner: Tuner sans réglage mémorisé
+            start: Paramètres du chargement en cours (point de départ)
+        """
+        if self._calibration_thread is not None and self._calibration_thread.is_alive():
+            return
+        self._pending_tuner = None
+        self._calibration_cancel.clear()
+        
+        def check_cancel():
+            if self._calibration_cancel.is_set():
+                raise ModelLoadCancelled("Calibration annulée (modèle déchargé)")
+        
+        def run():
+            try:
+                params = tuner.tune(start=start, check_cancel=check_cancel)
+            except ModelLoadCancelled as e:
+                logger.info(f"⏹️ {e}")
+            except Exception as e:
+                logger.warning(f"⚠️ Calibration du profil auto impossible : {e}")
+            else:
+                if params is not None:
+                    logger.info("✅ Profil auto calibré : appliqué au prochain chargement")
+        
+        self._calibration_thread = threading.Thread(
+            target=run, name="ProfileCalibration", daemon=True
+        )
+        self._calibration_thread.start()
+        logger.info("🔧 Calibration du profil auto en arrière-plan")
+    
+    def _vram_free(self) -> Optional[int]:
+        """VRAM libre actuelle en octets (None si inconnue)"""
+        status = self.get_gpu_status()
+        if not status.get("available"):
+            return None
+        return int(status["vram_free_gb"] * 1024**3)
+    
+    def _load_draft_model(self, gpu_params: Dict[str, Any]) -> Optional[GGUFDraftModel]:
+        """
+        Charge le modèle brouillon configuré (draft_model_path)
+        
+        Un brouillon introuvable ou invalide n'empêche pas le chargement :
+        la génération se fait alors sans décodage spéculatif.
+        
+        Args:
+            gpu_params: Paramètres du profil GPU courant
+        
+        Returns:
+            GGUFDraftModel ou None
+        """
+        draft_path = self.config.draft_model_path
+        if not draft_path:
+            return None
+        
+        if not os.path.exists(draft_path):
+            logger.warning(f"⚠️ Modèle brouillon introuvable : {draft_path} (spéculatif désactivé)")
+            return None
+        
+        profile = self.config.get_profile_info()
+        try:
+            draft = GGUFDraftModel(
+                model_path=draft_path,
+                num_pred_tokens=self.config.draft_tokens,
+                n_ctx=gpu_params["n_ctx"],
+                n_gpu_layers=profile.get("draft_n_gpu_layers", 0),
+                n_threads=gpu_params["n_threads"]
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Échec chargement modèle brouillon : {e} (spéculatif désactivé)")
+            return None
+        
+        logger.info(
+            f"✅ Décodage spéculatif activé : {os.path.basename(draft_path)} "
+            f"({self.config.draft_tokens} tokens proposés)"
+        )
+        return draft
+    
+    def get_speculative_stats(self) -> Dict[str, Any]:
+        """
+        Statistiques du décodage spéculatif et débit effectif
+        
+        Returns:
+            Brouillon, taux d'acceptation, tokens/sec effectifs
+        """
+        stats: Dict[str, Any] = {
+            "enabled": self.draft_model is not None,
+            "draft_model": (
+                os.path.basename(self.draft_model.model_path) if self.draft_model else None
+            ),
+            "generated_tokens": self.generated_tokens,
+            "effective_tokens_per_sec": (
+                self.generated_tokens / self.generation_time if self.generation_time > 0 else 0.0
+            )
+        }
+        if self.draft_model:
+            stats.update(self.draft_model.stats.get_stats())
+        return stats
+    
+    def _switch_prompt_state(self, cache_key: Optional[str]):
+        """
+        Place l'état KV de la conversation `cache_key` dans le contexte
+        
+        L'état courant n'est sauvegardé qu'au changement de conversation
+        (pas de copie à chaque tour d'un même utilisateur). llama-cpp-python
+        réutilise ensuite le plus long préfixe commun avec le prompt.
+        
+        Args:
+            cache_key: Conversation à restaurer (None = aucune)
+        """
+        if self.prompt_cache is None or cache_key == self._active_cache_key:
+            return
+        
+        if self._active_cache_key is not None:
+            self.prompt_cache.put(self._active_cache_key, self.model.save_state())
+        
+        self._active_cache_key = cache_key
+        if cache_key is None:
+            return
+        
+        state = self.prompt_cache.get(cache_key)
+        if state is not None:
+            self.model.load_state(state)
+            logger.debug(f"♻️ État KV restauré : {cache_key} ({state.n_tokens} tokens)")
+    
+    def forget_prompt_state(self, cache_key: str):
+        """
+        Oublie l'état KV d'une conversation (historique effacé)
+        
+        Args:
+            cache_key: Conversation à oublier
+        """
+        if self.prompt_cache is None:
+            return
+        with self._generate_lock:
+            self.prompt_cache.discard(cache_key)
+            if self._active_cache_key == cache_key:
+                self._active_cache_key = None
+    
+    def count_tokens(self, text: str) -> Optional[int]:
+        """
+        Compte les tokens d'un texte avec le tokenizer du modèle chargé
+        
+        Args:
+            text: Texte à tokeniser (balises ChatML comprises)
+        
+        Returns:
+            Nombre de tokens, ou None si aucun modèle n'est chargé
+        """
+        model = self.model  # unload_model() peut remettre self.model à None
+        if not self.is_loaded or model is None:
+            return None
+        
+        return len(model.tokenize(text.encode("utf-8"), add_bos=False, special=True))
+    
+    @property
+    def context_window(self) -> int:
+        """Taille de la fenêtre de contexte (n_ctx) du modèle chargé ou du profil"""
+        model = self.model
+        if self.is_loaded and model is not None:
+            return model.n_ctx()
+        return self.config.get_gpu_params()["n_ctx"]
+    
     def get_gpu_status(self) -> Dict[str, Any]:
         """
         Récupère le statut actuel du GPU
@@ -346,7 +842,10 @@ class ModelManager:
             "model_path": self.config.model_path,
             "model_name": os.path.basename(self.config.model_path),
             "gpu_profile": self.config.gpu_profile,
-            "gpu_params": self.config.get_gpu_params() if self.is_loaded else None,
+            "gpu_params": self.active_gpu_params if self.is_loaded else None,
+            "prompt_cache": self.prompt_cache.get_stats() if self.prompt_cache else None,
+            "speculative": self.get_speculative_stats(),
+            "startup": dict(self.startup_stats),
             "gpu_info": {
                 "available": self.gpu_info.available if self.gpu_info else False,
                 "name": self.gpu_info.name if self.gpu_info else None,
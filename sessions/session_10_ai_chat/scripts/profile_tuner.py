@@ -0,0 +1,396 @@
+"""
+Profile Tuner pour Desktop-Mate (Kira)
+
+Profil GPU "auto" : réglage adapté à la machine réelle au lieu des
+valeurs figées de GPU_PROFILES :
+- Démarrage : réglage mémorisé, sinon estimation immédiate (couches GPU
+  d'après la VRAM libre, threads d'après les cœurs, mlock d'après la RAM)
+- Calibration (threads, batch) une seule fois, hors du démarrage (thread
+  d'arrière-plan de ModelManager), en partant de l'estimation
+- Clé : empreinte matérielle (CPU, RAM, GPU/VRAM) + empreinte du modèle
+- Fichier : data/tuned_profiles.json (une entrée par machine × modèle)
+- Nouvelle calibration automatique si le matériel ou le modèle change
+
+Méthodologie reprise des benchmarks session_11 (benchmark_cpu_threads,
+benchmark_gpu_profiling) : prompt représentatif, temperature=0,
+tokens/sec mesurés ; balayage par coordonnées (threads → batch), point
+de départ mesuré une seule fois. Les couches GPU ne sont jamais sondées
+au-delà de l'estimation : un dépassement de VRAM peut faire avorter
+llama.cpp (processus entier) au lieu de lever une exception.
+"""
+
+import hashlib
+import json
+import os
+import platform
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+    psutil = None
+
+try:
+    from llama_cpp import Llama
+    LLAMA_CPP_AVAILABLE = True
+except ImportError:
+    LLAMA_CPP_AVAILABLE = False
+    Llama = None
+
+from .config import GPU_PROFILES
+
+logger = logging.getLogger(__name__)
+
+
+# Prompt de calibration (identique à benchmark_cpu_threads)
+CALIBRATION_PROMPT = """<|system|>
+Tu es Kira, un assistant virtuel amical et compétent.</s>
+<|user|>
+Explique-moi en 2-3 phrases ce qu'est l'apprentissage automatique.</s>
+<|assistant|>
+"""
+
+# Octets lus en début / fin de fichier pour l'empreinte du modèle
+_FINGERPRINT_CHUNK = 1024 * 1024
+
+# Couches d'un modèle 7B (Zephyr-7B) : base de l'estimation partielle
+_FULL_OFFLOAD_LAYERS = 43
+
+# Marge VRAM au-delà des poids (KV-cache, contexte CUDA)
+_VRAM_HEADROOM = 1.2
+
+
+def hardware_fingerprint(gpu_name: Optional[str] = None, vram_total: Optional[int] = None) -> str:
+    """
+    Empreinte de la machine (change si CPU, RAM ou GPU changent)
+
+    Args:
+        gpu_name: Nom du GPU (GPUInfo.name)
+        vram_total: VRAM totale en octets
+
+    Returns:
+        Empreinte hexadécimale courte
+    """
+    ram_total = psutil.virtual_memory().total if PSUTIL_AVAILABLE else 0
+    parts = [
+        platform.machine(),
+        platform.processor(),
+        str(os.cpu_count()),
+        str(ram_total // (1024**3)),  # Go : insensible aux variations mineures
+        str(gpu_name or "no-gpu"),
+        str((vram_total or 0) // (1024**3)),
+    ]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+
+def model_fingerprint(model_path: str) -> str:
+    """
+    Empreinte du modèle (taille + début + fin du fichier)
+
+    Hacher 5 Go à chaque lancement coûterait plusieurs secondes : taille
+    et extrémités (en-tête GGUF, derniers tenseurs) suffisent à détecter
+    un autre modèle ou une autre quantification.
+
+    Args:
+        model_path: Chemin du GGUF
+
+    Returns:
+        Empreinte hexadécimale courte
+    """
+    size = os.path.getsize(model_path)
+    digest = hashlib.sha1(str(size).encode())
+    with open(model_path, "rb") as f:
+        digest.update(f.read(_FINGERPRINT_CHUNK))
+        if size > 2 * _FINGERPRINT_CHUNK:
+            f.seek(-_FINGERPRINT_CHUNK, os.SEEK_END)
+            digest.update(f.read(_FINGERPRINT_CHUNK))
+    return digest.hexdigest()[:16]
+
+
+class ProfileTuner:
+    """
+    Calibration et mémorisation du profil "auto"
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        gpu_name: Optional[str] = None,
+        vram_total: Optional[int] = None,
+        cache_path: str = "data/tuned_profiles.json",
+        measure_fn: Optional[Callable[[Dict[str, Any]], float]] = None,
+        vram_free_fn: Optional[Callable[[], Optional[int]]] = None,
+    ):
+        """
+        Initialise le tuner
+
+        Args:
+            model_path: Modèle principal (GGUF)
+            gpu_name: Nom du GPU détecté (None = pas de GPU)
+            vram_total: VRAM totale en octets
+            cache_path: Fichier des réglages mémorisés
+            measure_fn: Paramètres Llama → tokens/sec (défaut : vraie mesure)
+            vram_free_fn: VRAM libre au moment d'une mesure (None = pas de
+                vérification) ; une configuration qui ne tient pas n'est pas chargée
+        """
+        self.model_path = model_path
+        self.gpu_name = gpu_name
+        self.vram_total = vram_total
+        self.cache_path = cache_path
+        self.measure_fn = measure_fn or self._measure
+        self.vram_free_fn = vram_free_fn
+
+    @property
+    def cache_key(self) -> str:
+        """Clé machine × modèle"""
+        return (
+            f"{hardware_fingerprint(self.gpu_name, self.vram_total)}:"
+            f"{model_fingerprint(self.model_path)}"
+        )
+
+    # ------------------------------------------------------------------
+    # Persistance
+    # ------------------------------------------------------------------
+
+    def _load_cache(self) -> Dict[str, Any]:
+        """Lit les réglages mémorisés (fichier absent ou invalide = vide)"""
+        if not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"⚠️ Profils calibrés illisibles ({e}) : recalibration")
+            return {}
+
+    def _save_cache(self, cache: Dict[str, Any]):
+        """Écrit les réglages mémorisés"""
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.cache_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=4, ensure_ascii=False)
+
+    def get_cached(self) -> Optional[Dict[str, Any]]:
+        """Réglage mémorisé pour cette machine × ce modèle (None si absent)"""
+        entry = self._load_cache().get(self.cache_key)
+        if entry is None:
+            return None
+        logger.info(
+            f"✅ Profil auto mémorisé ({entry['tokens_per_sec']:.1f} tok/s, "
+            f"calibré le {entry['tuned_at'][:10]})"
+        )
+        return dict(entry["params"])
+
+    def get_params(self, vram_free: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Paramètres Llama du profil "auto", sans aucune mesure
+
+        Args:
+            vram_free: VRAM libre en octets (estimation si pas de réglage mémorisé)
+
+        Returns:
+            {"n_gpu_layers", "n_ctx", "n_batch", "n_threads", "use_mlock"}
+        """
+        cached = self.get_cached()
+        if cached is not None:
+            return cached
+        logger.info("🔧 Profil auto : pas encore calibré, estimation d'après la VRAM")
+        return self.estimate_params(vram_free)
+
+    def tune(
+        self,
+        start: Optional[Dict[str, Any]] = None,
+        check_cancel: Optional[Callable[[], None]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Calibre et mémorise le réglage (appel long : hors du démarrage)
+
+        Args:
+            start: Point de départ (défaut : estimate_params())
+            check_cancel: Appelé avant chaque mesure ; une exception levée
+                interrompt la calibration (rien n'est mémorisé)
+
+        Returns:
+            Paramètres mémorisés, None si aucune mesure n'a été possible
+        """
+        params, tokens_per_sec = self.calibrate(start, check_cancel)
+        if tokens_per_sec == 0.0:
+            return None
+
+        cache = self._load_cache()
+        cache[self.cache_key] = {
+            "params": params,
+            "tokens_per_sec": tokens_per_sec,
+            "tuned_at": datetime.now().isoformat(),
+            "model": os.path.basename(self.model_path),
+            "gpu": self.gpu_name,
+        }
+        self._save_cache(cache)
+        return params
+
+    # ------------------------------------------------------------------
+    # Calibration
+    # ------------------------------------------------------------------
+
+    def _physical_cores(self) -> int:
+        """Nombre de cœurs physiques (approximé sans psutil)"""
+        if PSUTIL_AVAILABLE:
+            cores = psutil.cpu_count(logical=False)
+            if cores:
+                return cores
+        return max((os.cpu_count() or 2) // 2, 1)
+
+    def _vram_needed(self, n_gpu_layers: int) -> int:
+        """VRAM nécessaire (octets, marge comprise) pour n_gpu_layers couches"""
+        if not self.gpu_name or n_gpu_layers == 0:
+            return 0
+        full = os.path.getsize(self.model_path) * _VRAM_HEADROOM
+        if n_gpu_layers < 0:
+            return int(full)
+        return int(full * min(n_gpu_layers, _FULL_OFFLOAD_LAYERS) / _FULL_OFFLOAD_LAYERS)
+
+    def estimate_layers(self, vram_free: Optional[int] = None) -> int:
+        """
+        Couches GPU qui tiennent dans la VRAM libre (-1 = toutes)
+
+        Args:
+            vram_free: VRAM libre en octets (défaut : VRAM totale)
+        """
+        if not self.gpu_name:
+            return 0
+        available = vram_free if vram_free is not None else (self.vram_total or 0)
+        full = self._vram_needed(-1)
+        if available >= full:
+            return -1
+        return int(_FULL_OFFLOAD_LAYERS * available / full) if full else 0
+
+    def estimate_params(self, vram_free: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Réglage estimé sans mesure (VRAM, cœurs, RAM)
+
+        Args:
+            vram_free: VRAM libre en octets (défaut : VRAM totale)
+        """
+        base = GPU_PROFILES["balanced" if self.gpu_name else "cpu_fallback"]
+        return {
+            "n_gpu_layers": self.estimate_layers(vram_free),
+            "n_ctx": base["n_ctx"],
+            "n_batch": base["n_batch"],
+            "n_threads": self._physical_cores(),
+            "use_mlock": self.choose_mlock(),
+        }
+
+    def candidate_threads(self) -> List[int]:
+        """Threads CPU à tester autour du nombre de cœurs physiques"""
+        cores = self._physical_cores()
+        return sorted({max(cores // 2, 1), cores, min(cores + 2, os.cpu_count() or cores)})
+
+    def choose_mlock(self) -> bool:
+        """
+        mlock seulement si le modèle tient largement en RAM libre
+
+        mlock ne change pas le débit mesurable en quelques secondes ;
+        il évite le swap, mais peut échouer ou affamer le système si la
+        RAM est juste : décidé d'après la RAM disponible, pas mesuré.
+        """
+        if not PSUTIL_AVAILABLE:
+            return False
+        model_size = os.path.getsize(self.model_path)
+        return psutil.virtual_memory().available > model_size * 1.5
+
+    def calibrate(
+        self,
+        start: Optional[Dict[str, Any]] = None,
+        check_cancel: Optional[Callable[[], None]] = None,
+    ) -> Tuple[Dict[str, Any], float]:
+        """
+        Balayage par coordonnées depuis `start` : threads, puis batch
+
+        Chaque configuration (point de départ compris) est chargée une
+        seule fois ; les couches GPU restent celles de `start`.
+
+        Args:
+            start: Point de départ (défaut : estimate_params())
+            check_cancel: Appelé avant chaque mesure (peut lever une exception)
+
+        Returns:
+            (meilleurs paramètres, tokens/sec correspondants)
+        """
+        started_at = time.time()
+        best = dict(start) if start else self.estimate_params()
+        best_speed = self._try(best, check_cancel)
+        logger.info(f"   départ → {best_speed:.1f} tok/s")
+
+        sweeps = [
+            ("n_threads", self.candidate_threads()),
+            ("n_batch", [128, 256, 512]),
+        ]
+        for name, values in sweeps:
+            for value in values:
+                if value == best[name]:
+                    continue  # Déjà mesuré
+                params = dict(best, **{name: value})
+                speed = self._try(params, check_cancel)
+                logger.info(f"   {name}={value} → {speed:.1f} tok/s")
+                if speed > best_speed:
+                    best, best_speed = params, speed
+
+        if best_speed == 0.0:
+            logger.warning("⚠️ Calibration sans résultat : estimation conservée")
+
+        logger.info(
+            f"✅ Calibration terminée en {time.time() - started_at:.0f}s : "
+            f"layers={best['n_gpu_layers']}, threads={best['n_threads']}, "
+            f"batch={best['n_batch']}, mlock={best['use_mlock']} "
+            f"({best_speed:.1f} tok/s)"
+        )
+        return best, best_speed
+
+    def _try(
+        self, params: Dict[str, Any], check_cancel: Optional[Callable[[], None]]
+    ) -> float:
+        """Mesure une configuration si elle tient dans la VRAM libre (0.0 sinon)"""
+        if check_cancel is not None:
+            check_cancel()
+        if self.vram_free_fn is not None:
+            vram_free = self.vram_free_fn()
+            if vram_free is not None and self._vram_needed(params["n_gpu_layers"]) > vram_free:
+                logger.debug(f"⚠️ Configuration ignorée, VRAM libre insuffisante ({params})")
+                return 0.0
+        return self.measure_fn(params)
+
+    def _measure(self, params: Dict[str, Any]) -> float:
+        """
+        Charge le modèle avec `params` et mesure le débit de génération
+
+        Args:
+            params: Paramètres Llama
+
+        Returns:
+            Tokens/sec (0.0 si échec : VRAM insuffisante, etc.)
+        """
+        if not LLAMA_CPP_AVAILABLE:
+            raise ImportError("llama-cpp-python est requis pour la calibration")
+
+        model = None
+        try:
+            model = Llama(model_path=self.model_path, verbose=False, **params)
+            model(CALIBRATION_PROMPT, max_tokens=4, temperature=0.0)  # Warm-up
+
+            start = time.perf_counter()
+            response = model(CALIBRATION_PROMPT, max_tokens=48, temperature=0.0)
+            duration = time.perf_counter() - start
+
+            tokens = response.get("usage", {}).get("completion_tokens", 0)
+            return tokens / duration if duration > 0 else 0.0
+        except Exception as e:
+            logger.debug(f"⚠️ Configuration rejetée ({params}) : {e}")
+            return 0.0
+        finally:
+            del model
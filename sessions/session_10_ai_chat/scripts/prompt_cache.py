@@ -0,0 +1,139 @@
+"""
+Prompt Cache pour Desktop-Mate (Kira)
+
+Cache LRU des états llama.cpp (KV-cache) par conversation :
+- Clé : conversation ("desktop:desktop_user", "discord:1234...")
+- Valeur : LlamaState (Llama.save_state()) après le dernier tour
+- Budget RAM en octets : les états les moins récemment utilisés sont évincés
+
+llama-cpp-python réutilise déjà le plus long préfixe commun entre le
+contexte courant et le nouveau prompt. Le contexte courant est toutefois
+écrasé dès qu'un autre utilisateur (Discord) ou un résumé d'arrière-plan
+utilise le modèle : restaurer l'état de la conversation avant génération
+permet de ne ré-évaluer que le suffixe nouveau (dernière réponse + question).
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def state_size(state: Any) -> int:
+    """Taille en octets d'un LlamaState (llama_state_size, sinon len des données)"""
+    size = getattr(state, "llama_state_size", None)
+    if size is None:
+        size = len(getattr(state, "llama_state", b""))
+    return int(size)
+
+
+class PromptStateCache:
+    """
+    États de contexte llama.cpp par conversation, avec éviction LRU
+    """
+
+    def __init__(self, capacity_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialise le cache
+
+        Args:
+            capacity_bytes: Budget RAM total des états sauvegardés
+        """
+        self.capacity_bytes = capacity_bytes
+        self._states: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Récupère l'état d'une conversation (le marque comme récent)
+
+        Args:
+            key: Clé de conversation
+
+        Returns:
+            LlamaState ou None
+        """
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                self.misses += 1
+                return None
+            self._states.move_to_end(key)
+            self.hits += 1
+            return state
+
+    def put(self, key: str, state: Any) -> bool:
+        """
+        Sauvegarde l'état d'une conversation
+
+        Args:
+            key: Clé de conversation
+            state: LlamaState
+
+        Returns:
+            False si l'état dépasse à lui seul le budget (non conservé)
+        """
+        size = state_size(state)
+        with self._lock:
+            self._remove(key)
+            if size > self.capacity_bytes:
+                logger.debug(
+                    f"⚠️ État {key} trop volumineux ({size // 1024**2} MB), non conservé"
+                )
+                return False
+
+            self._states[key] = state
+            self._sizes[key] = size
+            self.total_bytes += size
+
+            while self.total_bytes > self.capacity_bytes:
+                evicted, _ = self._states.popitem(last=False)
+                self.total_bytes -= self._sizes.pop(evicted)
+                self.evictions += 1
+                logger.debug(f"🗑️ État évincé du cache KV : {evicted}")
+            return True
+
+    def discard(self, key: str):
+        """Supprime l'état d'une conversation (ex: historique effacé)"""
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str):
+        """Retire une entrée (verrou détenu)"""
+        if key in self._states:
+            del self._states[key]
+            self.total_bytes -= self._sizes.pop(key)
+
+    def clear(self):
+        """Vide le cache (modèle déchargé : états invalides)"""
+        with self._lock:
+            self._states.clear()
+            self._sizes.clear()
+            self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Statistiques du cache
+
+        Returns:
+            Entrées, RAM utilisée, hits/misses, évictions
+        """
+        return {
+            "entries": len(self._states),
+            "used_mb": self.total_bytes / (1024**2),
+            "capacity_mb": self.capacity_bytes / (1024**2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,159 @@
+"""
+Décodage spéculatif pour Desktop-Mate (Kira)
+
+Un petit modèle GGUF (brouillon, ex: TinyLlama / Mistral 160M quantifié)
+propose plusieurs tokens ; le modèle principal les vérifie en une seule
+évaluation et garde le plus long préfixe correct. Sur le profil
+cpu_fallback (2-5 tokens/sec), chaque token accepté économise une passe
+complète du modèle 7B.
+
+S'appuie sur l'extension point `draft_model` de llama-cpp-python
+(LlamaDraftModel) : le brouillon doit partager le vocabulaire du modèle
+principal (même tokenizer), sinon il est désactivé au chargement.
+"""
+
+from typing import Any, Dict, List, Optional
+import logging
+
+try:
+    import numpy as np
+    from llama_cpp import Llama
+    from llama_cpp.llama_speculative import LlamaDraftModel
+    SPECULATIVE_AVAILABLE = True
+except ImportError:
+    SPECULATIVE_AVAILABLE = False
+    np = None
+    Llama = None
+    LlamaDraftModel = object
+
+logger = logging.getLogger(__name__)
+
+
+class DraftStats:
+    """
+    Taux d'acceptation des tokens proposés
+
+    llama.cpp n'expose pas le résultat de la vérification : il est déduit
+    à l'appel suivant, en comparant les tokens réellement ajoutés au
+    contexte avec la proposition précédente.
+    """
+
+    def __init__(self):
+        self.proposed = 0
+        self.accepted = 0
+        self.drafts = 0
+        self._last_len: Optional[int] = None
+        self._last_draft: List[int] = []
+
+    def record(self, input_ids: List[int], draft: List[int]):
+        """
+        Enregistre une proposition (et le résultat de la précédente)
+
+        Args:
+            input_ids: Contexte transmis au brouillon
+            draft: Tokens proposés
+        """
+        if self._last_draft and self._last_len is not None and len(input_ids) > self._last_len:
+            # Nouveaux tokens depuis la proposition précédente
+            new_tokens = input_ids[self._last_len:]
+            for proposed, actual in zip(self._last_draft, new_tokens):
+                if proposed != actual:
+                    break
+                self.accepted += 1
+
+        self.proposed += len(draft)
+        self.drafts += 1
+        self._last_len = len(input_ids)
+        self._last_draft = list(draft)
+
+    def reset_sequence(self):
+        """Nouvelle génération : la proposition en cours n'est plus vérifiable"""
+        self._last_len = None
+        self._last_draft = []
+
+    @property
+    def acceptance_rate(self) -> float:
+        """Part des tokens proposés acceptés par le modèle principal"""
+        return self.accepted / self.proposed if self.proposed else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Propositions, tokens proposés / acceptés, taux d'acceptation"""
+        return {
+            "drafts": self.drafts,
+            "proposed": self.proposed,
+            "accepted": self.accepted,
+            "acceptance_rate": self.acceptance_rate,
+        }
+
+
+class GGUFDraftModel(LlamaDraftModel):
+    """
+    Modèle brouillon GGUF pour Llama(draft_model=...)
+
+    Génère `num_pred_tokens` tokens en greedy (temp=0) : le modèle
+    principal n'accepte que les tokens qu'il aurait lui-même produits.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        num_pred_tokens: int = 8,
+        n_ctx: int = 2048,
+        n_gpu_layers: int = 0,
+        n_threads: int = 4,
+    ):
+        """
+        Charge le modèle brouillon
+
+        Args:
+            model_path: Chemin du GGUF brouillon
+            num_pred_tokens: Tokens proposés par étape
+            n_ctx: Contexte du brouillon (identique au modèle principal)
+            n_gpu_layers: Couches sur GPU (cf. draft_n_gpu_layers du profil)
+            n_threads: Threads CPU
+        """
+        if not SPECULATIVE_AVAILABLE:
+            raise ImportError("llama-cpp-python est requis pour le décodage spéculatif")
+
+        self.model_path = model_path
+        self.num_pred_tokens = num_pred_tokens
+        self.stats = DraftStats()
+        self.model = Llama(
+            model_path=model_path,
+            n_ctx=n_ctx,
+            n_gpu_layers=n_gpu_layers,
+            n_threads=n_threads,
+            verbose=False,
+        )
+
+    def n_vocab(self) -> int:
+        """Taille du vocabulaire (doit égaler celle du modèle principal)"""
+        return self.model.n_vocab()
+
+    def __call__(self, input_ids, /, **kwargs):
+        """
+        Propose les tokens suivants
+
+        Args:
+            input_ids: Contexte du modèle principal (numpy intc)
+
+        Returns:
+            Tokens proposés (numpy intc, éventuellement vide)
+        """
+        tokens = input_ids.tolist()
+        # Contexte trop long pour le brouillon : garder la fin
+        max_input = self.model.n_ctx() - self.num_pred_tokens - 1
+        if len(tokens) > max_input:
+            tokens = tokens[-max_input:]
+
+        draft: List[int] = []
+        # generate() réutilise le plus long préfixe déjà évalué par le brouillon
+        for token in self.model.generate(tokens, top_k=1, temp=0.0):
+            if token == self.model.token_eos():
+                break
+            draft.append(token)
+            if len(draft) >= self.num_pred_tokens:
+                break
+
+        self.stats.record(input_ids.tolist(), draft)
+        return np.array(draft, dtype=np.intc)
@@ -7,6 +7,7 @@ Tests avec mocks pour simuler Discord sans connexion réelle.
 import pytest
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
 import asyncio
+import time
 from datetime import datetime
 
 from src.discord_bot.bot import KiraDiscordBot, get_discord_bot
@@ -67,7 +68,8 @@ def mock_config():
     config.get = Mock(return_value={
         'auto_reply_enabled': True,
         'auto_reply_channels': [123456789],
-        'rate_limit_seconds': 3
+        'rate_limit_seconds': 3,
+        'stream_responses': False
     })
     return config
 
@@ -223,7 +225,7 @@ async def test_on_message_no_reply_in_non_configured_channel(bot, mock_message):
 
 @pytest.mark.asyncio
 async def test_on_message_rate_limiting(bot, mock_message):
-    """Test rate limiting entre messages"""
+    """Test rate limiting : message rapproché différé, pas ignoré"""
     bot.user.mentioned_in = Mock(return_value=True)
     bot.rate_limit_seconds = 10  # 10 secondes
     
@@ -231,10 +233,28 @@ async def test_on_message_rate_limiting(bot, mock_message):
     await bot.on_message(mock_message)
     assert mock_message.channel.send.call_count == 1
     
-    # Deuxième message immédiat → Ignoré (rate limit)
+    # Deuxième message immédiat → Réponse après le délai restant
     mock_message.channel.send.reset_mock()
+    with patch('asyncio.sleep', new_callable=AsyncMock) as sleep:
+        await bot.on_message(mock_message)
+    
+    assert 9 < sleep.call_args.args[0] <= 10
+    assert bot.chat_engine.chat.call_count == 2
+    mock_message.channel.send.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_on_message_rate_limit_notice(bot, mock_message):
+    """Test rate limiting : un message attend déjà → utilisateur prévenu"""
+    bot.user.mentioned_in = Mock(return_value=True)
+    bot.rate_limit_seconds = 10
+    bot.last_response_time[mock_message.author.id] = time.time() + 5  # Créneau réservé
+    
     await bot.on_message(mock_message)
-    mock_message.channel.send.assert_not_called()
+    
+    bot.chat_engine.chat.assert_not_called()
+    assert "Doucement" in mock_message.channel.send.call_args.args[0]
+    assert bot.responses_rate_limited == 1
 
 
 # === Tests Méthodes Privées ===
@@ -263,24 +283,27 @@ def test_should_reply_to_message_no_reason(bot, mock_message):
     assert bot._should_reply_to_message(mock_message) is False
 
 
-def test_check_rate_limit_first_message(bot):
+def test_rate_limit_delay_first_message(bot):
     """Test rate limit pour premier message"""
     user_id = 123
     
-    assert bot._check_rate_limit(user_id) is True
+    assert bot._rate_limit_delay(user_id) == 0.0
     assert user_id in bot.last_response_time
 
 
-def test_check_rate_limit_too_fast(bot):
+def test_rate_limit_delay_too_fast(bot):
     """Test rate limit message trop rapide"""
     user_id = 123
     bot.rate_limit_seconds = 10
     
     # Premier message
-    assert bot._check_rate_limit(user_id) is True
+    assert bot._rate_limit_delay(user_id) == 0.0
     
-    # Deuxième immédiat
-    assert bot._check_rate_limit(user_id) is False
+    # Deuxième immédiat : différé
+    assert 9 < bot._rate_limit_delay(user_id) <= 10
+    
+    # Troisième pendant l'attente du deuxième : refusé
+    assert bot._rate_limit_delay(user_id) is None
 
 
 def test_clean_prompt(bot):
@@ -362,6 +385,70 @@ def test_get_discord_bot_singleton():
         assert bot1 is bot2
 
 
+# === Tests Streaming ===
+
+def make_chat_stream(chunks, response):
+    """Faux ChatEngine.chat_stream : produit les morceaux puis retourne la réponse"""
+    def chat_stream(**kwargs):
+        for chunk in chunks:
+            yield chunk
+        return response
+    return chat_stream
+
+
+@pytest.mark.asyncio
+async def test_stream_response_short_sent_once(bot, mock_message):
+    """Test réponse courte en streaming : un seul envoi, aucune édition"""
+    final = bot.chat_engine.chat.return_value
+    bot.chat_engine.chat_stream = make_chat_stream(["Salut ! ", "Comment ça va ? 😊"], final)
+    bot.stream_edit_interval = 60.0
+    
+    response = await bot._stream_response(
+        prompt="Bonjour",
+        user_id="123",
+        username="TestUser",
+        channel=mock_message.channel
+    )
+    
+    assert response == final.response
+    mock_message.channel.send.assert_called_once_with(final.response)
+    bot.emotion_analyzer.analyze.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_stream_response_edits_message(bot, mock_message):
+    """Test réponse longue : premier envoi partiel puis édition finale"""
+    final = bot.chat_engine.chat.return_value
+    bot.chat_engine.chat_stream = make_chat_stream(["Salut ! ", "Comment ça va ? 😊"], final)
+    bot.stream_edit_interval = 0.0  # Édition à chaque morceau
+    sent_message = Mock()
+    sent_message.edit = AsyncMock()
+    mock_message.channel.send = AsyncMock(return_value=sent_message)
+    
+    await bot._stream_response(
+        prompt="Bonjour",
+        user_id="123",
+        username="TestUser",
+        channel=mock_message.channel
+    )
+    
+    mock_message.channel.send.assert_called_once()
+    assert sent_message.edit.call_args_list[-1].kwargs["content"] == final.response
+
+
+@pytest.mark.asyncio
+async def test_on_message_streaming_enabled(bot, mock_message):
+    """Test on_message utilise chat_stream si le streaming est activé"""
+    bot.user.mentioned_in = Mock(return_value=True)
+    bot.stream_responses = True
+    bot.chat_engine.chat_stream = make_chat_stream(["Salut"], bot.chat_engine.chat.return_value)
+    
+    await bot.on_message(mock_message)
+    
+    mock_message.channel.send.assert_called_once()
+    bot.chat_engine.chat.assert_not_called()
+
+
 # === Tests Erreurs ===
 
 @pytest.mark.asyncio
@@ -0,0 +1,151 @@
+"""
+Tests pour l'ordonnanceur d'inférence (src/ai/inference_scheduler.py)
+
+Tests :
+- Priorités (desktop avant Discord)
+- Équité round-robin entre utilisateurs
+- Backpressure (file globale et par utilisateur)
+- Erreurs, annulation, arrêt
+- Appel bloquant call() (y compris depuis le thread d'inférence)
+"""
+
+import threading
+
+import pytest
+
+from src.ai.inference_scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_DESKTOP,
+    PRIORITY_DISCORD,
+    InferenceScheduler,
+    QueueFullError,
+)
+
+
+@pytest.fixture
+def scheduler():
+    """Ordonnanceur dont le thread d'inférence est bloqué par une première tâche"""
+    scheduler = InferenceScheduler(max_pending=10, max_pending_per_user=3)
+    gate = threading.Event()
+    started = threading.Event()
+
+    def blocker():
+        started.set()
+        gate.wait(5)
+
+    scheduler.submit(blocker, user_id="blocker")
+    started.wait(5)
+    scheduler.gate = gate
+    yield scheduler
+    gate.set()
+    scheduler.shutdown()
+
+
+def run_all(scheduler, futures):
+    """Débloque le thread d'inférence et attend les tâches"""
+    scheduler.gate.set()
+    for future in futures:
+        future.result(timeout=5)
+
+
+# ============================================================================
+# Tests ordonnancement
+# ============================================================================
+
+class TestScheduling:
+    """Tests de l'ordre de service"""
+
+    def test_priority_order(self, scheduler):
+        """Test desktop servi avant Discord, Discord avant arrière-plan"""
+        order = []
+        futures = [
+            scheduler.submit(lambda: order.append("résumé"), "worker", PRIORITY_BACKGROUND),
+            scheduler.submit(lambda: order.append("discord"), "alice", PRIORITY_DISCORD),
+            scheduler.submit(lambda: order.append("desktop"), "desktop_user", PRIORITY_DESKTOP),
+        ]
+
+        run_all(scheduler, futures)
+
+        assert order == ["desktop", "discord", "résumé"]
+
+    def test_round_robin_between_users(self, scheduler):
+        """Test un utilisateur bavard ne passe pas devant les autres"""
+        order = []
+        futures = [
+            scheduler.submit(lambda i=i: order.append(f"alice{i}"), "alice")
+            for i in range(3)
+        ]
+        futures.append(scheduler.submit(lambda: order.append("bob0"), "bob"))
+
+        run_all(scheduler, futures)
+
+        assert order == ["alice0", "bob0", "alice1", "alice2"]
+
+    def test_result_and_exception(self, scheduler):
+        """Test résultat et erreur transmis via le Future"""
+        ok = scheduler.submit(lambda: 42, "alice")
+        ko = scheduler.submit(lambda: 1 / 0, "bob")
+
+        scheduler.gate.set()
+
+        assert ok.result(timeout=5) == 42
+        with pytest.raises(ZeroDivisionError):
+            ko.result(timeout=5)
+        assert scheduler.get_stats()["failed"] == 1
+
+    def test_call_waits_result_and_runs_inline_from_worker(self, scheduler):
+        """Test call() bloquant, exécuté directement depuis le thread d'inférence"""
+        scheduler.gate.set()
+
+        assert scheduler.call(lambda: 7, timeout=5) == 7
+        nested = scheduler.submit(lambda: scheduler.call(lambda: "inline", timeout=1), "alice")
+        assert nested.result(timeout=5) == "inline"
+
+
+# ============================================================================
+# Tests backpressure
+# ============================================================================
+
+class TestBackpressure:
+    """Tests des limites de file"""
+
+    def test_per_user_limit(self, scheduler):
+        """Test limite de requêtes en attente par utilisateur"""
+        for _ in range(3):
+            scheduler.submit(lambda: None, "alice")
+
+        with pytest.raises(QueueFullError):
+            scheduler.submit(lambda: None, "alice")
+
+        scheduler.submit(lambda: None, "bob")  # Les autres restent servis
+        assert scheduler.get_stats()["rejected"] == 1
+
+    def test_global_limit(self, scheduler):
+        """Test limite globale de la file"""
+        for i in range(10):
+            scheduler.submit(lambda: None, f"user{i}")
+
+        with pytest.raises(QueueFullError):
+            scheduler.submit(lambda: None, "desktop_user", PRIORITY_DESKTOP)
+
+    def test_cancelled_job_skipped(self, scheduler):
+        """Test requête annulée avant exécution : non exécutée"""
+        calls = []
+        cancelled = scheduler.submit(lambda: calls.append("annulée"), "alice")
+        assert cancelled.cancel()
+        last = scheduler.submit(lambda: calls.append("ok"), "bob")
+
+        run_all(scheduler, [last])
+
+        assert calls == ["ok"]
+        assert scheduler.pending == 0
+
+    def test_shutdown_cancels_pending(self, scheduler):
+        """Test arrêt : requêtes en attente annulées, nouvelles refusées"""
+        future = scheduler.submit(lambda: None, "alice")
+        scheduler.gate.set()
+        scheduler.shutdown()
+
+        assert future.cancelled() or future.done()
+        with pytest.raises(RuntimeError):
+            scheduler.submit(lambda: None, "alice")
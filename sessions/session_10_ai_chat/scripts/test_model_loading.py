@@ -0,0 +1,154 @@
+"""
+Tests pour le chargement du modèle (src/ai/model_manager.py)
+
+Tests :
+- Progression jusqu'à 1.0 (lecture du fichier, llama.cpp, warm-up)
+- Annulation via cancel_event (lecture, avant llama.cpp)
+- Fallback OOM : chrono conservé, fichier lu une seule fois
+- Warm-up du system prompt et mesures de démarrage à froid
+- Profil "auto" non calibré : estimation au chargement, calibration en arrière-plan
+"""
+
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from src.ai.config import AIConfig
+from src.ai import model_manager as model_manager_module
+from src.ai.model_manager import ModelLoadCancelled
+
+
+@pytest.fixture
+def manager(monkeypatch, tmp_path):
+    """ModelManager avec Llama mocké et faux fichier GGUF"""
+    monkeypatch.setattr(model_manager_module, "LLAMA_CPP_AVAILABLE", True)
+    monkeypatch.setattr(model_manager_module, "PYNVML_AVAILABLE", False)
+    monkeypatch.setattr(model_manager_module, "_PREFETCH_CHUNK", 1024)
+
+    llama = Mock()
+    llama.tokenize.return_value = [1, 2, 3]
+    llama.return_value = {"choices": [{"text": "Salut"}], "usage": {"completion_tokens": 2}}
+    monkeypatch.setattr(model_manager_module, "Llama", Mock(return_value=llama))
+
+    model_file = tmp_path / "model.gguf"
+    model_file.write_bytes(b"GGUF" + b"\x00" * 8192)
+    config = AIConfig(model_path=str(model_file), gpu_profile="cpu_fallback", kv_cache_mb=0)
+    return model_manager_module.ModelManager(config)
+
+
+class TestModelLoading:
+    """Tests du chargement en arrière-plan"""
+
+    def test_progress_reaches_ready(self, manager):
+        """Test progression croissante jusqu'à 1.0, mmap activé"""
+        steps = []
+
+        assert manager.load_model(progress_callback=lambda f, step: steps.append((f, step)))
+
+        fractions = [fraction for fraction, _ in steps]
+        assert fractions == sorted(fractions)
+        assert steps[-1] == (1.0, "Prêt")
+        assert any(step == "Lecture du modèle" for _, step in steps)
+        assert model_manager_module.Llama.call_args.kwargs["use_mmap"] is True
+
+    def test_cancel_during_prefetch(self, manager):
+        """Test annulation pendant la lecture : modèle non chargé"""
+        cancel = threading.Event()
+
+        def on_progress(fraction, step):
+            if step == "Lecture du modèle":
+                cancel.set()
+
+        with pytest.raises(ModelLoadCancelled):
+            manager.load_model(progress_callback=on_progress, cancel_event=cancel)
+
+        assert not manager.is_loaded
+        model_manager_module.Llama.assert_not_called()
+
+    def test_cancel_before_llama(self, manager):
+        """Test annulation à l'initialisation : Llama jamais construit"""
+        cancel = threading.Event()
+
+        def on_progress(fraction, step):
+            if step == "Initialisation llama.cpp":
+                cancel.set()
+
+        with pytest.raises(ModelLoadCancelled):
+            manager.load_model(progress_callback=on_progress, cancel_event=cancel)
+
+        model_manager_module.Llama.assert_not_called()
+
+    def test_forced_profile_first_load_timed(self, manager):
+        """Test premier chargement avec force_profile : chrono démarré"""
+        assert manager.load_model(force_profile="cpu_fallback")
+
+        assert manager.startup_stats["load_s"] is not None
+
+    def test_oom_fallback_reads_file_once(self, manager, monkeypatch):
+        """Test fallback OOM : relance cpu_fallback sans relire le fichier"""
+        opened = []
+        monkeypatch.setattr(
+            model_manager_module, "open",
+            lambda *args, **kwargs: opened.append(args[0]) or open(*args, **kwargs),
+            raising=False,
+        )
+        llama = model_manager_module.Llama.return_value
+        model_manager_module.Llama.side_effect = [RuntimeError("CUDA out of memory"), llama]
+        manager.config.gpu_profile = "balanced"
+
+        assert manager.load_model(warm_cache=False)
+
+        assert manager.config.gpu_profile == "cpu_fallback"
+        assert model_manager_module.Llama.call_count == 2
+        assert len(opened) == 1
+        assert manager.startup_stats["load_s"] is not None
+        assert not manager._oom_retry
+
+    def test_warm_up_evaluates_system_prompt(self, manager):
+        """Test warm-up : system prompt tokenisé puis évalué"""
+        manager.load_model()
+
+        prompt = manager.model.tokenize.call_args.args[0].decode("utf-8")
+        assert prompt.startswith("<|system|>")
+        manager.model.eval.assert_called_once_with([1, 2, 3])
+        assert manager.startup_stats["warmup_s"] is not None
+
+    def test_no_warm_up(self, manager):
+        """Test warm_cache=False : aucune évaluation"""
+        manager.load_model(warm_cache=False)
+
+        manager.model.eval.assert_not_called()
+        assert manager.startup_stats["warmup_s"] is None
+
+    def test_first_reply_recorded_once(self, manager):
+        """Test démarrage à froid → première réponse mesuré une seule fois"""
+        manager.load_model()
+        manager.generate("Bonjour")
+        first = manager.startup_stats["first_reply_s"]
+        manager.generate("Encore")
+
+        startup = manager.get_model_info()["startup"]
+        assert first is not None
+        assert startup["first_reply_s"] == first
+        assert startup["load_s"] <= first
+
+    def test_auto_profile_calibrates_in_background(self, manager, monkeypatch, tmp_path):
+        """Test profil auto sans réglage mémorisé : chargement immédiat, calibration après"""
+        monkeypatch.chdir(tmp_path)
+        tuned = threading.Event()
+        starts = []
+
+        def fake_tune(tuner, start=None, check_cancel=None):
+            starts.append(start)
+            tuned.set()
+
+        monkeypatch.setattr(model_manager_module.ProfileTuner, "tune", fake_tune)
+        manager.config.gpu_profile = "auto"
+
+        assert manager.load_model(warm_cache=False)
+
+        assert tuned.wait(5)
+        assert starts == [manager.active_gpu_params]
+        assert manager.active_gpu_params["n_gpu_layers"] == 0  # Pas de GPU détecté
+        assert model_manager_module.Llama.call_count == 1
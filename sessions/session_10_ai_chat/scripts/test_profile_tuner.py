@@ -0,0 +1,178 @@
+"""
+Tests pour le profil GPU "auto" (src/ai/profile_tuner.py)
+
+Tests :
+- Estimation sans mesure (couches GPU d'après la VRAM libre)
+- Balayage par coordonnées (threads → batch) depuis l'estimation
+- Mémorisation par machine × modèle
+- Recalibration si le modèle ou le matériel change
+- Interruption (check_cancel), configurations hors VRAM ignorées
+"""
+
+import json
+
+import pytest
+
+from src.ai.profile_tuner import ProfileTuner, model_fingerprint
+
+
+class FakeMeasure:
+    """Débit simulé : plus de couches GPU et batch 256 = plus rapide"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, params):
+        self.calls.append(dict(params))
+        return self.speed(params)
+
+    @staticmethod
+    def speed(params):
+        layers = 43 if params["n_gpu_layers"] == -1 else params["n_gpu_layers"]
+        return layers + (5 if params["n_batch"] == 256 else 0) + params["n_threads"] * 0.1
+
+
+@pytest.fixture
+def model_file(tmp_path):
+    """Faux fichier GGUF"""
+    path = tmp_path / "model.gguf"
+    path.write_bytes(b"GGUF" + b"\x00" * 4096)
+    return path
+
+
+@pytest.fixture
+def measure():
+    """Mesure simulée"""
+    return FakeMeasure()
+
+
+def make_tuner(model_file, measure, tmp_path, gpu_name="RTX 4050", **kwargs):
+    """Tuner avec GPU 6 Go et cache dans tmp_path"""
+    return ProfileTuner(
+        str(model_file),
+        gpu_name=gpu_name,
+        vram_total=6 * 1024**3 if gpu_name else None,
+        cache_path=str(tmp_path / "tuned_profiles.json"),
+        measure_fn=measure,
+        **kwargs,
+    )
+
+
+class TestEstimate:
+    """Tests de l'estimation (démarrage, aucune mesure)"""
+
+    def test_get_params_without_cache_does_not_measure(self, model_file, measure, tmp_path):
+        """Test premier lancement : estimation immédiate, rien chargé ni mémorisé"""
+        params = make_tuner(model_file, measure, tmp_path).get_params(vram_free=6 * 1024**3)
+
+        assert params["n_gpu_layers"] == -1
+        assert measure.calls == []
+        assert not (tmp_path / "tuned_profiles.json").exists()
+
+    def test_partial_offload_when_vram_short(self, model_file, measure, tmp_path):
+        """Test VRAM libre insuffisante pour tout le modèle : couches partielles"""
+        tuner = make_tuner(model_file, measure, tmp_path)
+        size = model_file.stat().st_size
+
+        assert tuner.estimate_layers(vram_free=size // 2) == 17
+        assert tuner.estimate_layers(vram_free=0) == 0
+        assert make_tuner(model_file, measure, tmp_path, gpu_name=None).estimate_layers() == 0
+
+
+class TestCalibration:
+    """Tests du balayage"""
+
+    def test_picks_fastest_configuration(self, model_file, measure, tmp_path):
+        """Test meilleur réglage retenu dimension par dimension"""
+        params, speed = make_tuner(model_file, measure, tmp_path).calibrate()
+
+        assert params["n_gpu_layers"] == -1
+        assert params["n_batch"] == 256
+        assert speed == max(measure.speed(p) for p in measure.calls)
+
+    def test_starts_from_estimate_each_config_once(self, model_file, measure, tmp_path):
+        """Test départ mesuré une fois, couches jamais au-delà du départ"""
+        start = dict(n_gpu_layers=20, n_ctx=2048, n_batch=256, n_threads=4, use_mlock=False)
+
+        make_tuner(model_file, measure, tmp_path).calibrate(start)
+
+        assert measure.calls[0] == start
+        assert all(call["n_gpu_layers"] == 20 for call in measure.calls)
+        keys = [tuple(sorted(call.items())) for call in measure.calls]
+        assert len(keys) == len(set(keys))
+
+    def test_skips_configurations_over_free_vram(self, model_file, measure, tmp_path):
+        """Test VRAM occupée (modèle principal chargé) : aucun chargement GPU"""
+        tuner = make_tuner(model_file, measure, tmp_path, vram_free_fn=lambda: 0)
+
+        assert tuner.tune() is None
+        assert measure.calls == []
+        assert not (tmp_path / "tuned_profiles.json").exists()
+
+    def test_cpu_only_machine(self, model_file, measure, tmp_path):
+        """Test sans GPU : aucune couche déportée testée"""
+        params, _ = make_tuner(model_file, measure, tmp_path, gpu_name=None).calibrate()
+
+        assert params["n_gpu_layers"] == 0
+        assert all(call["n_gpu_layers"] == 0 for call in measure.calls)
+
+    def test_all_failures_keep_estimate(self, model_file, tmp_path):
+        """Test aucune configuration valide : estimation conservée, rien mémorisé"""
+        tuner = make_tuner(model_file, lambda params: 0.0, tmp_path)
+
+        params, speed = tuner.calibrate()
+
+        assert params == tuner.estimate_params()
+        assert speed == 0.0
+        assert tuner.tune() is None
+
+    def test_cancel_interrupts_calibration(self, model_file, measure, tmp_path):
+        """Test check_cancel : calibration interrompue, rien de mémorisé"""
+        tuner = make_tuner(model_file, measure, tmp_path)
+
+        def check_cancel():
+            if len(measure.calls) == 2:
+                raise InterruptedError("annulé")
+
+        with pytest.raises(InterruptedError):
+            tuner.tune(check_cancel=check_cancel)
+
+        assert len(measure.calls) == 2
+        assert not (tmp_path / "tuned_profiles.json").exists()
+
+
+class TestPersistence:
+    """Tests de la mémorisation"""
+
+    def test_calibrates_once(self, model_file, measure, tmp_path):
+        """Test second lancement : réglage mémorisé, aucune mesure"""
+        first = make_tuner(model_file, measure, tmp_path).tune()
+        calls = len(measure.calls)
+
+        second = make_tuner(model_file, measure, tmp_path).get_params()
+
+        assert second == first
+        assert len(measure.calls) == calls
+        saved = json.loads((tmp_path / "tuned_profiles.json").read_text(encoding="utf-8"))
+        assert len(saved) == 1
+
+    def test_retunes_on_model_change(self, model_file, measure, tmp_path):
+        """Test autre modèle (empreinte différente) : nouvelle calibration"""
+        make_tuner(model_file, measure, tmp_path).tune()
+        old_fingerprint = model_fingerprint(str(model_file))
+
+        model_file.write_bytes(b"GGUF" + b"\x01" * 8192)
+        tuner = make_tuner(model_file, measure, tmp_path)
+
+        assert model_fingerprint(str(model_file)) != old_fingerprint
+        assert tuner.get_cached() is None
+
+    def test_retunes_on_hardware_change(self, model_file, measure, tmp_path):
+        """Test autre GPU : nouvelle calibration, ancienne entrée conservée"""
+        make_tuner(model_file, measure, tmp_path).tune()
+        other = make_tuner(model_file, measure, tmp_path, gpu_name="RTX 4090")
+
+        assert other.get_cached() is None
+        other.tune()
+        saved = json.loads((tmp_path / "tuned_profiles.json").read_text(encoding="utf-8"))
+        assert len(saved) == 2
@@ -0,0 +1,153 @@
+"""
+Tests pour le cache d'états KV (src/ai/prompt_cache.py)
+
+Tests :
+- PromptStateCache (LRU par budget en octets)
+- Changement de conversation dans ModelManager (sauvegarde / restauration)
+- Génération en streaming (generate_stream)
+"""
+
+import threading
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from src.ai.config import AIConfig
+from src.ai.prompt_cache import PromptStateCache, state_size
+from src.ai import model_manager as model_manager_module
+
+
+def make_state(size: int, n_tokens: int = 10):
+    """État factice au format LlamaState"""
+    return SimpleNamespace(llama_state_size=size, n_tokens=n_tokens)
+
+
+# ============================================================================
+# Tests PromptStateCache
+# ============================================================================
+
+class TestPromptStateCache:
+    """Tests du cache LRU d'états"""
+
+    def test_get_put(self):
+        """Test sauvegarde puis restauration"""
+        cache = PromptStateCache(capacity_bytes=100)
+        state = make_state(40)
+
+        assert cache.get("desktop:user") is None
+        assert cache.put("desktop:user", state)
+        assert cache.get("desktop:user") is state
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_lru_eviction_by_bytes(self):
+        """Test éviction de l'état le moins récemment utilisé"""
+        cache = PromptStateCache(capacity_bytes=100)
+        cache.put("a", make_state(40))
+        cache.put("b", make_state(40))
+        cache.get("a")  # "b" devient le plus ancien
+        cache.put("c", make_state(40))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.total_bytes == 80
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_replace_and_oversized(self):
+        """Test remplacement d'une clé et état trop gros"""
+        cache = PromptStateCache(capacity_bytes=100)
+        cache.put("a", make_state(40))
+        cache.put("a", make_state(60))
+        assert cache.total_bytes == 60
+
+        assert not cache.put("b", make_state(500))
+        assert len(cache) == 1
+
+    def test_state_size_fallback(self):
+        """Test taille déduite des données si llama_state_size absent"""
+        assert state_size(SimpleNamespace(llama_state=b"x" * 12)) == 12
+
+
+# ============================================================================
+# Tests ModelManager (modèle mocké)
+# ============================================================================
+
+class TestModelManagerPromptState:
+    """Tests du changement de conversation dans ModelManager"""
+
+    @pytest.fixture
+    def manager(self, monkeypatch):
+        """ModelManager avec un faux Llama (sans llama-cpp-python)"""
+        monkeypatch.setattr(model_manager_module, "LLAMA_CPP_AVAILABLE", True)
+        manager = model_manager_module.ModelManager(
+            AIConfig(model_path="fake_model.gguf", kv_cache_mb=1)
+        )
+        manager.model = Mock()
+        manager.model.return_value = {"choices": [{"text": "Salut !"}]}
+        manager.model.save_state.side_effect = lambda: make_state(1024)
+        manager.is_loaded = True
+        return manager
+
+    def test_same_conversation_no_copy(self, manager):
+        """Test tours successifs d'un même utilisateur : aucun save/load"""
+        manager.generate("p1", cache_key="desktop:user")
+        manager.generate("p2", cache_key="desktop:user")
+
+        manager.model.save_state.assert_not_called()
+        manager.model.load_state.assert_not_called()
+
+    def test_switch_saves_and_restores(self, manager):
+        """Test alternance de conversations : état sauvegardé puis restauré"""
+        manager.generate("p1", cache_key="discord:alice")
+        manager.generate("p2", cache_key="discord:bob")
+        manager.generate("résumé")  # Prompt ponctuel (MemoryWorker)
+        manager.generate("p3", cache_key="discord:alice")
+
+        assert manager.model.save_state.call_count == 2  # alice, puis bob
+        manager.model.load_state.assert_called_once()
+        assert manager.get_model_info()["prompt_cache"]["entries"] == 2
+
+    def test_unload_clears_states(self, manager):
+        """Test déchargement : états invalidés"""
+        manager.generate("p1", cache_key="discord:alice")
+        manager.generate("p2", cache_key="discord:bob")
+        manager.unload_model()
+
+        assert len(manager.prompt_cache) == 0
+
+    def test_stream_switches_state(self, manager):
+        """Test streaming : même changement d'état KV, espaces de tête retirés"""
+        manager.generate("p1", cache_key="discord:alice")
+        manager.model.return_value = iter(
+            {"choices": [{"text": text}]} for text in [" ", " Sa", "lut", " !"]
+        )
+
+        chunks = list(manager.generate_stream("p2", cache_key="discord:bob"))
+
+        assert chunks == ["Sa", "lut", " !"]
+        assert manager.model.call_args.kwargs["stream"] is True
+        manager.model.save_state.assert_called_once()  # État d'alice sauvegardé
+
+    def test_stream_releases_lock_when_closed(self, manager):
+        """Test flux abandonné : le verrou de génération est libéré"""
+        manager.model.return_value = iter(
+            {"choices": [{"text": text}]} for text in ["a", "b", "c"]
+        )
+
+        stream = manager.generate_stream("p1")
+        assert next(stream) == "a"
+        stream.close()
+
+        # RLock : vérifier depuis un autre thread
+        acquired = []
+        def try_acquire():
+            acquired.append(manager._generate_lock.acquire(blocking=False))
+            if acquired[0]:
+                manager._generate_lock.release()
+        worker = threading.Thread(target=try_acquire)
+        worker.start()
+        worker.join()
+        assert acquired == [True]
@@ -0,0 +1,107 @@
+"""
+Tests pour le décodage spéculatif (src/ai/speculative.py)
+
+Tests :
+- DraftStats (taux d'acceptation déduit des appels successifs)
+- GGUFDraftModel (propositions greedy, arrêt EOS, contexte tronqué)
+- Statistiques dans ModelManager.get_model_info()
+"""
+
+from unittest.mock import Mock
+
+import numpy
+import pytest
+
+from src.ai import speculative
+from src.ai import model_manager as model_manager_module
+from src.ai.config import AIConfig
+from src.ai.speculative import DraftStats, GGUFDraftModel
+
+
+# ============================================================================
+# Tests DraftStats
+# ============================================================================
+
+class TestDraftStats:
+    """Tests du taux d'acceptation"""
+
+    def test_acceptance_from_next_context(self):
+        """Test tokens acceptés = préfixe commun proposition / contexte suivant"""
+        stats = DraftStats()
+        stats.record([1, 2, 3], [4, 5, 6, 7])
+        # Le modèle principal a accepté 4, 5 puis corrigé (9 au lieu de 6)
+        stats.record([1, 2, 3, 4, 5, 9], [10, 11])
+
+        assert stats.accepted == 2
+        assert stats.proposed == 6
+        assert stats.get_stats()["drafts"] == 2
+
+    def test_reset_sequence(self):
+        """Test nouvelle génération : pas de fausse comparaison"""
+        stats = DraftStats()
+        stats.record([1, 2], [3, 4])
+        stats.reset_sequence()
+        stats.record([1, 2, 3, 4], [5])
+
+        assert stats.accepted == 0
+        assert stats.acceptance_rate == 0.0
+
+
+# ============================================================================
+# Tests GGUFDraftModel (Llama mocké)
+# ============================================================================
+
+@pytest.fixture
+def draft(monkeypatch):
+    """Brouillon dont le Llama interne est un Mock"""
+    monkeypatch.setattr(speculative, "SPECULATIVE_AVAILABLE", True)
+    monkeypatch.setattr(speculative, "np", numpy)
+    llama = Mock()
+    llama.n_ctx.return_value = 16
+    llama.token_eos.return_value = 2
+    monkeypatch.setattr(speculative, "Llama", Mock(return_value=llama))
+    return GGUFDraftModel("draft.gguf", num_pred_tokens=3)
+
+
+class TestGGUFDraftModel:
+    """Tests des propositions du brouillon"""
+
+    def test_proposes_num_pred_tokens(self, draft):
+        """Test proposition limitée à num_pred_tokens, en greedy"""
+        draft.model.generate.return_value = iter([7, 8, 9, 10])
+
+        proposed = draft(numpy.array([1, 5, 6], dtype=numpy.intc))
+
+        assert proposed.tolist() == [7, 8, 9]
+        assert proposed.dtype == numpy.intc
+        assert draft.model.generate.call_args.kwargs["temp"] == 0.0
+
+    def test_stops_at_eos_and_truncates_context(self, draft):
+        """Test arrêt à EOS, contexte long tronqué à la fenêtre du brouillon"""
+        draft.model.generate.return_value = iter([7, 2, 8])
+
+        proposed = draft(numpy.arange(40, dtype=numpy.intc))
+
+        assert proposed.tolist() == [7]
+        assert len(draft.model.generate.call_args.args[0]) == 16 - 3 - 1
+
+
+# ============================================================================
+# Tests ModelManager
+# ============================================================================
+
+def test_model_info_reports_throughput(monkeypatch):
+    """Test débit effectif et état du spéculatif dans get_model_info()"""
+    monkeypatch.setattr(model_manager_module, "LLAMA_CPP_AVAILABLE", True)
+    manager = model_manager_module.ModelManager(AIConfig(model_path="fake_model.gguf"))
+    manager.model = Mock(
+        return_value={"choices": [{"text": "Salut"}], "usage": {"completion_tokens": 5}}
+    )
+    manager.is_loaded = True
+
+    manager.generate("Bonjour")
+    info = manager.get_model_info()["speculative"]
+
+    assert info["enabled"] is False
+    assert info["generated_tokens"] == 5
+    assert info["effective_tokens_per_sec"] > 0
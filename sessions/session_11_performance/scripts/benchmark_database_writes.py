@@ -0,0 +1,190 @@
+"""
+Benchmark écritures SQLite - Commits par tour de chat (WorklyDatabase)
+
+Ce script compare, sur une base WAL temporaire :
+1. Mode "avant" : chaque add_* valide sa propre transaction
+2. Mode "après" : un tour de chat = une unité de travail (db.transaction())
+   avec les variantes *_batch (executemany)
+
+Un tour simulé écrit : 2 messages, 3 faits, 2 émotions, 1 embedding,
+2 évolutions de personnalité (≈ ce que fait ChatEngine.chat en mode IA avancée).
+
+Mesures : commits par tour, latence moyenne / p95 par tour, tours/seconde.
+
+Usage:
+    python scripts/benchmark_database_writes.py
+    python scripts/benchmark_database_writes.py --turns 500 --synchronous FULL
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Ajouter le dossier racine au path pour importer les modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.ai.database import WorklyDatabase
+
+
+class DatabaseWriteBenchmark:
+    """Compare écritures unitaires et unités de travail sur WorklyDatabase."""
+
+    def __init__(self, turns: int = 200, synchronous: str = "NORMAL"):
+        """
+        Initialise le benchmark.
+
+        Args:
+            turns: Nombre de tours de chat simulés par mode
+            synchronous: PRAGMA synchronous (NORMAL = défaut Workly, FULL = fsync/commit)
+        """
+        self.turns = turns
+        self.synchronous = synchronous
+        self.rng = np.random.default_rng(0)
+        self.results = {}
+
+        # Seed pour le trait de personnalité (clé étrangère)
+        self.trait_name = "humor"
+
+    def _open_database(self, directory: str) -> WorklyDatabase:
+        """Crée une base temporaire avec le niveau de synchronisation demandé."""
+        db = WorklyDatabase(os.path.join(directory, "workly.db"))
+        db.conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        db.set_personality_trait(self.trait_name, 0.5, "Humour")
+        return db
+
+    def _turn_payload(self, turn: int) -> dict:
+        """Données d'un tour de chat simulé."""
+        timestamp = datetime.utcnow().isoformat()
+        return {
+            "messages": [
+                {"role": "user", "content": f"Question {turn}", "timestamp": timestamp},
+                {"role": "assistant", "content": f"Réponse {turn}", "timestamp": timestamp},
+            ],
+            "facts": [
+                {
+                    "category": "preferences",
+                    "type_": "likes",
+                    "data": {"value": f"sujet {turn}-{i}"},
+                    "timestamp": timestamp,
+                }
+                for i in range(3)
+            ],
+            "emotions": [
+                {
+                    "emotion": "joy",
+                    "intensity": 60.0,
+                    "confidence": 0.8,
+                    "source": source,
+                    "message_preview": f"Message {turn}",
+                    "context": "",
+                    "timestamp": timestamp,
+                }
+                for source in ("user", "assistant")
+            ],
+            "embedding": self.rng.normal(size=384).astype(np.float32),
+            "evolutions": [
+                (self.trait_name, 0.5, 0.52, "Feedback positif"),
+                (self.trait_name, 0.52, 0.53, "Feedback général positif"),
+            ],
+        }
+
+    def _write_turn_unbatched(self, db: WorklyDatabase, payload: dict):
+        """Mode "avant" : un commit par appel."""
+        for msg in payload["messages"]:
+            db.add_conversation(**msg)
+        for fact in payload["facts"]:
+            db.add_fact(**fact)
+        for emotion in payload["emotions"]:
+            db.add_emotion(**emotion)
+        db.add_embedding(None, payload["embedding"], "résumé", payload["messages"][0]["timestamp"])
+        for change in payload["evolutions"]:
+            db.add_personality_evolution(*change)
+
+    def _write_turn_batched(self, db: WorklyDatabase, payload: dict):
+        """Mode "après" : une unité de travail par tour."""
+        with db.transaction():
+            db.add_conversations_batch(payload["messages"])
+            db.add_facts_batch(payload["facts"])
+            db.add_emotions_batch(payload["emotions"])
+            db.add_embedding(
+                None, payload["embedding"], "résumé", payload["messages"][0]["timestamp"]
+            )
+            db.add_personality_evolutions_batch(payload["evolutions"])
+
+    def run_mode(self, name: str, write_turn) -> dict:
+        """
+        Exécute un mode sur une base neuve.
+
+        Returns:
+            Statistiques (commits/tour, latences en ms, tours/s)
+        """
+        with tempfile.TemporaryDirectory(prefix="workly_bench_") as directory:
+            db = self._open_database(directory)
+            commits_before = db.commit_count
+            latencies = []
+
+            start = time.perf_counter()
+            for turn in range(self.turns):
+                payload = self._turn_payload(turn)
+                t0 = time.perf_counter()
+                write_turn(db, payload)
+                latencies.append((time.perf_counter() - t0) * 1000)
+            total = time.perf_counter() - start
+
+            commits = db.commit_count - commits_before
+            db.close()
+
+        latencies.sort()
+        stats = {
+            "commits_per_turn": commits / self.turns,
+            "mean_ms": statistics.mean(latencies),
+            "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+            "turns_per_sec": self.turns / total,
+        }
+        self.results[name] = stats
+        return stats
+
+    def run(self):
+        """Lance les deux modes et affiche la comparaison."""
+        print("=" * 70)
+        print(f"💾 BENCHMARK ÉCRITURES SQLITE (WAL, synchronous={self.synchronous})")
+        print("=" * 70)
+        print(f"Tours simulés par mode : {self.turns}\n")
+
+        for name, write_turn in (
+            ("avant (commit par appel)", self._write_turn_unbatched),
+            ("après (unité de travail)", self._write_turn_batched),
+        ):
+            stats = self.run_mode(name, write_turn)
+            print(f"📊 {name}")
+            print(f"   Commits/tour : {stats['commits_per_turn']:.1f}")
+            print(f"   Latence      : {stats['mean_ms']:.2f} ms (p95 {stats['p95_ms']:.2f} ms)")
+            print(f"   Débit        : {stats['turns_per_sec']:.0f} tours/s\n")
+
+        before, after = self.results.values()
+        print(f"✅ Gain latence : x{before['mean_ms'] / after['mean_ms']:.1f}")
+
+
+def main():
+    """Point d'entrée."""
+    parser = argparse.ArgumentParser(description="Benchmark écritures WorklyDatabase")
+    parser.add_argument("--turns", type=int, default=200, help="Tours de chat simulés")
+    parser.add_argument(
+        "--synchronous",
+        choices=["OFF", "NORMAL", "FULL"],
+        default="NORMAL",
+        help="PRAGMA synchronous",
+    )
+    args = parser.parse_args()
+
+    DatabaseWriteBenchmark(turns=args.turns, synchronous=args.synchronous).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Benchmark recherche des mots-clés émotionnels - EmotionAnalyzer
+
+Compare, sur des messages Discord longs (limite 2000 caractères) et courts :
+1. Mode "avant" : _calculate_intensity par émotion (une recherche par
+   mot-clé, text.lower() à chaque émotion) + recherche des composées
+2. Mode "après" : KeywordMatcher compilé (une table, un seul lower(),
+   mots-clés dédupliqués ; messages courts : écartés si leur premier
+   caractère est absent)
+3. Références "passe unique" : automate Aho–Corasick en Python pur et
+   alternation regex (lookahead) sur tous les mots-clés
+
+Deux appels par tour de chat (message utilisateur + réponse) : le gain
+est mesuré par appel.
+
+Usage:
+    python scripts/benchmark_emotion_matcher.py
+    python scripts/benchmark_emotion_matcher.py --runs 2000
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+from collections import deque
+
+# Ajouter le dossier racine au path pour importer les modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.ai.emotion_analyzer import EmotionAnalyzer
+
+# Messages représentatifs (tronqués à 2000 caractères comme sur Discord)
+SPARSE_MESSAGE = (
+    "Salut tout le monde ! Alors hier soir j'ai enfin fini de configurer le serveur "
+    "pour la guilde, ça m'a pris des heures parce que les permissions des rôles "
+    "étaient complètement cassées après la mise à jour. Du coup je voulais vous "
+    "demander si quelqu'un avait une idée pour le bot de musique qui se déconnecte "
+    "toutes les dix minutes, c'est vraiment pénible en plein raid. Sinon pour ce "
+    "weekend on part sur la sortie prévue samedi à 21h, pensez à confirmer dans le "
+    "salon planning. Merci d'avance 🙂 "
+) * 5
+DENSE_MESSAGE = (
+    "Franchement c'était génial, trop bien, j'étais super content et un peu excité "
+    "🤩 mais le problème de la fin était horrible, j'étais énervé et déçu 😢... "
+    "bon, c'était quand même hilarant mdr 😂 wow incroyable ! "
+) * 14
+SHORT_MESSAGE = "Salut Kira, ça va ? 😊"
+
+MESSAGES = {
+    "long, peu de mots-clés": SPARSE_MESSAGE[:2000],
+    "long, nombreux mots-clés": DENSE_MESSAGE[:2000],
+    "court": SHORT_MESSAGE,
+}
+
+
+class EmotionMatcherBenchmark:
+    """Compare la recherche historique et KeywordMatcher."""
+
+    def __init__(self, runs: int = 500):
+        """
+        Initialise le benchmark.
+
+        Args:
+            runs: Répétitions par message et par mode
+        """
+        self.runs = runs
+        self.analyzer = EmotionAnalyzer(enable_emotion_memory=False)
+        self.keywords = sorted(
+            {kw for table in EmotionAnalyzer.EMOTION_KEYWORDS.values() for kw in table}
+            | {
+                kw
+                for data in EmotionAnalyzer.COMPOUND_EMOTIONS.values()
+                for kw in data["keywords"]
+            },
+            key=len,
+            reverse=True,
+        )
+        self._automaton = self._build_automaton(self.keywords)
+        self._alternation = re.compile(
+            "(?=(" + "|".join(map(re.escape, self.keywords)) + "))"
+        )
+
+    # ========== MODES ==========
+
+    def legacy_scan(self, text: str):
+        """Avant : une recherche par mot-clé et par émotion, puis composées."""
+        for table in EmotionAnalyzer.EMOTION_KEYWORDS.values():
+            self.analyzer._calculate_intensity(text, table)
+        self.analyzer._detect_compound_emotion(text, {})
+
+    def matcher_scan(self, text: str):
+        """Après : table compilée (primaires + composées en un appel)."""
+        EmotionAnalyzer._KEYWORD_MATCHER.scan(text)
+
+    @staticmethod
+    def _build_automaton(keywords):
+        """Automate Aho–Corasick (transitions, liens d'échec, sorties)."""
+        goto, fail, out = [{}], [0], [set()]
+        for keyword in keywords:
+            state = 0
+            for char in keyword:
+                if char not in goto[state]:
+                    goto.append({})
+                    fail.append(0)
+                    out.append(set())
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            out[state].add(keyword)
+
+        queue = deque(goto[0].values())
+        while queue:
+            parent = queue.popleft()
+            for char, state in goto[parent].items():
+                queue.append(state)
+                link = fail[parent]
+                while link and char not in goto[link]:
+                    link = fail[link]
+                target = goto[link].get(char, 0)
+                fail[state] = target if target != state else 0
+                out[state] |= out[fail[state]]
+        return goto, fail, out
+
+    def automaton_scan(self, text: str):
+        """Référence : Aho–Corasick en Python pur (une passe sur le texte)."""
+        goto, fail, out = self._automaton
+        state, found = 0, set()
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+    def regex_scan(self, text: str):
+        """Référence : alternation regex (ne voit pas "ah" dans "ahurissant")."""
+        return {m.group(1) for m in self._alternation.finditer(text.lower())}
+
+    # ========== MESURES ==========
+
+    def measure(self, scan, text: str) -> float:
+        """Temps médian d'un appel (µs)."""
+        timings = []
+        for _ in range(self.runs):
+            t0 = time.perf_counter()
+            scan(text)
+            timings.append((time.perf_counter() - t0) * 1e6)
+        return statistics.median(timings)
+
+    def run(self):
+        """Mesure chaque mode sur chaque message et affiche la comparaison."""
+        print("=" * 70)
+        print("🎭 BENCHMARK MOTS-CLÉS ÉMOTIONNELS (EmotionAnalyzer)")
+        print("=" * 70)
+        print(f"Mots-clés distincts : {len(self.keywords)} | Répétitions : {self.runs}\n")
+
+        modes = (
+            ("avant (par émotion)", self.legacy_scan),
+            ("après (KeywordMatcher)", self.matcher_scan),
+            ("Aho–Corasick (Python)", self.automaton_scan),
+            ("alternation regex", self.regex_scan),
+        )
+        for label, text in MESSAGES.items():
+            print(f"📊 Message {label} ({len(text)} caractères)")
+            results = {name: self.measure(scan, text) for name, scan in modes}
+            for name, micros in results.items():
+                print(f"   {name:<24}: {micros:8.1f} µs")
+            before, after = results["avant (par émotion)"], results["après (KeywordMatcher)"]
+            print(f"   ✅ Gain : x{before / after:.1f}")
+
+            analyze_us = self.measure(self.analyzer.analyze, text)
+            print(f"   analyze() complet       : {analyze_us:8.1f} µs\n")
+
+
+def main():
+    """Point d'entrée."""
+    parser = argparse.ArgumentParser(description="Benchmark mots-clés EmotionAnalyzer")
+    parser.add_argument("--runs", type=int, default=500, help="Répétitions par mesure")
+    args = parser.parse_args()
+
+    import logging
+
+    logging.disable(logging.INFO)  # analyze() journalise chaque appel
+    EmotionMatcherBenchmark(runs=args.runs).run()
+
+
+if __name__ == "__main__":
+    main()
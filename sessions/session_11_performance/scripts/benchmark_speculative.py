@@ -0,0 +1,269 @@
+"""
+Benchmark Décodage Spéculatif
+
+Compare la génération du modèle principal seul et avec un modèle
+brouillon (draft_model_path) :
+- Débit effectif (tokens/sec) par profil GPU
+- Taux d'acceptation des tokens proposés
+- Impact de draft_tokens (4, 8, 12)
+
+Objectif :
+- Mesurer le gain réel sur cpu_fallback (2-5 tokens/sec sans brouillon)
+- Choisir draft_tokens selon le taux d'acceptation observé
+
+Usage :
+    python scripts/benchmark_speculative.py models/tinyllama-1.1b-chat.Q4_K_M.gguf
+"""
+
+import os
+import sys
+import time
+import json
+from typing import List, Dict, Any, Optional
+from dataclasses import dataclass, asdict
+
+# Ajouter src/ au path pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.ai.model_manager import ModelManager
+from src.ai.config import AIConfig
+
+
+# Prompts représentatifs (conversation Kira, format Zephyr)
+TEST_PROMPTS = [
+    "<|system|>\nTu es Kira, un assistant virtuel amical.</s>\n"
+    "<|user|>\nExplique-moi en 2-3 phrases ce qu'est l'apprentissage automatique.</s>\n"
+    "<|assistant|>\n",
+    "<|system|>\nTu es Kira, un assistant virtuel amical.</s>\n"
+    "<|user|>\nDonne-moi trois conseils pour mieux dormir.</s>\n"
+    "<|assistant|>\n",
+    "<|system|>\nTu es Kira, un assistant virtuel amical.</s>\n"
+    "<|user|>\nRaconte-moi une courte histoire sur un chat curieux.</s>\n"
+    "<|assistant|>\n",
+]
+
+
+@dataclass
+class SpeculativeResult:
+    """Résultat d'un benchmark (une configuration)"""
+    gpu_profile: str
+    draft_tokens: Optional[int]  # None = sans brouillon
+    tokens_generated: int
+    duration_sec: float
+    tokens_per_sec: float
+    acceptance_rate: Optional[float]
+
+
+class SpeculativeBenchmark:
+    """
+    Benchmark décodage spéculatif pour Workly (Kira)
+    """
+
+    def __init__(
+        self,
+        draft_model_path: str,
+        model_path: str = "models/zephyr-7b-beta.Q5_K_M.gguf"
+    ):
+        """
+        Initialise le benchmark
+
+        Args:
+            draft_model_path: Modèle brouillon GGUF (même tokenizer)
+            model_path: Modèle principal
+        """
+        self.model_path = model_path
+        self.draft_model_path = draft_model_path
+        self.results: List[SpeculativeResult] = []
+
+        for path in (model_path, draft_model_path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Modèle introuvable : {path}")
+
+        print(f"📊 Benchmark Décodage Spéculatif\n")
+        print(f"Modèle principal : {os.path.basename(model_path)}")
+        print(f"Modèle brouillon : {os.path.basename(draft_model_path)}\n")
+
+    def run_single_benchmark(
+        self,
+        gpu_profile: str,
+        draft_tokens: Optional[int] = None,
+        max_tokens: int = 200
+    ) -> SpeculativeResult:
+        """
+        Génère TEST_PROMPTS avec une configuration
+
+        Args:
+            gpu_profile: Profil GPU
+            draft_tokens: Tokens proposés par étape (None = sans brouillon)
+            max_tokens: Tokens max par réponse
+
+        Returns:
+            SpeculativeResult
+        """
+        label = f"draft_tokens={draft_tokens}" if draft_tokens else "sans brouillon"
+        print(f"🧪 {gpu_profile} / {label}...")
+
+        config = AIConfig(
+            model_path=self.model_path,
+            gpu_profile=gpu_profile,
+            temperature=0.0,  # Déterministe : mêmes sorties avec ou sans brouillon
+            max_tokens=max_tokens,
+            draft_model_path=self.draft_model_path if draft_tokens else "",
+            draft_tokens=draft_tokens or 8
+        )
+
+        manager = ModelManager(config)
+        try:
+            manager.load_model()
+
+            # Warm-up (allocation buffers, hors mesure)
+            manager.generate(TEST_PROMPTS[0], max_tokens=8)
+            manager.generated_tokens = 0
+            manager.generation_time = 0.0
+
+            start = time.time()
+            for prompt in TEST_PROMPTS:
+                manager.generate(prompt, max_tokens=max_tokens)
+            duration = time.time() - start
+
+            stats = manager.get_speculative_stats()
+            if draft_tokens and not stats["enabled"]:
+                print("   ⚠️ Brouillon non chargé (vocabulaire incompatible ?)")
+
+            result = SpeculativeResult(
+                gpu_profile=gpu_profile,
+                draft_tokens=draft_tokens if stats["enabled"] else None,
+                tokens_generated=stats["generated_tokens"],
+                duration_sec=duration,
+                tokens_per_sec=stats["effective_tokens_per_sec"],
+                acceptance_rate=stats.get("acceptance_rate")
+            )
+        finally:
+            if manager.is_loaded:
+                manager.unload_model()
+
+        acceptance = (
+            f", acceptation {result.acceptance_rate * 100:.0f}%"
+            if result.acceptance_rate is not None
+            else ""
+        )
+        print(
+            f"   ✅ {result.tokens_generated} tokens en {duration:.1f}s → "
+            f"{result.tokens_per_sec:.2f} tok/s{acceptance}\n"
+        )
+
+        self.results.append(result)
+        return result
+
+    def run_full_benchmark(
+        self,
+        profiles: List[str],
+        draft_tokens_list: List[int]
+    ):
+        """
+        Exécute la référence puis chaque draft_tokens, pour chaque profil
+
+        Args:
+            profiles: Profils GPU à tester
+            draft_tokens_list: Valeurs de draft_tokens
+        """
+        for profile in profiles:
+            self.run_single_benchmark(profile)
+            for draft_tokens in draft_tokens_list:
+                self.run_single_benchmark(profile, draft_tokens)
+
+    def display_results(self):
+        """Affiche le tableau comparatif (gain vs référence du même profil)"""
+        print("=" * 72)
+        print(f"{'Profil':<14}{'Brouillon':<12}{'tok/s':>10}{'Gain':>10}{'Acceptation':>14}")
+        print("=" * 72)
+
+        for result in self.results:
+            baseline = next(
+                (r for r in self.results
+                 if r.gpu_profile == result.gpu_profile and r.draft_tokens is None),
+                None
+            )
+            gain = (
+                f"x{result.tokens_per_sec / baseline.tokens_per_sec:.2f}"
+                if baseline and baseline.tokens_per_sec > 0
+                else "-"
+            )
+            acceptance = (
+                f"{result.acceptance_rate * 100:.0f}%"
+                if result.acceptance_rate is not None
+                else "-"
+            )
+            draft = str(result.draft_tokens) if result.draft_tokens else "aucun"
+            print(
+                f"{result.gpu_profile:<14}{draft:<12}"
+                f"{result.tokens_per_sec:>10.2f}{gain:>10}{acceptance:>14}"
+            )
+        print()
+
+    def save_results(self, output_file: str = "scripts/benchmark_speculative_results.json"):
+        """
+        Sauvegarde les résultats au format JSON
+
+        Args:
+            output_file: Chemin fichier de sortie
+        """
+        results_dict: Dict[str, Any] = {
+            "benchmark": "speculative_decoding",
+            "model": os.path.basename(self.model_path),
+            "draft_model": os.path.basename(self.draft_model_path),
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "results": [asdict(r) for r in self.results]
+        }
+
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(results_dict, f, indent=4, ensure_ascii=False)
+
+        print(f"💾 Résultats sauvegardés : {output_file}\n")
+
+
+def main():
+    """Point d'entrée du benchmark"""
+    print("🎯 Benchmark Décodage Spéculatif - Workly\n")
+
+    if len(sys.argv) > 1:
+        draft_model_path = sys.argv[1]
+    else:
+        draft_model_path = input("Chemin du modèle brouillon (GGUF) : ").strip()
+
+    print("Profils à tester :")
+    print("1. cpu_fallback (cas cible)")
+    print("2. cpu_fallback + balanced")
+    print("3. Tous les profils")
+
+    choice = input("\nChoix [1]: ").strip() or "1"
+
+    if choice == "2":
+        profiles = ["cpu_fallback", "balanced"]
+    elif choice == "3":
+        profiles = ["cpu_fallback", "balanced", "performance"]
+    else:
+        profiles = ["cpu_fallback"]
+
+    print()
+
+    try:
+        benchmark = SpeculativeBenchmark(draft_model_path)
+        benchmark.run_full_benchmark(profiles=profiles, draft_tokens_list=[4, 8, 12])
+        benchmark.display_results()
+        benchmark.save_results()
+
+        print("✅ Benchmark terminé avec succès !")
+
+    except KeyboardInterrupt:
+        print("\n\n⚠️ Benchmark interrompu par l'utilisateur")
+    except Exception as e:
+        print(f"\n\n❌ Erreur : {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
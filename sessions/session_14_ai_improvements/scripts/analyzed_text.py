@@ -0,0 +1,114 @@
+"""
+analyzed_text.py - Prétraitement d'un message partagé par les analyseurs
+
+Chaque analyseur (EmotionAnalyzer, ContextAnalyzer, FactExtractor,
+ConversationSummarizer, PersonalityEngine) refaisait ses propres passes sur
+le même message : lower(), split(), re.sub par mot... AnalyzedText est
+calculé une fois par message (ChatEngine._prepare_turn) et passé à tous.
+
+- Formes calculées à la construction : texte brut, minuscules, normalisée
+  (minuscules sans espaces de bord)
+- Formes calculées au premier accès puis mémorisées : mots et leurs
+  positions, limites de phrases, forme sans accents
+
+Les analyseurs acceptent indifféremment un str ou un AnalyzedText
+(as_analyzed_text) : les appels existants restent valides.
+
+Author: Workly Team
+"""
+
+import re
+import unicodedata
+from functools import cached_property
+from typing import Tuple, Union
+
+# Mots : suites de caractères non blancs (mêmes mots que str.split())
+_WORD_PATTERN = re.compile(r"\S+")
+
+# Fin de phrase : ponctuation finale suivie d'un blanc ou de la fin du texte
+_SENTENCE_END_PATTERN = re.compile(r"[.!?…]+(?=\s|$)")
+
+
+class AnalyzedText:
+    """
+    Message prétraité une fois, partagé par tous les analyseurs
+
+    Immuable ; les formes paresseuses peuvent être lues depuis plusieurs
+    threads (au pire calculées deux fois, même résultat).
+    """
+
+    def __init__(self, text: str):
+        """
+        Prétraite le message
+
+        Args:
+            text: Message brut
+        """
+        self.raw = text
+        self.lower = text.lower()
+        self.normalized = self.lower.strip()
+
+    @cached_property
+    def word_spans(self) -> Tuple[Tuple[int, int], ...]:
+        """Positions (début, fin) de chaque mot dans raw"""
+        return tuple(match.span() for match in _WORD_PATTERN.finditer(self.raw))
+
+    @cached_property
+    def words(self) -> Tuple[str, ...]:
+        """Mots du texte brut (identiques à raw.split())"""
+        return tuple(self.raw[start:end] for start, end in self.word_spans)
+
+    @cached_property
+    def sentence_spans(self) -> Tuple[Tuple[int, int], ...]:
+        """Positions (début, fin) de chaque phrase dans raw (sans blancs de bord)"""
+        spans = []
+        start = 0
+        for match in _SENTENCE_END_PATTERN.finditer(self.raw):
+            spans.append((start, match.end()))
+            start = match.end()
+        spans.append((start, len(self.raw)))
+
+        trimmed = []
+        for start, end in spans:
+            segment = self.raw[start:end]
+            stripped = segment.strip()
+            if stripped:
+                offset = start + len(segment) - len(segment.lstrip())
+                trimmed.append((offset, offset + len(stripped)))
+        return tuple(trimmed)
+
+    @cached_property
+    def sentences(self) -> Tuple[str, ...]:
+        """Phrases du texte brut"""
+        return tuple(self.raw[start:end] for start, end in self.sentence_spans)
+
+    @cached_property
+    def folded(self) -> str:
+        """Minuscules sans accents ("énervé" → "enerve")"""
+        decomposed = unicodedata.normalize("NFKD", self.lower)
+        return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+    def __str__(self) -> str:
+        return self.raw
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def __repr__(self) -> str:
+        preview = self.raw[:30] + "..." if len(self.raw) > 30 else self.raw
+        return f"<AnalyzedText: {preview!r}>"
+
+
+def as_analyzed_text(text: Union[str, AnalyzedText]) -> AnalyzedText:
+    """
+    AnalyzedText d'un message (réutilisé tel quel s'il est déjà prétraité)
+
+    Args:
+        text: Message brut ou déjà prétraité
+
+    Returns:
+        AnalyzedText du message
+    """
+    if isinstance(text, AnalyzedText):
+        return text
+    return AnalyzedText(text or "")
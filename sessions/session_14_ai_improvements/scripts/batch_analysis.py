@@ -0,0 +1,91 @@
+"""
+batch_analysis.py - Analyse de messages par lots (EmotionAnalyzer, ContextAnalyzer)
+
+Ré-analyser un historique (rattrapage des émotions après migration,
+reconstruction de l'historique émotionnel d'un serveur Discord) appelait
+analyze() message par message. Ici :
+- Messages regroupés par paquets (une tâche = un paquet, pas un message)
+- Partie sans état (recherche de mots-clés) répartie sur un pool de
+  processus optionnel : les tables compilées sont chargées une fois par
+  processus, à l'import du module
+- Résultats rendus en flux et dans l'ordre d'entrée, avec un nombre borné
+  de paquets en vol (mémoire constante, même sur 100k messages)
+
+Note : avec un pool de processus (spawn sous Windows), le script appelant
+doit être protégé par `if __name__ == "__main__":`.
+
+Author: Workly Team
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Tuple
+
+# Paquets en attente par processus (le pool ne reste jamais à vide)
+_CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+
+def iter_chunks(items: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """
+    Découpe un itérable en paquets (le dernier peut être plus court)
+
+    Args:
+        items: Éléments (lus paresseusement)
+        chunk_size: Taille des paquets
+
+    Yields:
+        Listes d'au plus chunk_size éléments
+    """
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, max(1, chunk_size)))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _apply_chunk(fn: Callable, chunk: List[Any]) -> List[Any]:
+    """Applique fn à un paquet (exécuté dans un processus du pool)"""
+    return [fn(item) for item in chunk]
+
+
+def map_chunks(
+    fn: Callable,
+    items: Iterable[Any],
+    workers: int = 0,
+    chunk_size: int = 256,
+) -> Iterator[Tuple[List[Any], List[Any]]]:
+    """
+    Applique fn à chaque élément, paquet par paquet, dans l'ordre d'entrée
+
+    Args:
+        fn: Fonction sans état, importable par nom (pickle) si workers > 1
+        items: Éléments à traiter (lus paresseusement)
+        workers: Processus du pool (0 ou 1 = dans le processus courant)
+        chunk_size: Éléments par paquet
+
+    Yields:
+        (paquet d'éléments, résultats dans le même ordre)
+    """
+    chunks = iter_chunks(items, chunk_size)
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk, _apply_chunk(fn, chunk)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(_apply_chunk, fn, chunk)))
+            if len(pending) >= workers * _CHUNKS_IN_FLIGHT_PER_WORKER:
+                done, future = pending.popleft()
+                yield done, future.result()
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
+    finally:
+        # Consommateur arrêté en cours de route : paquets restants annulés
+        pool.shutdown(wait=True, cancel_futures=True)
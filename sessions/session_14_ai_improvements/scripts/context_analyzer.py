@@ -10,6 +10,7 @@ Architecture:
     - Extraction topics conversation
     - Suggestions actions proactives
     - Intégration avec ChatEngine
+    - Analyse par lots (analyze_batch) avec pool de processus optionnel
 
 Author: Workly Team
 Date: 17 novembre 2025
@@ -17,11 +18,21 @@ Date: 17 novembre 2025
 
 import re
 import logging
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Iterable, Iterator, Union
 from dataclasses import dataclass
 from datetime import datetime
 from collections import Counter
 
+try:
+    from .batch_analysis import map_chunks
+    from .analyzed_text import AnalyzedText, as_analyzed_text
+except ImportError:
+    from batch_analysis import map_chunks
+    from analyzed_text import AnalyzedText, as_analyzed_text
+
+# Ponctuation retirée des mots candidats entités
+_NON_WORD_PATTERN = re.compile(r'[^\w]')
+
 logger = logging.getLogger(__name__)
 
 
@@ -102,18 +113,70 @@ class ContextAnalyzer:
         logger.info("Initialisation ContextAnalyzer")
         self.analysis_history: List[ContextAnalysis] = []
     
-    def analyze(self, text: str, conversation_history: Optional[List[str]] = None) -> ContextAnalysis:
+    def analyze(self, text: Union[str, AnalyzedText],
+                conversation_history: Optional[List[str]] = None) -> ContextAnalysis:
         """
         Analyse complète du contexte d'un message.
         
         Args:
-            text: Texte à analyser
+            text: Texte à analyser (brut ou déjà prétraité)
             conversation_history: Historique conversation (optionnel)
         
         Returns:
             ContextAnalysis avec toutes les informations détectées
         """
-        text_lower = text.lower().strip()
+        analysis = self._analyze_text(text)
+        
+        # Stocker dans historique
+        self._remember(analysis)
+        
+        logger.debug(f"Analyse: intent={analysis.intent}({analysis.intent_confidence:.2f}), "
+                    f"sentiment={analysis.sentiment}({analysis.sentiment_score:.2f}), "
+                    f"topics={analysis.topics}, complexity={analysis.complexity}")
+        
+        return analysis
+    
+    def analyze_batch(self, texts: Iterable[Union[str, AnalyzedText]], workers: int = 0,
+                      chunk_size: int = 256) -> Iterator[ContextAnalysis]:
+        """
+        Analyse une suite de messages (ré-analyse d'un historique).
+        
+        Chaque analyse ne dépend que de son message : avec workers > 1 les
+        paquets sont répartis sur un pool de processus. L'historique des
+        analyses est mis à jour dans l'ordre, comme avec analyze().
+        
+        Args:
+            texts: Messages à analyser (lus paresseusement)
+            workers: Processus du pool (0 = dans le processus courant)
+            chunk_size: Messages par paquet
+        
+        Yields:
+            ContextAnalysis de chaque message, dans l'ordre d'entrée
+        """
+        fn = _analyze_in_worker if workers > 1 else self._analyze_text
+        count = 0
+        
+        for _, analyses in map_chunks(fn, texts, workers=workers, chunk_size=chunk_size):
+            for analysis in analyses:
+                self._remember(analysis)
+            count += len(analyses)
+            yield from analyses
+        
+        logger.info(f"✅ {count} messages analysés par lots "
+                    f"(processus={workers if workers > 1 else 0})")
+    
+    def _analyze_text(self, text: Union[str, AnalyzedText]) -> ContextAnalysis:
+        """
+        Analyse d'un message, sans historique (exécutable dans un processus).
+        
+        Args:
+            text: Texte à analyser (brut ou déjà prétraité)
+        
+        Returns:
+            ContextAnalysis du message
+        """
+        analyzed = as_analyzed_text(text)
+        text_lower = analyzed.normalized
         
         # 1. Détection intention
         intent, intent_confidence = self._detect_intent(text_lower)
@@ -125,17 +188,17 @@ class ContextAnalyzer:
         topics = self._extract_topics(text_lower)
         
         # 4. Extraction entités (noms, lieux, etc.)
-        entities = self._extract_entities(text)
+        entities = self._extract_entities(analyzed)
         
         # 5. Analyse complexité
-        complexity = self._analyze_complexity(text)
+        complexity = self._analyze_complexity(analyzed)
         
         # 6. Suggestions actions proactives
         requires_action, suggested_actions = self._suggest_actions(
             intent, sentiment, topics, text_lower
         )
         
-        analysis = ContextAnalysis(
+        return ContextAnalysis(
             intent=intent,
             intent_confidence=intent_confidence,
             sentiment=sentiment,
@@ -147,17 +210,12 @@ class ContextAnalyzer:
             complexity=complexity,
             timestamp=datetime.now()
         )
-        
-        # Stocker dans historique
+    
+    def _remember(self, analysis: ContextAnalysis) -> None:
+        """Ajoute une analyse à l'historique (100 dernières)."""
         self.analysis_history.append(analysis)
         if len(self.analysis_history) > 100:
             self.analysis_history.pop(0)
-        
-        logger.debug(f"Analyse: intent={intent}({intent_confidence:.2f}), "
-                    f"sentiment={sentiment}({sentiment_score:.2f}), "
-                    f"topics={topics}, complexity={complexity}")
-        
-        return analysis
     
     def _detect_intent(self, text: str) -> Tuple[str, float]:
         """
@@ -244,12 +302,12 @@ class ContextAnalyzer:
         
         return detected_topics
     
-    def _extract_entities(self, text: str) -> List[str]:
+    def _extract_entities(self, text: AnalyzedText) -> List[str]:
         """
         Extrait les entités nommées (noms propres, etc.).
         
         Args:
-            text: Texte original (avec majuscules)
+            text: Texte prétraité (mots avec majuscules)
         
         Returns:
             Liste des entités détectées
@@ -257,30 +315,34 @@ class ContextAnalyzer:
         entities = []
         
         # Pattern : mots commençant par majuscule (hors début phrase)
-        words = text.split()
-        for i, word in enumerate(words):
+        for i, word in enumerate(text.words):
+            # Début de phrase ou mot tout en minuscules : pas d'entité possible
+            if i == 0 or word.islower():
+                continue
+            
             # Nettoyer ponctuation
-            clean_word = re.sub(r'[^\w]', '', word)
+            clean_word = _NON_WORD_PATTERN.sub('', word)
             
             # Si majuscule ET pas début de phrase
-            if clean_word and clean_word[0].isupper() and i > 0:
+            if clean_word and clean_word[0].isupper():
                 entities.append(clean_word)
         
         return entities
     
-    def _analyze_complexity(self, text: str) -> str:
+    def _analyze_complexity(self, text: AnalyzedText) -> str:
         """
         Analyse la complexité du message.
         
         Args:
-            text: Texte original
+            text: Texte prétraité
         
         Returns:
             "simple", "medium", "complex"
         """
         # Critères complexité
-        word_count = len(text.split())
-        sentence_count = text.count('.') + text.count('!') + text.count('?')
+        word_count = len(text.words)
+        raw = text.raw
+        sentence_count = raw.count('.') + raw.count('!') + raw.count('?')
         if sentence_count == 0:
             sentence_count = 1
         
@@ -468,6 +530,20 @@ class ContextAnalyzer:
         return f"<ContextAnalyzer: {len(self.analysis_history)} analyses>"
 
 
+# Analyseur propre à chaque processus du pool (créé au premier paquet)
+_worker_analyzer: Optional[ContextAnalyzer] = None
+
+
+def _analyze_in_worker(text: str) -> ContextAnalysis:
+    """Analyse d'un message dans un processus du pool (analyze_batch)."""
+    global _worker_analyzer
+    
+    if _worker_analyzer is None:
+        _worker_analyzer = ContextAnalyzer()
+    
+    return _worker_analyzer._analyze_text(text)
+
+
 # ============================================================================
 # TEST STANDALONE
 # ============================================================================
@@ -12,9 +12,14 @@ Fonctionnalités :
 """
 
 import re
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Union
 from datetime import datetime
 
+try:
+    from .analyzed_text import AnalyzedText, as_analyzed_text
+except ImportError:
+    from analyzed_text import AnalyzedText, as_analyzed_text
+
 
 class ConversationSummarizer:
     """
@@ -276,12 +281,12 @@ Liste les points clés sous forme de puces (maximum 5 points).</|user|>
         """
         return message_count >= self.auto_summarize_threshold
     
-    def detect_key_points(self, message: str) -> List[str]:
+    def detect_key_points(self, message: Union[str, AnalyzedText]) -> List[str]:
         """
         Détecte si un message contient des points clés
         
         Args:
-            message: Message à analyser
+            message: Message à analyser (brut ou déjà prétraité)
             
         Returns:
             Liste de types de points clés détectés
@@ -295,7 +300,7 @@ Liste les points clés sous forme de puces (maximum 5 points).</|user|>
         }
         
         detected = []
-        message_lower = message.lower()
+        message_lower = as_analyzed_text(message).lower
         
         for key_type, indicators in key_point_indicators.items():
             for indicator in indicators:
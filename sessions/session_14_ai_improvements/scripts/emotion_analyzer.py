@@ -10,13 +10,16 @@ Fonctionnalités :
 - Historique émotionnel par utilisateur
 - Transitions émotionnelles douces
 - Mapping complet vers Blendshapes VRM
+- Mots-clés cherchés en un seul appel (KeywordMatcher compilé au chargement)
+- Analyse par lots (analyze_batch) avec pool de processus optionnel
 """
 
 import logging
-from typing import List, Dict, Optional, Tuple, Any
+from typing import List, Dict, Optional, Tuple, Any, Set, Iterable, Iterator, Union
 from dataclasses import dataclass
 from datetime import datetime
 from collections import deque
+from itertools import repeat
 
 # Import EmotionMemory pour historique persistant
 try:
@@ -24,6 +27,21 @@ try:
 except ImportError:
     from emotion_memory import EmotionMemory
 
+try:
+    from .keyword_matcher import KeywordMatcher
+except ImportError:
+    from keyword_matcher import KeywordMatcher
+
+try:
+    from .batch_analysis import map_chunks
+except ImportError:
+    from batch_analysis import map_chunks
+
+try:
+    from .analyzed_text import AnalyzedText, as_analyzed_text
+except ImportError:
+    from analyzed_text import AnalyzedText, as_analyzed_text
+
 logger = logging.getLogger(__name__)
 
 
@@ -271,6 +289,17 @@ class EmotionAnalyzer:
             "description": "Préoccupation avec incertitude"
         }
     }
+
+    # Table compilée une fois : mots-clés primaires et composés en un seul appel
+    _KEYWORD_MATCHER = KeywordMatcher(
+        {
+            **{("primary", name): table for name, table in EMOTION_KEYWORDS.items()},
+            **{
+                ("compound", name): dict.fromkeys(data["keywords"], 1)
+                for name, data in COMPOUND_EMOTIONS.items()
+            },
+        }
+    )
     
     def __init__(
         self,
@@ -328,18 +357,31 @@ class EmotionAnalyzer:
                 total_weight += weight
                 keywords_found.append(keyword)
 
+        return self._intensity_from_weights(total_weight, len(keywords_found)), keywords_found
+
+    @staticmethod
+    def _intensity_from_weights(total_weight: float, keyword_count: int) -> float:
+        """
+        Intensité 0-100 à partir des mots-clés trouvés
+
+        Args:
+            total_weight: Somme des poids des mots-clés trouvés
+            keyword_count: Nombre de mots-clés trouvés
+
+        Returns:
+            Intensité 0-100
+        """
         # Calcul intensité (normalisation empirique)
         # Poids total typique : 1-10 → Intensité : 0-100
         raw_intensity = min(100, total_weight * 15)  # 15 = facteur de normalisation
 
         # Bonus si plusieurs mots-clés (contexte renforcé)
-        keyword_count = len(keywords_found)
         if keyword_count >= 3:
             raw_intensity = min(100, raw_intensity * 1.2)  # +20%
         elif keyword_count >= 2:
             raw_intensity = min(100, raw_intensity * 1.1)  # +10%
 
-        return raw_intensity, keywords_found
+        return raw_intensity
 
     def _calculate_confidence(
         self, intensity: float, keywords_count: int, context_score: float
@@ -462,7 +504,8 @@ class EmotionAnalyzer:
     def _detect_compound_emotion(
         self,
         text: str,
-        primary_emotions: Dict[str, float]
+        primary_emotions: Dict[str, float],
+        matched_compounds: Optional[Set[str]] = None
     ) -> Optional[Tuple[str, float]]:
         """
         Détecte une émotion composée dans le texte
@@ -470,15 +513,20 @@ class EmotionAnalyzer:
         Args:
             text: Texte à analyser
             primary_emotions: Scores des émotions primaires détectées
+            matched_compounds: Composées dont un mot-clé est présent (déjà
+                cherchés par _KEYWORD_MATCHER ; None = chercher dans text)
             
         Returns:
             (nom_émotion_composée, score) ou None
         """
-        text_lower = text.lower()
+        text_lower = text.lower() if matched_compounds is None else ""
         
         for compound_name, compound_data in self.COMPOUND_EMOTIONS.items():
             # Vérifier keywords spécifiques
-            has_keyword = any(kw in text_lower for kw in compound_data["keywords"])
+            if matched_compounds is None:
+                has_keyword = any(kw in text_lower for kw in compound_data["keywords"])
+            else:
+                has_keyword = compound_name in matched_compounds
             
             if has_keyword:
                 # Calculer score basé sur composantes
@@ -510,7 +558,7 @@ class EmotionAnalyzer:
     
     def analyze(
         self,
-        text: str,
+        text: Union[str, AnalyzedText],
         user_id: str = "desktop_user",
         context: Optional[List[str]] = None,
         source: str = "assistant"
@@ -524,7 +572,8 @@ class EmotionAnalyzer:
         - Analyse contextuelle avancée avec tendances
 
         Args:
-            text: Texte à analyser (réponse du bot ou message utilisateur)
+            text: Texte à analyser (réponse du bot ou message utilisateur),
+                brut ou déjà prétraité (AnalyzedText)
             user_id: ID utilisateur pour historique émotionnel
             context: Contexte conversationnel (optionnel)
             source: 'assistant' ou 'user' (pour EmotionMemory)
@@ -532,32 +581,94 @@ class EmotionAnalyzer:
         Returns:
             EmotionResult avec émotion, intensité, confiance, etc.
         """
-        if not text or not text.strip():
+        analyzed = as_analyzed_text(text)
+
+        if not analyzed.normalized:
             # Texte vide → Neutral
-            result = EmotionResult(
-                emotion="neutral",
-                intensity=0.0,
-                confidence=100.0,
-                keywords_found=[],
-                context_score=100.0,
-                timestamp=datetime.now(),
-            )
+            result = self._neutral_result()
             # Sauvegarder dans mémoire si activée
             if self.emotion_memory:
                 self.emotion_memory.add_emotion(
-                    "neutral", 0.0, 100.0, source, text
+                    "neutral", 0.0, 100.0, source, analyzed.raw
                 )
             return result
 
-        # 1. Analyser chaque émotion primaire et calculer scores
-        emotion_scores = {}
-        emotion_details = {}
+        result = self._resolve_emotion(self._scan_keywords(analyzed), user_id)
 
-        for emotion, keywords_with_weights in self.EMOTION_KEYWORDS.items():
-            intensity, keywords_found = self._calculate_intensity(
-                text, keywords_with_weights
+        # 7. Sauvegarder dans mémoire long terme si activée
+        if self.emotion_memory:
+            self.emotion_memory.add_emotion(
+                result.emotion,
+                result.intensity,
+                result.confidence,
+                source,
+                analyzed.raw,
+                context={"user_id": user_id}
             )
 
+        logger.info(
+            f"🎭 Émotion analysée : {result.emotion} "
+            f"(intensité={result.intensity:.1f}, confiance={result.confidence:.1f})"
+        )
+
+        return result
+
+    @classmethod
+    def _scan_keywords(
+        cls, text: AnalyzedText
+    ) -> Tuple[Dict[str, Tuple[float, List[str]]], Set[str]]:
+        """
+        Partie sans état de l'analyse : mots-clés trouvés et intensités
+
+        Ne dépend que des tables de la classe : exécutable dans un processus
+        du pool d'analyze_batch.
+
+        Args:
+            text: Texte prétraité (non vide)
+
+        Returns:
+            ({émotion primaire: (intensité, mots-clés trouvés)},
+             émotions composées dont un mot-clé est présent)
+        """
+        # Tous les mots-clés (primaires + composés) en un seul appel
+        hits = cls._KEYWORD_MATCHER.scan(text.raw, text.lower)
+
+        primary = {}
+        for emotion in cls.EMOTION_KEYWORDS:
+            found = hits.get(("primary", emotion))
+            if found:
+                primary[emotion] = (
+                    cls._intensity_from_weights(
+                        sum(weight for _, weight in found), len(found)
+                    ),
+                    [keyword for keyword, _ in found],
+                )
+
+        matched_compounds = {name for kind, name in hits if kind == "compound"}
+        return primary, matched_compounds
+
+    def _resolve_emotion(
+        self,
+        scan: Tuple[Dict[str, Tuple[float, List[str]]], Set[str]],
+        user_id: str
+    ) -> EmotionResult:
+        """
+        Partie avec état de l'analyse : contexte, lissage, historique
+
+        Args:
+            scan: Résultat de _scan_keywords
+            user_id: ID utilisateur pour historique émotionnel
+
+        Returns:
+            EmotionResult (déjà ajouté à l'historique court terme)
+        """
+        primary, matched_compounds = scan
+
+        # 1. Scores des émotions primaires trouvées
+        emotion_scores = {}
+        emotion_details = {}
+
+        for emotion, (intensity, keywords_found) in primary.items():
             if intensity > 0:
                 context_score = self._calculate_context_score(emotion, user_id)
                 confidence = self._calculate_confidence(
@@ -575,8 +686,10 @@ class EmotionAnalyzer:
                     "context_score": context_score,
                 }
         
-        # 2. Vérifier émotions composées
-        compound_result = self._detect_compound_emotion(text, emotion_scores)
+        # 2. Vérifier émotions composées (mots-clés déjà cherchés : texte inutile)
+        compound_result = self._detect_compound_emotion(
+            "", emotion_scores, matched_compounds
+        )
         
         if compound_result:
             compound_name, compound_score = compound_result
@@ -628,24 +741,91 @@ class EmotionAnalyzer:
 
         # 6. Sauvegarder dans historique court terme
         self._save_to_history(user_id, result)
-        
-        # 7. Sauvegarder dans mémoire long terme si activée
-        if self.emotion_memory:
-            self.emotion_memory.add_emotion(
-                result.emotion,
-                result.intensity,
-                result.confidence,
-                source,
-                text,
-                context={"user_id": user_id}
-            )
+
+        return result
+
+    def analyze_batch(
+        self,
+        texts: Iterable[Union[str, AnalyzedText]],
+        user_ids: Optional[Iterable[str]] = None,
+        source: str = "assistant",
+        workers: int = 0,
+        chunk_size: int = 256
+    ) -> Iterator[EmotionResult]:
+        """
+        Analyse une suite de messages (rattrapage, reconstruction d'historique)
+
+        Résultats identiques à analyze() appelé message par message dans le
+        même ordre (lissage et score contextuel par utilisateur compris) :
+        seule la recherche de mots-clés est répartie sur le pool, le reste
+        est appliqué ici dans l'ordre. Mémoire émotionnelle écrite une fois
+        par paquet.
+
+        Args:
+            texts: Messages à analyser (lus paresseusement)
+            user_ids: ID utilisateur de chaque message (None = "desktop_user")
+            source: 'assistant' ou 'user' (pour EmotionMemory)
+            workers: Processus pour la recherche de mots-clés (0 = aucun)
+            chunk_size: Messages par paquet
+
+        Yields:
+            EmotionResult de chaque message, dans l'ordre d'entrée
+        """
+        users = iter(user_ids) if user_ids is not None else repeat("desktop_user")
+        count = 0
+
+        for chunk, scans in map_chunks(
+            self._scan_text, texts, workers=workers, chunk_size=chunk_size
+        ):
+            results = []
+            records = []
+            for text, scan, user_id in zip(chunk, scans, users):
+                if scan is None:
+                    result = self._neutral_result()
+                else:
+                    result = self._resolve_emotion(scan, user_id)
+                results.append(result)
+                records.append({
+                    "emotion": result.emotion,
+                    "intensity": result.intensity,
+                    "confidence": result.confidence,
+                    "source": source,
+                    "message": str(text),
+                    "context": {"user_id": user_id} if scan is not None else None,
+                })
+
+            if self.emotion_memory:
+                self.emotion_memory.add_emotions(records)
+
+            count += len(results)
+            yield from results
 
         logger.info(
-            f"🎭 Émotion analysée : {result.emotion} "
-            f"(intensité={result.intensity:.1f}, confiance={result.confidence:.1f})"
+            f"✅ {count} messages analysés par lots "
+            f"(processus={workers if workers > 1 else 0})"
         )
 
-        return result
+    @classmethod
+    def _scan_text(
+        cls, text: Union[str, AnalyzedText]
+    ) -> Optional[Tuple[Dict[str, Tuple[float, List[str]]], Set[str]]]:
+        """_scan_keywords pour analyze_batch (None = texte vide → neutral)"""
+        analyzed = as_analyzed_text(text)
+        if not analyzed.normalized:
+            return None
+        return cls._scan_keywords(analyzed)
+
+    @staticmethod
+    def _neutral_result() -> EmotionResult:
+        """Résultat d'un texte vide (hors lissage et historique)"""
+        return EmotionResult(
+            emotion="neutral",
+            intensity=0.0,
+            confidence=100.0,
+            keywords_found=[],
+            context_score=100.0,
+            timestamp=datetime.now(),
+        )
 
     def _save_to_history(self, user_id: str, result: EmotionResult):
         """
@@ -154,6 +154,32 @@ class EmotionMemory:
         # Sauvegarder
         self._save_history()
     
+    def add_emotions(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Ajoute plusieurs émotions avec une seule sauvegarde (analyse par lots)
+        
+        Args:
+            records: Dicts avec les arguments de add_emotion (emotion,
+                intensity, confidence, source, message, context)
+        
+        Returns:
+            Nombre d'émotions ajoutées
+        """
+        for record in records:
+            message = record["message"]
+            self.history.append(EmotionEntry(
+                emotion=record["emotion"],
+                intensity=record["intensity"],
+                confidence=record["confidence"],
+                source=record["source"],
+                message_preview=message[:100] + "..." if len(message) > 100 else message,
+                timestamp=datetime.utcnow().isoformat(),
+                context=record.get("context") or {}
+            ))
+        
+        self._save_history()
+        return len(records)
+    
     def get_recent_emotions(
         self,
         count: int = 10,
@@ -8,14 +8,124 @@ Ce module analyse les messages de conversation pour extraire des informations st
 - Relations (entre personnes, concepts)
 
 Utilise des patterns regex et des mots-clés pour l'extraction.
+
+Chemin critique (MemoryManager.add_message, chaque message utilisateur) :
+- Patterns regex compilés une fois, au niveau du module
+- Mots déclencheurs cherchés avant les regex, groupe par groupe et à la
+  demande (TriggerHits) : une catégorie sans déclencheur est écartée sans
+  analyse
+- Durée de chaque catégorie mesurée (get_stats)
 """
 
 import re
-from typing import List, Dict, Optional, Set
-from dataclasses import dataclass, asdict
+import time
+from collections import defaultdict
+from typing import List, Dict, Optional, Set, Tuple, Union, Any
+from dataclasses import dataclass
 from datetime import datetime
 import json
 
+try:
+    from .analyzed_text import AnalyzedText, as_analyzed_text
+except ImportError:
+    from analyzed_text import AnalyzedText, as_analyzed_text
+
+
+# ========== BANQUE DE PATTERNS (compilés une fois) ==========
+
+# Patterns regex pour extraction d'entités
+ENTITY_PATTERNS = {
+    'person': r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b',  # Noms propres
+    'location': r'\b(?:à|en|dans|vers)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\b',
+    'date': r'\b(?:\d{1,2}[-/]\d{1,2}[-/]\d{2,4}|lundi|mardi|mercredi|jeudi|vendredi|samedi|dimanche|hier|aujourd\'hui|demain|la semaine prochaine|le mois prochain)\b',
+    'organization': r'\b(?:chez|pour)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\b',
+}
+
+_ENTITY_REGEXES = {
+    entity_type: re.compile(pattern, re.IGNORECASE)
+    for entity_type, pattern in ENTITY_PATTERNS.items()
+}
+# Participants et lieu d'un événement : sensibles à la casse
+_PERSON_REGEX = re.compile(ENTITY_PATTERNS['person'])
+_LOCATION_REGEX = re.compile(ENTITY_PATTERNS['location'])
+_DATE_REGEX = _ENTITY_REGEXES['date']
+
+# Mots autour d'un mot-clé de relation
+_LAST_WORD_REGEX = re.compile(r'\b(\w+)\s*$')
+_FIRST_WORD_REGEX = re.compile(r'^\s*(\w+)')
+
+# Déclencheurs des entités : sous-chaîne présente dans tout texte en
+# minuscules où le pattern peut trouver une correspondance ('person' n'en a
+# pas : avec IGNORECASE, tout mot peut correspondre)
+ENTITY_TRIGGERS = {
+    'location': ['à', 'en', 'dans', 'vers'],
+    'date': ['-', '/', 'lundi', 'mardi', 'mercredi', 'jeudi', 'vendredi', 'samedi',
+             'dimanche', 'hier', 'aujourd\'hui', 'demain', 'la semaine prochaine',
+             'le mois prochain'],
+    'organization': ['chez', 'pour'],
+}
+
+# Catégories mesurées, dans l'ordre d'extract_all_facts
+FACT_CATEGORIES = ('entities', 'preferences', 'events', 'relationships')
+
+
+class TriggerHits:
+    """
+    Mots déclencheurs présents dans un message, par groupe
+    
+    Chaque groupe (catégorie, sous-type) n'est cherché qu'au premier accès,
+    puis mémorisé : extract_all_facts partage les recherches entre
+    catégories, un appel isolé (extract_preferences...) ne cherche que ses
+    groupes et s'arrête au premier mot trouvé quand la présence suffit.
+    """
+    
+    __slots__ = ('_tables', '_text_lower', '_present', '_found')
+    
+    def __init__(self, tables: Dict[Tuple[str, str], Tuple[str, ...]], text_lower: str):
+        """
+        Args:
+            tables: (catégorie, sous-type) → mots déclencheurs
+            text_lower: Message en minuscules
+        """
+        self._tables = tables
+        self._text_lower = text_lower
+        self._present: Dict[Tuple[str, str], bool] = {}
+        self._found: Dict[Tuple[str, str], List[str]] = {}
+    
+    def has(self, group: Tuple[str, str]) -> bool:
+        """Au moins un déclencheur du groupe est présent"""
+        present = self._present.get(group)
+        if present is not None:
+            return present
+        text_lower = self._text_lower
+        present = False
+        for keyword in self._tables[group]:
+            if keyword in text_lower:
+                present = True
+                break
+        self._present[group] = present
+        return present
+    
+    def has_any(self, groups: Tuple[Tuple[str, str], ...]) -> bool:
+        """Au moins un déclencheur présent dans l'un des groupes"""
+        for group in groups:
+            if self.has(group):
+                return True
+        return False
+    
+    def found(self, group: Tuple[str, str]) -> List[str]:
+        """Déclencheurs du groupe présents, dans l'ordre de la table"""
+        found = self._found.get(group)
+        if found is not None:
+            return found
+        if self._present.get(group) is False:
+            found = []
+        else:
+            text_lower = self._text_lower
+            found = [keyword for keyword in self._tables[group] if keyword in text_lower]
+        self._found[group] = found
+        return found
+
 
 @dataclass
 class Entity:
@@ -28,8 +138,8 @@ class Entity:
     occurrences: int = 1
     
     def to_dict(self) -> Dict:
-        """Convertit en dictionnaire pour JSON"""
-        return asdict(self)
+        """Convertit en dictionnaire pour JSON (champs simples : copie plate)"""
+        return dict(self.__dict__)
 
 
 @dataclass
@@ -43,8 +153,8 @@ class Preference:
     timestamp: str  # ISO timestamp
     
     def to_dict(self) -> Dict:
-        """Convertit en dictionnaire pour JSON"""
-        return asdict(self)
+        """Convertit en dictionnaire pour JSON (champs simples : copie plate)"""
+        return dict(self.__dict__)
 
 
 @dataclass
@@ -60,8 +170,10 @@ class Event:
     timestamp: str  # ISO timestamp
     
     def to_dict(self) -> Dict:
-        """Convertit en dictionnaire pour JSON"""
-        return asdict(self)
+        """Convertit en dictionnaire pour JSON (liste des participants copiée)"""
+        data = dict(self.__dict__)
+        data['participants'] = list(self.participants)
+        return data
 
 
 @dataclass
@@ -75,8 +187,8 @@ class Relationship:
     timestamp: str
     
     def to_dict(self) -> Dict:
-        """Convertit en dictionnaire pour JSON"""
-        return asdict(self)
+        """Convertit en dictionnaire pour JSON (champs simples : copie plate)"""
+        return dict(self.__dict__)
 
 
 class FactExtractor:
@@ -89,13 +201,8 @@ class FactExtractor:
     
     def __init__(self):
         """Initialise l'extracteur avec patterns et mots-clés"""
-        # Patterns regex pour extraction d'entités
-        self.patterns = {
-            'person': r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b',  # Noms propres
-            'location': r'\b(?:à|en|dans|vers)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\b',
-            'date': r'\b(?:\d{1,2}[-/]\d{1,2}[-/]\d{2,4}|lundi|mardi|mercredi|jeudi|vendredi|samedi|dimanche|hier|aujourd\'hui|demain|la semaine prochaine|le mois prochain)\b',
-            'organization': r'\b(?:chez|pour)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\b',
-        }
+        # Patterns regex pour extraction d'entités (compilés : ENTITY_PATTERNS)
+        self.patterns = dict(ENTITY_PATTERNS)
         
         # Mots-clés pour détection de préférences
         self.preference_keywords = {
@@ -144,24 +251,68 @@ class FactExtractor:
             'owns': ['a un', 'a une', 'possède', 'propriétaire de'],
             'works_at': ['travaille à', 'travaille chez', 'employé de', 'chez']
         }
+        
+        # Déclencheurs de toutes les catégories : (catégorie, sous-type) → mots
+        self._trigger_tables: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+        for entity_type, triggers in ENTITY_TRIGGERS.items():
+            self._trigger_tables[('entity', entity_type)] = tuple(triggers)
+        for sentiment, keywords in self.preference_keywords.items():
+            self._trigger_tables[('preference', sentiment)] = tuple(keywords)
+        for cat_name, keywords in self.preference_categories.items():
+            self._trigger_tables[('preference_category', cat_name)] = tuple(keywords)
+        for evt_type, keywords in self.event_keywords.items():
+            self._trigger_tables[('event', evt_type)] = tuple(keywords)
+        for rel_type, keywords in self.relationship_keywords.items():
+            self._trigger_tables[('relationship', rel_type)] = tuple(keywords)
+        
+        # extract_all_facts : catégorie → (extraction, groupes dont un
+        # déclencheur est requis ; entités : aucun, 'person' correspond à tout mot)
+        self._extractors = (
+            ('entities', self._extract_entities, None),
+            ('preferences', self._extract_preferences,
+             tuple(('preference', sentiment) for sentiment in self.preference_keywords)),
+            ('events', self._extract_events,
+             tuple(('event', evt_type) for evt_type in self.event_keywords)),
+            ('relationships', self._extract_relationships,
+             tuple(('relationship', rel_type) for rel_type in self.relationship_keywords)),
+        )
+        
+        # Statistiques par catégorie (extract_all_facts)
+        self.messages_processed = 0
+        self.last_timings: Dict[str, float] = {}
+        self._totals: Dict[str, float] = defaultdict(float)
+        self._skipped: Dict[str, int] = defaultdict(int)
+    
+    def _triggers(self, text: AnalyzedText) -> TriggerHits:
+        """Déclencheurs du message (cherchés à la demande)"""
+        return TriggerHits(self._trigger_tables, text.lower)
     
-    def extract_entities(self, message: str) -> List[Entity]:
+    def extract_entities(self, message: Union[str, AnalyzedText]) -> List[Entity]:
         """
         Extrait les entités (noms, lieux, dates, organisations)
         
         Args:
-            message: Message à analyser
+            message: Message à analyser (brut ou déjà prétraité)
             
         Returns:
             Liste d'entités extraites avec contexte
         """
+        text = as_analyzed_text(message)
+        return self._extract_entities(text, self._triggers(text))
+    
+    def _extract_entities(self, text: AnalyzedText, hits: TriggerHits) -> List[Entity]:
+        """extract_entities avec déclencheurs déjà cherchés"""
+        message = text.raw
         entities = []
         timestamp = datetime.utcnow().isoformat()
         
         # Extraction pour chaque type d'entité
-        for entity_type, pattern in self.patterns.items():
-            matches = re.finditer(pattern, message, re.IGNORECASE)
-            for match in matches:
+        for entity_type, regex in _ENTITY_REGEXES.items():
+            # Pattern impossible sans son déclencheur
+            if entity_type in ENTITY_TRIGGERS and not hits.has(('entity', entity_type)):
+                continue
+            
+            for match in regex.finditer(message):
                 value = match.group(1) if match.lastindex else match.group(0)
                 value = value.strip()
                 
@@ -170,7 +321,7 @@ class FactExtractor:
                     continue
                 
                 # Calculer confiance basée sur contexte
-                confidence = self._calculate_entity_confidence(entity_type, value, message)
+                confidence = self._calculate_entity_confidence(entity_type, value, text.lower)
                 
                 entity = Entity(
                     entity_type=entity_type,
@@ -184,194 +335,221 @@ class FactExtractor:
         
         return entities
     
-    def extract_preferences(self, message: str) -> List[Preference]:
+    def extract_preferences(self, message: Union[str, AnalyzedText]) -> List[Preference]:
         """
         Extrait les préférences (aime/n'aime pas)
         
         Args:
-            message: Message à analyser
+            message: Message à analyser (brut ou déjà prétraité)
             
         Returns:
             Liste de préférences extraites
         """
-        preferences = []
-        timestamp = datetime.utcnow().isoformat()
-        message_lower = message.lower()
+        text = as_analyzed_text(message)
+        return self._extract_preferences(text, self._triggers(text))
+    
+    def _extract_preferences(self, text: AnalyzedText, hits: TriggerHits) -> List[Preference]:
+        """extract_preferences avec déclencheurs déjà cherchés"""
+        message_lower = text.lower
         
-        # Détecter sentiment
+        # Détecter sentiment (négatif prioritaire)
         sentiment = 'neutral'
         intensity = 0.5
         
-        for keyword in self.preference_keywords['positive']:
-            if keyword in message_lower:
-                sentiment = 'positive'
-                intensity = 0.7 if 'adore' in message_lower or 'raffole' in message_lower else 0.6
-                break
+        if hits.has(('preference', 'positive')):
+            sentiment = 'positive'
+            intensity = 0.7 if 'adore' in message_lower or 'raffole' in message_lower else 0.6
         
-        for keyword in self.preference_keywords['negative']:
-            if keyword in message_lower:
-                sentiment = 'negative'
-                intensity = 0.7 if 'déteste' in message_lower or 'horreur' in message_lower else 0.6
-                break
+        if hits.has(('preference', 'negative')):
+            sentiment = 'negative'
+            intensity = 0.7 if 'déteste' in message_lower or 'horreur' in message_lower else 0.6
         
         # Si aucun sentiment détecté, pas de préférence
         if sentiment == 'neutral':
             return []
         
-        # Identifier catégorie et sujet
-        category = 'general'
-        subject = None
-        
-        for cat_name, keywords in self.preference_categories.items():
-            for keyword in keywords:
-                if keyword in message_lower:
-                    category = cat_name
-                    subject = keyword
-                    break
-            if subject:
-                break
-        
-        # Si sujet trouvé, créer préférence
-        if subject:
-            preference = Preference(
-                category=category,
-                subject=subject,
-                sentiment=sentiment,
-                intensity=intensity,
-                context=message,
-                timestamp=timestamp
-            )
-            preferences.append(preference)
-        
-        return preferences
+        # Identifier catégorie et sujet (premier mot-clé de la première catégorie)
+        for cat_name in self.preference_categories:
+            if hits.has(('preference_category', cat_name)):
+                return [Preference(
+                    category=cat_name,
+                    subject=hits.found(('preference_category', cat_name))[0],
+                    sentiment=sentiment,
+                    intensity=intensity,
+                    context=text.raw,
+                    timestamp=datetime.utcnow().isoformat()
+                )]
+        
+        return []
     
-    def extract_events(self, message: str) -> List[Event]:
+    def extract_events(self, message: Union[str, AnalyzedText]) -> List[Event]:
         """
         Extrait les événements (actions passées, projets, objectifs)
         
         Args:
-            message: Message à analyser
+            message: Message à analyser (brut ou déjà prétraité)
             
         Returns:
             Liste d'événements extraits
         """
-        events = []
-        timestamp = datetime.utcnow().isoformat()
-        message_lower = message.lower()
+        text = as_analyzed_text(message)
+        return self._extract_events(text, self._triggers(text))
+    
+    def _extract_events(self, text: AnalyzedText, hits: TriggerHits) -> List[Event]:
+        """extract_events avec déclencheurs déjà cherchés"""
+        message = text.raw
+        
+        # Détecter type d'événement (premier type dont un mot-clé est présent)
+        event_type = next(
+            (evt_type for evt_type in self.event_keywords if hits.has(('event', evt_type))),
+            None
+        )
+        if event_type is None:
+            return []
         
-        # Détecter type d'événement
-        event_type = None
-        status = 'ongoing'
+        status = {'past_action': 'completed', 'future_goal': 'planned'}.get(event_type, 'ongoing')
         
-        for evt_type, keywords in self.event_keywords.items():
-            for keyword in keywords:
-                if keyword in message_lower:
-                    event_type = evt_type
-                    if evt_type == 'past_action':
-                        status = 'completed'
-                    elif evt_type == 'future_goal':
-                        status = 'planned'
-                    break
-            if event_type:
-                break
+        # Extraire participants (noms propres)
+        participants = [match.group(0) for match in _PERSON_REGEX.finditer(message)]
         
-        # Si type détecté, créer événement
-        if event_type:
-            # Extraire participants (noms propres)
-            participants = []
-            person_matches = re.finditer(self.patterns['person'], message)
-            for match in person_matches:
-                participants.append(match.group(0))
-            
-            # Extraire lieu si présent
-            location = None
-            location_match = re.search(self.patterns['location'], message)
+        # Extraire lieu si présent
+        location = None
+        if hits.has(('entity', 'location')):
+            location_match = _LOCATION_REGEX.search(message)
             if location_match:
                 location = location_match.group(1)
-            
-            # Extraire référence temporelle
-            time_reference = None
-            date_match = re.search(self.patterns['date'], message, re.IGNORECASE)
+        
+        # Extraire référence temporelle
+        time_reference = None
+        if hits.has(('entity', 'date')):
+            date_match = _DATE_REGEX.search(message)
             if date_match:
                 time_reference = date_match.group(0)
-            
-            event = Event(
-                event_type=event_type,
-                description=message[:100] + '...' if len(message) > 100 else message,
-                participants=participants,
-                location=location,
-                time_reference=time_reference,
-                status=status,
-                context=message,
-                timestamp=timestamp
-            )
-            events.append(event)
-        
-        return events
+        
+        return [Event(
+            event_type=event_type,
+            description=message[:100] + '...' if len(message) > 100 else message,
+            participants=participants,
+            location=location,
+            time_reference=time_reference,
+            status=status,
+            context=message,
+            timestamp=datetime.utcnow().isoformat()
+        )]
     
-    def extract_relationships(self, message: str) -> List[Relationship]:
+    def extract_relationships(self, message: Union[str, AnalyzedText]) -> List[Relationship]:
         """
         Extrait les relations entre entités
         
         Args:
-            message: Message à analyser
+            message: Message à analyser (brut ou déjà prétraité)
             
         Returns:
             Liste de relations extraites
         """
+        text = as_analyzed_text(message)
+        return self._extract_relationships(text, self._triggers(text))
+    
+    def _extract_relationships(self, text: AnalyzedText, hits: TriggerHits) -> List[Relationship]:
+        """extract_relationships avec déclencheurs déjà cherchés"""
+        message = text.raw
         relationships = []
         timestamp = datetime.utcnow().isoformat()
-        message_lower = message.lower()
         
-        # Détecter type de relation
-        for rel_type, keywords in self.relationship_keywords.items():
-            for keyword in keywords:
-                if keyword in message_lower:
-                    # Trouver sujet et objet autour du mot-clé
-                    subject, object_entity = self._extract_relation_entities(message, keyword)
-                    
-                    if subject and object_entity:
-                        confidence = 0.7  # Confiance moyenne pour relations
-                        relationship = Relationship(
-                            subject=subject,
-                            relation_type=rel_type,
-                            object=object_entity,
-                            context=message,
-                            confidence=confidence,
-                            timestamp=timestamp
-                        )
-                        relationships.append(relationship)
-                        break
+        # Détecter type de relation (mots-clés présents, dans l'ordre des listes)
+        for rel_type in self.relationship_keywords:
+            group = ('relationship', rel_type)
+            if not hits.has(group):
+                continue
+            for keyword in hits.found(group):
+                # Trouver sujet et objet autour du mot-clé
+                subject, object_entity = self._extract_relation_entities(
+                    message, keyword, text.lower
+                )
+                
+                if subject and object_entity:
+                    confidence = 0.7  # Confiance moyenne pour relations
+                    relationship = Relationship(
+                        subject=subject,
+                        relation_type=rel_type,
+                        object=object_entity,
+                        context=message,
+                        confidence=confidence,
+                        timestamp=timestamp
+                    )
+                    relationships.append(relationship)
+                    break
         
         return relationships
     
-    def extract_all_facts(self, message: str) -> Dict[str, List]:
+    def extract_all_facts(self, message: Union[str, AnalyzedText]) -> Dict[str, List]:
         """
         Extrait tous les types de faits d'un message
         
+        Déclencheurs partagés entre les quatre catégories ; une catégorie
+        sans déclencheur est écartée avant ses regex (comptée dans get_stats).
+        
         Args:
-            message: Message à analyser
+            message: Message à analyser (brut ou déjà prétraité)
             
         Returns:
             Dictionnaire contenant toutes les extractions
         """
+        text = as_analyzed_text(message)
+        hits = self._triggers(text)
+        
+        facts = {}
+        timings = {}
+        for category, extract, required in self._extractors:
+            start = time.perf_counter()
+            if required is None or hits.has_any(required):
+                facts[category] = [fact.to_dict() for fact in extract(text, hits)]
+            else:
+                facts[category] = []
+                self._skipped[category] += 1
+            timings[category] = time.perf_counter() - start
+        
+        self._record(timings)
+        return facts
+    
+    # --- Statistiques ---
+    
+    def _record(self, timings: Dict[str, float]) -> None:
+        """Ajoute les durées d'un message aux statistiques"""
+        self.messages_processed += 1
+        self.last_timings = timings
+        for name, seconds in timings.items():
+            self._totals[name] += seconds
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Durées par catégorie (dernier message + moyennes, ms) et catégories écartées
+        
+        Returns:
+            Dict avec messages, last_ms, avg_ms, skipped
+        """
+        count = self.messages_processed
         return {
-            'entities': [e.to_dict() for e in self.extract_entities(message)],
-            'preferences': [p.to_dict() for p in self.extract_preferences(message)],
-            'events': [e.to_dict() for e in self.extract_events(message)],
-            'relationships': [r.to_dict() for r in self.extract_relationships(message)]
+            'messages': count,
+            'last_ms': {
+                name: round(seconds * 1000, 3) for name, seconds in self.last_timings.items()
+            },
+            'avg_ms': {
+                name: round(total / count * 1000, 3) for name, total in self._totals.items()
+            } if count else {},
+            'skipped': dict(self._skipped),
         }
     
     # --- Méthodes utilitaires privées ---
     
-    def _calculate_entity_confidence(self, entity_type: str, value: str, context: str) -> float:
+    def _calculate_entity_confidence(self, entity_type: str, value: str, context_lower: str) -> float:
         """
         Calcule confiance pour une entité basée sur contexte
         
         Args:
             entity_type: Type d'entité ('person', 'location', etc.)
             value: Valeur extraite
-            context: Contexte original
+            context_lower: Contexte original en minuscules
             
         Returns:
             Score de confiance 0.0-1.0
@@ -395,25 +573,31 @@ class FactExtractor:
         
         if entity_type in indicators:
             for indicator in indicators[entity_type]:
-                if indicator in context.lower():
+                if indicator in context_lower:
                     confidence += 0.1
                     break
         
         return min(confidence, 1.0)  # Cap à 1.0
     
-    def _extract_relation_entities(self, message: str, keyword: str) -> tuple:
+    def _extract_relation_entities(
+        self, message: str, keyword: str, message_lower: Optional[str] = None
+    ) -> tuple:
         """
         Extrait sujet et objet autour d'un mot-clé de relation
         
         Args:
             message: Message complet
             keyword: Mot-clé de relation trouvé
+            message_lower: Message en minuscules (calculé si absent)
             
         Returns:
             Tuple (sujet, objet) ou (None, None)
         """
+        if message_lower is None:
+            message_lower = message.lower()
+        
         # Chercher mot-clé dans message
-        keyword_index = message.lower().find(keyword.lower())
+        keyword_index = message_lower.find(keyword.lower())
         if keyword_index == -1:
             return None, None
         
@@ -422,12 +606,12 @@ class FactExtractor:
         after = message[keyword_index + len(keyword):].strip()
         
         # Extraire dernier mot avant (sujet)
-        subject_match = re.findall(r'\b(\w+)\s*$', before)
-        subject = subject_match[0] if subject_match else None
+        subject_match = _LAST_WORD_REGEX.search(before)
+        subject = subject_match.group(1) if subject_match else None
         
         # Extraire premier mot après (objet)
-        object_match = re.findall(r'^\s*(\w+)', after)
-        object_entity = object_match[0] if object_match else None
+        object_match = _FIRST_WORD_REGEX.match(after)
+        object_entity = object_match.group(1) if object_match else None
         
         return subject, object_entity
 
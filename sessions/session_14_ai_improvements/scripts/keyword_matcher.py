@@ -0,0 +1,104 @@
+"""
+Keyword Matcher - Workly (Kira)
+
+Table de mots-clés compilée une fois (au chargement de la classe qui
+l'utilise) pour EmotionAnalyzer : tous les mots-clés pondérés de tous les
+groupes (émotions primaires, émotions composées) sont trouvés en un seul
+appel, sur un texte mis en minuscules une seule fois.
+
+Sémantique identique à `keyword in text.lower()` (sous-chaîne, sans
+frontière de mot) : "ah" est trouvé dans "ahurissant", les mots-clés qui
+se chevauchent sont tous trouvés.
+
+Choix de l'implémentation (mesuré, cf. benchmark_emotion_matcher.py) :
+un automate Aho–Corasick ou une alternation regex parcourent le texte une
+seule fois, mais en Python pur ou caractère par caractère dans `re` ils
+sont plus lents que ~140 recherches de sous-chaîne en C (`str.__contains__`).
+La table compilée garde donc la recherche C, mais :
+- chaque mot-clé n'est cherché qu'une fois (doublons entre groupes fusionnés)
+- messages courts : les mots-clés dont le premier caractère est absent du
+  texte sont écartés sans recherche (emojis, lettres accentuées)
+"""
+
+from collections import defaultdict
+from typing import Dict, Hashable, List, Mapping, Optional, Tuple
+
+# Au-delà, presque tous les premiers caractères sont présents : le tri
+# préalable coûte plus qu'il n'écarte de recherches
+_PREFILTER_MAX_CHARS = 512
+
+
+class KeywordMatcher:
+    """
+    Recherche de mots-clés pondérés de plusieurs groupes en un seul appel
+    """
+
+    def __init__(self, tables: Mapping[Hashable, Mapping[str, float]]):
+        """
+        Compile les tables de mots-clés
+
+        Args:
+            tables: Groupe → {mot-clé: poids} (ordre des mots-clés conservé)
+        """
+        self.groups: Tuple[Hashable, ...] = tuple(tables)
+
+        # Mot-clé → [(groupe, rang dans le groupe, poids)]
+        entries: Dict[str, List[Tuple[Hashable, int, float]]] = defaultdict(list)
+        for group, keywords in tables.items():
+            for rank, (keyword, weight) in enumerate(keywords.items()):
+                entries[keyword].append((group, rank, weight))
+
+        # Premier caractère → mots-clés (écartés si le caractère est absent)
+        buckets: Dict[str, List[Tuple[str, Tuple]]] = defaultdict(list)
+        for keyword, targets in entries.items():
+            if keyword:
+                buckets[keyword[0]].append((keyword, tuple(targets)))
+        self._buckets = {char: tuple(items) for char, items in buckets.items()}
+        self._keywords = tuple(item for items in self._buckets.values() for item in items)
+        self.keyword_count = len(self._keywords)
+
+    def scan(
+        self, text: str, text_lower: Optional[str] = None
+    ) -> Dict[Hashable, List[Tuple[str, float]]]:
+        """
+        Trouve les mots-clés de tous les groupes présents dans le texte
+
+        Args:
+            text: Texte à analyser
+            text_lower: Texte déjà en minuscules (AnalyzedText.lower), sinon
+                calculé ici
+
+        Returns:
+            Groupe → [(mot-clé, poids)] dans l'ordre des tables (groupes
+            sans mot-clé trouvé absents)
+        """
+        if text_lower is None:
+            text_lower = text.lower()
+
+        if len(text_lower) <= _PREFILTER_MAX_CHARS:
+            present = set(text_lower)
+            candidates = [
+                item
+                for char, items in self._buckets.items()
+                if char in present
+                for item in items
+            ]
+        else:
+            candidates = self._keywords
+
+        hits: Dict[Hashable, List[Tuple[int, str, float]]] = defaultdict(list)
+        for keyword, targets in candidates:
+            if keyword in text_lower:
+                for group, rank, weight in targets:
+                    hits[group].append((rank, keyword, weight))
+
+        return {
+            group: [(keyword, weight) for _, keyword, weight in sorted(found)]
+            for group, found in hits.items()
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"<KeywordMatcher: {self.keyword_count} mots-clés, "
+            f"{len(self.groups)} groupes>"
+        )
@@ -0,0 +1,127 @@
+"""
+Tests unitaires pour AnalyzedText (prétraitement partagé des messages)
+
+Tests :
+- Formes calculées : minuscules, normalisée, mots et positions, phrases,
+  forme sans accents
+- Analyseurs : mêmes résultats avec un str ou un AnalyzedText
+"""
+
+import pytest
+
+from src.ai.analyzed_text import AnalyzedText, as_analyzed_text
+from src.ai.context_analyzer import ContextAnalyzer
+from src.ai.conversation_summarizer import ConversationSummarizer
+from src.ai.emotion_analyzer import EmotionAnalyzer
+from src.ai.fact_extractor import FactExtractor
+
+
+MESSAGES = [
+    "",
+    "  Salut Kira !  ",
+    "Hier j'ai rencontré Marie à Paris. Elle travaille chez Google ! Et toi ?",
+    "J'adore la pizza mais je déteste les brocolis... vraiment 😡",
+    "Mon frère Pierre a un chien. On a décidé de partir demain\tà Lyon.",
+    "ÉNORME BUG, ça crash !!! pourquoi ???",
+]
+
+
+# ========== TESTS FORMES ==========
+
+def test_eager_forms():
+    """Test minuscules et forme normalisée calculées à la construction"""
+    text = AnalyzedText("  Ça Va ?  ")
+
+    assert text.raw == "  Ça Va ?  "
+    assert text.lower == "  ça va ?  "
+    assert text.normalized == "ça va ?"
+    assert str(text) == text.raw
+    assert len(text) == len(text.raw)
+
+
+@pytest.mark.parametrize("message", MESSAGES)
+def test_words_match_split(message):
+    """Test mots identiques à str.split(), positions cohérentes"""
+    text = AnalyzedText(message)
+
+    assert list(text.words) == message.split()
+    assert [message[start:end] for start, end in text.word_spans] == list(text.words)
+
+
+def test_sentences():
+    """Test phrases découpées sur la ponctuation finale (sans blancs de bord)"""
+    text = AnalyzedText("Bonjour. Ça va ?! Oui... v1.2 est sortie")
+
+    assert text.sentences == ("Bonjour.", "Ça va ?!", "Oui...", "v1.2 est sortie")
+    assert AnalyzedText("   ").sentences == ()
+
+
+def test_folded():
+    """Test forme sans accents en minuscules"""
+    assert AnalyzedText("Énervé, DÉÇU à Noël").folded == "enerve, decu a noel"
+
+
+def test_as_analyzed_text_reuses_instance():
+    """Test message déjà prétraité réutilisé tel quel"""
+    text = AnalyzedText("Salut")
+
+    assert as_analyzed_text(text) is text
+    assert as_analyzed_text("Salut").raw == "Salut"
+    assert as_analyzed_text(None).raw == ""
+
+
+# ========== TESTS ANALYSEURS ==========
+
+@pytest.mark.parametrize("message", MESSAGES)
+def test_emotion_analyzer_same_result(message):
+    """Test EmotionAnalyzer : str ou AnalyzedText, même émotion"""
+    from_str = EmotionAnalyzer(enable_emotion_memory=False).analyze(message)
+    from_text = EmotionAnalyzer(enable_emotion_memory=False).analyze(AnalyzedText(message))
+
+    assert (from_text.emotion, from_text.intensity, from_text.keywords_found) == (
+        from_str.emotion, from_str.intensity, from_str.keywords_found
+    )
+
+
+@pytest.mark.parametrize("message", MESSAGES)
+def test_context_analyzer_same_result(message):
+    """Test ContextAnalyzer : str ou AnalyzedText, même analyse"""
+    analyzer = ContextAnalyzer()
+    from_str = analyzer.analyze(message)
+    from_text = analyzer.analyze(AnalyzedText(message))
+
+    assert from_text.intent == from_str.intent
+    assert from_text.sentiment_score == from_str.sentiment_score
+    assert from_text.topics == from_str.topics
+    assert from_text.entities == from_str.entities
+    assert from_text.complexity == from_str.complexity
+
+
+@pytest.mark.parametrize("message", MESSAGES)
+def test_fact_extractor_same_result(message):
+    """Test FactExtractor : str ou AnalyzedText, mêmes faits (hors horodatage)"""
+
+    def strip_time(facts):
+        return {
+            category: [
+                {k: v for k, v in fact.items() if k not in ("timestamp", "first_seen")}
+                for fact in items
+            ]
+            for category, items in facts.items()
+        }
+
+    extractor = FactExtractor()
+
+    assert strip_time(extractor.extract_all_facts(AnalyzedText(message))) == strip_time(
+        extractor.extract_all_facts(message)
+    )
+
+
+@pytest.mark.parametrize("message", MESSAGES)
+def test_summarizer_key_points_same_result(message):
+    """Test ConversationSummarizer : str ou AnalyzedText, mêmes points clés"""
+    summarizer = ConversationSummarizer()
+
+    assert summarizer.detect_key_points(AnalyzedText(message)) == (
+        summarizer.detect_key_points(message)
+    )
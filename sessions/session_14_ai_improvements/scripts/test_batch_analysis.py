@@ -0,0 +1,126 @@
+"""
+Tests unitaires pour l'analyse par lots
+
+Tests :
+- map_chunks : ordre préservé, paquets, pool de processus, arrêt anticipé
+- EmotionAnalyzer.analyze_batch : résultats identiques à analyze() en boucle
+  (lissage par utilisateur compris), pool de processus, mémoire émotionnelle
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from src.ai.batch_analysis import iter_chunks, map_chunks
+from src.ai.emotion_analyzer import EmotionAnalyzer
+from src.ai.emotion_memory import EmotionMemory
+
+
+MESSAGES = [
+    "Je suis super heureux et content ! 😊 C'est génial !",
+    "C'est vraiment triste et dommage... 😢",
+    "",
+    "Wow ! C'est incroyable et stupéfiant ! 😲",
+    "Haha, trop drôle et hilarant ! 😂 lol mdr",
+    "Je suis très en colère et furieux ! 😠",
+    "ok",
+] * 4
+USER_IDS = ["alice", "bob", "alice", "carol"] * 7
+
+
+def _fields(result):
+    """Champs comparables d'un EmotionResult (sans horodatage)"""
+    return (
+        result.emotion,
+        round(result.intensity, 6),
+        round(result.confidence, 6),
+        result.keywords_found,
+        result.context_score,
+    )
+
+
+@pytest.fixture
+def temp_storage():
+    """Fixture : dossier temporaire pour la mémoire émotionnelle"""
+    temp_dir = tempfile.mkdtemp(prefix="workly_batch_analysis_test_")
+    yield os.path.join(temp_dir, "emotion_history.json")
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+# ========== TESTS MAP_CHUNKS ==========
+
+def test_iter_chunks_sizes():
+    """Test découpage paresseux, dernier paquet plus court"""
+    assert list(iter_chunks(iter(range(7)), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(iter_chunks([], 3)) == []
+
+
+def test_map_chunks_process_pool_keeps_order():
+    """Test pool de processus : paquets rendus dans l'ordre d'entrée"""
+    chunks = list(map_chunks(abs, range(0, -50, -1), workers=2, chunk_size=7))
+
+    assert [item for chunk, _ in chunks for item in chunk] == list(range(0, -50, -1))
+    assert [value for _, results in chunks for value in results] == list(range(50))
+
+
+def test_map_chunks_stops_early():
+    """Test consommateur arrêté en cours de route : pool arrêté proprement"""
+    stream = map_chunks(abs, range(10_000), workers=2, chunk_size=10)
+
+    assert next(stream)[1] == list(range(10))
+    stream.close()
+
+
+# ========== TESTS EMOTIONANALYZER ==========
+
+def test_batch_matches_sequential_analyze():
+    """Test résultats identiques à analyze() message par message"""
+    sequential = EmotionAnalyzer(enable_emotion_memory=False)
+    expected = [
+        _fields(sequential.analyze(text, user_id=user_id))
+        for text, user_id in zip(MESSAGES, USER_IDS)
+    ]
+
+    batch = EmotionAnalyzer(enable_emotion_memory=False)
+    results = list(batch.analyze_batch(iter(MESSAGES), iter(USER_IDS), chunk_size=5))
+
+    assert [_fields(result) for result in results] == expected
+    assert {
+        user_id: [_fields(r) for r in history]
+        for user_id, history in batch.emotion_history.items()
+    } == {
+        user_id: [_fields(r) for r in history]
+        for user_id, history in sequential.emotion_history.items()
+    }
+
+
+def test_batch_process_pool_matches_in_process():
+    """Test pool de processus : mêmes résultats, même ordre"""
+    expected = [
+        _fields(result)
+        for result in EmotionAnalyzer(enable_emotion_memory=False).analyze_batch(
+            MESSAGES, USER_IDS
+        )
+    ]
+
+    analyzer = EmotionAnalyzer(enable_emotion_memory=False)
+    results = list(analyzer.analyze_batch(MESSAGES, USER_IDS, workers=2, chunk_size=3))
+
+    assert [_fields(result) for result in results] == expected
+
+
+def test_batch_writes_emotion_memory(temp_storage):
+    """Test mémoire émotionnelle alimentée une fois par paquet"""
+    analyzer = EmotionAnalyzer(enable_emotion_memory=False)
+    analyzer.emotion_memory = EmotionMemory(storage_file=temp_storage, max_entries=10)
+    before = analyzer.emotion_memory.db.get_emotion_count()
+
+    results = list(analyzer.analyze_batch(MESSAGES, source="user", chunk_size=8))
+
+    memory = analyzer.emotion_memory
+    assert memory.db.get_emotion_count() - before == len(MESSAGES)
+    assert len(memory.history) == 10
+    assert [entry.emotion for entry in memory.history] == [r.emotion for r in results[-10:]]
+    assert all(entry.source == "user" for entry in memory.history)
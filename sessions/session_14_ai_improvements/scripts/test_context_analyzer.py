@@ -357,6 +357,43 @@ class TestRepr:
         assert "2 analyses" in repr_str
 
 
+class TestBatchAnalysis:
+    """Tests analyse par lots."""
+    
+    MESSAGES = [
+        "Comment ça marche ?",
+        "Super merci beaucoup ! 😊",
+        "J'ai un bug avec Unity, ça crash tout le temps 😡",
+        "Bonjour Kira !",
+        "",
+    ] * 3
+    
+    @staticmethod
+    def _fields(analysis):
+        """Champs comparables (sans horodatage, actions non ordonnées)."""
+        return (analysis.intent, analysis.intent_confidence, analysis.sentiment,
+                analysis.sentiment_score, analysis.topics, analysis.entities,
+                sorted(analysis.suggested_actions), analysis.complexity)
+    
+    def test_batch_matches_analyze(self, analyzer):
+        """Test : Mêmes résultats et même historique qu'analyze()."""
+        expected = [self._fields(analyzer.analyze(msg)) for msg in self.MESSAGES]
+        batch_analyzer = ContextAnalyzer()
+        
+        results = list(batch_analyzer.analyze_batch(iter(self.MESSAGES), chunk_size=4))
+        
+        assert [self._fields(a) for a in results] == expected
+        assert len(batch_analyzer.analysis_history) == len(self.MESSAGES)
+    
+    def test_batch_process_pool(self, analyzer):
+        """Test : Pool de processus, résultats dans l'ordre d'entrée."""
+        expected = [self._fields(analyzer._analyze_text(msg)) for msg in self.MESSAGES]
+        
+        results = list(analyzer.analyze_batch(self.MESSAGES, workers=2, chunk_size=2))
+        
+        assert [self._fields(a) for a in results] == expected
+
+
 # ============================================================================
 # MARKERS PYTEST
 # ============================================================================
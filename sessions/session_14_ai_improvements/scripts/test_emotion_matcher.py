@@ -0,0 +1,167 @@
+"""
+Tests unitaires pour KeywordMatcher (mots-clés EmotionAnalyzer)
+
+Parité avec la recherche historique (`keyword in text.lower()` par table) :
+- Sous-chaînes qui se chevauchent ("ah" dans "ahurissant")
+- Majuscules, emojis, apostrophes, texte vide
+- Émotions composées
+- Résultats complets d'analyze() sur un corpus aléatoire reproductible
+"""
+
+import random
+
+import pytest
+
+from src.ai.emotion_analyzer import EmotionAnalyzer
+from src.ai.keyword_matcher import KeywordMatcher
+
+
+class LegacyMatcher:
+    """Recherche historique : un `in` par mot-clé et par table"""
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def scan(self, text, text_lower=None):
+        text_lower = text.lower()
+        hits = {}
+        for group, keywords in self.tables.items():
+            found = [(kw, weight) for kw, weight in keywords.items() if kw in text_lower]
+            if found:
+                hits[group] = found
+        return hits
+
+
+TABLES = {
+    **{("primary", name): table for name, table in EmotionAnalyzer.EMOTION_KEYWORDS.items()},
+    **{
+        ("compound", name): dict.fromkeys(data["keywords"], 1)
+        for name, data in EmotionAnalyzer.COMPOUND_EMOTIONS.items()
+    },
+}
+
+CORPUS = [
+    "",
+    "Salut Kira, ça va ?",
+    "C'est ahurissant, combien tu dis ?",
+    "Mélancolique mais heureux de te revoir",
+    "D'ACCORD, C'EST GÉNIAL !!! 😂😂",
+    "je suis énervé et déçu 😢 mais bon mdr",
+    "wow incroyable, j'ai peur mais je suis excité",
+    "hmm... je ne sais pas trop, peut-être",
+    "Trop bien 🤩 merci beaucoup ❤️",
+    "x" * 600 + " génial " + "y" * 600,
+]
+
+
+def _fuzz_corpus(count=200, seed=1234):
+    """Messages aléatoires mêlant mots-clés, fragments et bruit"""
+    rng = random.Random(seed)
+    keywords = sorted({kw for table in TABLES.values() for kw in table})
+    noise = ["le", "serveur", "raid", "Bot", "!!", "?", "...", "é", "😀", "ça", "AH"]
+    corpus = []
+    for _ in range(count):
+        words = []
+        for _ in range(rng.randint(0, 80)):
+            pick = rng.random()
+            if pick < 0.3:
+                kw = rng.choice(keywords)
+                words.append(kw.upper() if rng.random() < 0.2 else kw)
+            elif pick < 0.4:
+                kw = rng.choice(keywords)
+                words.append(kw[: max(1, len(kw) // 2)])
+            else:
+                words.append(rng.choice(noise))
+        corpus.append(rng.choice([" ", "", "-"]).join(words))
+    return corpus
+
+
+@pytest.fixture
+def analyzer():
+    """Fixture : analyseur sans mémoire émotionnelle (résultats déterministes)"""
+    return EmotionAnalyzer(enable_emotion_memory=False)
+
+
+def _analyze_both(analyzer, monkeypatch, text):
+    """analyze() avec la table compilée puis avec la recherche historique"""
+    compiled = analyzer.analyze(text, user_id="compiled")
+    with monkeypatch.context() as patch:
+        patch.setattr(EmotionAnalyzer, "_KEYWORD_MATCHER", LegacyMatcher(TABLES))
+        legacy = analyzer.analyze(text, user_id="legacy")
+    return compiled, legacy
+
+
+# ========== TESTS KEYWORDMATCHER ==========
+
+def test_overlapping_keywords_all_found():
+    """Test mots-clés imbriqués trouvés ensemble (sous-chaîne, sans frontière)"""
+    matcher = KeywordMatcher({"a": {"ah": 1.0, "ahurissant": 2.0}, "b": {"hurl": 1.5}})
+
+    hits = matcher.scan("C'est AHURISSANT")
+
+    assert hits == {"a": [("ah", 1.0), ("ahurissant", 2.0)]}
+
+
+def test_table_order_preserved():
+    """Test mots-clés rendus dans l'ordre de leur table, pas du texte"""
+    matcher = KeywordMatcher({"joy": {"super": 1.0, "bien": 0.5, "génial": 2.0}})
+
+    hits = matcher.scan("génial, bien, super")
+
+    assert hits["joy"] == [("super", 1.0), ("bien", 0.5), ("génial", 2.0)]
+
+
+def test_shared_keyword_counted_per_group():
+    """Test mot-clé partagé : cherché une fois, rendu dans chaque groupe"""
+    matcher = KeywordMatcher({"x": {"wow": 1.0}, "y": {"bof": 0.5, "wow": 3.0}})
+
+    assert matcher.keyword_count == 2
+    assert matcher.scan("wow") == {"x": [("wow", 1.0)], "y": [("wow", 3.0)]}
+
+
+def test_scan_matches_legacy():
+    """Test parité scan() / recherche historique (courts et longs messages)"""
+    legacy = LegacyMatcher(TABLES)
+
+    for text in CORPUS + _fuzz_corpus():
+        assert EmotionAnalyzer._KEYWORD_MATCHER.scan(text) == legacy.scan(text), text
+
+
+# ========== TESTS PARITÉ EMOTIONANALYZER ==========
+
+def test_analyze_matches_legacy(analyzer, monkeypatch):
+    """Test résultats d'analyze() identiques avec l'une ou l'autre recherche"""
+    for text in CORPUS + _fuzz_corpus(count=60, seed=99):
+        compiled, legacy = _analyze_both(analyzer, monkeypatch, text)
+
+        assert compiled.emotion == legacy.emotion, text
+        assert compiled.intensity == pytest.approx(legacy.intensity), text
+        assert compiled.confidence == pytest.approx(legacy.confidence), text
+        assert compiled.keywords_found == legacy.keywords_found, text
+
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_calculate_intensity_matches_scan(analyzer, text):
+    """Test _calculate_intensity (par table) cohérent avec les poids trouvés"""
+    hits = EmotionAnalyzer._KEYWORD_MATCHER.scan(text)
+
+    for emotion, table in EmotionAnalyzer.EMOTION_KEYWORDS.items():
+        found = hits.get(("primary", emotion), [])
+        intensity, keywords = analyzer._calculate_intensity(text, table)
+
+        assert keywords == [kw for kw, _ in found]
+        assert intensity == pytest.approx(
+            EmotionAnalyzer._intensity_from_weights(sum(w for _, w in found), len(found))
+        )
+
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_compound_detection_matches_legacy(analyzer, text):
+    """Test composées : mots-clés pré-cherchés ≡ recherche dans le texte"""
+    hits = EmotionAnalyzer._KEYWORD_MATCHER.scan(text)
+    matched = {name for kind, name in hits if kind == "compound"}
+    scores = {"joy": 60.0, "sadness": 50.0, "fear": 40.0, "surprise": 30.0}
+
+    assert analyzer._detect_compound_emotion(text, scores, matched) == (
+        analyzer._detect_compound_emotion(text, scores)
+    )
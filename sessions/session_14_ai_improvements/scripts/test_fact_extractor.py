@@ -15,7 +15,11 @@ from src.ai.fact_extractor import (
     Entity,
     Preference,
     Event,
-    Relationship
+    Relationship,
+    TriggerHits,
+    ENTITY_PATTERNS,
+    ENTITY_TRIGGERS,
+    FACT_CATEGORIES
 )
 
 
@@ -315,6 +319,82 @@ def test_extract_with_special_characters(extractor):
     assert isinstance(facts, dict)
 
 
+# ========== TESTS PRÉFILTRE ET STATISTIQUES ==========
+
+PREFILTER_MESSAGES = [
+    "Hier j'ai rencontré Marie à Paris. Elle travaille chez Google !",
+    "J'adore la pizza mais je déteste les brocolis",
+    "Mon frère Pierre a un chien. On a décidé de partir DEMAIN À Lyon.",
+    "Je veux apprendre le piano le 12/03/2024 avec Paul",
+    "RDV le 5-6-24 CHEZ Airbus, POUR Thales ensuite",
+    "Alice est la sœur de Bob, mon ami Luc est marié",
+    "ok",
+    "",
+]
+
+
+def _without_timestamps(facts):
+    """Faits sans horodatage (comparables d'un appel à l'autre)"""
+    return [
+        {k: v for k, v in fact.items() if k not in ('timestamp', 'first_seen')}
+        for fact in facts
+    ]
+
+
+def test_entity_triggers_cover_patterns():
+    """Test préfiltre : pas de correspondance regex sans déclencheur"""
+    import re
+    
+    tables = {('entity', t): tuple(words) for t, words in ENTITY_TRIGGERS.items()}
+    for message in PREFILTER_MESSAGES:
+        hits = TriggerHits(tables, message.lower())
+        for entity_type in ENTITY_TRIGGERS:
+            if re.search(ENTITY_PATTERNS[entity_type], message, re.IGNORECASE):
+                assert hits.has(('entity', entity_type)), (entity_type, message)
+
+
+def test_extract_all_facts_matches_single_calls(extractor):
+    """Test déclencheurs partagés : mêmes faits que les appels par catégorie"""
+    single_calls = {
+        'entities': extractor.extract_entities,
+        'preferences': extractor.extract_preferences,
+        'events': extractor.extract_events,
+        'relationships': extractor.extract_relationships,
+    }
+    
+    for message in PREFILTER_MESSAGES:
+        facts = extractor.extract_all_facts(message)
+        for category, extract in single_calls.items():
+            expected = [fact.to_dict() for fact in extract(message)]
+            assert _without_timestamps(facts[category]) == _without_timestamps(expected)
+
+
+def test_extract_all_facts_skips_categories_without_triggers(extractor):
+    """Test catégories sans déclencheur écartées (entités jamais écartées)"""
+    extractor.extract_all_facts("Marie est là.")
+    extractor.extract_all_facts("J'adore la pizza")
+    
+    skipped = extractor.get_stats()['skipped']
+    
+    assert skipped == {'preferences': 1, 'events': 2, 'relationships': 2}
+
+
+def test_get_stats_timings(extractor):
+    """Test durées par catégorie (dernier message et moyenne)"""
+    assert extractor.get_stats() == {
+        'messages': 0, 'last_ms': {}, 'avg_ms': {}, 'skipped': {}
+    }
+    
+    extractor.extract_all_facts("Hier j'ai rencontré Marie à Paris.")
+    extractor.extract_all_facts("ok")
+    stats = extractor.get_stats()
+    
+    assert stats['messages'] == 2
+    assert tuple(stats['last_ms']) == FACT_CATEGORIES
+    assert set(stats['avg_ms']) == set(FACT_CATEGORIES)
+    assert all(ms >= 0 for ms in stats['avg_ms'].values())
+
+
 # ========== TESTS PERFORMANCE ==========
 
 @pytest.mark.slow
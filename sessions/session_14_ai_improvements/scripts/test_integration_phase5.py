@@ -14,6 +14,7 @@ import pytest
 import tempfile
 import shutil
 import os
+from collections.abc import Mapping
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 
@@ -22,6 +23,12 @@ from src.ai.config import AIConfig
 from src.ai.memory import ConversationMemory
 
 
+@pytest.fixture(autouse=True)
+def isolated_cwd(tmp_path, monkeypatch):
+    """Dossier courant temporaire : EmotionMemory écrit dans data/memory/ (relatif)."""
+    monkeypatch.chdir(tmp_path)
+
+
 @pytest.fixture
 def temp_storage():
     """Créer dossier temporaire pour tests."""
@@ -36,6 +43,8 @@ def mock_model_manager():
     mock = MagicMock()
     mock.is_loaded = True
     mock.generate.return_value = "Bonjour ! Comment puis-je t'aider ?"
+    mock.context_window = 2048  # n_ctx (budget de tokens du prompt)
+    mock.count_tokens.return_value = None  # Pas de tokenizer : approximation
     return mock
 
 
@@ -153,14 +162,39 @@ class TestChatEngineAdvancedMode:
         # Conversation
         engine.chat("Mon nom est Alice")
         engine.chat("J'aime le Python")
+        engine.flush()  # Sauvegardes du dernier tour (arrière-plan)
         
         # Vérifier que MemoryManager a enregistré
         assert len(engine.memory_manager.current_conversation) == 4  # 2 user + 2 assistant
         
         # Vérifier extraction faits (peut prendre quelques messages)
         facts = engine.memory_manager.facts
-        assert isinstance(facts, dict)
+        assert isinstance(facts, Mapping)  # FactStore, lu comme un dict de listes
+        assert set(facts) == {"entities", "preferences", "events", "relationships"}
     
+    def test_history_from_database_per_conversation(self, basic_config, mock_model_manager, temp_storage):
+        """Test : Historique du prompt lu dans SQLite (get_recent_turns), par conversation."""
+        memory = Mock()
+        engine = ChatEngine(
+            config=basic_config,
+            memory=memory,
+            model_manager=mock_model_manager,
+            enable_advanced_ai=True,
+            memory_storage_dir=temp_storage
+        )
+
+        engine.chat("Salut", user_id="alice", source="discord")
+        engine.chat("Salut", user_id="bob", source="discord")
+        with patch.object(
+            engine.memory_manager.db, "get_recent_turns",
+            wraps=engine.memory_manager.db.get_recent_turns,
+        ) as recent:
+            response = engine.chat("Et toi ?", user_id="alice", source="discord")
+
+        assert response.context_messages == 1  # Tour de bob exclu
+        recent.assert_any_call("alice", "discord", n=basic_config.context_limit * 4)
+        memory.get_history.assert_not_called()
+
     def test_personality_engine_integration(self, basic_config, mock_model_manager, temp_storage):
         """Test : Intégration PersonalityEngine (Phase 2)."""
         engine = ChatEngine(
@@ -231,6 +265,7 @@ class TestChatEngineAdvancedMode:
             assert response.processing_time > 0
         
         # Vérifications finales
+        engine.flush()  # Sauvegardes du dernier tour (arrière-plan)
         
         # Phase 1: MemoryManager
         assert len(engine.memory_manager.current_conversation) == 10  # 5 user + 5 assistant
@@ -294,6 +329,29 @@ class TestErrorHandling:
         
         with pytest.raises(RuntimeError, match="Échec génération réponse"):
             engine.chat("Test")
+        assert engine.pipeline.get_stats()["turns"] == 1
+
+    def test_stream_generation_error_handling(self, basic_config, mock_model_manager):
+        """Test : Erreur autre que RuntimeError pendant le streaming."""
+        def failing_stream(**kwargs):
+            yield "Bonjour"
+            raise ValueError("Erreur LLM")
+
+        mock_model_manager.generate_stream.side_effect = failing_stream
+        on_complete = Mock()
+
+        engine = ChatEngine(config=basic_config, model_manager=mock_model_manager)
+        chunks = []
+        with pytest.raises(RuntimeError, match="Échec génération réponse") as exc:
+            for chunk in engine.chat_stream("Test", on_complete=on_complete):
+                chunks.append(chunk)
+
+        assert chunks == ["Bonjour"]
+        assert isinstance(exc.value.__cause__, ValueError)
+        on_complete.assert_not_called()
+        stats = engine.pipeline.get_stats()
+        assert stats["turns"] == 1
+        assert "generation" in stats["last_ms"]
 
 
 class TestContextInjection:
@@ -308,16 +366,16 @@ class TestContextInjection:
             memory_storage_dir=temp_storage
         )
         
-        # Espionner _build_prompt
-        original_build = engine._build_prompt
+        # Espionner _plan_prompt (assemblage du prompt utilisé par chat())
+        original_plan = engine._plan_prompt
         prompts_captured = []
         
         def capture_prompt(*args, **kwargs):
-            result = original_build(*args, **kwargs)
-            prompts_captured.append(result)
+            result = original_plan(*args, **kwargs)
+            prompts_captured.append(result[0])
             return result
         
-        engine._build_prompt = capture_prompt
+        engine._plan_prompt = capture_prompt
         
         engine.chat("Test")
         
@@ -338,14 +396,14 @@ class TestContextInjection:
         
         # Capturer prochain prompt
         prompts_captured = []
-        original_build = engine._build_prompt
+        original_plan = engine._plan_prompt
         
         def capture_prompt(*args, **kwargs):
-            result = original_build(*args, **kwargs)
-            prompts_captured.append(result)
+            result = original_plan(*args, **kwargs)
+            prompts_captured.append(result[0])
             return result
         
-        engine._build_prompt = capture_prompt
+        engine._plan_prompt = capture_prompt
         
         engine.chat("Merci !")
         
@@ -356,6 +414,70 @@ class TestContextInjection:
         assert "<|system|>" in prompt
 
 
+class TestResponseCache:
+    """Tests du cache de réponses (opt-in) dans ChatEngine, avec vraie mémoire."""
+
+    @pytest.fixture
+    def engine(self, basic_config, mock_model_manager, tmp_path):
+        """ChatEngine + ConversationMemory SQLite + cache de réponses."""
+        basic_config.response_cache = True
+        return ChatEngine(
+            config=basic_config,
+            memory=ConversationMemory(str(tmp_path / "chat_history.db")),
+            model_manager=mock_model_manager,
+            enable_advanced_ai=False
+        )
+
+    def test_hits_across_users_and_turns(self, engine, mock_model_manager):
+        """Test : "salut" répété par un utilisateur puis par d'autres → servi du cache."""
+        for _ in range(5):
+            engine.chat("salut", user_id="alice", source="discord")
+        with patch.object(engine, "_plan_prompt", wraps=engine._plan_prompt) as plan:
+            for user_id in ("bob", "carol", "dave"):
+                engine.chat("Salut !", user_id=user_id, source="discord")
+            plan.assert_not_called()
+
+        # Ouverture, puis "salut" après "salut" : 2 générations pour 8 messages
+        assert mock_model_manager.generate.call_count == 2
+        stats = engine.response_cache.get_stats()
+        assert stats["hits"] == 6
+        assert stats["hit_rate"] == 0.75
+
+    def test_scoped_by_channel_and_previous_message(self, engine, mock_model_manager):
+        """Test : autre canal ou autre message précédent → nouvelle génération."""
+        engine.chat("salut", user_id="alice", source="discord")
+        engine.chat("salut", user_id="alice", source="desktop")
+        engine.chat("Il pleut aujourd'hui", user_id="bob", source="discord")
+        engine.chat("salut", user_id="bob", source="discord")
+
+        assert mock_model_manager.generate.call_count == 4
+        assert engine.response_cache.get_stats()["hits"] == 0
+
+    def test_personal_context_not_cached(
+        self, basic_config, mock_model_manager, temp_storage
+    ):
+        """Test : réponse construite avec des faits mémorisés jamais resservie."""
+        basic_config.response_cache = True
+        engine = ChatEngine(
+            config=basic_config,
+            model_manager=mock_model_manager,
+            enable_advanced_ai=True,
+            memory_storage_dir=temp_storage
+        )
+        # Ouverture : aucun fait encore mémorisé → mise en cache
+        engine.chat("J'adore la programmation Python !", user_id="alice", source="discord")
+        engine.flush()
+        assert engine.response_cache.get_stats()["entries"] == 1
+
+        # Préférence "Python" retrouvée dans le contexte → réponse non mémorisée
+        engine.chat("Python", user_id="alice", source="discord")
+        assert engine.response_cache.get_stats()["entries"] == 1
+
+        with patch.object(engine.memory_manager, "is_personal_context", return_value=False):
+            engine.chat("Python", user_id="bob", source="discord")
+        assert engine.response_cache.get_stats()["entries"] == 2
+
+
 class TestMemoryPersistence:
     """Tests de persistance des données."""
     
@@ -370,13 +492,12 @@ class TestMemoryPersistence:
         )
         
         engine1.chat("Test message")
+        engine1.flush()  # Sauvegardes du dernier tour (arrière-plan)
         
-        # Vérifier fichier créé (dans data/memory/ par défaut, pas temp_storage)
-        # EmotionMemory utilise toujours data/memory/emotion_history.json
-        emotion_file = Path("data") / "memory" / "emotion_history.json"
-        assert emotion_file.exists()
+        # Vérifier base créée (SQLite depuis la Phase 6, plus de JSON)
+        assert (Path("data") / "memory" / "workly.db").exists()
         
-        # Deuxième instance (charge depuis fichier)
+        # Deuxième instance (charge depuis SQLite)
         engine2 = ChatEngine(
             config=basic_config,
             model_manager=mock_model_manager,
@@ -385,9 +506,7 @@ class TestMemoryPersistence:
         )
         
         # Devrait avoir chargé historique
-        stats = engine2.emotion_analyzer.get_stats()
-        if "emotion_memory_stats" in stats:
-            assert stats["emotion_memory_stats"]["total_entries"] > 0
+        assert len(engine2.emotion_analyzer.emotion_memory.history) > 0
 
 
 # ============================================================================
@@ -288,6 +288,45 @@ def test_get_context_max_tokens(memory_manager):
     assert len(context) <= 100 * 4 + 100  # Marge d'erreur
 
 
+def test_get_recent_exchanges_per_conversation(memory_manager):
+    """Test historique du prompt : tours de cette conversation, plus ancien en premier"""
+    for i in range(4):
+        memory_manager.add_exchange(f"Question {i}", f"Réponse {i}", user_id="alice", source="discord")
+    memory_manager.add_exchange("Autre", "Ailleurs", user_id="bob", source="discord")
+
+    history = memory_manager.get_recent_exchanges("alice", "discord", limit=2)
+
+    assert [(h["user_input"], h["bot_response"]) for h in history] == [
+        ("Question 2", "Réponse 2"),
+        ("Question 3", "Réponse 3"),
+    ]
+    assert memory_manager.get_recent_exchanges("alice", "desktop") == []
+
+
+def test_get_context_current_conversation_per_user(memory_manager):
+    """Test conversation courante du contexte limitée à l'utilisateur demandé"""
+    memory_manager.add_exchange("Je parle de jardinage", "D'accord", user_id="alice", source="discord")
+    memory_manager.add_exchange("Je parle de voitures", "Ok", user_id="bob", source="discord")
+
+    context = memory_manager.get_context_for_prompt(
+        "bonjour", include_facts=False, include_segments=False, user_id="alice", source="discord"
+    )
+
+    assert "jardinage" in context
+    assert "voitures" not in context
+
+
+def test_clear_history(memory_manager):
+    """Test effacement de l'historique d'un seul utilisateur"""
+    memory_manager.add_exchange("Salut", "Bonjour", user_id="alice", source="discord")
+    memory_manager.add_exchange("Salut", "Bonjour", user_id="bob", source="discord")
+
+    assert memory_manager.clear_history("alice") == 2
+
+    assert memory_manager.get_recent_exchanges("alice", "discord") == []
+    assert len(memory_manager.get_recent_exchanges("bob", "discord")) == 1
+
+
 # ========== TESTS STATISTIQUES ==========
 
 def test_get_stats_structure(memory_manager):
@@ -260,6 +260,7 @@ class TestPerformanceScaling:
                 engine.chat(f"Message {round_num} de {user_id}", user_id=user_id)
         
         # Vérifier que chaque user a son historique
+        engine.flush()  # Sauvegardes du dernier tour (arrière-plan)
         for user_id in users:
             history = engine.memory.get_history(user_id=user_id, source="desktop")
             assert len(history) == 10, f"Historique {user_id} incorrect"
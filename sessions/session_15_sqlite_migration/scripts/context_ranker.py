@@ -0,0 +1,188 @@
+"""
+context_ranker.py - Classement hybride du contexte long-terme (lexical + sémantique)
+
+Remplace la sélection fixe de MemoryManager.get_context_for_prompt
+(top-2 cosinus + 5 dernières préférences + 5 entités, quelle que soit la question) :
+- Fusion des classements BM25 (FTS5) et cosinus (VectorIndex) par
+  Reciprocal Rank Fusion : score = Σ poids / (k + rang)
+- Décroissance temporelle (demi-vie) : un souvenir ancien pèse moins
+- Déduplication des résumés quasi identiques (Jaccard sur les mots)
+- Remplissage glouton du budget de tokens (meilleur score d'abord,
+  les éléments trop longs sont sautés au profit des suivants)
+
+RRF ne compare que des rangs : pas besoin de calibrer BM25 (non borné)
+contre la similarité cosinus (0-1).
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def approximate_tokens(text: str) -> int:
+    """Approximation : 1 token ≈ 4 caractères"""
+    return len(text) // 4 + 1
+
+
+@dataclass
+class ContextCandidate:
+    """Élément de contexte candidat (segment ou fait)"""
+
+    key: str  # Identifiant stable ("segment:seg_3", "fact:12") pour la fusion
+    kind: str  # "segment", "fact" ou "profile"
+    text: str
+    timestamp: Optional[str] = None
+    score: float = 0.0
+
+
+class ContextRanker:
+    """
+    Fusionne, filtre et empaquette des candidats de contexte
+    """
+
+    def __init__(
+        self,
+        rrf_k: int = 60,
+        half_life_days: float = 30.0,
+        recency_floor: float = 0.5,
+        dedup_threshold: float = 0.8,
+    ):
+        """
+        Initialise le classeur
+
+        Args:
+            rrf_k: Constante RRF (60 = valeur usuelle, amortit le poids du 1er rang)
+            half_life_days: Âge (jours) auquel le bonus de fraîcheur est divisé par 2
+            recency_floor: Facteur minimal appliqué aux souvenirs très anciens
+            dedup_threshold: Similarité de Jaccard au-delà de laquelle deux textes
+                sont considérés identiques
+        """
+        self.rrf_k = rrf_k
+        self.half_life_days = half_life_days
+        self.recency_floor = recency_floor
+        self.dedup_threshold = dedup_threshold
+
+    # ========== FUSION ==========
+
+    def fuse(
+        self,
+        rankings: Sequence[List[ContextCandidate]],
+        weights: Optional[Sequence[float]] = None,
+        now: Optional[datetime] = None,
+    ) -> List[ContextCandidate]:
+        """
+        Reciprocal Rank Fusion + décroissance temporelle + déduplication
+
+        Args:
+            rankings: Listes de candidats, chacune triée par pertinence décroissante
+            weights: Poids de chaque liste (défaut : 1.0)
+            now: Date de référence pour la fraîcheur (défaut : utcnow)
+
+        Returns:
+            Candidats uniques triés par score décroissant
+        """
+        weights = weights or [1.0] * len(rankings)
+        now = now or datetime.utcnow()
+
+        fused: Dict[str, ContextCandidate] = {}
+        for ranking, weight in zip(rankings, weights):
+            for rank, candidate in enumerate(ranking, 1):
+                entry = fused.get(candidate.key)
+                if entry is None:
+                    entry = fused[candidate.key] = ContextCandidate(
+                        candidate.key, candidate.kind, candidate.text, candidate.timestamp
+                    )
+                elif len(candidate.text) > len(entry.text):
+                    entry.text = candidate.text  # Garder la version la plus complète
+                entry.timestamp = entry.timestamp or candidate.timestamp
+                entry.score += weight / (self.rrf_k + rank)
+
+        for entry in fused.values():
+            entry.score *= self.recency_factor(entry.timestamp, now)
+
+        ranked = sorted(fused.values(), key=lambda c: c.score, reverse=True)
+        return self.deduplicate(ranked)
+
+    def recency_factor(self, timestamp: Optional[str], now: datetime) -> float:
+        """
+        Facteur de fraîcheur dans [recency_floor, 1]
+
+        Args:
+            timestamp: Date ISO du souvenir (None/invalide = pas de pénalité)
+            now: Date de référence
+
+        Returns:
+            1.0 pour un souvenir récent, tend vers recency_floor avec l'âge
+        """
+        if not timestamp:
+            return 1.0
+        try:
+            then = datetime.fromisoformat(timestamp).replace(tzinfo=None)
+        except ValueError:
+            return 1.0
+
+        age_days = max((now - then).total_seconds() / 86400, 0.0)
+        decay = math.pow(0.5, age_days / self.half_life_days)
+        return self.recency_floor + (1 - self.recency_floor) * decay
+
+    # ========== DÉDUPLICATION ==========
+
+    def deduplicate(self, candidates: List[ContextCandidate]) -> List[ContextCandidate]:
+        """
+        Retire les textes quasi identiques à un candidat mieux classé
+
+        Args:
+            candidates: Candidats triés par score décroissant
+
+        Returns:
+            Candidats conservés (ordre inchangé)
+        """
+        kept: List[ContextCandidate] = []
+        kept_words: List[set] = []
+        for candidate in candidates:
+            words = set(_WORD_RE.findall(candidate.text.lower()))
+            if any(self._jaccard(words, other) >= self.dedup_threshold for other in kept_words):
+                continue
+            kept.append(candidate)
+            kept_words.append(words)
+        return kept
+
+    @staticmethod
+    def _jaccard(a: set, b: set) -> float:
+        """Similarité de Jaccard entre deux ensembles de mots"""
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
+
+    # ========== BUDGET ==========
+
+    def pack(
+        self,
+        candidates: List[ContextCandidate],
+        budget_tokens: int,
+        count_tokens: Optional[Callable[[str], int]] = None,
+    ) -> List[ContextCandidate]:
+        """
+        Remplissage glouton du budget de tokens
+
+        Args:
+            candidates: Candidats triés par score décroissant
+            budget_tokens: Budget disponible
+            count_tokens: Compteur de tokens (défaut : approximation 4 chars/token)
+
+        Returns:
+            Candidats retenus (ordre de score), sans texte tronqué
+        """
+        count_tokens = count_tokens or approximate_tokens
+        selected = []
+        remaining = budget_tokens
+        for candidate in candidates:
+            cost = count_tokens(candidate.text)
+            if cost <= remaining:
+                selected.append(candidate)
+                remaining -= cost
+        return selected
@@ -0,0 +1,224 @@
+"""
+embedding_cache.py - Cache des embeddings calculés (clé = hash du texte)
+
+Évite de ré-encoder avec SentenceTransformer les textes déjà vus
+(salutations répétées, prompts Discord identiques, segments re-résumés) :
+- Clé : SHA-256 du texte normalisé + nom du modèle (casse conservée par
+  défaut ; lowercase=True pour un modèle uncased)
+- Niveau 1 : LRU en mémoire (OrderedDict, protégé par un verrou)
+- Niveau 2 : table SQLite `embedding_cache` (persiste entre sessions),
+  écrite par lots et bornée à max_disk_entries lignes
+- Compteurs hits/misses exposés via get_stats()
+"""
+
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str, lowercase: bool = False) -> str:
+    """
+    Normalise un texte pour la clé de cache
+
+    NFC + espaces compactés : "Salut  !" et "Salut !" partagent la même
+    entrée. Minuscules seulement si lowercase=True (modèle uncased comme
+    all-MiniLM-L6-v2) : un modèle sensible à la casse encode "Paris" et
+    "paris" différemment.
+    """
+    text = _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+    return text.lower() if lowercase else text
+
+
+def make_cache_key(text: str, model_name: str, lowercase: bool = False) -> str:
+    """Clé de cache : SHA-256 (modèle + texte normalisé)"""
+    payload = f"{model_name}\0{normalize_text(text, lowercase)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Cache à deux niveaux devant SentenceTransformer.encode
+
+    Les vecteurs sont stockés en float32 ; les valeurs retournées sont
+    en lecture seule (partagées entre appelants). Utilisable depuis
+    plusieurs threads (chat, MemoryWorker) : l'encodage se fait hors verrou.
+    """
+
+    def __init__(
+        self,
+        db=None,
+        model_name: str = "",
+        max_memory_entries: int = 2048,
+        max_disk_entries: int = 50000,
+        write_batch_size: int = 32,
+        lowercase: bool = False,
+    ):
+        """
+        Initialise le cache
+
+        Args:
+            db: Instance WorklyDatabase (niveau persistant, optionnel)
+            model_name: Nom du modèle d'embeddings (fait partie de la clé)
+            max_memory_entries: Taille du LRU en mémoire
+            max_disk_entries: Lignes max de la table SQLite (les plus
+                anciennes sont supprimées au-delà)
+            write_batch_size: Vecteurs calculés accumulés avant écriture
+                en base (flush() écrit le reste)
+            lowercase: Clé insensible à la casse (modèle uncased seulement)
+        """
+        self.db = db
+        self.model_name = model_name
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.write_batch_size = max(1, write_batch_size)
+        self.lowercase = lowercase
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+        # Vecteurs calculés pas encore écrits en base
+        self._pending: Dict[str, np.ndarray] = {}
+        self._disk_entries: Optional[int] = None  # Compté à la première écriture
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        """Ajoute au LRU en mémoire (évince l'entrée la plus ancienne, sous self._lock)"""
+        vector.setflags(write=False)
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_or_compute(
+        self, texts: List[str], encode_fn: Callable[[List[str]], np.ndarray]
+    ) -> np.ndarray:
+        """
+        Retourne les embeddings de textes, en n'encodant que les absents
+
+        Args:
+            texts: Textes à encoder
+            encode_fn: Fonction d'encodage par lot (ex: model.encode)
+
+        Returns:
+            Matrice (len(texts), dim) float32, dans l'ordre des textes
+        """
+        keys = [make_cache_key(text, self.model_name, self.lowercase) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+
+        # Niveau 1 : mémoire (et vecteurs en attente d'écriture)
+        with self._lock:
+            for key in keys:
+                if key in found:
+                    continue
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                    self.memory_hits += 1
+                elif key in self._pending:
+                    found[key] = self._pending[key]
+                    self._remember(key, found[key])
+                    self.memory_hits += 1
+
+        # Niveau 2 : SQLite (une seule requête pour toutes les clés absentes)
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing and self.db is not None:
+            disk = self.db.get_cached_embeddings(missing)
+            with self._lock:
+                for key, vector in disk.items():
+                    found[key] = vector
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+
+        # Calcul des textes restants (dédupliqués, en un seul lot)
+        to_compute = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in to_compute:
+                to_compute[key] = text
+
+        if to_compute:
+            vectors = np.asarray(
+                encode_fn(list(to_compute.values())), dtype=np.float32
+            ).reshape(len(to_compute), -1)
+            with self._lock:
+                self.misses += len(to_compute)
+                for key, vector in zip(to_compute, vectors):
+                    vector = vector.copy()
+                    found[key] = vector
+                    self._remember(key, vector)
+                    if self.db is not None:
+                        self._pending[key] = vector
+                full = len(self._pending) >= self.write_batch_size
+            if full:
+                self.flush()
+
+        return np.vstack([found[key] for key in keys])
+
+    def flush(self) -> int:
+        """
+        Écrit en base les vecteurs calculés en attente (une transaction)
+
+        Supprime ensuite les lignes les plus anciennes si la table dépasse
+        max_disk_entries.
+
+        Returns:
+            Nombre de vecteurs écrits
+        """
+        if self.db is None:
+            return 0
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        self.db.add_cached_embeddings(
+            [(key, self.model_name, vector) for key, vector in pending.items()]
+        )
+
+        with self._lock:
+            if self._disk_entries is None:
+                self._disk_entries = self.db.count_cached_embeddings()
+            else:
+                self._disk_entries += len(pending)  # Surestimé si REPLACE
+            over = self._disk_entries > self.max_disk_entries
+        if over:
+            remaining = self.db.prune_embedding_cache(self.max_disk_entries)
+            with self._lock:
+                self._disk_entries = remaining
+        return len(pending)
+
+    def clear(self, persistent: bool = False) -> None:
+        """Vide le LRU (et le niveau SQLite si persistent=True)"""
+        with self._lock:
+            self._memory.clear()
+            self._pending.clear()
+        if persistent and self.db is not None:
+            self.db.clear_embedding_cache(self.model_name)
+            with self._lock:
+                self._disk_entries = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Compteurs hits/misses et taille du LRU"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "pending_writes": len(self._pending),
+            }
+
+    def __repr__(self) -> str:
+        return f"<EmbeddingCache: {len(self._memory)} en mémoire, modèle={self.model_name}>"
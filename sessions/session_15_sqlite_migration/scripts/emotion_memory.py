@@ -181,6 +181,53 @@ class EmotionMemory:
         # Ajouter au cache (deque gère max_entries automatiquement)
         self.history.append(entry)
 
+    def add_emotions(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Ajoute plusieurs émotions en une seule transaction (analyse par lots)
+
+        Args:
+            records: Dicts avec les arguments de add_emotion (emotion,
+                intensity, confidence, source, message, context)
+
+        Returns:
+            Nombre d'émotions ajoutées
+        """
+        entries = []
+        for record in records:
+            message = record["message"]
+            context = record.get("context")
+            entries.append(
+                EmotionEntry(
+                    emotion=record["emotion"],
+                    intensity=record["intensity"],
+                    confidence=record["confidence"],
+                    source=record["source"],
+                    message_preview=message[:100] + "..." if len(message) > 100 else message,
+                    timestamp=datetime.utcnow().isoformat(),
+                    context=context or {},
+                )
+            )
+
+        # Écrire dans SQLite (executemany, pas d'ID par ligne)
+        self.db.add_emotions_batch(
+            [
+                {
+                    "emotion": entry.emotion,
+                    "intensity": entry.intensity,
+                    "confidence": entry.confidence,
+                    "source": entry.source,
+                    "message_preview": entry.message_preview,
+                    "context": json.dumps(entry.context) if entry.context else "",
+                    "timestamp": entry.timestamp,
+                }
+                for entry in entries
+            ]
+        )
+
+        # Ajouter au cache (seules les max_entries dernières restent)
+        self.history.extend(entries)
+        return len(entries)
+
     def get_recent_emotions(
         self, count: int = 10, source: Optional[str] = None
     ) -> List[EmotionEntry]:
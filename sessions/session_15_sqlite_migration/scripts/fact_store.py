@@ -0,0 +1,459 @@
+"""
+fact_store.py - Faits extraits en mémoire, indexés (MemoryManager.facts)
+
+MemoryManager.facts était un dict de listes : dédoublonnage des entités
+par parcours linéaire, tri de toutes les entités par occurrences à chaque
+prompt, parcours des préférences à chaque tour (ChatEngine). Ici :
+- Index par (type, valeur normalisée) : entités (dédoublonnage O(1)) et
+  préférences (sentiment, sujet) → présence en O(1)
+- Top-K des entités par occurrences maintenu à chaque ajout (K petit)
+- File de récence par catégorie (OrderedDict borné, entité revue = remise
+  en tête)
+- Écriture immédiate dans SQLite, une transaction par message : une ligne
+  par entité (mise à jour quand elle est revue, pas une ligne par mention),
+  une ligne par préférence/événement/relation ; rechargement au démarrage
+
+Reste lisible comme l'ancien dict : facts["preferences"],
+facts.get("entities", []) (tuples, faits en lecture seule).
+"""
+
+import bisect
+import heapq
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+# Catégories de faits (colonne facts.category)
+FACT_CATEGORIES = ("entities", "preferences", "events", "relationships")
+
+# Champ du fait → colonne facts.type
+_TYPE_FIELDS = {
+    "entities": "entity_type",
+    "preferences": "category",
+    "events": "event_type",
+    "relationships": "relation_type",
+}
+
+
+def _normalize(value: Any) -> str:
+    """Valeur normalisée pour les index (casse ignorée)"""
+    return str(value or "").strip().lower()
+
+
+def _entity_key(entity: Dict[str, Any]) -> Tuple[str, str]:
+    """Clé de dédoublonnage d'une entité : (type, valeur normalisée)"""
+    return (entity.get("entity_type"), _normalize(entity.get("value")))
+
+
+def _merge_entity(known: Optional[Dict[str, Any]], mention: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    État d'une entité après une nouvelle mention
+
+    Args:
+        known: Entité déjà connue (non modifiée) ou None
+        mention: Entité extraite du message
+
+    Returns:
+        Nouveau dict : la mention si l'entité est nouvelle, sinon l'entité
+        connue avec occurrences + 1 et last_seen mis à jour
+    """
+    if known is None:
+        return dict(mention)
+    merged = dict(known)
+    merged["occurrences"] = known.get("occurrences", 1) + 1
+    merged["last_seen"] = mention.get("first_seen", datetime.utcnow().isoformat())
+    return merged
+
+
+def _row(category: str, fact: Dict[str, Any], timestamp: str, row_id: Optional[int] = None) -> Dict[str, Any]:
+    """Fait → arguments de WorklyDatabase.upsert_facts_batch"""
+    return {
+        "id": row_id,
+        "category": category,
+        "type_": fact.get(_TYPE_FIELDS[category], "general"),
+        "data": fact,
+        "timestamp": timestamp,
+    }
+
+
+class FactStore(Mapping):
+    """
+    Faits par catégorie avec index, top-K et files de récence
+
+    Les ajouts passent par add_facts (SQLite puis mémoire) ; facts[catégorie]
+    retourne un tuple, les faits qu'il contient ne doivent pas être modifiés
+    directement (index non mis à jour).
+    """
+
+    def __init__(self, db=None, top_k: int = 5, recent_size: int = 50):
+        """
+        Initialise le magasin (vide)
+
+        Args:
+            db: Instance WorklyDatabase (écriture immédiate, optionnelle)
+            top_k: Entités les plus fréquentes maintenues en continu
+            recent_size: Faits gardés par file de récence
+        """
+        self.db = db
+        self.top_k = max(1, top_k)
+        self.recent_size = recent_size
+        self._lock = threading.Lock()
+
+        self._facts: Dict[str, List[Dict[str, Any]]] = {c: [] for c in FACT_CATEGORIES}
+        self._seq = 0
+
+        # (entity_type, valeur normalisée) → entité ; rang d'insertion
+        self._entities: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._entity_seq: Dict[Tuple[str, str], int] = {}
+        # (entity_type, valeur normalisée) → id de sa ligne SQLite
+        self._entity_ids: Dict[Tuple[str, str], int] = {}
+        # Entités écrites dans une transaction pas encore validée : (état, id)
+        self._staged: Dict[Tuple[str, str], Tuple[Dict[str, Any], int]] = {}
+        # Top-K trié par (-occurrences, rang d'insertion) : même ordre qu'un
+        # tri stable décroissant sur les occurrences
+        self._top: List[Tuple[Tuple[int, int], Tuple[str, str]]] = []
+        self._top_keys = set()
+
+        # (sentiment, sujet normalisé) → nombre de préférences
+        self._preferences: Dict[Tuple[str, str], int] = {}
+
+        # Catégorie → {clé: fait}, plus récent en dernier
+        self._recent: Dict[str, "OrderedDict[Hashable, Dict[str, Any]]"] = {
+            c: OrderedDict() for c in FACT_CATEGORIES
+        }
+
+    # ========== LECTURE (compatible dict de listes) ==========
+
+    def __getitem__(self, category: str) -> Tuple[Dict[str, Any], ...]:
+        with self._lock:
+            return tuple(self._facts[category])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._facts)
+
+    def __len__(self) -> int:
+        return len(self._facts)
+
+    def __setitem__(self, category: str, facts: Iterable[Dict[str, Any]]) -> None:
+        """Remplace une catégorie en mémoire (index reconstruits, SQLite inchangé)"""
+        if category not in self._facts:
+            raise KeyError(category)
+        with self._lock:
+            self._reset(category)
+            for fact in facts:
+                self._insert(category, fact)
+
+    def count(self, category: str) -> int:
+        """Nombre de faits d'une catégorie (entités dédoublonnées)"""
+        with self._lock:
+            return len(self._facts.get(category, ()))
+
+    # ========== REQUÊTES INDEXÉES ==========
+
+    def find_entity(self, entity_type: str, value: str) -> Optional[Dict[str, Any]]:
+        """
+        Entité connue (casse de la valeur ignorée)
+
+        Args:
+            entity_type: 'person', 'location', 'date', 'organization'
+            value: Valeur de l'entité
+
+        Returns:
+            Entité stockée ou None
+        """
+        with self._lock:
+            return self._entities.get((entity_type, _normalize(value)))
+
+    def top_entities(self, n: int) -> List[Dict[str, Any]]:
+        """
+        Entités les plus fréquentes (à égalité : la plus ancienne d'abord)
+
+        Args:
+            n: Nombre d'entités
+
+        Returns:
+            Au plus n entités, occurrences décroissantes
+        """
+        with self._lock:
+            if n <= self.top_k:
+                return [self._entities[key] for _, key in self._top[:n]]
+            return [
+                self._entities[key]
+                for key in heapq.nsmallest(n, self._entities, key=self._entity_rank)
+            ]
+
+    def recent(self, category: str, n: int) -> List[Dict[str, Any]]:
+        """
+        Derniers faits ajoutés (ou entités revues) d'une catégorie
+
+        Args:
+            category: Catégorie de faits
+            n: Nombre de faits (au plus recent_size)
+
+        Returns:
+            Faits du plus récent au plus ancien
+        """
+        with self._lock:
+            return list(islice(reversed(self._recent[category].values()), n))
+
+    def has_preference(self, subjects: Iterable[str], sentiment: str = "positive") -> bool:
+        """
+        Au moins une préférence de ce sentiment sur l'un des sujets
+
+        Args:
+            subjects: Sujets cherchés (casse ignorée)
+            sentiment: 'positive' ou 'negative'
+
+        Returns:
+            True si une préférence correspond
+        """
+        keys = [(sentiment, _normalize(subject)) for subject in subjects]
+        with self._lock:
+            return any(key in self._preferences for key in keys)
+
+    # ========== ÉCRITURE ==========
+
+    def add_facts(self, facts: Dict[str, List[Dict[str, Any]]], timestamp: Optional[str] = None) -> int:
+        """
+        Ajoute les faits d'un message (SQLite puis mémoire)
+
+        Entité déjà connue : occurrences incrémentées, sa ligne SQLite mise
+        à jour (pas de nouvelle ligne). Dans une transaction englobante, la
+        mémoire n'est modifiée qu'après son COMMIT (rien après un ROLLBACK).
+
+        Args:
+            facts: Catégorie → faits (dicts FactExtractor.extract_all_facts)
+            timestamp: Horodatage des lignes SQLite (défaut : maintenant)
+
+        Returns:
+            Nombre de faits ajoutés
+        """
+        timestamp = timestamp or datetime.utcnow().isoformat()
+        others = [
+            (category, fact)
+            for category in FACT_CATEGORIES
+            if category != "entities"
+            for fact in facts.get(category, ())
+        ]
+        mentions = list(facts.get("entities", ()))
+        if not mentions and not others:
+            return 0
+
+        with self._lock:
+            # Entités : état final de chaque entité touchée par ce message
+            # (y compris les écritures de la transaction pas encore validées)
+            entities: Dict[Tuple[str, str], Dict[str, Any]] = {}
+            for fact in mentions:
+                key = _entity_key(fact)
+                staged = self._staged.get(key)
+                known = entities.get(key) or (staged[0] if staged else self._entities.get(key))
+                entities[key] = _merge_entity(known, fact)
+
+            if self.db is None:
+                self._apply(entities, {}, others)
+                return len(mentions) + len(others)
+
+            ids = self.db.upsert_facts_batch(
+                [
+                    _row("entities", entity, timestamp, self._entity_id(key))
+                    for key, entity in entities.items()
+                ]
+                + [_row(category, fact, timestamp) for category, fact in others]
+            )
+            staged = {key: (entity, id_) for (key, entity), id_ in zip(entities.items(), ids)}
+            self._staged.update(staged)
+
+        def apply():
+            with self._lock:
+                self._unstage(staged)
+                self._apply(entities, {key: id_ for key, (_, id_) in staged.items()}, others)
+
+        def forget():
+            with self._lock:
+                self._unstage(staged)
+
+        self.db.call_after_commit(apply, on_rollback=forget)
+        return len(mentions) + len(others)
+
+    def _entity_id(self, key: Tuple[str, str]) -> Optional[int]:
+        """Id SQLite d'une entité (écrite dans la transaction en cours ou validée)"""
+        staged = self._staged.get(key)
+        return staged[1] if staged else self._entity_ids.get(key)
+
+    def _unstage(self, staged: Dict[Tuple[str, str], Tuple[Dict[str, Any], int]]) -> None:
+        """Retire des entités en attente (sauf si réécrites depuis)"""
+        for key, item in staged.items():
+            if self._staged.get(key) is item:
+                del self._staged[key]
+
+    def _apply(
+        self,
+        entities: Dict[Tuple[str, str], Dict[str, Any]],
+        ids: Dict[Tuple[str, str], int],
+        others: List[Tuple[str, Dict[str, Any]]],
+    ) -> None:
+        """Reporte en mémoire des faits écrits (verrou détenu)"""
+        self._entity_ids.update(ids)
+        for key, entity in entities.items():
+            self._put_entity(key, entity)
+        for category, fact in others:
+            self._insert(category, fact)
+
+    def load_from_database(self) -> int:
+        """
+        Recharge les faits depuis SQLite
+
+        Bases antérieures (une ligne par mention d'entité) : les doublons
+        sont fusionnés en mémoire puis compactés en base (une seule fois).
+
+        Returns:
+            Nombre de lignes lues
+        """
+        if self.db is None:
+            return 0
+
+        # Ordre des id = ordre d'insertion (une entité revue garde son id)
+        rows = sorted(self.db.get_facts(), key=lambda row: row["id"])
+        duplicates: List[int] = []
+        merged = set()
+        with self._lock:
+            for category in FACT_CATEGORIES:
+                self._reset(category)
+            seen_at: Dict[Tuple[str, str], str] = {}
+            for row in rows:
+                if row["category"] not in self._facts or not isinstance(row["data"], dict):
+                    continue
+                fact = dict(row["data"])
+                fact.setdefault("extracted_at", row["timestamp"])
+                if row["category"] != "entities":
+                    self._insert(row["category"], fact)
+                    continue
+
+                key = _entity_key(fact)
+                known = self._entities.get(key)
+                if known is not None:
+                    # Ligne de mention héritée : cumuler dans la plus récente
+                    fact["occurrences"] = known.get("occurrences", 1) + fact.get("occurrences", 1)
+                    fact["last_seen"] = fact.get("last_seen", fact.get("first_seen"))
+                    fact["first_seen"] = known.get("first_seen", fact.get("first_seen"))
+                    duplicates.append(self._entity_ids[key])
+                    merged.add(key)
+                self._put_entity(key, fact)
+                self._entity_ids[key] = row["id"]
+                seen_at[key] = max(row["timestamp"], seen_at.get(key, ""))
+
+            # File de récence des entités : dernière mise à jour d'abord
+            recent = self._recent["entities"]
+            recent.clear()
+            for key in sorted(seen_at, key=seen_at.get):
+                self._remember("entities", key, self._entities[key])
+
+            if duplicates:
+                self.db.upsert_facts_batch(
+                    [
+                        _row("entities", self._entities[key], seen_at[key], self._entity_ids[key])
+                        for key in merged
+                    ],
+                    delete_ids=duplicates,
+                )
+        return len(rows)
+
+    # ========== INDEX (sous self._lock) ==========
+
+    def _reset(self, category: str) -> None:
+        """Vide une catégorie et ses index"""
+        self._facts[category] = []
+        self._recent[category].clear()
+        if category == "entities":
+            self._entities.clear()
+            self._entity_seq.clear()
+            self._entity_ids.clear()
+            self._staged.clear()
+            self._top.clear()
+            self._top_keys.clear()
+        elif category == "preferences":
+            self._preferences.clear()
+
+    def _insert(self, category: str, fact: Dict[str, Any]) -> None:
+        """Ajoute un fait en mémoire et met à jour les index"""
+        if category == "entities":
+            key = _entity_key(fact)
+            self._put_entity(key, _merge_entity(self._entities.get(key), fact))
+            return
+
+        self._seq += 1
+        if category == "preferences":
+            pref_key = (fact.get("sentiment"), _normalize(fact.get("subject")))
+            self._preferences[pref_key] = self._preferences.get(pref_key, 0) + 1
+
+        self._facts[category].append(fact)
+        self._remember(category, self._seq, fact)
+
+    def _put_entity(self, key: Tuple[str, str], entity: Dict[str, Any]) -> None:
+        """Enregistre l'état d'une entité (nouvelle ou mise à jour sur place)"""
+        existing = self._entities.get(key)
+        if existing is not None:
+            existing.update(entity)
+            entity = existing
+        else:
+            self._seq += 1
+            self._entities[key] = entity
+            self._entity_seq[key] = self._seq
+            self._facts["entities"].append(entity)
+        self._update_top(key)
+        self._remember("entities", key, entity)
+
+    def _remember(self, category: str, key: Hashable, fact: Dict[str, Any]) -> None:
+        """Place le fait en tête de la file de récence (bornée)"""
+        recent = self._recent[category]
+        recent[key] = fact
+        recent.move_to_end(key)
+        while len(recent) > self.recent_size:
+            recent.popitem(last=False)
+
+    def _entity_rank(self, key: Tuple[str, str]) -> Tuple[int, int]:
+        """Clé de tri : occurrences décroissantes puis ordre d'insertion"""
+        return (-self._entities[key].get("occurrences", 1), self._entity_seq[key])
+
+    def _update_top(self, key: Tuple[str, str]) -> None:
+        """
+        Repositionne une entité dans le top-K après ajout ou incrément
+
+        Les occurrences ne font qu'augmenter : une entité hors du top n'y
+        entre qu'au moment où elle est revue, donc ici.
+        """
+        top = self._top
+        rank = self._entity_rank(key)
+        if key in self._top_keys:
+            for i, (_, top_key) in enumerate(top):
+                if top_key == key:
+                    del top[i]
+                    break
+        elif len(top) >= self.top_k and rank >= top[-1][0]:
+            return
+        else:
+            self._top_keys.add(key)
+
+        bisect.insort(top, (rank, key))
+        if len(top) > self.top_k:
+            _, evicted = top.pop()
+            self._top_keys.discard(evicted)
+
+    # ========== STATISTIQUES ==========
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne les tailles du magasin
+
+        Returns:
+            Dict avec faits par catégorie, préférences indexées, top_k
+        """
+        with self._lock:
+            return {
+                "counts": {category: len(items) for category, items in self._facts.items()},
+                "indexed_preferences": len(self._preferences),
+                "top_k": self.top_k,
+            }
@@ -6,19 +6,22 @@ Ce module orchestre toutes les fonctionnalités de mémoire :
 - Extraction automatique de faits (via FactExtractor)
 - Résumés automatiques (via ConversationSummarizer)
 - Recherche sémantique (via sentence-transformers)
+- Contexte de prompt classé par fusion BM25 + cosinus (via ContextRanker)
 
 Architecture :
 - Conversations stockées dans base SQLite avec résumés
-- Faits extraits et indexés par type
+- Faits extraits et indexés par type (FactStore : index, top-K, récence)
 - Embeddings pour recherche sémantique rapide
 - Résumés générés automatiquement tous les 20-30 messages
+- Maintenance (résumé + embedding) optionnellement en arrière-plan (MemoryWorker)
 
 Migration Phase 6 : JSON → SQLite (performance + ACID)
 """
 
 import json
 import os
-from typing import List, Dict, Optional, Any, Tuple
+import threading
+from typing import List, Dict, Optional, Any, Tuple, Union
 from datetime import datetime
 import numpy as np
 
@@ -33,13 +36,33 @@ except ImportError:
 # Modules Workly
 try:
     from .fact_extractor import FactExtractor
+    from .fact_store import FactStore
     from .conversation_summarizer import ConversationSummarizer
     from .database import get_database
+    from .vector_index import VectorIndex
+    from .embedding_cache import EmbeddingCache
+    from .memory_worker import MemoryWorker
+    from .context_ranker import ContextCandidate, ContextRanker, approximate_tokens
+    from .analyzed_text import AnalyzedText
 except ImportError:
     # Fallback pour exécution standalone (test)
     from fact_extractor import FactExtractor
+    from fact_store import FactStore
     from conversation_summarizer import ConversationSummarizer
     from database import get_database
+    from vector_index import VectorIndex
+    from embedding_cache import EmbeddingCache
+    from memory_worker import MemoryWorker
+    from context_ranker import ContextCandidate, ContextRanker, approximate_tokens
+    from analyzed_text import AnalyzedText
+
+# En-têtes des sections du contexte (comptés dans le budget)
+_SEGMENTS_HEADER = "=== Conversations Précédentes ==="
+_FACTS_HEADER = "=== Faits Mémorisés ==="
+_CURRENT_HEADER = "=== Conversation Actuelle ==="
+
+# Poids RRF des classements indépendants de la requête (profil, segments récents)
+_PROFILE_WEIGHT = 0.3
 
 
 class MemoryManager:
@@ -58,6 +81,10 @@ class MemoryManager:
         storage_dir: str = "data/memory",
         llm_callback=None,
         embedding_model: str = "all-MiniLM-L6-v2",
+        vector_index_mode: str = "auto",
+        use_embedding_store: bool = False,
+        async_maintenance: bool = False,
+        max_pending_segments: int = 8,
     ):
         """
         Initialise le gestionnaire de mémoire
@@ -66,6 +93,11 @@ class MemoryManager:
             storage_dir: Dossier de stockage (base SQLite + cache)
             llm_callback: Callback pour générer texte via LLM (pour résumés)
             embedding_model: Nom du modèle sentence-transformers
+            vector_index_mode: Mode de l'index vectoriel ("exact", "ivf", "auto")
+            use_embedding_store: Sidecar mmap des embeddings (RAM plate)
+            async_maintenance: Résumé/embedding des segments en arrière-plan
+                (add_message ne bloque plus sur le LLM)
+            max_pending_segments: Profondeur max de la file d'arrière-plan
         """
         self.storage_dir = storage_dir
         self.llm_callback = llm_callback
@@ -75,7 +107,7 @@ class MemoryManager:
 
         # Base de données SQLite
         db_path = os.path.join(storage_dir, "workly.db")
-        self.db = get_database(db_path)
+        self.db = get_database(db_path, use_embedding_store=use_embedding_store)
 
         # Chemins des fichiers de persistance (gardés pour backward compatibility)
         self.conversations_file = os.path.join(storage_dir, "conversations.json")
@@ -102,11 +134,37 @@ class MemoryManager:
                 "⚠️ sentence-transformers non disponible - recherche sémantique désactivée"
             )
 
+        # Cache des embeddings calculés (LRU mémoire + table SQLite)
+        self.embedding_cache = EmbeddingCache(self.db, model_name=embedding_model)
+
         # Cache en mémoire (chargé depuis SQLite)
         self.conversations = {"segments": self._load_segments_from_db()}
-        self.facts = self._load_facts_from_db()
+        self.facts = FactStore(self.db)
+        try:
+            self.facts.load_from_database()
+        except Exception as e:
+            print(f"⚠️ Erreur chargement faits: {e}")
         self.embeddings_data = {"embeddings": []}  # Pas de cache (requêtes directes DB)
 
+        # Index vectoriel (chargé une seule fois, mis à jour à chaque embedding)
+        self.vector_index = VectorIndex(mode=vector_index_mode)
+        self._index_lock = threading.Lock()  # Index partagé avec le worker
+        try:
+            self.vector_index.load_from_database(self.db)
+        except Exception as e:
+            print(f"⚠️ Erreur chargement index vectoriel: {e}")
+        embedding_store = getattr(self.db, "embedding_store", None)
+        if embedding_store is not None:
+            # Sidecar reconstruit : l'index lâche sa vue mmap avant
+            embedding_store.on_release(self._release_index_base)
+
+        # File d'arrière-plan (None = maintenance synchrone)
+        self.worker: Optional[MemoryWorker] = (
+            MemoryWorker(max_queue_size=max_pending_segments)
+            if async_maintenance
+            else None
+        )
+
         # État de la conversation courante (en mémoire)
         self.current_conversation = []
         self.current_segment_id = self._get_next_segment_id()
@@ -115,8 +173,18 @@ class MemoryManager:
         self.max_messages_per_segment = 30
         self.auto_summarize_threshold = 20
 
+        # Classement du contexte (fusion BM25 + cosinus, budget de tokens)
+        self.context_ranker = ContextRanker()
+        self.retrieval_top_k = 8  # Candidats par classement avant fusion
+        self.count_tokens = approximate_tokens
+
     # ========== MÉTHODES HELPER CHARGEMENT ==========
 
+    def _release_index_base(self) -> None:
+        """Copie en RAM la base mmap de l'index (avant reset du sidecar)"""
+        with self._index_lock:
+            self.vector_index.detach_base()
+
     def _load_segments_from_db(self) -> List[Dict[str, Any]]:
         """Charge tous les segments depuis SQLite"""
         try:
@@ -143,39 +211,6 @@ class MemoryManager:
             print(f"⚠️ Erreur chargement segments: {e}")
             return []
 
-    def _load_facts_from_db(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Charge tous les faits depuis SQLite"""
-        try:
-            db_facts = self.db.get_facts()
-            facts = {
-                "entities": [],
-                "preferences": [],
-                "events": [],
-                "relationships": [],
-            }
-            for fact in db_facts:
-                fact_dict = {
-                    "category": fact["category"],
-                    "content": (
-                        json.loads(fact["content"])
-                        if isinstance(fact["content"], str)
-                        else fact["content"]
-                    ),
-                    "extracted_at": fact["extracted_at"],
-                }
-                # Aplatir le contenu dans le dict
-                fact_dict.update(fact_dict.pop("content"))
-                facts[fact["category"]].append(fact_dict)
-            return facts
-        except Exception as e:
-            print(f"⚠️ Erreur chargement faits: {e}")
-            return {
-                "entities": [],
-                "preferences": [],
-                "events": [],
-                "relationships": [],
-            }
-
     # ========== STOCKAGE DE CONVERSATIONS ==========
 
     def add_message(self, role: str, content: str) -> None:
@@ -186,6 +221,100 @@ class MemoryManager:
             role: 'user' ou 'assistant'
             content: Contenu du message
         """
+        # Message + faits extraits : une seule transaction
+        with self.db.transaction():
+            self._store_message(role, content)
+
+        self._check_segmentation()
+
+    def add_exchange(
+        self,
+        user_message: Union[str, AnalyzedText],
+        assistant_message: str,
+        user_id: str = "default",
+        source: str = "desktop",
+    ) -> None:
+        """
+        Ajoute un tour complet (utilisateur + assistant) en une transaction
+
+        Args:
+            user_message: Message de l'utilisateur (brut ou déjà prétraité,
+                réutilisé par l'extraction de faits)
+            assistant_message: Réponse de l'assistant
+            user_id: ID utilisateur (historique par conversation)
+            source: Source du message ('desktop', 'discord', ...)
+        """
+        with self.db.transaction():
+            self._store_message("user", user_message, user_id, source)
+            self._store_message("assistant", assistant_message, user_id, source)
+
+        self._check_segmentation()
+
+    def get_recent_exchanges(
+        self, user_id: str, source: str, limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Derniers tours d'une conversation (historique du prompt)
+
+        Lecture bornée par l'index (user_id, source, timestamp, id) :
+        2 × limit messages lus, quelle que soit la taille de la base.
+
+        Args:
+            user_id: ID utilisateur
+            source: Source ('desktop', 'discord', ...)
+            limit: Nombre max de tours
+
+        Returns:
+            Tours {user_input, bot_response, timestamp}, plus ancien en premier
+        """
+        exchanges: List[Dict[str, Any]] = []
+        for msg in self.db.get_recent_turns(user_id, source, n=limit * 2):
+            if msg["role"] == "user":
+                exchanges.append(
+                    {
+                        "user_input": msg["content"],
+                        "bot_response": "",
+                        "timestamp": msg["timestamp"],
+                    }
+                )
+            elif msg["role"] == "assistant" and exchanges and not exchanges[-1]["bot_response"]:
+                exchanges[-1]["bot_response"] = msg["content"]
+        return exchanges[-limit:]
+
+    def clear_history(self, user_id: str, source: Optional[str] = None) -> int:
+        """
+        Efface les messages d'un utilisateur (segments et faits conservés)
+
+        Args:
+            user_id: ID utilisateur
+            source: Filtrer par source (None = toutes)
+
+        Returns:
+            Nombre de messages supprimés
+        """
+        return self.db.delete_user_conversations(user_id, source)
+
+    def _store_message(
+        self,
+        role: str,
+        content: Union[str, AnalyzedText],
+        user_id: str = "default",
+        source: str = "desktop",
+    ) -> None:
+        """
+        Enregistre un message (SQLite + mémoire) et extrait ses faits
+
+        Appelé dans une transaction : la conversation courante (comme les
+        faits, cf. FactStore.add_facts) n'est modifiée qu'après le COMMIT.
+
+        Args:
+            role: 'user' ou 'assistant'
+            content: Contenu du message (brut ou déjà prétraité)
+            user_id: ID utilisateur
+            source: Source du message
+        """
+        analyzed = content
+        content = str(content)
         message = {
             "role": role,
             "content": content,
@@ -197,61 +326,76 @@ class MemoryManager:
             role=role,
             content=content,
             timestamp=message["timestamp"],
-            user_id="default",
+            user_id=user_id,
+            source=source,
             metadata=json.dumps({"segment_id": self.current_segment_id}),
         )
 
-        self.current_conversation.append(message)
+        self.db.call_after_commit(lambda: self.current_conversation.append(message))
 
         # Extraire faits du message utilisateur
         if role == "user":
-            self._extract_and_store_facts(content)
+            self._extract_and_store_facts(analyzed)
 
-        # Vérifier si besoin de résumer/segmenter
+    def _check_segmentation(self) -> None:
+        """Résume/segmente si le seuil est atteint (hors transaction)"""
         if len(self.current_conversation) >= self.auto_summarize_threshold:
             self._auto_summarize_and_segment()
 
     def _auto_summarize_and_segment(self) -> None:
         """
-        Génère résumé automatique et crée nouveau segment
+        Clôt la conversation courante et crée un nouveau segment
+
+        Le segment (résumé LLM, points clés, embedding) est construit par
+        _build_segment : dans le worker si async_maintenance, sinon ici.
         """
         if len(self.current_conversation) < self.summarizer.min_messages_for_summary:
             return
 
+        # Instantané puis réinitialisation immédiate (le tour de chat continue)
+        messages = self.current_conversation
+        segment_id = self.current_segment_id
+        self.current_conversation = []
+
+        if self.worker:
+            self.worker.submit(segment_id, self._build_segment, messages, segment_id)
+        else:
+            self._build_segment(messages, segment_id)
+
+        self.current_segment_id = self._get_next_segment_id()
+
+    def _build_segment(self, messages: List[Dict[str, Any]], segment_id: str) -> None:
+        """
+        Génère résumé + embedding d'un segment et le sauvegarde
+
+        Args:
+            messages: Messages du segment (instantané)
+            segment_id: ID du segment
+        """
         # Générer résumé
-        summary_data = self.summarizer.summarize(
-            self.current_conversation, include_keypoints=True
-        )
+        summary_data = self.summarizer.summarize(messages, include_keypoints=True)
 
         # Créer segment
         segment = {
-            "segment_id": self.current_segment_id,
-            "messages": self.current_conversation.copy(),
+            "segment_id": segment_id,
+            "messages": messages,
             "summary": summary_data,
             "created_at": datetime.utcnow().isoformat(),
-            "message_count": len(self.current_conversation),
+            "message_count": len(messages),
         }
 
         # Sauvegarder dans SQLite
-        start_ts = (
-            self.current_conversation[0]["timestamp"]
-            if self.current_conversation
-            else datetime.utcnow().isoformat()
-        )
-        end_ts = (
-            self.current_conversation[-1]["timestamp"]
-            if self.current_conversation
-            else datetime.utcnow().isoformat()
-        )
+        start_ts = messages[0]["timestamp"] if messages else datetime.utcnow().isoformat()
+        end_ts = messages[-1]["timestamp"] if messages else datetime.utcnow().isoformat()
 
         self.db.add_segment(
             summary=summary_data.get("summary", ""),
-            message_count=len(self.current_conversation),
+            message_count=len(messages),
             start_timestamp=start_ts,
             end_timestamp=end_ts,
             topics=summary_data.get("keypoints", []),
             metadata={
-                "segment_id": self.current_segment_id,
+                "segment_id": segment_id,
                 "full_summary": summary_data,
             },
         )
@@ -259,19 +403,22 @@ class MemoryManager:
         # Mettre à jour cache
         self.conversations["segments"].append(segment)
 
-        # Générer embedding du résumé
+        # Générer embedding du résumé (abandonnable si la file est saturée :
+        # le segment et son résumé restent en base)
         if self.embedding_model and summary_data.get("summary"):
-            self._generate_and_store_embedding(
-                text=summary_data["summary"],
-                segment_id=self.current_segment_id,
-                metadata={"type": "segment_summary"},
-            )
-
-        # Réinitialiser conversation courante
-        self.current_conversation = []
-        self.current_segment_id = self._get_next_segment_id()
+            embed_args = (summary_data["summary"], segment_id, {"type": "segment_summary"})
+            if self.worker:
+                self.worker.submit(
+                    f"{segment_id}:embedding",
+                    self._generate_and_store_embedding,
+                    *embed_args,
+                    block_timeout=0,
+                    low_priority=True,
+                )
+            else:
+                self._generate_and_store_embedding(*embed_args)
 
-        print(f"✅ Segment auto-créé avec résumé ({len(segment['messages'])} messages)")
+        print(f"✅ Segment auto-créé avec résumé ({len(messages)} messages)")
 
     def force_segment_creation(self) -> Dict[str, Any]:
         """
@@ -284,91 +431,56 @@ class MemoryManager:
             return {"error": "Aucun message dans conversation courante"}
 
         self._auto_summarize_and_segment()
+        self.flush()
         return (
             self.conversations["segments"][-1] if self.conversations["segments"] else {}
         )
 
-    # ========== EXTRACTION DE FAITS ==========
-
-    def _extract_and_store_facts(self, message: str) -> None:
+    def flush(self, timeout: Optional[float] = None) -> bool:
         """
-        Extrait faits d'un message et les stocke
+        Attend la fin des résumés/embeddings en arrière-plan, puis écrit
+        les embeddings calculés encore en attente
 
         Args:
-            message: Message utilisateur à analyser
-        """
-        facts = self.fact_extractor.extract_all_facts(message)
+            timeout: Attente max en secondes (None = illimitée)
 
-        # Ajouter timestamp à tous les faits
-        timestamp = datetime.utcnow().isoformat()
-
-        # Stocker entités
-        for entity in facts["entities"]:
-            entity["extracted_at"] = timestamp
-            self._add_or_update_entity(entity)
-            # Sauver dans SQLite
-            self.db.add_fact(
-                category="entities",
-                type_=entity.get("entity_type", "unknown"),
-                data=entity,
-                timestamp=timestamp,
-            )
+        Returns:
+            True si toutes les tâches sont terminées
+        """
+        done = self.worker.flush(timeout) if self.worker else True
+        self.embedding_cache.flush()  # Vecteurs calculés en attente d'écriture
+        return done
 
-        # Stocker préférences
-        for pref in facts["preferences"]:
-            pref["extracted_at"] = timestamp
-            self.facts["preferences"].append(pref)
-            self.db.add_fact(
-                category="preferences",
-                type_=pref.get("category", "general"),
-                data=pref,
-                timestamp=timestamp,
-            )
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Termine les tâches en attente puis arrête le worker
 
-        # Stocker événements
-        for event in facts["events"]:
-            event["extracted_at"] = timestamp
-            self.facts["events"].append(event)
-            self.db.add_fact(
-                category="events",
-                type_=event.get("event_type", "general"),
-                data=event,
-                timestamp=timestamp,
-            )
+        Args:
+            timeout: Attente max en secondes (None = illimitée)
+        """
+        if self.worker:
+            self.worker.shutdown(drain=True, timeout=timeout)
+        self.embedding_cache.flush()
 
-        # Stocker relations
-        for rel in facts["relationships"]:
-            rel["extracted_at"] = timestamp
-            self.facts["relationships"].append(rel)
-            self.db.add_fact(
-                category="relationships",
-                type_=rel.get("relationship_type", "general"),
-                data=rel,
-                timestamp=timestamp,
-            )
+    # ========== EXTRACTION DE FAITS ==========
 
-    def _add_or_update_entity(self, entity: Dict[str, Any]) -> None:
+    def _extract_and_store_facts(self, message: Union[str, AnalyzedText]) -> None:
         """
-        Ajoute ou met à jour une entité (incrémente occurrences si existe)
+        Extrait faits d'un message et les stocke
 
         Args:
-            entity: Dictionnaire entité
-        """
-        # Chercher entité existante
-        for existing in self.facts["entities"]:
-            if (
-                existing["entity_type"] == entity["entity_type"]
-                and existing["value"].lower() == entity["value"].lower()
-            ):
-                # Incrémenter occurrences
-                existing["occurrences"] += 1
-                existing["last_seen"] = entity.get(
-                    "first_seen", datetime.utcnow().isoformat()
-                )
-                return
+            message: Message utilisateur à analyser (brut ou déjà prétraité)
+        """
+        facts = self.fact_extractor.extract_all_facts(message)
+
+        # Ajouter timestamp à tous les faits
+        timestamp = datetime.utcnow().isoformat()
+        for category in facts.values():
+            for fact in category:
+                fact["extracted_at"] = timestamp
 
-        # Nouvelle entité
-        self.facts["entities"].append(entity)
+        # Mémoire indexée (entités dédoublonnées) + SQLite (un seul executemany)
+        self.facts.add_facts(facts, timestamp)
 
     # ========== RECHERCHE SÉMANTIQUE ==========
 
@@ -389,15 +501,39 @@ class MemoryManager:
         if not self.embedding_model:
             return
 
-        # Générer embedding
-        embedding = self.embedding_model.encode(text, convert_to_numpy=True)
+        # Générer embedding (ou le reprendre du cache)
+        embedding = self.encode([text])[0]
 
         # Stocker dans SQLite
-        self.db.add_embedding(
+        embedding_id = self.db.add_embedding(
             conversation_id=None,  # Pas de lien direct avec message
             embedding=embedding,  # numpy array
             text=text[:200],  # Préview
             timestamp=datetime.utcnow().isoformat(),
+            segment_id=segment_id,
+        )
+
+        # Mise à jour incrémentale de l'index (pas de rechargement DB)
+        with self._index_lock:
+            self.vector_index.add(
+                embedding_id, embedding, text=text[:200], segment_id=segment_id
+            )
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode des textes via le cache (seuls les textes inconnus sont calculés)
+
+        Utilisé aussi par le cache de réponses de ChatEngine (similarité).
+
+        Args:
+            texts: Textes à encoder
+
+        Returns:
+            Matrice (len(texts), dim) float32
+        """
+        return self.embedding_cache.get_or_compute(
+            texts,
+            lambda missing: self.embedding_model.encode(missing, convert_to_numpy=True),
         )
 
     def search_relevant_context(
@@ -414,39 +550,76 @@ class MemoryManager:
         Returns:
             Liste de segments/faits pertinents triés par similarité
         """
-        # Charger embeddings depuis SQLite
-        db_embeddings = self.db.get_embeddings()
+        return self.search_relevant_context_batch([query], top_k, min_similarity)[0]
 
-        if not self.embedding_model or not db_embeddings:
-            # Fallback : retourner derniers segments
-            return self._get_recent_segments(top_k)
+    def search_relevant_context_batch(
+        self, queries: List[str], top_k: int = 3, min_similarity: float = 0.3
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Recherche contexte pertinent pour plusieurs requêtes en une passe
 
-        # Générer embedding de la requête
-        query_embedding = self.embedding_model.encode(query, convert_to_numpy=True)
+        Un seul appel encode() pour toutes les requêtes, puis un seul produit
+        matriciel contre l'index (utile pour résumés et classement de faits).
 
-        # Calculer similarités cosinus
-        results = []
-        for entry in db_embeddings:
-            stored_embedding = entry["embedding"]  # déjà numpy array
+        Args:
+            queries: Requêtes à scorer
+            top_k: Nombre de résultats par requête
+            min_similarity: Seuil de similarité minimale (0-1)
 
-            # Similarité cosinus
-            similarity = self._cosine_similarity(query_embedding, stored_embedding)
+        Returns:
+            Une liste de résultats (cf. search_relevant_context) par requête
+        """
+        if not queries:
+            return []
 
-            if similarity >= min_similarity:
-                results.append(
-                    {
-                        "similarity": float(similarity),
-                        "segment_id": entry.get("segment_id", "unknown"),
-                        "text_preview": entry["text"],
-                        "metadata": {},  # Pas de metadata dans le format actuel
-                    }
-                )
+        if not self.embedding_model or len(self.vector_index) == 0:
+            # Fallback : recherche lexicale (FTS5), sinon derniers segments
+            recent = self._get_recent_segments(top_k)
+            return [self._search_segments_lexical(q, top_k) or list(recent) for q in queries]
+
+        # Générer embeddings des requêtes (un seul lot, cache d'abord)
+        query_embeddings = self.encode(list(queries))
 
-        # Trier par similarité décroissante
-        results.sort(key=lambda x: x["similarity"], reverse=True)
+        # Recherche dans l'index (produit matriciel + top-k, ou IVF)
+        with self._index_lock:
+            batch_hits = self.vector_index.search_batch(
+                query_embeddings, top_k=top_k, min_similarity=min_similarity
+            )
 
-        # Limiter au top_k
-        return results[:top_k]
+        return [
+            [
+                {
+                    "similarity": hit["similarity"],
+                    "segment_id": hit["segment_id"] or "unknown",
+                    "text_preview": hit["text"],
+                    "metadata": {},  # Pas de metadata dans le format actuel
+                }
+                for hit in hits
+            ]
+            for hits in batch_hits
+        ]
+
+    def _search_segments_lexical(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+        """
+        Segments pertinents via l'index plein texte (BM25)
+
+        Args:
+            query: Requête utilisateur
+            top_k: Nombre de résultats
+
+        Returns:
+            Résultats au format search_relevant_context (similarity = score BM25)
+        """
+        hits = self.db.search_text(query, k=top_k, kinds=("segment",))
+        return [
+            {
+                "similarity": hit["score"],
+                "segment_id": hit.get("segment_id") or "unknown",
+                "text_preview": hit["text"][:200],
+                "metadata": {"type": "lexical"},
+            }
+            for hit in hits
+        ]
 
     def _cosine_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
         """
@@ -499,105 +672,210 @@ class MemoryManager:
         include_facts: bool = True,
         include_segments: bool = True,
         max_tokens: int = 1000,
+        user_id: Optional[str] = None,
+        source: str = "desktop",
     ) -> str:
         """
         Construit contexte enrichi pour un prompt
 
+        Les segments et faits sont classés par rank_context() (BM25 + cosinus,
+        fraîcheur, déduplication) puis ajoutés du plus pertinent au moins
+        pertinent tant que le budget le permet (aucun texte coupé).
+
         Args:
             query: Requête utilisateur
             include_facts: Inclure faits extraits
             include_segments: Inclure segments pertinents
-            max_tokens: Budget de tokens approximatif
+            max_tokens: Budget de tokens du contexte
+            user_id: Conversation courante de cet utilisateur (derniers
+                messages lus dans SQLite) ; None = tous utilisateurs confondus
+            source: Source de la conversation (avec user_id)
 
         Returns:
             Contexte formaté prêt pour prompt
         """
+        # 1. Conversation courante (prioritaire : messages les plus récents d'abord)
+        if user_id is not None:
+            recent = self.db.get_recent_turns(user_id, source, n=3)
+        else:
+            recent = self.current_conversation[-3:]
+        current_lines = []
+        budget = max_tokens - self.count_tokens(_CURRENT_HEADER)
+        for msg in reversed(recent):
+            line = f"{msg['role'].capitalize()}: {msg['content'][:100]}..."
+            cost = self.count_tokens(line)
+            if cost > budget:
+                break
+            current_lines.insert(0, line)
+            budget -= cost
+
+        # 2. Segments et faits classés, empaquetés dans le budget restant
+        budget -= self.count_tokens(_SEGMENTS_HEADER) + self.count_tokens(_FACTS_HEADER)
+        selected = self.context_ranker.pack(
+            self.rank_context(query, include_facts, include_segments),
+            max(budget, 0),
+            self.count_tokens,
+        )
+
         context_parts = []
+        segments = [c.text for c in selected if c.kind == "segment"]
+        if segments:
+            context_parts.append(_SEGMENTS_HEADER + "\n" + "\n\n".join(segments))
 
-        # 1. Segments pertinents (via recherche sémantique)
-        if include_segments:
-            relevant_segments = self.search_relevant_context(query, top_k=2)
-
-            if relevant_segments:
-                context_parts.append("=== Conversations Précédentes ===")
-                for seg_data in relevant_segments:
-                    segment = self._get_segment_by_id(seg_data["segment_id"])
-                    if segment and segment.get("summary"):
-                        formatted = self.summarizer.format_summary_for_context(
-                            segment["summary"]
-                        )
-                        context_parts.append(formatted)
-
-        # 2. Faits pertinents
-        if include_facts:
-            facts_context = self._format_relevant_facts(query)
-            if facts_context:
-                context_parts.append("\n=== Faits Mémorisés ===")
-                context_parts.append(facts_context)
+        facts = [f"  - {c.text}" for c in selected if c.kind != "segment"]
+        if facts:
+            context_parts.append(_FACTS_HEADER + "\n" + "\n".join(facts))
 
-        # 3. Conversation courante (aperçu)
-        if self.current_conversation:
-            context_parts.append("\n=== Conversation Actuelle ===")
-            recent_msgs = self.current_conversation[-3:]  # 3 derniers messages
-            for msg in recent_msgs:
-                role = msg["role"].capitalize()
-                content = msg["content"][:100]
-                context_parts.append(f"{role}: {content}...")
+        if current_lines:
+            context_parts.append(_CURRENT_HEADER + "\n" + "\n".join(current_lines))
 
-        # Joindre et limiter taille
-        full_context = "\n\n".join(context_parts)
+        return "\n\n".join(context_parts)
 
-        # Approximation tokens (1 token ≈ 4 chars)
-        if len(full_context) > max_tokens * 4:
-            full_context = full_context[: max_tokens * 4] + "\n[...contexte tronqué...]"
+    @staticmethod
+    def is_personal_context(context: str) -> bool:
+        """
+        Le contexte contient-il des souvenirs propres à l'utilisateur ?
 
-        return full_context
+        Args:
+            context: Contexte retourné par get_context_for_prompt
 
-    def _format_relevant_facts(self, query: str) -> str:
+        Returns:
+            True si des faits ou segments mémorisés y figurent (la
+            conversation courante seule ne compte pas)
         """
-        Formate faits pertinents pour une requête
+        return _FACTS_HEADER in context or _SEGMENTS_HEADER in context
+
+    def rank_context(
+        self, query: str, include_facts: bool = True, include_segments: bool = True
+    ) -> List[ContextCandidate]:
+        """
+        Classe segments et faits pour une requête (Reciprocal Rank Fusion)
+
+        Classements fusionnés :
+        - Segments : similarité cosinus (VectorIndex) et BM25 (FTS5)
+        - Faits : BM25 (FTS5)
+        - Profil (poids réduit) : segments récents, entités fréquentes,
+          dernières préférences et événements, utiles quand rien ne correspond
 
         Args:
             query: Requête utilisateur
+            include_facts: Classer les faits
+            include_segments: Classer les segments
 
         Returns:
-            Faits formatés en texte
-        """
-        facts_text = []
-        query_lower = query.lower()
-
-        # Préférences
-        prefs = self.facts.get("preferences", [])
-        if prefs:
-            facts_text.append("Préférences :")
-            for pref in prefs[-5:]:  # 5 dernières
-                sentiment = "aime" if pref["sentiment"] == "positive" else "n'aime pas"
-                facts_text.append(
-                    f"  - {sentiment} {pref['subject']} ({pref['category']})"
+            Candidats uniques triés par pertinence décroissante
+        """
+        depth = self.retrieval_top_k
+        rankings: List[List[ContextCandidate]] = []
+        weights: List[float] = []
+
+        if include_segments:
+            if self.embedding_model and len(self.vector_index) > 0:
+                rankings.append(
+                    [
+                        self._segment_candidate(hit["segment_id"], hit["text_preview"])
+                        for hit in self.search_relevant_context(query, top_k=depth)
+                    ]
                 )
+                weights.append(1.0)
+
+            rankings.append(
+                [
+                    self._segment_candidate(
+                        hit.get("segment_id") or f"row_{hit['id']}", hit["text"], hit["timestamp"]
+                    )
+                    for hit in self.db.search_text(query, k=depth, kinds=("segment",))
+                ]
+            )
+            weights.append(1.0)
+
+            rankings.append(
+                [
+                    self._segment_candidate(seg["segment_id"], seg["text_preview"])
+                    for seg in reversed(self._get_recent_segments(2))
+                ]
+            )
+            weights.append(_PROFILE_WEIGHT)
 
-        # Entités fréquentes
-        entities = self.facts.get("entities", [])
-        if entities:
-            # Trier par occurrences
-            top_entities = sorted(
-                entities, key=lambda e: e.get("occurrences", 1), reverse=True
-            )[:5]
-            facts_text.append("\nEntités mentionnées :")
-            for ent in top_entities:
-                facts_text.append(
-                    f"  - {ent['value']} ({ent['entity_type']}, {ent.get('occurrences', 1)}x)"
+        if include_facts:
+            matched = []
+            for hit in self.db.search_text(query, k=depth, kinds=("fact",)):
+                try:
+                    data = json.loads(hit["text"])
+                except ValueError:
+                    continue
+                matched.append(
+                    ContextCandidate(
+                        key=f"fact:{hit['id']}",
+                        kind="fact",
+                        text=self._describe_fact(hit["category"], data),
+                        timestamp=hit["timestamp"],
+                    )
                 )
+            rankings.append(matched)
+            weights.append(1.0)
+
+            rankings.append(self._profile_candidates())
+            weights.append(_PROFILE_WEIGHT)
+
+        return self.context_ranker.fuse(rankings, weights)
+
+    def _segment_candidate(
+        self, segment_id: str, text: str, timestamp: Optional[str] = None
+    ) -> ContextCandidate:
+        """Candidat segment (résumé complet si le segment est en cache)"""
+        segment = self._get_segment_by_id(segment_id)
+        if segment and segment.get("summary"):
+            text = self.summarizer.format_summary_for_context(segment["summary"]) or text
+            timestamp = timestamp or segment.get("created_at")
+        return ContextCandidate(
+            key=f"segment:{segment_id}", kind="segment", text=text, timestamp=timestamp
+        )
 
-        # Événements récents
-        events = self.facts.get("events", [])
-        if events:
-            recent_events = events[-3:]  # 3 derniers
-            facts_text.append("\nÉvénements récents :")
-            for evt in recent_events:
-                facts_text.append(f"  - {evt['description']}")
+    def _profile_candidates(self) -> List[ContextCandidate]:
+        """
+        Faits indépendants de la requête (ancien contenu fixe du contexte)
 
-        return "\n".join(facts_text) if facts_text else ""
+        Returns:
+            Entités fréquentes, dernières préférences et événements
+        """
+        profile = [("entities", ent) for ent in self.facts.top_entities(5)]
+        profile += [("preferences", pref) for pref in self.facts.recent("preferences", 5)]
+        profile += [("events", evt) for evt in self.facts.recent("events", 3)]
+
+        return [
+            ContextCandidate(
+                key=f"profile:{category}:{i}",
+                kind="profile",
+                text=self._describe_fact(category, data),
+                # Entité : dernière mention ; autres faits : date d'extraction
+                timestamp=data.get("last_seen") or data.get("extracted_at"),
+            )
+            for i, (category, data) in enumerate(profile)
+        ]
+
+    @staticmethod
+    def _describe_fact(category: str, data: Dict[str, Any]) -> str:
+        """
+        Décrit un fait stocké en une ligne
+
+        Args:
+            category: 'entities', 'preferences', 'events', 'relationships'
+            data: Données du fait (dict FactExtractor)
+
+        Returns:
+            Description courte
+        """
+        if category == "entities":
+            return f"{data.get('value', '?')} ({data.get('entity_type', 'entité')})"
+        if category == "preferences":
+            sentiment = "aime" if data.get("sentiment") == "positive" else "n'aime pas"
+            return f"{sentiment} {data.get('subject', '?')}"
+        if category == "events":
+            return data.get("description", data.get("context", ""))
+        if category == "relationships":
+            return f"{data.get('subject', '?')} {data.get('relation_type', '→')} {data.get('object', '?')}"
+        return data.get("context", str(data))
 
     def _get_segment_by_id(self, segment_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -660,6 +938,9 @@ class MemoryManager:
         """
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
         segment_count = len(self.conversations.get("segments", []))
+        if self.worker:
+            # Segments encore en cours de construction dans le worker
+            segment_count += self.worker.pending_count
         return f"segment_{timestamp}_{segment_count:03d}"
 
     # ========== STATS & DEBUG ==========
@@ -678,7 +959,12 @@ class MemoryManager:
             "preferences_count": len(self.facts.get("preferences", [])),
             "events_count": len(self.facts.get("events", [])),
             "relationships_count": len(self.facts.get("relationships", [])),
-            "embeddings_count": len(self.db.get_embeddings()),
+            "fact_store": self.facts.get_stats(),
+            "embeddings_count": len(self.vector_index),
+            "vector_index": self.vector_index.get_stats(),
+            "embedding_cache": self.embedding_cache.get_stats(),
+            "fact_extraction": self.fact_extractor.get_stats(),
+            "maintenance_queue": self.worker.get_stats() if self.worker else None,
             "embedding_model": self.embedding_model_name,
             "embedding_available": self.embedding_model is not None,
             "storage_dir": self.storage_dir,
@@ -0,0 +1,235 @@
+"""
+memory_worker.py - File de tâches d'arrière-plan pour la maintenance mémoire
+
+Sort du tour de chat les opérations lentes de MemoryManager :
+- Résumé LLM des segments (via llm_callback)
+- Extraction des points clés
+- Calcul et stockage des embeddings (SentenceTransformer)
+
+Garanties :
+- File bornée (max_queue_size) : si elle est pleine, submit() attend au plus
+  block_timeout puis évince la plus ancienne tâche basse priorité en file ;
+  une tâche n'est jamais exécutée dans le thread appelant (tour de chat)
+- Les tâches normales (segments) ne sont jamais perdues : sans tâche basse
+  priorité à évincer, elles dépassent la borne plutôt que d'être abandonnées
+- Un seul thread worker : les tâches se terminent dans l'ordre de soumission
+  (le segment N est toujours stocké avant le segment N+1)
+- flush() attend que la file soit vide, shutdown() arrête proprement le thread
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryWorker:
+    """
+    Worker d'arrière-plan (un thread, file FIFO bornée)
+
+    Utilisé par MemoryManager quand async_maintenance=True.
+    """
+
+    def __init__(self, max_queue_size: int = 8, name: str = "memory-worker"):
+        """
+        Initialise le worker (le thread démarre à la première soumission)
+
+        Args:
+            max_queue_size: Profondeur maximale de la file
+            name: Nom du thread (visible dans les logs/debug)
+        """
+        self.max_queue_size = max_queue_size
+        self.name = name
+
+        self._queue: "deque[Optional[tuple]]" = deque()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._ready = threading.Condition(self._lock)  # Tâche ajoutée
+        self._space = threading.Condition(self._lock)  # Place libérée
+        self._pending = 0
+
+        # Statistiques
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.overflows = 0
+        self.total_job_time = 0.0
+
+    # ========== SOUMISSION ==========
+
+    @property
+    def pending_count(self) -> int:
+        """Nombre de tâches soumises et non terminées"""
+        with self._lock:
+            return self._pending
+
+    def _ensure_started(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name=self.name, daemon=True
+            )
+            self._thread.start()
+
+    def submit(
+        self,
+        label: str,
+        fn: Callable[..., Any],
+        *args,
+        block_timeout: float = 0.5,
+        low_priority: bool = False,
+        **kwargs,
+    ) -> bool:
+        """
+        Soumet une tâche (exécutée dans l'ordre de soumission)
+
+        Args:
+            label: Description courte (logs), ex: ID du segment
+            fn: Fonction à exécuter
+            block_timeout: Attente max si la file est pleine (secondes)
+            low_priority: Tâche abandonnable si la file reste pleine
+                (ex: embedding, recalculable plus tard)
+
+        Returns:
+            True si mise en file, False si abandonnée (file pleine)
+        """
+        job = (label, fn, args, kwargs, low_priority)
+        deadline = time.monotonic() + block_timeout
+
+        with self._lock:
+            while len(self._queue) >= self.max_queue_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._space.wait(remaining)
+
+            if len(self._queue) >= self.max_queue_size:
+                # Jamais d'exécution dans le thread appelant : on évince
+                victim = next(
+                    (i for i, item in enumerate(self._queue) if item and item[4]),
+                    None,
+                )
+                if victim is not None:
+                    evicted = self._queue[victim]
+                    del self._queue[victim]
+                    self._pending -= 1
+                    self._drop(evicted[0])
+                elif low_priority:
+                    self.submitted += 1
+                    self._drop(label)
+                    return False
+                else:
+                    self.overflows += 1
+                    logger.warning(
+                        f"⚠️ File mémoire pleine ({self.max_queue_size}) : "
+                        f"'{label}' mise en file au-delà de la borne"
+                    )
+
+            self._queue.append(job)
+            self._pending += 1
+            self.submitted += 1
+            self._ready.notify()
+            self._ensure_started()
+        return True
+
+    def _drop(self, label: str) -> None:
+        """Compte une tâche basse priorité abandonnée (verrou tenu)"""
+        self.dropped += 1
+        self._idle.notify_all()
+        logger.warning(
+            f"⚠️ File mémoire pleine ({self.max_queue_size}) : "
+            f"tâche basse priorité '{label}' abandonnée"
+        )
+
+    # ========== EXÉCUTION ==========
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._queue:
+                    self._ready.wait()
+                item = self._queue.popleft()
+                self._space.notify_all()
+            if item is None:
+                return
+            label, fn, args, kwargs, _ = item
+            self._execute(label, fn, args, kwargs)
+
+    def _execute(self, label: str, fn: Callable[..., Any], args, kwargs) -> None:
+        start = time.perf_counter()
+        try:
+            fn(*args, **kwargs)
+            failed = False
+        except Exception as e:
+            logger.error(f"❌ Tâche mémoire '{label}' échouée : {e}")
+            failed = True
+
+        with self._lock:
+            self.total_job_time += time.perf_counter() - start
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+            self._pending -= 1
+            self._idle.notify_all()
+
+    # ========== SYNCHRONISATION ==========
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Attend que toutes les tâches soumises soient terminées
+
+        Args:
+            timeout: Attente max en secondes (None = illimitée)
+
+        Returns:
+            True si la file est vide, False si timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._pending > 0:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def shutdown(self, drain: bool = True, timeout: Optional[float] = None) -> None:
+        """
+        Arrête le thread worker
+
+        Args:
+            drain: Terminer les tâches en attente avant l'arrêt
+            timeout: Attente max pour le drain
+        """
+        if drain:
+            self.flush(timeout)
+        if self._thread is not None and self._thread.is_alive():
+            with self._lock:
+                self._queue.append(None)  # Sentinelle, hors borne
+                self._ready.notify()
+            self._thread.join(timeout)
+        self._thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques de la file (profondeur, tâches, temps moyen)"""
+        with self._lock:
+            done = self.completed + self.failed
+            return {
+                "pending": self._pending,
+                "queue_depth": len(self._queue),
+                "max_queue_size": self.max_queue_size,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "overflows": self.overflows,
+                "avg_job_time": self.total_job_time / done if done else 0.0,
+            }
+
+    def __repr__(self) -> str:
+        return f"<MemoryWorker: {self.pending_count} en attente>"
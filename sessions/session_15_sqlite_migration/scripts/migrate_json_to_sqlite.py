@@ -101,20 +101,21 @@ class JSONToSQLiteMigrator:
         # Format attendu : liste de messages
         conversations = data if isinstance(data, list) else []
 
-        for msg in conversations:
-            try:
-                self.db.add_conversation(
-                    role=msg.get("role", "user"),
-                    content=msg.get("content", ""),
-                    timestamp=msg.get("timestamp", datetime.now().isoformat()),
-                    user_id=msg.get("user_id", "desktop_user"),
-                    source=msg.get("source", "desktop"),
-                    metadata=msg.get("metadata"),
-                )
-                self.stats["conversations"] += 1
-            except Exception as e:
-                logger.error(f"  ❌ Erreur migration message : {e}")
-                self.stats["errors"].append(f"Conversation error: {e}")
+        with self.db.transaction():  # Un seul COMMIT par table
+            for msg in conversations:
+                try:
+                    self.db.add_conversation(
+                        role=msg.get("role", "user"),
+                        content=msg.get("content", ""),
+                        timestamp=msg.get("timestamp", datetime.now().isoformat()),
+                        user_id=msg.get("user_id", "desktop_user"),
+                        source=msg.get("source", "desktop"),
+                        metadata=msg.get("metadata"),
+                    )
+                    self.stats["conversations"] += 1
+                except Exception as e:
+                    logger.error(f"  ❌ Erreur migration message : {e}")
+                    self.stats["errors"].append(f"Conversation error: {e}")
 
         logger.info(f"  ✅ {self.stats['conversations']} conversations migrées")
 
@@ -132,28 +133,29 @@ class JSONToSQLiteMigrator:
         texts_list = data.get("texts", [])
         timestamps_list = data.get("timestamps", [])
 
-        for i, (embedding, text) in enumerate(zip(embeddings_list, texts_list)):
-            try:
-                # Convertir liste → numpy array
-                embedding_array = np.array(embedding, dtype=np.float32)
-
-                # Timestamp
-                timestamp = (
-                    timestamps_list[i]
-                    if i < len(timestamps_list)
-                    else datetime.now().isoformat()
-                )
-
-                self.db.add_embedding(
-                    conversation_id=None,  # Pas de lien direct
-                    embedding=embedding_array,
-                    text=text,
-                    timestamp=timestamp,
-                )
-                self.stats["embeddings"] += 1
-            except Exception as e:
-                logger.error(f"  ❌ Erreur migration embedding {i}: {e}")
-                self.stats["errors"].append(f"Embedding error: {e}")
+        with self.db.transaction():  # Un seul COMMIT par table
+            for i, (embedding, text) in enumerate(zip(embeddings_list, texts_list)):
+                try:
+                    # Convertir liste → numpy array
+                    embedding_array = np.array(embedding, dtype=np.float32)
+
+                    # Timestamp
+                    timestamp = (
+                        timestamps_list[i]
+                        if i < len(timestamps_list)
+                        else datetime.now().isoformat()
+                    )
+
+                    self.db.add_embedding(
+                        conversation_id=None,  # Pas de lien direct
+                        embedding=embedding_array,
+                        text=text,
+                        timestamp=timestamp,
+                    )
+                    self.stats["embeddings"] += 1
+                except Exception as e:
+                    logger.error(f"  ❌ Erreur migration embedding {i}: {e}")
+                    self.stats["errors"].append(f"Embedding error: {e}")
 
         logger.info(f"  ✅ {self.stats['embeddings']} embeddings migrés")
 
@@ -167,22 +169,23 @@ class JSONToSQLiteMigrator:
             return
 
         # Format attendu : dict avec catégories
-        for category in ["entities", "preferences", "events", "relationships"]:
-            facts_in_category = data.get(category, [])
-
-            for fact in facts_in_category:
-                try:
-                    self.db.add_fact(
-                        category=category,
-                        type_=fact.get("type", "unknown"),
-                        data=fact.get("data", {}),
-                        confidence=fact.get("confidence", 1.0),
-                        timestamp=fact.get("timestamp", datetime.now().isoformat()),
-                    )
-                    self.stats["facts"] += 1
-                except Exception as e:
-                    logger.error(f"  ❌ Erreur migration fait : {e}")
-                    self.stats["errors"].append(f"Fact error: {e}")
+        with self.db.transaction():  # Un seul COMMIT par table
+            for category in ["entities", "preferences", "events", "relationships"]:
+                facts_in_category = data.get(category, [])
+
+                for fact in facts_in_category:
+                    try:
+                        self.db.add_fact(
+                            category=category,
+                            type_=fact.get("type", "unknown"),
+                            data=fact.get("data", {}),
+                            confidence=fact.get("confidence", 1.0),
+                            timestamp=fact.get("timestamp", datetime.now().isoformat()),
+                        )
+                        self.stats["facts"] += 1
+                    except Exception as e:
+                        logger.error(f"  ❌ Erreur migration fait : {e}")
+                        self.stats["errors"].append(f"Fact error: {e}")
 
         logger.info(f"  ✅ {self.stats['facts']} faits migrés")
 
@@ -198,24 +201,25 @@ class JSONToSQLiteMigrator:
         # Format attendu : liste de segments
         segments = data if isinstance(data, list) else []
 
-        for segment in segments:
-            try:
-                self.db.add_segment(
-                    summary=segment.get("summary", ""),
-                    message_count=segment.get("message_count", 0),
-                    start_timestamp=segment.get(
-                        "start_timestamp", datetime.now().isoformat()
-                    ),
-                    end_timestamp=segment.get(
-                        "end_timestamp", datetime.now().isoformat()
-                    ),
-                    topics=segment.get("topics"),
-                    metadata=segment.get("metadata"),
-                )
-                self.stats["segments"] += 1
-            except Exception as e:
-                logger.error(f"  ❌ Erreur migration segment : {e}")
-                self.stats["errors"].append(f"Segment error: {e}")
+        with self.db.transaction():  # Un seul COMMIT par table
+            for segment in segments:
+                try:
+                    self.db.add_segment(
+                        summary=segment.get("summary", ""),
+                        message_count=segment.get("message_count", 0),
+                        start_timestamp=segment.get(
+                            "start_timestamp", datetime.now().isoformat()
+                        ),
+                        end_timestamp=segment.get(
+                            "end_timestamp", datetime.now().isoformat()
+                        ),
+                        topics=segment.get("topics"),
+                        metadata=segment.get("metadata"),
+                    )
+                    self.stats["segments"] += 1
+                except Exception as e:
+                    logger.error(f"  ❌ Erreur migration segment : {e}")
+                    self.stats["errors"].append(f"Segment error: {e}")
 
         logger.info(f"  ✅ {self.stats['segments']} segments migrés")
 
@@ -231,22 +235,23 @@ class JSONToSQLiteMigrator:
         # Format attendu : liste d'émotions
         emotions = data if isinstance(data, list) else []
 
-        for emotion in emotions:
-            try:
-                self.db.add_emotion(
-                    emotion=emotion.get("emotion", "neutral"),
-                    intensity=emotion.get("intensity", 0.5),
-                    confidence=emotion.get("confidence", 1.0),
-                    source=emotion.get("source", "user"),
-                    message_preview=emotion.get("message_preview", ""),
-                    context=emotion.get("context", ""),
-                    timestamp=emotion.get("timestamp", datetime.now().isoformat()),
-                    user_id=emotion.get("user_id", "desktop_user"),
-                )
-                self.stats["emotions"] += 1
-            except Exception as e:
-                logger.error(f"  ❌ Erreur migration émotion : {e}")
-                self.stats["errors"].append(f"Emotion error: {e}")
+        with self.db.transaction():  # Un seul COMMIT par table
+            for emotion in emotions:
+                try:
+                    self.db.add_emotion(
+                        emotion=emotion.get("emotion", "neutral"),
+                        intensity=emotion.get("intensity", 0.5),
+                        confidence=emotion.get("confidence", 1.0),
+                        source=emotion.get("source", "user"),
+                        message_preview=emotion.get("message_preview", ""),
+                        context=emotion.get("context", ""),
+                        timestamp=emotion.get("timestamp", datetime.now().isoformat()),
+                        user_id=emotion.get("user_id", "desktop_user"),
+                    )
+                    self.stats["emotions"] += 1
+                except Exception as e:
+                    logger.error(f"  ❌ Erreur migration émotion : {e}")
+                    self.stats["errors"].append(f"Emotion error: {e}")
 
         logger.info(f"  ✅ {self.stats['emotions']} émotions migrées")
 
@@ -262,27 +267,28 @@ class JSONToSQLiteMigrator:
         # Format attendu : dict avec traits
         personality = data.get("personality", {})
 
-        for trait_name, trait_data in personality.items():
-            try:
-                # Si c'est juste un score
-                if isinstance(trait_data, (int, float)):
-                    score = float(trait_data)
-                    description = ""
-                # Si c'est un dict complet
-                elif isinstance(trait_data, dict):
-                    score = float(trait_data.get("score", 0.5))
-                    description = trait_data.get("description", "")
-                else:
-                    logger.warning(f"  ⚠️ Format trait inconnu : {trait_name}")
-                    continue
-
-                self.db.set_personality_trait(
-                    trait_name=trait_name, score=score, description=description
-                )
-                self.stats["personality_traits"] += 1
-            except Exception as e:
-                logger.error(f"  ❌ Erreur migration trait {trait_name}: {e}")
-                self.stats["errors"].append(f"Personality error: {e}")
+        with self.db.transaction():  # Un seul COMMIT par table
+            for trait_name, trait_data in personality.items():
+                try:
+                    # Si c'est juste un score
+                    if isinstance(trait_data, (int, float)):
+                        score = float(trait_data)
+                        description = ""
+                    # Si c'est un dict complet
+                    elif isinstance(trait_data, dict):
+                        score = float(trait_data.get("score", 0.5))
+                        description = trait_data.get("description", "")
+                    else:
+                        logger.warning(f"  ⚠️ Format trait inconnu : {trait_name}")
+                        continue
+
+                    self.db.set_personality_trait(
+                        trait_name=trait_name, score=score, description=description
+                    )
+                    self.stats["personality_traits"] += 1
+                except Exception as e:
+                    logger.error(f"  ❌ Erreur migration trait {trait_name}: {e}")
+                    self.stats["errors"].append(f"Personality error: {e}")
 
         logger.info(
             f"  ✅ {self.stats['personality_traits']} traits de personnalité migrés"
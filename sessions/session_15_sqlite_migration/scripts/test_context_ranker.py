@@ -0,0 +1,147 @@
+"""
+Tests unitaires pour ContextRanker
+
+Tests du classement hybride du contexte :
+- Reciprocal Rank Fusion (accord lexical + sémantique)
+- Décroissance temporelle
+- Déduplication des résumés quasi identiques
+- Remplissage glouton du budget de tokens
+- Intégration MemoryManager.get_context_for_prompt
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.ai.context_ranker import ContextCandidate, ContextRanker, approximate_tokens
+from src.ai.memory_manager import MemoryManager
+
+NOW = datetime(2025, 6, 1)
+
+
+def _candidate(key: str, text: str = None, days_ago: float = None) -> ContextCandidate:
+    timestamp = (NOW - timedelta(days=days_ago)).isoformat() if days_ago is not None else None
+    return ContextCandidate(key=key, kind="segment", text=text or f"texte {key}", timestamp=timestamp)
+
+
+@pytest.fixture
+def ranker():
+    """Fixture : classeur par défaut"""
+    return ContextRanker()
+
+
+# ========== TESTS FUSION ==========
+
+
+def test_rrf_rewards_agreement(ranker):
+    """Test un élément présent dans les deux classements passe devant"""
+    lexical = [_candidate("a"), _candidate("b")]
+    semantic = [_candidate("c"), _candidate("b")]
+
+    ranked = ranker.fuse([lexical, semantic], now=NOW)
+
+    assert [c.key for c in ranked][0] == "b"
+    assert len(ranked) == 3
+
+
+def test_rrf_weights(ranker):
+    """Test un classement de poids réduit ne domine pas"""
+    ranked = ranker.fuse([[_candidate("profil")], [_candidate("requête")]], weights=[0.3, 1.0], now=NOW)
+
+    assert [c.key for c in ranked] == ["requête", "profil"]
+
+
+def test_fuse_keeps_longest_text(ranker):
+    """Test fusion : texte complet préféré à l'aperçu"""
+    ranked = ranker.fuse(
+        [[_candidate("a", "Résumé")], [_candidate("a", "Résumé complet du segment")]], now=NOW
+    )
+
+    assert ranked[0].text == "Résumé complet du segment"
+
+
+# ========== TESTS FRAÎCHEUR ==========
+
+
+def test_recency_decay(ranker):
+    """Test à rang égal, le souvenir récent passe devant"""
+    ranked = ranker.fuse([[_candidate("ancien", days_ago=365)], [_candidate("récent", days_ago=1)]], now=NOW)
+
+    assert ranked[0].key == "récent"
+    assert ranker.recency_factor(None, NOW) == 1.0
+    assert ranker.recency_factor("pas une date", NOW) == 1.0
+    assert ranker.recency_factor((NOW - timedelta(days=30)).isoformat(), NOW) == pytest.approx(0.75)
+    assert ranker.recency_factor((NOW - timedelta(days=3650)).isoformat(), NOW) == pytest.approx(0.5)
+
+
+# ========== TESTS DÉDUPLICATION ==========
+
+
+def test_deduplicate_near_identical(ranker):
+    """Test résumés quasi identiques : seul le mieux classé reste"""
+    candidates = [
+        _candidate("a", "L'utilisateur parle de son voyage au Japon en avril"),
+        _candidate("b", "L'utilisateur parle de son voyage au Japon en avril !"),
+        _candidate("c", "Discussion sur Python et les tests unitaires"),
+    ]
+
+    assert [c.key for c in ranker.deduplicate(candidates)] == ["a", "c"]
+
+
+# ========== TESTS BUDGET ==========
+
+
+def test_pack_greedy_skips_oversized(ranker):
+    """Test un élément trop long est sauté au profit des suivants"""
+    candidates = [_candidate("a", "x" * 40), _candidate("b", "y" * 400), _candidate("c", "z" * 40)]
+
+    packed = ranker.pack(candidates, budget_tokens=25)
+
+    assert [c.key for c in packed] == ["a", "c"]
+    assert sum(approximate_tokens(c.text) for c in packed) <= 25
+
+
+def test_pack_custom_counter(ranker):
+    """Test compteur de tokens fourni par l'appelant"""
+    candidates = [_candidate("a", "un deux trois"), _candidate("b", "quatre cinq")]
+
+    packed = ranker.pack(candidates, budget_tokens=3, count_tokens=lambda t: len(t.split()))
+
+    assert [c.key for c in packed] == ["a"]
+
+
+# ========== TESTS INTÉGRATION ==========
+
+
+def test_context_prefers_relevant_facts(tmp_path):
+    """Test faits liés à la question avant les faits de profil"""
+    manager = MemoryManager(storage_dir=str(tmp_path))
+    manager.embedding_model = None
+    if not manager.db.fts_enabled:
+        pytest.skip("SQLite compilé sans FTS5")
+
+    manager.facts["preferences"] = [
+        {"subject": f"sujet {i}", "sentiment": "positive", "category": "general"} for i in range(5)
+    ]
+    manager.db.add_fact("preferences", "likes", {"subject": "escalade", "sentiment": "positive"})
+
+    context = manager.get_context_for_prompt("Tu fais de l'escalade ?", max_tokens=30)
+
+    assert "aime escalade" in context
+    assert manager.count_tokens(context) <= 30
+    manager.close()
+
+
+def test_profile_candidates_dated(tmp_path):
+    """Test faits de profil datés (décroissance temporelle applicable)"""
+    manager = MemoryManager(storage_dir=str(tmp_path))
+    manager.add_message("user", "J'adore la programmation Python !")
+    manager.add_message("user", "Marie.")
+    manager.add_message("user", "Marie !")
+
+    candidates = manager._profile_candidates()
+    marie = manager.facts.find_entity("person", "Marie")
+
+    assert candidates and all(c.timestamp for c in candidates)
+    assert marie["last_seen"] in {c.timestamp for c in candidates}
+    manager.close()
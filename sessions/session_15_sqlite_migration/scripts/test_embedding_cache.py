@@ -0,0 +1,166 @@
+"""
+Tests unitaires pour EmbeddingCache
+
+Tests du cache d'embeddings à deux niveaux :
+- Normalisation et clés de cache
+- Niveau mémoire (LRU) et niveau SQLite (écriture par lots, taille bornée)
+- Compteurs hits/misses
+- Accès concurrents
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from src.ai.database import WorklyDatabase
+from src.ai.embedding_cache import EmbeddingCache, make_cache_key, normalize_text
+
+
+class CountingEncoder:
+    """Encodeur factice qui compte les textes encodés"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(t), t.count("a"), 1.0] for t in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Fixture : base SQLite temporaire"""
+    database = WorklyDatabase(str(tmp_path / "workly.db"))
+    yield database
+    database.close()
+
+
+def test_normalize_text():
+    """Test normalisation (espaces ; casse seulement si demandé)"""
+    assert normalize_text("  Salut   Kira ! ") == "Salut Kira !"
+    assert normalize_text("  Salut   Kira ! ", lowercase=True) == "salut kira !"
+
+
+def test_cache_key_depends_on_model():
+    """Test clé différente selon le modèle"""
+    assert make_cache_key("salut", "model-a") != make_cache_key("salut", "model-b")
+    assert make_cache_key("salut ", "m") == make_cache_key("salut", "m")
+
+
+def test_cache_key_case():
+    """Test casse conservée par défaut (modèles sensibles à la casse)"""
+    assert make_cache_key("Paris", "m") != make_cache_key("paris", "m")
+    assert make_cache_key("Paris", "m", lowercase=True) == make_cache_key("paris", "m", lowercase=True)
+
+
+def test_memory_hit_skips_encode():
+    """Test deuxième appel servi par le LRU"""
+    encoder = CountingEncoder()
+    cache = EmbeddingCache(model_name="m", lowercase=True)
+
+    first = cache.get_or_compute(["bonjour"], encoder)
+    second = cache.get_or_compute(["Bonjour"], encoder)
+
+    assert len(encoder.calls) == 1
+    assert np.array_equal(first, second)
+    assert cache.get_stats()["memory_hits"] == 1
+
+
+def test_batch_deduplicates_and_keeps_order():
+    """Test lot avec doublons : un seul encodage par texte unique"""
+    encoder = CountingEncoder()
+    cache = EmbeddingCache(model_name="m")
+
+    vectors = cache.get_or_compute(["merci", "salut", "merci"], encoder)
+
+    assert encoder.calls == [["merci", "salut"]]
+    assert vectors.shape == (3, 3)
+    assert np.array_equal(vectors[0], vectors[2])
+
+
+def test_persistent_tier(db):
+    """Test niveau SQLite partagé entre instances"""
+    encoder = CountingEncoder()
+    first = EmbeddingCache(db, model_name="m")
+    first.get_or_compute(["salut"], encoder)
+    first.flush()
+
+    fresh = EmbeddingCache(db, model_name="m")
+    fresh.get_or_compute(["salut"], encoder)
+
+    assert len(encoder.calls) == 1
+    assert fresh.get_stats()["disk_hits"] == 1
+
+
+def test_lru_eviction():
+    """Test taille maximale du LRU"""
+    cache = EmbeddingCache(model_name="m", max_memory_entries=2)
+    cache.get_or_compute(["a", "b", "c"], CountingEncoder())
+
+    assert cache.get_stats()["memory_entries"] == 2
+
+
+def test_stats_hit_rate():
+    """Test taux de hits"""
+    cache = EmbeddingCache(model_name="m")
+    encoder = CountingEncoder()
+    cache.get_or_compute(["x"], encoder)
+    cache.get_or_compute(["x"], encoder)
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == pytest.approx(0.5)
+
+
+def test_writes_batched(db):
+    """Test vecteurs calculés écrits par lots, pas à chaque miss"""
+    cache = EmbeddingCache(db, model_name="m", write_batch_size=3)
+    encoder = CountingEncoder()
+
+    cache.get_or_compute(["a", "b"], encoder)
+    assert db.count_cached_embeddings() == 0
+    assert cache.get_stats()["pending_writes"] == 2
+
+    cache.get_or_compute(["c"], encoder)
+    assert db.count_cached_embeddings() == 3
+    assert cache.get_stats()["pending_writes"] == 0
+
+
+def test_disk_tier_bounded(db):
+    """Test table SQLite bornée : les entrées les plus anciennes supprimées"""
+    cache = EmbeddingCache(db, model_name="m", max_disk_entries=5, write_batch_size=1)
+    encoder = CountingEncoder()
+    for i in range(12):
+        cache.get_or_compute([f"texte {i}"], encoder)
+
+    assert db.count_cached_embeddings() == 5
+    newest = make_cache_key("texte 11", "m")
+    oldest = make_cache_key("texte 0", "m")
+    assert set(db.get_cached_embeddings([newest, oldest])) == {newest}
+
+
+def test_concurrent_access():
+    """Test appels simultanés depuis plusieurs threads : LRU et compteurs cohérents"""
+    cache = EmbeddingCache(model_name="m", max_memory_entries=16)
+    encoder = CountingEncoder()
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(200):
+                cache.get_or_compute([f"t{(i + offset) % 40}"], encoder)
+        except Exception as e:  # pragma: no cover - échec rapporté ci-dessous
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.get_stats()
+    assert errors == []
+    assert stats["hits"] + stats["misses"] == 800
+    assert stats["memory_entries"] == 16
@@ -0,0 +1,233 @@
+"""
+Tests unitaires pour FactStore
+
+Tests du magasin de faits indexé :
+- Dédoublonnage des entités, top-K par occurrences, files de récence
+- Index des préférences
+- Lecture sans exposer les listes internes
+- Écriture dans SQLite (une ligne par entité) et rechargement
+  (MemoryManager compris, bases à une ligne par mention compactées)
+- Mémoire modifiée seulement après COMMIT (rien après ROLLBACK)
+"""
+
+import random
+
+import pytest
+
+from src.ai.database import WorklyDatabase
+from src.ai.fact_store import FactStore
+from src.ai.memory_manager import MemoryManager
+
+
+def _entity(value, entity_type="person", first_seen="2024-01-01T10:00:00"):
+    """Entité au format FactExtractor"""
+    return {
+        "entity_type": entity_type,
+        "value": value,
+        "context": f"... {value} ...",
+        "confidence": 0.8,
+        "first_seen": first_seen,
+        "occurrences": 1,
+    }
+
+
+def _preference(subject, sentiment="positive", category="hobby"):
+    """Préférence au format FactExtractor"""
+    return {"category": category, "subject": subject, "sentiment": sentiment, "intensity": 0.6}
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Fixture : base SQLite temporaire"""
+    database = WorklyDatabase(str(tmp_path / "workly.db"))
+    yield database
+    database.close()
+
+
+# ========== TESTS INDEX ==========
+
+
+def test_entity_deduplicated_case_insensitive():
+    """Test même entité (casse ignorée) : occurrences incrémentées"""
+    store = FactStore()
+    store.add_facts({"entities": [_entity("Marie")]})
+    store.add_facts({"entities": [_entity("marie", first_seen="2024-01-02T10:00:00")]})
+
+    assert store.count("entities") == 1
+    marie = store.find_entity("person", "MARIE")
+    assert marie["occurrences"] == 2
+    assert marie["last_seen"] == "2024-01-02T10:00:00"
+    assert store.find_entity("location", "Marie") is None
+
+
+def test_top_entities_matches_full_sort():
+    """Test top-K maintenu : même ordre qu'un tri stable de toutes les entités"""
+    rng = random.Random(7)
+    store = FactStore(top_k=5)
+    for _ in range(400):
+        store.add_facts({"entities": [_entity(f"Nom{rng.randint(0, 40)}")]})
+
+    expected = sorted(store["entities"], key=lambda e: e["occurrences"], reverse=True)
+    for n in (1, 3, 5, 12):
+        assert store.top_entities(n) == expected[:n]
+
+
+def test_recent_newest_first_and_bounded():
+    """Test file de récence : plus récent d'abord, taille bornée"""
+    store = FactStore(recent_size=3)
+    for i in range(5):
+        store.add_facts({"events": [{"event_type": "past_action", "description": f"evt {i}"}]})
+
+    assert [e["description"] for e in store.recent("events", 10)] == ["evt 4", "evt 3", "evt 2"]
+    assert store.count("events") == 5
+
+
+def test_recent_entity_seen_again_moves_first():
+    """Test entité revue : remise en tête de la file de récence"""
+    store = FactStore()
+    store.add_facts({"entities": [_entity("Marie"), _entity("Paul")]})
+    store.add_facts({"entities": [_entity("Marie")]})
+
+    assert [e["value"] for e in store.recent("entities", 2)] == ["Marie", "Paul"]
+
+
+def test_has_preference():
+    """Test index (sentiment, sujet)"""
+    store = FactStore()
+    assert not store.has_preference(["humour"])
+
+    store.add_facts({"preferences": [_preference("Blague"), _preference("brocolis", "negative")]})
+
+    assert store.has_preference(["humour", "blague"])
+    assert store.has_preference(["brocolis"], sentiment="negative")
+    assert not store.has_preference(["brocolis"])
+
+
+def test_replace_category_rebuilds_indexes():
+    """Test affectation d'une catégorie : index reconstruits"""
+    store = FactStore()
+    store.add_facts({"preferences": [_preference("humour")]})
+
+    store["preferences"] = [_preference("jazz")]
+
+    assert [p["subject"] for p in store.get("preferences", [])] == ["jazz"]
+    assert not store.has_preference(["humour"])
+    assert store.has_preference(["jazz"])
+
+
+def test_getitem_returns_snapshot():
+    """Test facts[catégorie] : tuple, les index restent cohérents"""
+    store = FactStore()
+    store.add_facts({"preferences": [_preference("humour")]})
+
+    snapshot = store["preferences"]
+    store.add_facts({"preferences": [_preference("jazz")]})
+
+    assert isinstance(snapshot, tuple) and len(snapshot) == 1
+    assert store.count("preferences") == 2
+
+
+# ========== TESTS SQLITE ==========
+
+
+def test_write_through_and_reload(db):
+    """Test faits écrits dans SQLite puis rechargés à l'identique"""
+    store = FactStore(db)
+    store.add_facts({"entities": [_entity("Marie")], "preferences": [_preference("humour")]})
+    store.add_facts({"entities": [_entity("Marie"), _entity("Lyon", "location")]})
+
+    assert len(db.get_facts()) == 3  # Une seule ligne pour Marie
+    assert {f["type"] for f in db.get_facts(category="entities")} == {"person", "location"}
+
+    reloaded = FactStore(db)
+    reloaded.load_from_database()
+
+    assert reloaded.find_entity("person", "Marie")["occurrences"] == 2
+    assert [e["value"] for e in reloaded.top_entities(5)] == ["Marie", "Lyon"]
+    assert reloaded.has_preference(["humour"])
+
+
+def test_legacy_mention_rows_compacted(db):
+    """Test base à une ligne par mention : fusionnée au chargement, une seule fois"""
+    db.add_facts_batch(
+        [
+            {"category": "entities", "type_": "person", "data": _entity("Marie", first_seen=f"2024-01-0{i}T10:00:00")}
+            for i in (1, 2, 3)
+        ]
+    )
+
+    store = FactStore(db)
+    assert store.load_from_database() == 3
+    marie = store.find_entity("person", "marie")
+    assert (marie["occurrences"], marie["first_seen"], marie["last_seen"]) == (
+        3,
+        "2024-01-01T10:00:00",
+        "2024-01-03T10:00:00",
+    )
+    assert len(db.get_facts()) == 1
+
+    store.add_facts({"entities": [_entity("Marie")]})
+    reloaded = FactStore(db)
+    assert reloaded.load_from_database() == 1
+    assert reloaded.find_entity("person", "Marie")["occurrences"] == 4
+
+
+def test_memory_applied_after_commit_only(db):
+    """Test transaction englobante : mémoire à jour au COMMIT, intacte au ROLLBACK"""
+    store = FactStore(db)
+
+    with db.transaction():
+        store.add_facts({"entities": [_entity("Marie")]})
+        store.add_facts({"entities": [_entity("Marie")]})  # Voit l'écriture en attente
+        assert store.find_entity("person", "Marie") is None
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            store.add_facts({"entities": [_entity("Marie"), _entity("Lyon", "location")]})
+            raise RuntimeError("échec")
+
+    assert store.find_entity("person", "Marie")["occurrences"] == 2
+    assert store.find_entity("location", "Lyon") is None
+    assert len(db.get_facts()) == 1
+
+    store.add_facts({"entities": [_entity("Marie")]})
+    assert len(db.get_facts()) == 1
+    assert store.find_entity("person", "Marie")["occurrences"] == 3
+
+
+def test_memory_manager_rollback_keeps_conversation(tmp_path, monkeypatch):
+    """Test échec d'un échange : ni message ni fait en mémoire"""
+    manager = MemoryManager(storage_dir=str(tmp_path))
+    add_conversation = manager.db.add_conversation
+
+    def fail_on_assistant(role, *args, **kwargs):
+        if role == "assistant":
+            raise RuntimeError("disque plein")
+        return add_conversation(role, *args, **kwargs)
+
+    monkeypatch.setattr(manager.db, "add_conversation", fail_on_assistant)
+    with pytest.raises(RuntimeError):
+        manager.add_exchange("J'adore la programmation Python !", "Moi aussi !")
+
+    assert manager.current_conversation == []
+    assert manager.facts.count("preferences") == 0
+    assert manager.db.get_conversation_count() == 0
+    manager.close()
+
+
+def test_memory_manager_facts_survive_restart(tmp_path):
+    """Test faits de MemoryManager rechargés au redémarrage"""
+    manager = MemoryManager(storage_dir=str(tmp_path))
+    manager.add_message("user", "J'adore la programmation Python !")
+    manager.add_message("user", "Marie.")
+    manager.add_message("user", "Marie !")
+    preferences = manager.facts.count("preferences")
+    entities = [dict(e) for e in manager.facts["entities"]]
+    manager.close()
+
+    restarted = MemoryManager(storage_dir=str(tmp_path))
+
+    assert preferences > 0
+    assert restarted.facts.count("preferences") == preferences
+    assert restarted.facts.find_entity("person", "Marie")["occurrences"] == 2
+    assert list(restarted.facts["entities"]) == entities
+    restarted.close()
@@ -0,0 +1,205 @@
+"""
+Tests unitaires pour MemoryWorker
+
+Tests de la file d'arrière-plan :
+- Ordre de complétion (FIFO)
+- flush() / shutdown()
+- Contre-pression (file pleine → attente courte puis éviction basse priorité)
+- Intégration MemoryManager (async_maintenance)
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.ai.memory_worker import MemoryWorker
+from src.ai.memory_manager import MemoryManager
+
+
+@pytest.fixture
+def worker():
+    """Fixture : worker arrêté après le test"""
+    w = MemoryWorker(max_queue_size=4)
+    yield w
+    w.shutdown(drain=False, timeout=1)
+
+
+# ========== TESTS WORKER ==========
+
+
+def test_jobs_complete_in_order(worker):
+    """Test tâches terminées dans l'ordre de soumission"""
+    done = []
+    for i in range(10):
+        worker.submit(f"job {i}", lambda i=i: (time.sleep(0.001), done.append(i)))
+
+    assert worker.flush(timeout=5)
+    assert done == list(range(10))
+    assert worker.get_stats()["completed"] == 10
+
+
+def test_submit_does_not_block(worker):
+    """Test soumission immédiate même si la tâche est lente"""
+    release = threading.Event()
+
+    start = time.perf_counter()
+    worker.submit("lente", release.wait, 5)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.5
+    assert worker.pending_count == 1
+    release.set()
+    assert worker.flush(timeout=5)
+    assert worker.pending_count == 0
+
+
+def test_flush_timeout(worker):
+    """Test flush retourne False si la file ne se vide pas"""
+    release = threading.Event()
+    worker.submit("bloquée", release.wait, 5)
+
+    assert not worker.flush(timeout=0.05)
+    release.set()
+    assert worker.flush(timeout=5)
+
+
+def test_failed_job_counted(worker):
+    """Test erreur d'une tâche sans arrêter le worker"""
+    done = []
+    worker.submit("erreur", lambda: 1 / 0)
+    worker.submit("ok", done.append, 1)
+
+    assert worker.flush(timeout=5)
+    assert done == [1]
+    assert worker.get_stats()["failed"] == 1
+
+
+def _fill(worker, release, done):
+    """Occupe le worker avec une tâche bloquante (file vide ensuite)"""
+    worker.submit("bloquante", lambda: (release.wait(5), done.append("a")))
+    time.sleep(0.05)  # Le worker a pris la première tâche
+
+
+def test_full_queue_waits_for_space():
+    """Test file pleine : submit attend qu'une place se libère"""
+    worker = MemoryWorker(max_queue_size=1)
+    release = threading.Event()
+    done = []
+    _fill(worker, release, done)
+    worker.submit("en file", done.append, "b")
+
+    timer = threading.Timer(0.05, release.set)
+    timer.start()
+    assert worker.submit("suivante", done.append, "c", block_timeout=2)
+
+    assert worker.flush(timeout=5)
+    assert done == ["a", "b", "c"]
+    stats = worker.get_stats()
+    assert stats["dropped"] == 0 and stats["overflows"] == 0
+    worker.shutdown()
+
+
+def test_full_queue_drops_oldest_low_priority():
+    """Test file pleine : la plus ancienne tâche basse priorité est évincée"""
+    worker = MemoryWorker(max_queue_size=2)
+    release = threading.Event()
+    done = []
+    _fill(worker, release, done)
+    worker.submit("embedding 1", done.append, "e1", low_priority=True)
+    worker.submit("segment", done.append, "b")
+
+    start = time.perf_counter()
+    assert worker.submit("segment 2", done.append, "c", block_timeout=0.01)
+    assert time.perf_counter() - start < 1
+    assert done == []  # Rien d'exécuté dans le thread appelant
+
+    release.set()
+    assert worker.flush(timeout=5)
+    assert done == ["a", "b", "c"]
+    assert worker.get_stats()["dropped"] == 1
+    worker.shutdown()
+
+
+def test_full_queue_never_runs_inline():
+    """Test file pleine de tâches normales : dépassement, jamais d'exécution inline"""
+    worker = MemoryWorker(max_queue_size=1)
+    release = threading.Event()
+    done = []
+    threads = []
+    _fill(worker, release, done)
+    worker.submit("en file", done.append, "b")
+
+    def job():
+        threads.append(threading.current_thread().name)
+        done.append("c")
+
+    assert worker.submit("segment", job, block_timeout=0.01)
+    dropped = worker.submit(
+        "embedding", done.append, "e", low_priority=True, block_timeout=0.01
+    )
+    assert dropped is False
+    assert done == []
+
+    release.set()
+    assert worker.flush(timeout=5)
+    assert done == ["a", "b", "c"]
+    assert threads == [worker.name]
+    stats = worker.get_stats()
+    assert stats["overflows"] == 1
+    assert stats["dropped"] == 1
+    assert stats["pending"] == 0
+    worker.shutdown()
+
+
+# ========== TESTS INTÉGRATION ==========
+
+
+def test_memory_manager_async_segments(tmp_path):
+    """Test add_message ne bloque pas sur le résumé LLM"""
+    release = threading.Event()
+
+    def slow_llm(prompt: str) -> str:
+        release.wait(5)
+        return "Résumé : discussion de test."
+
+    manager = MemoryManager(
+        storage_dir=str(tmp_path), llm_callback=slow_llm, async_maintenance=True
+    )
+    manager.auto_summarize_threshold = 6
+
+    start = time.perf_counter()
+    for i in range(6):
+        manager.add_message("user" if i % 2 == 0 else "assistant", f"Message {i}")
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 2
+    assert manager.current_conversation == []
+    assert manager.get_stats()["maintenance_queue"]["pending"] == 1
+
+    release.set()
+    assert manager.flush(timeout=5)
+    assert manager.get_stats()["segments_count"] == 1
+    manager.close()
+
+
+def test_segment_ids_unique_while_pending(tmp_path):
+    """Test IDs de segments distincts avec segments en cours"""
+    release = threading.Event()
+    manager = MemoryManager(
+        storage_dir=str(tmp_path),
+        llm_callback=lambda prompt: (release.wait(5), "Résumé.")[1],
+        async_maintenance=True,
+    )
+    manager.auto_summarize_threshold = 6
+
+    ids = [manager.current_segment_id]
+    for _ in range(2):
+        for i in range(6):
+            manager.add_message("user", f"Message {i}")
+        ids.append(manager.current_segment_id)
+
+    release.set()
+    manager.close(timeout=5)
+    assert len(set(ids)) == 3
+    assert [s["segment_id"] for s in manager.conversations["segments"]] == ids[:2]
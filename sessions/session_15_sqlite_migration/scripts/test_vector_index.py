@@ -0,0 +1,298 @@
+"""
+Tests unitaires pour VectorIndex
+
+Tests de l'index vectoriel en mémoire :
+- Ajout incrémental et croissance de la matrice
+- Recherche exacte (parité avec similarité cosinus naïve)
+- Mode IVF approximatif (rappel sur données groupées)
+- Entraînement IVF en arrière-plan (requêtes exactes en attendant)
+- Chargement depuis SQLite
+"""
+
+import pytest
+import numpy as np
+import tempfile
+import shutil
+import os
+import threading
+
+from src.ai.vector_index import VectorIndex, batch_top_k, normalize_rows
+from src.ai.database import WorklyDatabase
+from src.ai.memory_manager import MemoryManager
+
+
+@pytest.fixture
+def rng():
+    """Fixture : générateur aléatoire reproductible"""
+    return np.random.default_rng(42)
+
+
+@pytest.fixture
+def temp_db():
+    """Fixture : base SQLite temporaire"""
+    temp_dir = tempfile.mkdtemp(prefix="workly_index_test_")
+    db = WorklyDatabase(os.path.join(temp_dir, "workly.db"))
+    yield db
+    db.close()
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _naive_top_k(vectors, query, k):
+    """Référence : boucle cosinus comme l'ancien search_relevant_context"""
+    scores = []
+    for i, vec in enumerate(vectors):
+        sim = np.dot(vec, query) / (np.linalg.norm(vec) * np.linalg.norm(query))
+        scores.append((float(sim), i))
+    scores.sort(reverse=True)
+    return scores[:k]
+
+
+# ========== TESTS CONSTRUCTION ==========
+
+
+def test_invalid_mode():
+    """Test mode inconnu refusé"""
+    with pytest.raises(ValueError):
+        VectorIndex(mode="hnsw")
+
+
+def test_add_grows_capacity(rng):
+    """Test ajout incrémental au-delà de la capacité initiale"""
+    index = VectorIndex(mode="exact", initial_capacity=2)
+
+    for i in range(10):
+        index.add(i, rng.normal(size=8), text=f"texte {i}")
+
+    assert len(index) == 10
+    assert index.get_stats()["dim"] == 8
+
+
+def test_dimension_mismatch(rng):
+    """Test dimension incompatible refusée"""
+    index = VectorIndex(mode="exact")
+    index.add(1, rng.normal(size=8))
+
+    with pytest.raises(ValueError):
+        index.add(2, rng.normal(size=4))
+
+
+# ========== TESTS RECHERCHE ==========
+
+
+def test_exact_search_matches_naive(rng):
+    """Test parité avec le calcul cosinus naïf"""
+    vectors = rng.normal(size=(200, 16)).astype(np.float32)
+    index = VectorIndex(mode="exact")
+    index.add_batch(vectors, list(range(200)))
+
+    query = rng.normal(size=16).astype(np.float32)
+    results = index.search(query, top_k=5)
+    expected = _naive_top_k(vectors, query, 5)
+
+    assert [r["id"] for r in results] == [i for _, i in expected]
+    for result, (sim, _) in zip(results, expected):
+        assert result["similarity"] == pytest.approx(sim, abs=1e-5)
+
+
+def test_search_min_similarity(rng):
+    """Test seuil de similarité"""
+    index = VectorIndex(mode="exact")
+    index.add(1, np.array([1.0, 0.0]), text="est")
+    index.add(2, np.array([0.0, 1.0]), text="nord")
+
+    results = index.search(np.array([1.0, 0.1]), top_k=2, min_similarity=0.5)
+
+    assert len(results) == 1
+    assert results[0]["text"] == "est"
+
+
+def test_search_empty_index():
+    """Test recherche sur index vide"""
+    assert VectorIndex().search(np.ones(4), top_k=3) == []
+
+
+def test_ivf_search_recall(rng):
+    """Test rappel du mode IVF sur données groupées"""
+    centers = rng.normal(size=(20, 32))
+    vectors = np.vstack(
+        [c + 0.05 * rng.normal(size=(100, 32)) for c in centers]
+    ).astype(np.float32)
+
+    index = VectorIndex(mode="ivf", n_probe=4)
+    index.add_batch(vectors, list(range(len(vectors))))
+    assert index.wait_for_training(5)
+
+    query = centers[3] + 0.05 * rng.normal(size=32)
+    results = index.search(query, top_k=10)
+    expected = {i for _, i in _naive_top_k(vectors, query, 10)}
+
+    assert index.get_stats()["ivf_active"]
+    assert len({r["id"] for r in results} & expected) >= 8
+
+
+def test_search_exact_while_training(rng):
+    """Test requête pendant l'entraînement : pas d'attente, résultat exact"""
+    vectors = rng.normal(size=(500, 16))
+    gate = threading.Event()
+    index = VectorIndex(mode="ivf", n_probe=2)
+    train = index.train
+    index.train = lambda *args, **kwargs: gate.wait(5) and train(*args, **kwargs)
+
+    index.add_batch(vectors, list(range(500)))
+    results = index.search(vectors[7], top_k=1)
+
+    assert results[0]["id"] == 7
+    assert index.get_stats()["ivf_lists"] == 0
+    gate.set()
+    assert index.wait_for_training(5)
+    assert index.get_stats()["ivf_lists"] > 0
+
+
+def test_ivf_incremental_add(rng):
+    """Test vecteur ajouté après entraînement retrouvé"""
+    index = VectorIndex(mode="ivf", n_probe=2)
+    index.add_batch(rng.normal(size=(500, 16)), list(range(500)))
+    index.train()
+
+    target = rng.normal(size=16)
+    index.add(999, target, text="nouveau")
+
+    results = index.search(target, top_k=1)
+    assert results[0]["id"] == 999
+
+
+# ========== TESTS SQLITE ==========
+
+
+def test_load_from_database(temp_db, rng):
+    """Test chargement des embeddings existants"""
+    for i in range(5):
+        temp_db.add_embedding(
+            None, rng.normal(size=8).astype(np.float32), f"texte {i}", f"2025-01-0{i + 1}"
+        )
+
+    index = VectorIndex()
+    loaded = index.load_from_database(temp_db)
+
+    assert loaded == 5
+    assert len(index) == 5
+
+
+# ========== TESTS SCORING PAR LOT ==========
+
+
+def test_batch_top_k_matches_single(rng):
+    """Test lot de requêtes = requêtes individuelles"""
+    matrix = normalize_rows(rng.normal(size=(300, 16)))
+    queries = rng.normal(size=(4, 16))
+
+    batch_idx, batch_scores = batch_top_k(matrix, queries, 5)
+
+    for q, query in enumerate(queries):
+        idx, scores = batch_top_k(matrix, query, 5)
+        assert list(idx[0]) == list(batch_idx[q])
+        assert np.allclose(scores[0], batch_scores[q])
+
+
+def test_batch_top_k_k_larger_than_n(rng):
+    """Test top_k supérieur au nombre de vecteurs"""
+    matrix = normalize_rows(rng.normal(size=(3, 8)))
+
+    idx, scores = batch_top_k(matrix, rng.normal(size=8), 10)
+
+    assert idx.shape == (1, 3)
+    assert np.all(np.diff(scores[0]) <= 0)
+
+
+def test_search_batch_exact(rng):
+    """Test search_batch retourne un résultat par requête"""
+    index = VectorIndex(mode="exact")
+    index.add_batch(rng.normal(size=(50, 8)), list(range(50)))
+
+    results = index.search_batch(rng.normal(size=(3, 8)), top_k=2)
+
+    assert len(results) == 3
+    assert all(len(hits) == 2 for hits in results)
+
+
+def test_get_all_embeddings_matrix(temp_db, rng):
+    """Test matrice pré-allouée identique aux BLOBs stockés"""
+    vectors = rng.normal(size=(4, 8)).astype(np.float32)
+    for i, vec in enumerate(vectors):
+        temp_db.add_embedding(None, vec, f"texte {i}", f"2025-01-0{i + 1}")
+
+    matrix, ids = temp_db.get_all_embeddings_matrix()
+
+    assert matrix.shape == (4, 8)
+    assert ids == [4, 3, 2, 1]  # timestamp DESC
+    assert np.array_equal(matrix[0], vectors[3])
+
+
+# ========== TESTS BASE MMAP ==========
+
+
+def test_attach_base_matches_in_memory(rng):
+    """Test base mmap : mêmes résultats que l'index en mémoire"""
+    vectors = rng.normal(size=(100, 8)).astype(np.float32)
+    extra = rng.normal(size=(10, 8)).astype(np.float32)
+
+    in_memory = VectorIndex(mode="exact")
+    in_memory.add_batch(np.vstack([vectors, extra]), list(range(110)))
+
+    mapped = VectorIndex(mode="exact")
+    mapped.attach_base(vectors, list(range(100)))
+    mapped.add_batch(extra, list(range(100, 110)))
+
+    query = rng.normal(size=8)
+    assert [r["id"] for r in mapped.search(query, top_k=5)] == [
+        r["id"] for r in in_memory.search(query, top_k=5)
+    ]
+    assert mapped.get_stats()["mmap_rows"] == 100
+
+
+def test_load_from_embedding_store(tmp_path, rng):
+    """Test chargement via le sidecar mmap de la base"""
+    db = WorklyDatabase(str(tmp_path / "workly.db"), use_embedding_store=True)
+    for i in range(6):
+        db.add_embedding(None, rng.normal(size=8).astype(np.float32), f"t{i}", f"t{i}")
+
+    index = VectorIndex(mode="exact")
+    assert index.load_from_database(db) == 6
+    assert index.get_stats()["mmap_rows"] == 6
+    assert index.search(db.get_embeddings_view()[0][2], top_k=1)[0]["id"] == 3
+    db.close()
+
+
+def test_detach_base_keeps_results(rng):
+    """Test base mmap copiée en RAM (sidecar remplacé) : mêmes résultats, vue lâchée"""
+    vectors = rng.normal(size=(100, 8)).astype(np.float32)
+    extra = rng.normal(size=(10, 8)).astype(np.float32)
+    index = VectorIndex(mode="exact")
+    index.attach_base(vectors, list(range(100)))
+    index.add_batch(extra, list(range(100, 110)))
+    query = rng.normal(size=8)
+    before = [r["id"] for r in index.search(query, top_k=5)]
+
+    index.detach_base()
+
+    assert index.get_stats()["mmap_rows"] == 0
+    assert index._base is None
+    assert [r["id"] for r in index.search(query, top_k=5)] == before
+    index.add(110, rng.normal(size=8).astype(np.float32))
+    assert len(index) == 111
+
+
+def test_memory_manager_releases_mmap_on_rebuild(tmp_path, rng):
+    """Test reconstruction du sidecar : l'index du MemoryManager lâche sa vue avant"""
+    db = WorklyDatabase(str(tmp_path / "workly.db"), use_embedding_store=True)
+    for i in range(6):
+        db.add_embedding(None, rng.normal(size=8).astype(np.float32), f"t{i}", f"t{i}")
+    db.close()
+    manager = MemoryManager(storage_dir=str(tmp_path), use_embedding_store=True)
+    assert manager.vector_index.get_stats()["mmap_rows"] == 6
+
+    manager.db.rebuild_embedding_store()
+
+    assert manager.vector_index.get_stats()["mmap_rows"] == 0
+    assert len(manager.vector_index) == 6
+    manager.close()
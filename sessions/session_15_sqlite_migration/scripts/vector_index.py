@@ -0,0 +1,618 @@
+"""
+vector_index.py - Index vectoriel en mémoire pour la recherche sémantique
+
+Remplace la boucle Python de MemoryManager.search_relevant_context :
+- Vecteurs float32 pré-normalisés stockés dans une matrice contiguë
+- Recherche exacte : un seul produit matriciel + sélection top-k (argpartition)
+- Scoring par lot : plusieurs requêtes scorées en un seul produit matriciel
+- Mode approximatif IVF (k-means sphérique + listes inversées) pour 100k+ vecteurs
+- Entraînement IVF déclenché à l'ajout, en arrière-plan (jamais dans une requête)
+- Chargement unique au démarrage depuis SQLite, mise à jour incrémentale
+- Base mmap optionnelle (sidecar EmbeddingStore) : vecteurs lus sans copie en RAM
+
+Modes :
+- "exact" : produit scalaire sur toute la matrice (O(N·d) vectorisé)
+- "ivf"   : seules les n_probe listes les plus proches sont scorées
+- "auto"  : exact sous ivf_threshold vecteurs, IVF au-delà (défaut)
+
+Tant que le premier entraînement n'est pas terminé, les requêtes sont
+servies en mode exact.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_MODES = ("exact", "ivf", "auto")
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Normalise des vecteurs ligne par ligne (les vecteurs nuls restent nuls)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def batch_top_k(
+    matrix: np.ndarray, queries: np.ndarray, top_k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score un lot de requêtes contre une matrice en un seul produit matriciel
+
+    Les lignes de `matrix` doivent être normalisées (cf. normalize_rows) ;
+    les requêtes sont normalisées ici. La sélection top-k utilise
+    argpartition (O(N)) puis ne trie que les k meilleurs.
+
+    Args:
+        matrix: Matrice (N, dim) de vecteurs normalisés
+        queries: Requête (dim,) ou lot de requêtes (Q, dim)
+        top_k: Nombre de résultats par requête
+
+    Returns:
+        (indices, scores) de forme (Q, k), triés par similarité décroissante
+    """
+    queries = normalize_rows(np.atleast_2d(queries))
+    return select_top_k(queries @ matrix.T, top_k)
+
+
+def select_top_k(scores: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sélectionne les k meilleurs scores de chaque ligne d'une matrice (Q, N)
+
+    Returns:
+        (indices, scores) de forme (Q, k), triés par score décroissant
+    """
+    n = scores.shape[1]
+    k = min(top_k, n)
+    if k <= 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(np.float32)
+
+    if k < n:
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        best = np.broadcast_to(np.arange(n), scores.shape)
+    best_scores = np.take_along_axis(scores, best, axis=1)
+
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return (
+        np.take_along_axis(best, order, axis=1),
+        np.take_along_axis(best_scores, order, axis=1),
+    )
+
+
+class VectorIndex:
+    """
+    Index vectoriel persistant (durée de vie du processus) pour les embeddings
+
+    Les vecteurs sont normalisés à l'insertion : la similarité cosinus devient
+    un simple produit scalaire. La matrice est pré-allouée et doublée quand
+    elle est pleine (ajout amorti O(1), pas de np.vstack à chaque insertion).
+
+    Avec une base mmap (attach_base), les premières lignes restent dans le
+    fichier sidecar : seuls les inverses des normes (4 octets/ligne) sont en
+    RAM, et les vecteurs ajoutés ensuite vont dans la matrice en mémoire.
+    """
+
+    def __init__(
+        self,
+        mode: str = "auto",
+        ivf_threshold: int = 20000,
+        n_probe: int = 8,
+        initial_capacity: int = 1024,
+        background_training: bool = True,
+    ):
+        """
+        Initialise un index vide
+
+        Args:
+            mode: "exact", "ivf" ou "auto"
+            ivf_threshold: Nombre de vecteurs à partir duquel "auto" passe en IVF
+            n_probe: Nombre de listes inversées scorées par requête (mode IVF)
+            initial_capacity: Nombre de lignes pré-allouées
+            background_training: Entraînement IVF dans un thread (False = dans add)
+        """
+        if mode not in INDEX_MODES:
+            raise ValueError(
+                f"Mode d'index invalide : {mode}. Valeurs valides : {list(INDEX_MODES)}"
+            )
+
+        self.mode = mode
+        self.ivf_threshold = ivf_threshold
+        self.n_probe = n_probe
+        self.background_training = background_training
+        self._initial_capacity = max(1, initial_capacity)
+
+        self.dim: Optional[int] = None
+        self._matrix: Optional[np.ndarray] = None  # (capacity, dim) float32
+        self._ids: List[int] = []
+        self._payloads: List[Dict[str, Any]] = []
+        self._count = 0
+
+        # Base mmap (lignes 0.._n_base, vecteurs bruts + inverses des normes)
+        self._base: Optional[np.ndarray] = None
+        self._base_scale: Optional[np.ndarray] = None
+        self._n_base = 0
+
+        # État IVF
+        self._centroids: Optional[np.ndarray] = None  # (n_lists, dim) float32
+        self._lists: List[List[int]] = []
+        self._list_arrays: List[Optional[np.ndarray]] = []
+        self._trained_size = 0
+
+        # Entraînement en arrière-plan : ajouts et installation des listes sérialisés
+        self._ivf_lock = threading.Lock()
+        self._training: Optional[threading.Thread] = None
+        self._generation = 0  # Incrémenté par clear() : entraînement en cours périmé
+
+    # ========== CONSTRUCTION ==========
+
+    def __len__(self) -> int:
+        return self._count
+
+    def clear(self) -> None:
+        """Vide l'index (la dimension est conservée)"""
+        with self._ivf_lock:
+            self._generation += 1
+            self._matrix = None
+            self._ids = []
+            self._payloads = []
+            self._count = 0
+            self._base = None
+            self._base_scale = None
+            self._n_base = 0
+            self._reset_ivf()
+
+    def _reset_ivf(self) -> None:
+        self._centroids = None
+        self._lists = []
+        self._list_arrays = []
+        self._trained_size = 0
+
+    def _ensure_capacity(self, extra: int) -> None:
+        """Agrandit la matrice en mémoire (doublement) si nécessaire"""
+        used = self._count - self._n_base
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if used + extra <= capacity:
+            return
+
+        new_capacity = max(self._initial_capacity, capacity)
+        while new_capacity < used + extra:
+            new_capacity *= 2
+
+        new_matrix = np.empty((new_capacity, self.dim), dtype=np.float32)
+        if used:
+            new_matrix[:used] = self._matrix[:used]
+        self._matrix = new_matrix
+
+    def attach_base(
+        self,
+        vectors: np.ndarray,
+        ids: List[int],
+        payloads: Optional[List[Dict[str, Any]]] = None,
+        chunk_size: int = 8192,
+    ) -> None:
+        """
+        Utilise une matrice externe (np.memmap du sidecar) comme base de l'index
+
+        Les vecteurs ne sont pas copiés : seules leurs normes sont calculées
+        (lecture séquentielle par blocs). L'index doit être vide.
+
+        Args:
+            vectors: Matrice (n, dim) de vecteurs bruts, en lecture seule
+            ids: IDs SQLite correspondants
+            payloads: Métadonnées par vecteur (text, segment_id)
+        """
+        if self._count:
+            raise ValueError("attach_base() nécessite un index vide")
+        n = vectors.shape[0]
+        if len(ids) != n:
+            raise ValueError(f"{n} vecteurs mais {len(ids)} IDs")
+        if n == 0:
+            return
+
+        scale = np.empty(n, dtype=np.float32)
+        for start in range(0, n, chunk_size):
+            norms = np.linalg.norm(vectors[start : start + chunk_size], axis=1)
+            norms[norms == 0] = 1.0
+            scale[start : start + chunk_size] = 1.0 / norms
+
+        self.dim = vectors.shape[1]
+        self._base = vectors
+        self._base_scale = scale
+        self._n_base = n
+        self._ids = [int(id_) for id_ in ids]
+        self._payloads = list(payloads or [{} for _ in range(n)])
+        self._count = n
+        self._schedule_training()
+
+    def detach_base(self, chunk_size: int = 8192) -> None:
+        """
+        Copie la base mmap en RAM puis lâche la vue (sidecar sur le point
+        d'être remplacé, cf. EmbeddingStore.on_release)
+
+        L'ordre des lignes est conservé : les listes IVF restent valides.
+        """
+        self.wait_for_training()
+        with self._ivf_lock:
+            n_base = self._n_base
+            if n_base == 0:
+                return
+            used = self._count - n_base
+            matrix = np.empty(
+                (max(self._count, self._initial_capacity), self.dim), dtype=np.float32
+            )
+            for start in range(0, n_base, chunk_size):
+                stop = min(start + chunk_size, n_base)
+                matrix[start:stop] = (
+                    self._base[start:stop] * self._base_scale[start:stop, None]
+                )
+            if used:
+                matrix[n_base : self._count] = self._matrix[:used]
+
+            self._matrix = matrix
+            self._n_base = 0
+            self._base = None
+            self._base_scale = None
+
+    def _rows(self, rows: np.ndarray) -> np.ndarray:
+        """Vecteurs normalisés pour des lignes de l'index (base mmap ou mémoire)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        if self._n_base == 0:
+            return self._matrix[rows]
+
+        out = np.empty((rows.shape[0], self.dim), dtype=np.float32)
+        in_base = rows < self._n_base
+        base_rows = rows[in_base]
+        out[in_base] = self._base[base_rows] * self._base_scale[base_rows, None]
+        if not in_base.all():
+            out[~in_base] = self._matrix[rows[~in_base] - self._n_base]
+        return out
+
+    def _score_all(self, queries: np.ndarray) -> np.ndarray:
+        """Similarités (Q, N) de requêtes normalisées contre toutes les lignes"""
+        if self._n_base == 0:
+            return queries @ self._matrix[: self._count].T
+
+        scores = (queries @ self._base.T) * self._base_scale
+        if self._count > self._n_base:
+            in_memory = self._matrix[: self._count - self._n_base]
+            scores = np.hstack([scores, queries @ in_memory.T])
+        return scores
+
+    def add(
+        self,
+        id_: int,
+        vector: np.ndarray,
+        text: str = "",
+        segment_id: Optional[str] = None,
+    ) -> None:
+        """
+        Ajoute un vecteur à l'index (appelé après WorklyDatabase.add_embedding)
+
+        Args:
+            id_: ID de la ligne SQLite (table embeddings)
+            vector: Embedding brut (normalisé ici)
+            text: Aperçu du texte source
+            segment_id: ID du segment résumé (si connu)
+        """
+        self.add_batch(
+            np.asarray(vector, dtype=np.float32).reshape(1, -1),
+            [id_],
+            [{"text": text, "segment_id": segment_id}],
+        )
+
+    def add_batch(
+        self,
+        vectors: np.ndarray,
+        ids: List[int],
+        payloads: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """
+        Ajoute plusieurs vecteurs en une seule opération
+
+        Args:
+            vectors: Matrice (n, dim)
+            ids: IDs SQLite correspondants
+            payloads: Métadonnées par vecteur (text, segment_id)
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        n = vectors.shape[0]
+        if n == 0:
+            return
+        if len(ids) != n:
+            raise ValueError(f"{n} vecteurs mais {len(ids)} IDs")
+
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(
+                f"Dimension incompatible : {vectors.shape[1]} (index: {self.dim})"
+            )
+
+        normalized = normalize_rows(vectors)
+        with self._ivf_lock:
+            self._ensure_capacity(n)
+            start = self._count
+            local = start - self._n_base
+            self._matrix[local : local + n] = normalized
+            self._ids.extend(int(id_) for id_ in ids)
+            self._payloads.extend(payloads or [{} for _ in range(n)])
+            self._count += n
+
+            # Mise à jour incrémentale des listes inversées
+            if self._centroids is not None:
+                assignments = self._assign(normalized)
+                for offset, list_id in enumerate(assignments):
+                    self._lists[list_id].append(start + offset)
+                    self._list_arrays[list_id] = None
+
+        self._schedule_training()
+
+    def load_from_database(self, db) -> int:
+        """
+        Charge tous les embeddings depuis SQLite (une seule fois au démarrage)
+
+        Si la base a un sidecar mmap (db.embedding_store), les vecteurs ne
+        sont pas copiés en RAM : l'index lit directement la vue np.memmap.
+
+        Args:
+            db: Instance WorklyDatabase
+
+        Returns:
+            Nombre de vecteurs chargés
+        """
+        self.clear()
+        use_mmap = getattr(db, "embedding_store", None) is not None
+        if use_mmap:
+            matrix, ids = db.get_embeddings_view()
+            ids = ids.tolist()
+        else:
+            matrix, ids = db.get_all_embeddings_matrix()
+        if not ids:
+            return 0
+
+        if hasattr(db, "get_embedding_payloads"):
+            stored = db.get_embedding_payloads()
+        else:  # Schéma sans colonne segment_id
+            stored = {id_: (text, None) for id_, text in db.get_embedding_texts().items()}
+        payloads = []
+        for id_ in ids:
+            text, segment_id = stored.get(id_, ("", None))
+            payloads.append({"text": text, "segment_id": segment_id})
+        if use_mmap:
+            self.attach_base(matrix, ids, payloads)
+        else:
+            self.add_batch(matrix, ids, payloads)
+        logger.info(f"✅ Index vectoriel chargé : {self._count} embeddings")
+        return self._count
+
+    # ========== IVF ==========
+
+    def _use_ivf(self) -> bool:
+        if self.mode == "exact":
+            return False
+        if self.mode == "ivf":
+            return self._count > self.n_probe
+        return self._count >= self.ivf_threshold
+
+    def _assign(
+        self, vectors: np.ndarray, centroids: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Retourne la liste inversée (centroïde le plus proche) de chaque vecteur"""
+        centroids = self._centroids if centroids is None else centroids
+        return np.argmax(vectors @ centroids.T, axis=1)
+
+    def _needs_training(self) -> bool:
+        """IVF utile et jamais entraîné, ou index doublé depuis l'entraînement"""
+        return self._use_ivf() and (
+            self._centroids is None or self._count >= 2 * self._trained_size
+        )
+
+    def _schedule_training(self) -> None:
+        """Lance l'entraînement IVF hors du chemin des requêtes (si nécessaire)"""
+        if not self._needs_training():
+            return
+        if not self.background_training:
+            self.train()
+            return
+        if self._training is not None and self._training.is_alive():
+            return  # Relancé par un ajout ultérieur si l'index a encore doublé
+        self._training = threading.Thread(
+            target=self._train_in_background, name="VectorIndexTraining", daemon=True
+        )
+        self._training.start()
+
+    def _train_in_background(self) -> None:
+        try:
+            self.train()
+        except Exception as e:
+            logger.warning(f"⚠️ Entraînement IVF impossible : {e} (recherche exacte)")
+
+    def wait_for_training(self, timeout: Optional[float] = None) -> bool:
+        """
+        Attend la fin d'un entraînement en arrière-plan
+
+        Args:
+            timeout: Attente max en secondes (None = illimitée)
+
+        Returns:
+            True si aucun entraînement n'est en cours
+        """
+        training = self._training
+        if training is not None:
+            training.join(timeout)
+            return not training.is_alive()
+        return True
+
+    def train(self, n_lists: Optional[int] = None, n_iter: int = 10, seed: int = 0):
+        """
+        Entraîne les centroïdes IVF (k-means sphérique) et reconstruit les listes
+
+        Les k-means portent sur les vecteurs présents au départ ; ceux ajoutés
+        pendant l'entraînement sont affectés au moment de l'installation.
+
+        Args:
+            n_lists: Nombre de listes inversées (défaut: ~sqrt(N))
+            n_iter: Itérations k-means
+            seed: Graine aléatoire (résultats reproductibles)
+        """
+        with self._ivf_lock:
+            count = self._count
+            generation = self._generation
+        if count == 0:
+            return
+
+        n_lists = n_lists or max(1, int(np.sqrt(count)))
+        n_lists = min(n_lists, count)
+
+        rng = np.random.default_rng(seed)
+        sample_size = min(count, max(n_lists * 64, 10000))
+        sample_rows = np.sort(rng.choice(count, size=sample_size, replace=False))
+        sample = self._rows(sample_rows)
+        centroids = sample[rng.choice(sample_size, size=n_lists, replace=False)].copy()
+
+        for _ in range(n_iter):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]  # Garder les centroïdes orphelins
+            centroids = normalize_rows(sums)
+
+        chunk_size = 8192
+        assignments = np.empty(count, dtype=np.int64)
+        for start in range(0, count, chunk_size):
+            rows = np.arange(start, min(start + chunk_size, count))
+            assignments[start : start + chunk_size] = self._assign(self._rows(rows), centroids)
+
+        with self._ivf_lock:
+            if generation != self._generation:
+                return  # Index vidé pendant l'entraînement
+            if self._count > count:
+                added = self._assign(self._rows(np.arange(count, self._count)), centroids)
+                assignments = np.concatenate([assignments, added])
+
+            order = np.argsort(assignments, kind="stable")
+            bounds = np.searchsorted(assignments[order], np.arange(n_lists + 1))
+            self._centroids = centroids
+            self._lists = [order[bounds[i] : bounds[i + 1]].tolist() for i in range(n_lists)]
+            self._list_arrays = [None] * n_lists
+            self._trained_size = self._count
+
+        logger.debug(f"🧭 IVF entraîné : {n_lists} listes pour {count} vecteurs")
+
+    def _candidate_rows(self, query: np.ndarray) -> np.ndarray:
+        """Lignes des n_probe listes inversées les plus proches de la requête"""
+        with self._ivf_lock:
+            n_probe = min(self.n_probe, len(self._lists))
+            centroid_scores = self._centroids @ query
+            probe = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+
+            arrays = []
+            for list_id in probe:
+                if self._list_arrays[list_id] is None:
+                    self._list_arrays[list_id] = np.asarray(
+                        self._lists[list_id], dtype=np.int64
+                    )
+                arrays.append(self._list_arrays[list_id])
+        return np.concatenate(arrays)
+
+    # ========== RECHERCHE ==========
+
+    def search(
+        self, query: np.ndarray, top_k: int = 3, min_similarity: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        """
+        Recherche les vecteurs les plus similaires à une requête
+
+        Args:
+            query: Embedding de la requête (non normalisé)
+            top_k: Nombre de résultats
+            min_similarity: Seuil de similarité cosinus
+
+        Returns:
+            Liste de dicts (id, similarity, text, segment_id) triés par similarité
+        """
+        return self.search_batch(
+            np.asarray(query).reshape(1, -1), top_k, min_similarity
+        )[0]
+
+    def search_batch(
+        self, queries: np.ndarray, top_k: int = 3, min_similarity: float = 0.0
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Recherche pour un lot de requêtes (un seul produit matriciel en mode exact)
+
+        Args:
+            queries: Matrice (Q, dim) d'embeddings de requêtes
+            top_k: Nombre de résultats par requête
+            min_similarity: Seuil de similarité cosinus
+
+        Returns:
+            Une liste de résultats (cf. search) par requête, dans l'ordre
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if self._count == 0 or top_k <= 0:
+            return [[] for _ in range(queries.shape[0])]
+
+        # Premier entraînement IVF en cours (cf. _schedule_training) : recherche exacte
+        if not self._use_ivf() or self._centroids is None:
+            rows, scores = select_top_k(
+                self._score_all(normalize_rows(queries)), top_k
+            )
+            return [
+                self._format_hits(r, s, min_similarity) for r, s in zip(rows, scores)
+            ]
+
+        results = []
+        for query in normalize_rows(queries):
+            candidates = self._candidate_rows(query)
+            positions, scores = batch_top_k(self._rows(candidates), query, top_k)
+            results.append(
+                self._format_hits(candidates[positions[0]], scores[0], min_similarity)
+            )
+        return results
+
+    def _format_hits(
+        self, rows: np.ndarray, scores: np.ndarray, min_similarity: float
+    ) -> List[Dict[str, Any]]:
+        """Convertit des lignes de matrice en résultats (triés, filtrés par seuil)"""
+        hits = []
+        for row, score in zip(rows, scores):
+            if score < min_similarity:
+                break
+            payload = self._payloads[int(row)]
+            hits.append(
+                {
+                    "id": self._ids[int(row)],
+                    "similarity": float(score),
+                    "text": payload.get("text", ""),
+                    "segment_id": payload.get("segment_id"),
+                }
+            )
+        return hits
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques de l'index (taille, mode, état IVF)"""
+        return {
+            "count": self._count,
+            "dim": self.dim,
+            "mode": self.mode,
+            "ivf_active": self._use_ivf(),
+            "ivf_lists": len(self._lists),
+            "memory_mb": (
+                self._matrix.nbytes / (1024**2) if self._matrix is not None else 0.0
+            ),
+            "mmap_rows": self._n_base,
+        }
+
+    def __repr__(self) -> str:
+        return f"<VectorIndex: {self._count} vecteurs, mode={self.mode}>"
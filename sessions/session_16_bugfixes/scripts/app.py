@@ -6,6 +6,7 @@ Manages the GUI and coordinates with Unity via IPC.
 import sys
 import logging
 import asyncio
+import threading
 import os
 from pathlib import Path
 from typing import Optional
@@ -34,7 +35,7 @@ from PySide6.QtWidgets import (
     QDialogButtonBox,
 )
 from PySide6.QtCore import Qt, QTimer, Signal, QObject, QThread
-from PySide6.QtGui import QIcon
+from PySide6.QtGui import QIcon, QColor, QTextCharFormat
 
 # Load .env file at startup
 from dotenv import load_dotenv
@@ -45,9 +46,13 @@ from ..ipc.unity_bridge import UnityBridge
 from ..utils.config import Config
 from ..ai.chat_engine import get_chat_engine
 from ..ai.emotion_analyzer import get_emotion_analyzer
+from ..ai.inference_scheduler import PRIORITY_DESKTOP, get_inference_scheduler
 
 logger = logging.getLogger(__name__)
 
+# Intervalle min (s) entre deux rafraîchissements d'une réponse en streaming
+STREAM_FLUSH_INTERVAL = 0.05
+
 
 class DiscordSignals(QObject):
     """
@@ -190,6 +195,57 @@ class DiscordBotThread(QThread):
         self.wait(5000)  # 5 secondes max
 
 
+class ModelLoaderThread(QThread):
+    """
+    Thread de chargement du modèle IA (ChatEngine + LLM + warm-up).
+
+    Le chargement (5 GB) ne bloque plus l'UI : l'utilisateur peut connecter
+    Unity et charger le VRM en parallèle, suivre la progression et annuler.
+    """
+
+    progress = Signal(int, str)  # (pourcentage, étape)
+    loaded = Signal()
+    failed = Signal(str, bool)  # (message, llama-cpp-python manquant ?)
+    cancelled = Signal()
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.chat_engine = None
+        self.emotion_analyzer = None
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Demande l'annulation (prise en compte à la prochaine étape)"""
+        self._cancel_event.set()
+
+    def run(self):
+        """Charge les composants IA puis le modèle (thread séparé)"""
+        from src.ai.model_manager import ModelLoadCancelled
+
+        try:
+            self.progress.emit(0, "Initialisation des composants IA")
+            self.chat_engine = get_chat_engine()
+            self.emotion_analyzer = get_emotion_analyzer()
+
+            logger.info("Loading LLM model into GPU/CPU...")
+            if not self.chat_engine.model_manager.load_model(
+                progress_callback=lambda fraction, step: self.progress.emit(
+                    int(fraction * 100), step
+                ),
+                cancel_event=self._cancel_event,
+            ):
+                raise RuntimeError("Échec du chargement du modèle LLM")
+
+            self.loaded.emit()
+
+        except ModelLoadCancelled:
+            self.cancelled.emit()
+        except ImportError as e:
+            self.failed.emit(str(e), True)
+        except Exception as e:
+            self.failed.emit(str(e), False)
+
+
 class MainWindow(QMainWindow):
     """Main application window."""
 
@@ -199,6 +255,9 @@ class MainWindow(QMainWindow):
     expression_changed = Signal(str, float)  # expression_id, value (0-100)
     stats_updated = Signal()
     chat_input_ready = Signal()  # Signal pour réactiver l'input de chat
+    stream_started = Signal(str, str)  # sender, color (réponse en streaming)
+    stream_chunk = Signal(str)  # texte à ajouter au message en cours
+    shutdown_finished = Signal()  # sauvegardes de fermeture terminées
 
     def __init__(self):
         super().__init__()
@@ -222,6 +281,8 @@ class MainWindow(QMainWindow):
         self.chat_engine = None
         self.emotion_analyzer = None
         self.ai_available = False
+        self.model_loader = None  # ModelLoaderThread pendant un chargement
+        self._shutdown_thread = None  # Sauvegardes de fermeture (hors thread UI)
         logger.info(
             "💡 AI components not initialized. Use 'Charger IA' button to load them."
         )
@@ -237,9 +298,16 @@ class MainWindow(QMainWindow):
         self.message_received.connect(self.append_chat_message)
         self.stats_updated.connect(self.update_chat_stats)
         self.chat_input_ready.connect(self.enable_chat_input)
+        self.stream_started.connect(self.begin_stream_message)
+        self.stream_chunk.connect(self.append_stream_chunk)
+        self.shutdown_finished.connect(QApplication.quit)
 
         self.init_ui()
 
+        # Préchargement IA au démarrage (en parallèle de Unity / VRM)
+        if self.config.get("ai.preload_on_startup", False):
+            QTimer.singleShot(0, self.load_ai_model)
+
     def init_ui(self):
         """Initialize the user interface."""
         self.setWindowTitle("Workly Control Panel")
@@ -1441,22 +1509,43 @@ class MainWindow(QMainWindow):
         import threading
 
         def process_message():
+            import time
+
             try:
-                # Generate response using ChatEngine
-                response = self.chat_engine.chat(
-                    user_input=message, user_id="desktop_user"
-                )
+                # Generate response using ChatEngine (affichage au fil des tokens)
+                self.stream_started.emit("Kira", "#CE93D8")  # Violet clair
+
+                def stream_reply():
+                    # Regrouper les tokens (~20 rafraîchissements/s max côté Qt)
+                    pending = []
+                    last_flush = time.monotonic()
+                    stream = self.chat_engine.chat_stream(
+                        user_input=message, user_id="desktop_user"
+                    )
+                    while True:
+                        try:
+                            pending.append(next(stream))
+                        except StopIteration as done:
+                            reply = done.value
+                            break
+                        if time.monotonic() - last_flush >= STREAM_FLUSH_INTERVAL:
+                            self.stream_chunk.emit("".join(pending))
+                            pending.clear()
+                            last_flush = time.monotonic()
+                    if pending:
+                        self.stream_chunk.emit("".join(pending))
+                    return reply
+
+                # File d'inférence partagée avec Discord : le desktop passe en premier
+                response = get_inference_scheduler().submit(
+                    stream_reply, user_id="desktop_user", priority=PRIORITY_DESKTOP
+                ).result()
 
                 # Analyze emotion
                 emotion_result = self.emotion_analyzer.analyze(
                     text=response.response, user_id="kira"
                 )
 
-                # Emit signal to display Kira's response (thread-safe)
-                self.message_received.emit(
-                    "Kira", response.response, "#CE93D8"
-                )  # Violet clair pour fond sombre
-
                 # Update emotion display
                 emotion_emoji = {
                     "joy": "😊",
@@ -1571,6 +1660,30 @@ class MainWindow(QMainWindow):
         cursor.movePosition(cursor.MoveOperation.End)
         self.chat_display.setTextCursor(cursor)
 
+    def begin_stream_message(self, sender: str, color: str):
+        """Start a message whose content arrives incrementally.
+
+        Args:
+            sender: Name of the sender
+            color: Color for the sender name (hex code)
+        """
+        self.append_chat_message(sender, "", color)
+
+    def append_stream_chunk(self, text: str):
+        """Append text to the message started by begin_stream_message.
+
+        Args:
+            text: Generated text (plain text, not HTML)
+        """
+        text_format = QTextCharFormat()
+        text_format.setForeground(QColor("#e0e0e0"))
+
+        cursor = self.chat_display.textCursor()
+        cursor.movePosition(cursor.MoveOperation.End)
+        cursor.insertText(text, text_format)
+        self.chat_display.setTextCursor(cursor)
+        self.chat_display.ensureCursorVisible()
+
     def update_chat_stats(self):
         """Update chat statistics display."""
         # Affiche le nombre de messages de la session actuelle (GUI uniquement)
@@ -2343,97 +2456,117 @@ class MainWindow(QMainWindow):
             logger.error("Failed to connect to Unity")
 
     def load_ai_model(self):
-        """Load AI/LLM model (ChatEngine + EmotionAnalyzer)."""
-        try:
-            # Show loading message
-            self.ai_status_label.setText("⏳ Chargement du modèle IA...")
+        """Load AI/LLM model in the background (click again to cancel)."""
+        if self.model_loader is not None:
+            # Chargement en cours : le bouton sert à annuler
+            logger.info("⏹️ Annulation du chargement IA demandée...")
+            self.model_loader.cancel()
             self.load_ai_btn.setEnabled(False)
-            QApplication.processEvents()  # Update UI
+            self.ai_status_label.setText("⏳ Annulation en cours...")
+            return
 
-            logger.info("Loading AI components...")
+        logger.info("Loading AI components...")
+        self.ai_status_label.setText("⏳ Chargement du modèle IA...")
+        self.load_ai_btn.setText("⏹️ Annuler le chargement")
 
-            # Try to import and initialize AI components
-            from src.ai.chat_engine import get_chat_engine
-            from src.ai.emotion_analyzer import get_emotion_analyzer
+        self.model_loader = ModelLoaderThread(self)
+        self.model_loader.progress.connect(self.on_ai_load_progress)
+        self.model_loader.loaded.connect(self.on_ai_loaded)
+        self.model_loader.failed.connect(self.on_ai_load_failed)
+        self.model_loader.cancelled.connect(self.on_ai_load_cancelled)
+        self.model_loader.start()
 
-            # Get instances
-            self.chat_engine = get_chat_engine()
-            self.emotion_analyzer = get_emotion_analyzer()
+    def on_ai_load_progress(self, percent: int, step: str):
+        """Update AI status label with loading progress."""
+        self.ai_status_label.setText(f"⏳ {step}... {percent}%")
 
-            # IMPORTANT: Load the LLM model into VRAM/RAM
-            logger.info("Loading LLM model into GPU/CPU...")
-            self.ai_status_label.setText("⏳ Chargement du modèle sur GPU...")
-            QApplication.processEvents()  # Update UI
+    def _finish_ai_loading(self):
+        """Reset the load button once the loader thread is done."""
+        self.model_loader = None
+        self.load_ai_btn.setText("📥 Charger IA (Zephyr-7B)")
 
-            if not self.chat_engine.model_manager.load_model():
-                raise RuntimeError("Échec du chargement du modèle LLM")
+    def on_ai_loaded(self):
+        """AI components loaded (called in the Qt thread)."""
+        self.chat_engine = self.model_loader.chat_engine
+        self.emotion_analyzer = self.model_loader.emotion_analyzer
+        self._finish_ai_loading()
 
-            self.ai_available = True
+        self.ai_available = True
 
-            # Update UI
-            self.ai_status_label.setText("✅ IA chargée : Zephyr-7B prêt")
-            self.ai_status_label.setStyleSheet(
-                "font-size: 13px; padding: 5px; color: #4CAF50;"
-            )
-            self.load_ai_btn.setEnabled(False)
-            self.unload_ai_btn.setEnabled(True)
+        # Update UI
+        startup = self.chat_engine.model_manager.startup_stats
+        self.ai_status_label.setText(
+            f"✅ IA chargée : Zephyr-7B prêt ({startup['load_s']:.0f}s)"
+        )
+        self.ai_status_label.setStyleSheet(
+            "font-size: 13px; padding: 5px; color: #4CAF50;"
+        )
+        self.load_ai_btn.setEnabled(False)
+        self.unload_ai_btn.setEnabled(True)
 
-            # Update GPU profile label
-            self.update_gpu_profile_display()
+        # Update GPU profile label
+        self.update_gpu_profile_display()
 
-            # Enable chat input if on chat tab
-            if hasattr(self, "chat_input"):
-                self.chat_input.setEnabled(True)
-                self.send_btn.setEnabled(True)
-                self.chat_input.setPlaceholderText("Écrivez votre message ici...")
+        # Enable chat input if on chat tab
+        if hasattr(self, "chat_input"):
+            self.chat_input.setEnabled(True)
+            self.send_btn.setEnabled(True)
+            self.chat_input.setPlaceholderText("Écrivez votre message ici...")
 
-            logger.info("✅ AI components loaded successfully!")
+        logger.info("✅ AI components loaded successfully!")
 
-            # Show success message
-            self.append_chat_message(
-                "Système",
-                "✅ Modèle IA chargé avec succès ! Vous pouvez maintenant discuter avec Kira.",
-                "#4CAF50",
-            )
+        # Show success message
+        self.append_chat_message(
+            "Système",
+            "✅ Modèle IA chargé avec succès ! Vous pouvez maintenant discuter avec Kira.",
+            "#4CAF50",
+        )
 
-        except ImportError as e:
+    def on_ai_load_cancelled(self):
+        """AI loading cancelled by the user."""
+        self._finish_ai_loading()
+        self.ai_status_label.setText("Statut IA : Non chargé (chargement annulé)")
+        self.ai_status_label.setStyleSheet("font-size: 13px; padding: 5px;")
+        self.load_ai_btn.setEnabled(True)
+        logger.info("⏹️ AI loading cancelled")
+
+    def on_ai_load_failed(self, error: str, missing_dependency: bool):
+        """AI loading failed (called in the Qt thread)."""
+        self._finish_ai_loading()
+
+        if missing_dependency:
             error_msg = (
                 "❌ Impossible de charger l'IA : llama-cpp-python n'est pas installé.\n\n"
                 "Pour installer :\n"
                 "pip install llama-cpp-python\n\n"
-                f"Détails : {str(e)}"
+                f"Détails : {error}"
             )
             self.ai_status_label.setText("❌ IA non disponible")
-            self.ai_status_label.setStyleSheet(
-                "font-size: 13px; padding: 5px; color: #f44336;"
-            )
-            self.load_ai_btn.setEnabled(True)
-            logger.error(f"ImportError loading AI: {e}")
-
-            # Show error dialog
-            from PySide6.QtWidgets import QMessageBox
-
-            QMessageBox.critical(self, "Erreur de chargement IA", error_msg)
-
-        except Exception as e:
-            error_msg = f"❌ Erreur lors du chargement de l'IA : {str(e)}"
+            logger.error(f"ImportError loading AI: {error}")
+        else:
+            error_msg = f"❌ Erreur lors du chargement de l'IA : {error}"
             self.ai_status_label.setText("❌ Erreur de chargement")
-            self.ai_status_label.setStyleSheet(
-                "font-size: 13px; padding: 5px; color: #f44336;"
-            )
-            self.load_ai_btn.setEnabled(True)
-            logger.error(f"Error loading AI: {e}")
+            logger.error(f"Error loading AI: {error}")
 
-            # Show error dialog
-            from PySide6.QtWidgets import QMessageBox
+        self.ai_status_label.setStyleSheet(
+            "font-size: 13px; padding: 5px; color: #f44336;"
+        )
+        self.load_ai_btn.setEnabled(True)
 
-            QMessageBox.critical(self, "Erreur de chargement IA", error_msg)
+        # Show error dialog
+        from PySide6.QtWidgets import QMessageBox
+
+        QMessageBox.critical(self, "Erreur de chargement IA", error_msg)
 
     def unload_ai_model(self):
         """Unload AI/LLM model to free memory."""
         try:
             logger.info("Unloading AI components...")
 
+            # Finish pending saves and memory summaries while the LLM is still loaded
+            if self.chat_engine:
+                self.chat_engine.close(timeout=30)
+
             # Unload LLM model from VRAM/RAM first
             if self.chat_engine and self.chat_engine.model_manager:
                 logger.info("Unloading LLM model from GPU/CPU...")
@@ -2520,6 +2653,8 @@ class MainWindow(QMainWindow):
 
             # Delete database files
             db_files = [db_path, f"{db_path}-shm", f"{db_path}-wal"]
+            # Sidecar mmap des embeddings (reconstruit automatiquement sinon)
+            db_files += [f"{db_path}.emb.f32", f"{db_path}.emb.ids", f"{db_path}.emb.json"]
             for db_file in db_files:
                 if os.path.exists(db_file):
                     os.remove(db_file)
@@ -2760,10 +2895,41 @@ class MainWindow(QMainWindow):
 
     def closeEvent(self, event):
         """Handle window close event."""
+        if self.model_loader is None and self.chat_engine is None:
+            logger.info("Application closing...")
+            self.unity_bridge.disconnect()
+            self.config.save()
+            event.accept()
+            return
+
+        # Sauvegardes en attente (tours, résumés) : fenêtre masquée tout de
+        # suite, fin de l'application quand elles sont terminées
+        event.ignore()
+        if self._shutdown_thread is not None:
+            return
         logger.info("Application closing...")
+        if self.model_loader is not None:
+            self.model_loader.cancel()
         self.unity_bridge.disconnect()
         self.config.save()
-        event.accept()
+        self.hide()
+        self._shutdown_thread = threading.Thread(
+            target=self._finish_shutdown, name="Shutdown", daemon=True
+        )
+        self._shutdown_thread.start()
+
+    def _finish_shutdown(self):
+        """Termine chargement et sauvegardes puis quitte (thread Shutdown)."""
+        try:
+            if self.model_loader is not None:
+                # Ne pas détruire le QThread en cours de chargement
+                self.model_loader.wait(10000)
+            if self.chat_engine:
+                self.chat_engine.close(timeout=10)
+        except Exception as e:
+            logger.error(f"❌ Erreur pendant la fermeture : {e}")
+        finally:
+            self.shutdown_finished.emit()
 
 
 class WorklyApp:
@@ -7,8 +7,10 @@ Moteur conversationnel unifié qui orchestre :
 - Personnalité évolutive (PersonalityEngine) - Phase 2
 - Analyse émotionnelle avancée (EmotionAnalyzer) - Phase 3
 - Analyse contextuelle avancée (ContextAnalyzer) - Phase 4
-- Génération LLM (ModelManager)
-- Construction prompts avec contexte
+- Génération LLM (ModelManager), complète ou en streaming (chat_stream)
+- Construction prompts avec contexte (budget de tokens, cf. prompt_budget)
+- Cache des réponses aux messages courts répétés (opt-in, cf. response_cache)
+- Étapes indépendantes en parallèle, sauvegardes en arrière-plan (cf. chat_pipeline)
 - Sauvegarde automatique des conversations
 
 Phases IA :
@@ -20,8 +22,10 @@ Phases IA :
 
 import logging
 import os
-from typing import Optional, Dict, List, Any
-from dataclasses import dataclass
+import time
+from concurrent.futures import Future
+from typing import Optional, Dict, List, Any, Tuple, Callable, Generator
+from dataclasses import dataclass, field
 
 from .memory import ConversationMemory, get_memory
 from .model_manager import ModelManager, get_model_manager
@@ -30,9 +34,23 @@ from .memory_manager import MemoryManager
 from .personality_engine import PersonalityEngine
 from .emotion_analyzer import EmotionAnalyzer
 from .context_analyzer import ContextAnalyzer
+from .analyzed_text import AnalyzedText
+from .inference_scheduler import PRIORITY_BACKGROUND, get_inference_scheduler
+from .prompt_budget import PromptBudgeter, TokenCounter
+from .response_cache import ResponseCache, context_hash, personality_bucket
+from .chat_pipeline import ChatPipeline
 
 logger = logging.getLogger(__name__)
 
+# Séquences d'arrêt : le modèle ne doit pas écrire le tour suivant
+_STOP_SEQUENCES = ["<|user|>", "<|system|>"]
+
+# Messages utilisateur récents inclus dans la clé du cache de réponses
+_RESPONSE_CACHE_CONTEXT_TURNS = 1
+
+# Sujets de préférence qui signalent un goût pour l'humour
+_HUMOR_SUBJECTS = ("humour", "blague", "drôle")
+
 
 @dataclass
 class ChatResponse:
@@ -40,9 +58,28 @@ class ChatResponse:
 
     response: str  # Texte généré par le modèle
     emotion: str  # Émotion détectée ('joy', 'angry', etc.)
-    tokens_used: int  # Nombre approximatif de tokens
-    context_messages: int  # Nombre de messages dans le contexte
+    tokens_used: int  # Tokens générés (tokenizer du modèle si chargé)
+    context_messages: int  # Nombre de messages d'historique retenus dans le prompt
     processing_time: float  # Temps de traitement en secondes
+    stage_timings: Dict[str, float] = field(default_factory=dict)  # Durée par étape (s)
+
+
+@dataclass
+class _Turn:
+    """État d'un tour de chat entre _prepare_turn et _finish_turn"""
+
+    user_input: str
+    user_id: str
+    source: str
+    start_time: float  # time.time() au début du tour
+    text: Optional[AnalyzedText] = None  # Message prétraité, partagé par les analyseurs
+    timings: Dict[str, float] = field(default_factory=dict)  # Durée par étape (s)
+    prompt: str = ""
+    prompt_stats: Dict[str, int] = field(default_factory=dict)
+    cache_key: str = ""  # Conversation (KV-cache)
+    response_key: Optional[Tuple[str, str]] = None  # Cache de réponses
+    cached_response: Optional[str] = None  # Réponse trouvée en cache (pas de génération)
+    user_emotion: Optional[Future] = None  # EmotionResult du message utilisateur
 
 
 # EmotionDetector supprimé - remplacé par EmotionAnalyzer (Phase 3)
@@ -82,6 +119,14 @@ class ChatEngine:
         self.memory = memory or get_memory()
         self.model_manager = model_manager or get_model_manager(self.config)
 
+        # Comptage de tokens (tokenizer du modèle, mémoïsé par message)
+        self.token_counter = TokenCounter(self.model_manager.count_tokens)
+        self._model_generation = getattr(self.model_manager, "model_generation", None)
+        self._history_anchors: Dict[str, Optional[str]] = {}  # Premier tour par conversation
+
+        # Étapes du tour en parallèle, sauvegardes en arrière-plan
+        self.pipeline = ChatPipeline()
+
         # ⭐ PHASE 3 : EmotionAnalyzer avancé (remplace EmotionDetector basique)
         # Toujours activé pour meilleure détection émotions (avec/sans advanced_ai)
         self.emotion_analyzer = EmotionAnalyzer(
@@ -102,20 +147,29 @@ class ChatEngine:
         self.personality_engine: Optional[PersonalityEngine] = None
 
         if enable_advanced_ai:
-            # Callback LLM pour résumés
+            # Callback LLM pour résumés : passe par la file d'inférence en
+            # priorité basse, les messages desktop et Discord restent servis d'abord
             def llm_callback(prompt: str) -> str:
                 if self.model_manager.is_loaded:
-                    return self.model_manager.generate(
-                        prompt=prompt,
-                        temperature=0.3,  # Température basse pour résumés factuels
-                        max_tokens=200,
-                        stop=["<|user|>", "<|system|>"],
+                    return get_inference_scheduler().call(
+                        lambda: self.model_manager.generate(
+                            prompt=prompt,
+                            temperature=0.3,  # Température basse pour résumés factuels
+                            max_tokens=200,
+                            stop=["<|user|>", "<|system|>"],
+                        ),
+                        user_id="memory_worker",
+                        priority=PRIORITY_BACKGROUND,
                     )
                 return ""
 
+            # Résumés + embeddings hors du tour de chat (MemoryWorker)
             self.memory_manager = MemoryManager(
-                storage_dir=memory_storage_dir, llm_callback=llm_callback
+                storage_dir=memory_storage_dir,
+                llm_callback=llm_callback,
+                async_maintenance=True,
             )
+            self.memory_manager.count_tokens = self.token_counter
             logger.info("✅ Mémoire long-terme activée (MemoryManager)")
 
             # Initialiser PersonalityEngine
@@ -123,6 +177,19 @@ class ChatEngine:
             self.personality_engine = PersonalityEngine(storage_file=personality_file)
             logger.info("✅ Personnalité évolutive activée (PersonalityEngine)")
 
+        # Cache de réponses (opt-in) : "salut", "merci"... sans génération LLM
+        self.response_cache: Optional[ResponseCache] = None
+        if self.config.response_cache:
+            encode_fn = None
+            if self.memory_manager and self.memory_manager.embedding_model is not None:
+                encode_fn = self.memory_manager.encode  # Embeddings mis en cache
+            self.response_cache = ResponseCache(
+                ttl_seconds=self.config.response_cache_ttl,
+                similarity_threshold=self.config.response_cache_similarity,
+                encode_fn=encode_fn,
+            )
+            logger.info("✅ Cache de réponses activé (ResponseCache)")
+
         logger.info(
             "✅ ChatEngine initialisé"
             + (" [Mode IA Avancée]" if enable_advanced_ai else "")
@@ -145,62 +212,157 @@ class ChatEngine:
         Returns:
             Prompt formaté pour le modèle
         """
+        return self._plan_prompt(user_input, history, context_info)[0]
+
+    def _budgeter(self) -> PromptBudgeter:
+        """Budget de tokens du prompt pour la fenêtre de contexte du modèle"""
+        return PromptBudgeter(
+            self.token_counter,
+            n_ctx=self.model_manager.context_window,
+            reply_tokens=self.config.max_tokens,
+        )
+
+    def _plan_prompt(
+        self,
+        user_input: str,
+        history: List[Dict[str, Any]],
+        context_info: Optional[str] = None,
+        cache_key: Optional[str] = None,
+        long_term_context: Optional[str] = None,
+    ) -> Tuple[str, Dict[str, int]]:
+        """
+        Assemble le prompt dans la fenêtre de contexte du modèle (n_ctx)
+
+        Budgets (PromptBudgeter) : réponse réservée, système (system prompt,
+        puis personnalité et contexte conversationnel s'ils tiennent),
+        mémoire long-terme, puis historique dans le reste en évinçant
+        les tours les plus anciens.
+
+        Disposition stable en préfixe (réutilisation du KV-cache) :
+        system prompt + personnalité, puis historique, puis seulement les
+        parties qui changent à chaque tour (contexte conversationnel,
+        contexte mémorisé) juste avant la question.
+
+        Args:
+            user_input: Message actuel de l'utilisateur
+            history: Historique des conversations (liste de dicts)
+            context_info: Contexte conversationnel généré par ContextAnalyzer (Phase 4)
+            cache_key: Conversation (ex: "discord:1234") : l'historique garde le
+                même premier tour d'un appel à l'autre tant qu'il tient
+            long_term_context: Contexte long-terme déjà récupéré (None = le
+                récupérer ici, cf. _long_term_context)
+
+        Returns:
+            (prompt, stats) - stats : prompt_tokens, reply_tokens,
+            history_kept, history_dropped, n_ctx
+        """
+        budgeter = self._budgeter()
+        limits = budgeter.allocate()
+
         # Format du prompt pour Zephyr-7B (format ChatML)
-        prompt_parts = []
+        # 1. Préfixe stable : system prompt (obligatoire) + personnalité
+        prefix_parts = [f"<|system|>\n{self.config.system_prompt}"]
+        system_tokens = self.token_counter(prefix_parts[0])
 
-        # System prompt
-        prompt_parts.append(f"<|system|>\n{self.config.system_prompt}")
+        # Parties optionnelles sous plafond système : (libellé, texte, stable ?)
+        optional_parts = []
 
         # ⭐ PHASE 2 : Injection personnalité (si activée)
         if self.enable_advanced_ai and self.personality_engine:
             personality_prompt = self.personality_engine.generate_personality_prompt()
-            prompt_parts.append(f"\n{personality_prompt}")
-            logger.debug(f"🎭 Personnalité injectée : {personality_prompt[:80]}...")
+            optional_parts.append(("🎭 Personnalité", f"\n{personality_prompt}", True))
 
         # ⭐ PHASE 4 : Injection contexte conversationnel (si disponible)
         if context_info:
-            prompt_parts.append(f"\n[CONTEXTE CONVERSATIONNEL] {context_info}")
-            logger.debug(f"🔍 Contexte conversationnel injecté : {context_info}")
+            optional_parts.append(
+                (
+                    "🔍 Contexte conversationnel",
+                    f"[CONTEXTE CONVERSATIONNEL] {context_info}",
+                    False,
+                )
+            )
+
+        volatile_parts = []
+        for label, part, stable in optional_parts:
+            cost = self.token_counter(part)
+            if system_tokens + cost > limits["system"]:
+                logger.debug(f"✂️ {label} omis (budget système {limits['system']} tokens)")
+                continue
+            (prefix_parts if stable else volatile_parts).append(part)
+            system_tokens += cost
+            logger.debug(f"{label} injecté : {part.strip()[:80]}...")
+
+        prefix_parts.append("</|system|>")
 
         # ⭐ PHASE 1 : Injection contexte long-terme (si activé)
         if self.enable_advanced_ai and self.memory_manager:
-            long_term_context = self.memory_manager.get_context_for_prompt(
-                query=user_input,
-                include_facts=True,
-                include_segments=True,
-                max_tokens=800,  # ~20% du contexte total
-            )
+            if long_term_context is None:
+                long_term_context = self._long_term_context(user_input)
 
             if long_term_context:
-                prompt_parts.append("\n--- CONTEXTE MÉMORISÉ ---")
-                prompt_parts.append(long_term_context)
-                prompt_parts.append("--- FIN CONTEXTE ---")
+                volatile_parts.append("--- CONTEXTE MÉMORISÉ ---")
+                volatile_parts.append(long_term_context)
+                volatile_parts.append("--- FIN CONTEXTE ---")
                 logger.debug(
                     f"📚 Contexte long-terme injecté : {len(long_term_context)} chars"
                 )
 
-        prompt_parts.append("</|system|>")
-
-        # Historique des conversations (court-terme)
-        for interaction in history:
-            user_msg = interaction["user_input"]
-            bot_msg = interaction["bot_response"]
+        # 2. Suffixe : contexte du tour + question actuelle (obligatoire)
+        suffix_parts = []
+        if volatile_parts:
+            suffix_parts = ["<|system|>"] + volatile_parts + ["</|system|>"]
+        suffix_parts += [f"<|user|>\n{user_input}</|user|>", "<|assistant|>"]
+
+        fixed_parts = prefix_parts + suffix_parts
+        fixed_tokens = sum(self.token_counter(part) + 1 for part in fixed_parts)
+
+        # Question plus longue que la fenêtre : raccourcie (début + fin) pour
+        # garder la place de la réponse
+        overflow = fixed_tokens - limits["input"]
+        if overflow > 0:
+            user_budget = max(self.token_counter(user_input) - overflow, 1)
+            user_input = budgeter.truncate(user_input, user_budget)
+            suffix_parts[-2] = f"<|user|>\n{user_input}</|user|>"
+            fixed_parts = prefix_parts + suffix_parts
+            fixed_tokens = sum(self.token_counter(part) + 1 for part in fixed_parts)
+            logger.warning(
+                f"✂️ Message utilisateur raccourci ({overflow} tokens au-delà du budget)"
+            )
 
-            prompt_parts.append(f"<|user|>\n{user_msg}</|user|>")
-            prompt_parts.append(f"<|assistant|>\n{bot_msg}</|assistant|>")
+        # 3. Historique des conversations (court-terme) : le reste du budget
+        turns = [
+            f"<|user|>\n{interaction['user_input']}</|user|>\n"
+            f"<|assistant|>\n{interaction['bot_response']}</|assistant|>"
+            for interaction in history
+        ]
+        kept_turns = budgeter.fit_history_stable(
+            turns,
+            limits["input"] - fixed_tokens,
+            anchor=self._history_anchors.get(cache_key),
+            max_turns=self.config.context_limit,
+        )
+        if cache_key:
+            self._history_anchors[cache_key] = kept_turns[0] if kept_turns else None
+        history_tokens = sum(self.token_counter(turn) + 1 for turn in kept_turns)
 
-        # Question actuelle
-        prompt_parts.append(f"<|user|>\n{user_input}</|user|>")
-        prompt_parts.append("<|assistant|>")
+        prompt = "\n".join(prefix_parts + kept_turns + suffix_parts)
 
-        prompt = "\n".join(prompt_parts)
+        prompt_tokens = fixed_tokens + history_tokens
+        stats = {
+            "n_ctx": budgeter.n_ctx,
+            "prompt_tokens": prompt_tokens,
+            "reply_tokens": budgeter.reply_budget(prompt_tokens),
+            "history_kept": len(kept_turns),
+            "history_dropped": len(turns) - len(kept_turns),
+        }
 
         logger.debug(
-            f"📝 Prompt construit : {len(prompt)} caractères, "
-            f"{len(history)} messages d'historique"
+            f"📝 Prompt construit : {prompt_tokens} tokens / {budgeter.n_ctx}, "
+            f"{len(kept_turns)} messages d'historique "
+            f"({stats['history_dropped']} évincé(s))"
         )
 
-        return prompt
+        return prompt, stats
 
     def chat(
         self, user_input: str, user_id: str = "desktop_user", source: str = "desktop"
@@ -219,15 +381,135 @@ class ChatEngine:
         Raises:
             RuntimeError: Si le modèle n'est pas chargé
         """
-        import time
+        logger.info(
+            f"💬 Chat request : user={user_id[:8]}..., "
+            f"source={source}, input_len={len(user_input)}"
+        )
+
+        turn = self._prepare_turn(user_input, user_id, source)
+
+        # Réponse déjà générée pour ce message (cache opt-in, cf. _prepare_turn)
+        if turn.cached_response is not None:
+            return self._finish_turn(turn, turn.cached_response)
+
+        # 4. Générer la réponse
+        try:
+            response_text = self.pipeline.timed(
+                turn.timings,
+                "generation",
+                self.model_manager.generate,
+                prompt=turn.prompt,
+                temperature=self.config.temperature,
+                top_p=self.config.top_p,
+                max_tokens=turn.prompt_stats["reply_tokens"],
+                stop=_STOP_SEQUENCES,  # Arrêter aux balises
+                cache_key=turn.cache_key,  # Réutilise le KV-cache de la conversation
+            )
+        except Exception as e:
+            raise self._generation_failed(turn, e) from e
+
+        self._cache_response(
+            user_input, turn.response_key, response_text, turn.timings["generation"]
+        )
+        return self._finish_turn(turn, response_text)
+
+    def chat_stream(
+        self,
+        user_input: str,
+        user_id: str = "desktop_user",
+        source: str = "desktop",
+        on_complete: Optional[Callable[[ChatResponse], None]] = None,
+    ) -> Generator[str, None, ChatResponse]:
+        """
+        Comme chat(), mais produit la réponse au fil des tokens
 
-        start_time = time.time()
+        Le post-traitement (émotions, personnalité, sauvegarde mémoire) est
+        lancé une fois la génération terminée, avant la fin de l'itération.
+        La ChatResponse finale est passée à `on_complete` et retournée par
+        le générateur (StopIteration.value / `yield from`). Si l'itération
+        est interrompue avant la fin, l'échange n'est pas sauvegardé.
 
+        Args:
+            user_input: Message de l'utilisateur
+            user_id: ID utilisateur (Discord ID ou "desktop_user")
+            source: Source du message ("desktop" ou "discord")
+            on_complete: Callback appelé avec la ChatResponse finale
+
+        Yields:
+            Morceaux de texte de la réponse
+
+        Raises:
+            RuntimeError: Si le modèle n'est pas chargé ou si la génération échoue
+        """
         logger.info(
-            f"💬 Chat request : user={user_id[:8]}..., "
+            f"💬 Chat stream request : user={user_id[:8]}..., "
             f"source={source}, input_len={len(user_input)}"
         )
 
+        turn = self._prepare_turn(user_input, user_id, source)
+
+        # Réponse déjà générée pour ce message (cache opt-in) : un seul morceau
+        cached = turn.cached_response
+        if cached is not None:
+            yield cached
+            response = self._finish_turn(turn, cached)
+            if on_complete:
+                on_complete(response)
+            return response
+
+        # 4. Générer la réponse en streaming
+        chunks = []
+        generation_start = time.perf_counter()
+        try:
+            for chunk in self.model_manager.generate_stream(
+                prompt=turn.prompt,
+                temperature=self.config.temperature,
+                top_p=self.config.top_p,
+                max_tokens=turn.prompt_stats["reply_tokens"],
+                stop=_STOP_SEQUENCES,
+                cache_key=turn.cache_key,
+            ):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            turn.timings["generation"] = time.perf_counter() - generation_start
+            raise self._generation_failed(turn, e) from e
+        turn.timings["generation"] = time.perf_counter() - generation_start
+
+        response_text = "".join(chunks).strip()
+        self._cache_response(
+            user_input, turn.response_key, response_text, turn.timings["generation"]
+        )
+        response = self._finish_turn(turn, response_text)
+        if on_complete:
+            on_complete(response)
+        return response
+
+    def _prepare_turn(self, user_input: str, user_id: str, source: str) -> "_Turn":
+        """
+        Étapes avant génération : personnalité, historique, contexte, prompt
+
+        Étapes indépendantes en parallèle (ChatPipeline) : adaptation de la
+        personnalité, contexte long-terme (encodage d'embedding), émotion
+        utilisateur ; historique puis analyse contextuelle dans le thread
+        appelant. Le prompt est construit quand toutes sont terminées.
+
+        Le cache de réponses est consulté juste après l'historique : en cas
+        de succès, seule l'émotion utilisateur est calculée (pas de
+        personnalité, d'embedding ni de prompt).
+
+        Args:
+            user_input: Message de l'utilisateur
+            user_id: ID utilisateur
+            source: Source du message
+
+        Returns:
+            _Turn (prompt, statistiques, clés de cache, durées des étapes,
+            réponse en cache éventuelle)
+
+        Raises:
+            RuntimeError: Si le modèle n'est pas chargé
+        """
         # Vérifier que le modèle est chargé
         if not self.model_manager.is_loaded:
             error_msg = (
@@ -236,52 +518,76 @@ class ChatEngine:
             logger.error(f"❌ {error_msg}")
             raise RuntimeError(error_msg)
 
-        # 1. Adapter personnalité au contexte (si activée)
-        if self.enable_advanced_ai and self.personality_engine:
-            # Déterminer heure du jour
-            from datetime import datetime
-
-            current_hour = datetime.now().hour
-            if 5 <= current_hour < 12:
-                time_of_day = "morning"
-            elif 12 <= current_hour < 18:
-                time_of_day = "afternoon"
-            elif 18 <= current_hour < 22:
-                time_of_day = "evening"
-            else:
-                time_of_day = "night"
+        # Modèle rechargé ou remplacé : comptes de tokens mémoïsés périmés
+        generation = getattr(self.model_manager, "model_generation", None)
+        if generation != self._model_generation:
+            self.token_counter.reset()
+            self._model_generation = generation
 
-            # Récupérer préférences utilisateur
-            user_prefs = {}
-            if self.memory_manager:
-                prefs = self.memory_manager.facts.get("preferences", [])
-                if prefs:
-                    user_prefs["likes_humor"] = any(
-                        p.get("subject") in ["humour", "blague", "drôle"]
-                        for p in prefs
-                        if p.get("sentiment") == "positive"
-                    )
+        turn = _Turn(user_input, user_id, source, start_time=time.time())
+        timings = turn.timings
 
-            # Adapter personnalité
-            conversation_length = (
-                len(self.memory_manager.current_conversation)
-                if self.memory_manager
-                else 0
-            )
-            self.personality_engine.adapt_to_context(
-                time_of_day=time_of_day,
-                conversation_length=conversation_length,
-                user_preferences=user_prefs,
-            )
+        # Message prétraité une fois (minuscules, mots...) pour tous les analyseurs
+        turn.text = AnalyzedText(user_input)
+
+        # Écritures du tour précédent (historique, personnalité) visibles
+        self.pipeline.flush()
+
+        # 1. Émotion de l'utilisateur (pour PersonalityEngine), nécessaire
+        # même quand la réponse vient du cache
+        turn.user_emotion = self.pipeline.submit(
+            timings,
+            "user_emotion",
+            self.emotion_analyzer.analyze,
+            turn.text,
+            user_id=user_id,
+            source="user",
+        )
 
         # 2. Récupérer l'historique
-        history = self.memory.get_history(
-            user_id=user_id, limit=self.config.context_limit, source=source
+        # Deux fois context_limit : marge pour garder le même premier tour
+        # d'un message à l'autre (préfixe stable, cf. _plan_prompt)
+        history = self.pipeline.timed(
+            timings,
+            "history",
+            self._get_history,
+            user_id,
+            source,
+            self.config.context_limit * 2,
         )
 
+        # 2.1 Réponse déjà générée pour ce message (cache opt-in) : rien d'autre à préparer
+        turn.response_key = self._response_cache_key(source, history)
+        turn.cached_response = self._get_cached_response(user_input, turn.response_key)
+        if turn.cached_response is not None:
+            turn.cache_key = f"{source}:{user_id}"
+            turn.prompt_stats = {"history_kept": 0}
+            return turn
+
+        # 2.2 Étapes indépendantes, en parallèle
+        personality_future = None
+        if self.enable_advanced_ai and self.personality_engine:
+            personality_future = self.pipeline.submit(
+                timings, "personality", self._adapt_personality
+            )
+
+        memory_future = None
+        if self.enable_advanced_ai and self.memory_manager:
+            memory_future = self.pipeline.submit(
+                timings,
+                "long_term_memory",
+                self._long_term_context,
+                user_input,
+                user_id,
+                source,
+            )
+
         # 2.5 ⭐ PHASE 4 : Analyser contexte conversationnel AVANT génération
-        context_analysis = self.context_analyzer.analyze(
-            user_input,
+        context_analysis = self.pipeline.timed(
+            timings,
+            "context_analysis",
+            self.context_analyzer.analyze,
+            turn.text,
             conversation_history=[
                 (
                     msg["content"]
@@ -299,84 +605,336 @@ class ChatEngine:
         # Générer contexte textuel pour injection dans prompt
         context_info = self.context_analyzer.get_context_for_prompt(window=5)
 
+        # Fin des étapes parallèles (leurs exceptions sont relevées ici)
+        if personality_future:
+            personality_future.result()
+        long_term_context = memory_future.result() if memory_future else None
+        if long_term_context and self.memory_manager.is_personal_context(long_term_context):
+            turn.response_key = None  # Réponse personnalisée : jamais partagée
+
         # 3. Construire le prompt (avec contexte conversationnel)
-        prompt = self._build_prompt(user_input, history, context_info=context_info)
+        turn.cache_key = f"{source}:{user_id}"
+        turn.prompt, turn.prompt_stats = self.pipeline.timed(
+            timings,
+            "prompt_build",
+            self._plan_prompt,
+            user_input,
+            history,
+            context_info=context_info,
+            cache_key=turn.cache_key,
+            long_term_context=long_term_context,
+        )
+        return turn
+
+    def _adapt_personality(self):
+        """Adapte la personnalité au contexte (heure, préférences, longueur)"""
+        # Déterminer heure du jour
+        from datetime import datetime
+
+        current_hour = datetime.now().hour
+        if 5 <= current_hour < 12:
+            time_of_day = "morning"
+        elif 12 <= current_hour < 18:
+            time_of_day = "afternoon"
+        elif 18 <= current_hour < 22:
+            time_of_day = "evening"
+        else:
+            time_of_day = "night"
+
+        # Récupérer préférences utilisateur
+        user_prefs = {}
+        if self.memory_manager:
+            facts = self.memory_manager.facts
+            if hasattr(facts, "has_preference"):
+                # Index (sentiment, sujet) du FactStore : pas de parcours des préférences
+                if facts.count("preferences"):
+                    user_prefs["likes_humor"] = facts.has_preference(
+                        _HUMOR_SUBJECTS, sentiment="positive"
+                    )
+            else:
+                # Ancien format (dict de listes)
+                prefs = facts.get("preferences", [])
+                if prefs:
+                    user_prefs["likes_humor"] = any(
+                        str(p.get("subject", "")).lower() in _HUMOR_SUBJECTS
+                        and p.get("sentiment") == "positive"
+                        for p in prefs
+                    )
 
-        # 4. Générer la réponse
-        try:
-            response_text = self.model_manager.generate(
-                prompt=prompt,
-                temperature=self.config.temperature,
-                top_p=self.config.top_p,
-                max_tokens=self.config.max_tokens,
-                stop=["<|user|>", "<|system|>"],  # Arrêter aux balises
-            )
-        except Exception as e:
-            logger.error(f"❌ Erreur génération : {e}")
-            raise RuntimeError(f"Échec génération réponse : {e}")
+        # Adapter personnalité
+        conversation_length = (
+            len(self.memory_manager.current_conversation)
+            if self.memory_manager
+            else 0
+        )
+        self.personality_engine.adapt_to_context(
+            time_of_day=time_of_day,
+            conversation_length=conversation_length,
+            user_preferences=user_prefs,
+        )
 
-        # 5. Analyser l'émotion de l'utilisateur (pour PersonalityEngine)
-        user_emotion_result = self.emotion_analyzer.analyze(
-            user_input, user_id=user_id, source="user"
+    def _get_history(self, user_id: str, source: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Derniers tours de la conversation, plus ancien en premier
+
+        Mémoire long-terme activée : lecture bornée de la table conversations
+        (index (user_id, source, timestamp, id), cf. get_recent_turns) ;
+        sinon mémoire court-terme (ConversationMemory).
+
+        Args:
+            user_id: ID utilisateur
+            source: Source du message
+            limit: Nombre max de tours
+
+        Returns:
+            Tours {user_input, bot_response, ...}
+        """
+        if self.memory_manager:
+            return self.memory_manager.get_recent_exchanges(user_id, source, limit)
+        return self.memory.get_history(user_id=user_id, limit=limit, source=source)
+
+    def _long_term_context(
+        self, user_input: str, user_id: Optional[str] = None, source: str = "desktop"
+    ) -> str:
+        """
+        Contexte long-terme (faits + segments pertinents) pour le prompt
+
+        Args:
+            user_input: Message de l'utilisateur (requête sémantique)
+            user_id: Conversation courante (derniers messages de cet utilisateur)
+            source: Source du message
+
+        Returns:
+            Contexte formaté (vide si rien de pertinent)
+        """
+        limits = self._budgeter().allocate()
+        return self.memory_manager.get_context_for_prompt(
+            query=user_input,
+            include_facts=True,
+            include_segments=True,
+            max_tokens=min(800, limits["memory"]),
+            user_id=user_id,
+            source=source,
         )
 
+    def _response_cache_key(
+        self, source: str, history: List[Dict[str, Any]]
+    ) -> Optional[Tuple[str, str]]:
+        """
+        Partie (personnalité, canal + contexte récent) de la clé du cache de réponses
+
+        Portée : canal (source), palier de personnalité et derniers messages
+        de l'utilisateur. Ni l'ID utilisateur ni les réponses générées n'y
+        figurent : elles changent à chaque tour et le cache ne servirait
+        jamais. Deux personnes qui ouvrent une conversation par "salut"
+        partagent donc la réponse, comme une conversation qui se répète.
+        Les réponses construites avec des souvenirs personnels (faits,
+        segments) ne sont pas mises en cache (cf. _prepare_turn).
+
+        Args:
+            source: Source du message
+            history: Historique de la conversation (plus ancien en premier)
+
+        Returns:
+            (palier de personnalité, empreinte du contexte), None si cache désactivé
+        """
+        if self.response_cache is None:
+            return None
+
+        traits = {}
+        if self.personality_engine:
+            traits = {
+                name: self.personality_engine.get_trait(name)
+                for name in self.personality_engine.personality
+            }
+
+        recent = [source]
+        for msg in history[-_RESPONSE_CACHE_CONTEXT_TURNS:] if history else []:
+            recent.append(msg.get("user_input", msg.get("content", "")))
+
+        return personality_bucket(traits), context_hash(recent)
+
+    def _get_cached_response(
+        self, user_input: str, response_key: Optional[Tuple[str, str]]
+    ) -> Optional[str]:
+        """Réponse en cache pour ce message (None si absente ou cache désactivé)"""
+        if response_key is None:
+            return None
+        entry = self.response_cache.get(
+            user_input, *response_key, temperature=self.config.temperature
+        )
+        if entry is None:
+            return None
+        logger.info(
+            f"♻️ Réponse servie depuis le cache ({entry.generation_s:.2f}s GPU économisées)"
+        )
+        return entry.text
+
+    def _cache_response(
+        self,
+        user_input: str,
+        response_key: Optional[Tuple[str, str]],
+        response_text: str,
+        generation_s: float,
+    ):
+        """Mémorise une réponse générée (si cache activé)"""
+        if response_key is None:
+            return
+        self.response_cache.put(
+            user_input,
+            *response_key,
+            temperature=self.config.temperature,
+            response=response_text,
+            generation_s=generation_s,
+        )
+
+    def _generation_failed(self, turn: "_Turn", error: Exception) -> RuntimeError:
+        """
+        Échec de génération (chat et chat_stream) : journal et durées du tour
+
+        Rien n'est sauvegardé ni mis en cache ; l'appelant affiche son
+        message de repli (bot Discord, interface desktop).
+
+        Args:
+            turn: Tour préparé par _prepare_turn
+            error: Exception levée par le modèle
+
+        Returns:
+            RuntimeError à lever par l'appelant
+        """
+        logger.error(f"❌ Erreur génération : {error}")
+        self.pipeline.record(turn.timings)
+        return RuntimeError(f"Échec génération réponse : {error}")
+
+    def _finish_turn(self, turn: "_Turn", response_text: str) -> ChatResponse:
+        """
+        Étapes après génération : émotion de la réponse, stats, sauvegardes
+
+        Seule l'émotion de la réponse est calculée avant le retour ; le
+        feedback personnalité et les sauvegardes mémoire sont exécutés en
+        arrière-plan (ChatPipeline.defer), terminés avant le tour suivant.
+
+        Args:
+            turn: Tour préparé par _prepare_turn
+            response_text: Réponse générée
+
+        Returns:
+            ChatResponse avec réponse, émotion, stats
+        """
+        # 5. Émotion de l'utilisateur (analysée pendant la préparation)
+        user_emotion_result = turn.user_emotion.result()
+
         # 6. Analyser l'émotion de la réponse assistant
-        assistant_emotion_result = self.emotion_analyzer.analyze(
-            response_text, user_id=user_id, source="assistant"
+        assistant_emotion_result = self.pipeline.timed(
+            turn.timings,
+            "assistant_emotion",
+            self.emotion_analyzer.analyze,
+            response_text,
+            user_id=turn.user_id,
+            source="assistant",
         )
 
         emotion = assistant_emotion_result.emotion  # Pour compatibilité
 
+        # 8. Calculer stats
+        processing_time = time.time() - turn.start_time
+        tokens_used = self.token_counter(response_text)
+
+        logger.info(
+            f"✅ Réponse générée : {len(response_text)} chars, "
+            f"émotion assistant={emotion} ({assistant_emotion_result.intensity:.1f}%), "
+            f"émotion user={user_emotion_result.emotion} ({user_emotion_result.intensity:.1f}%), "
+            f"temps={processing_time:.2f}s"
+        )
+
+        response = ChatResponse(
+            response=response_text,
+            emotion=emotion,
+            tokens_used=tokens_used,
+            context_messages=turn.prompt_stats["history_kept"],
+            processing_time=processing_time,
+            stage_timings=dict(turn.timings),
+        )
+
+        # 7. Sauvegardes hors du chemin de la réponse
+        self.pipeline.defer(
+            turn.timings,
+            self._save_turn,
+            turn,
+            response_text,
+            emotion,
+            user_emotion_result.emotion,
+        )
+
+        return response
+
+    def _save_turn(
+        self, turn: "_Turn", response_text: str, emotion: str, user_emotion: str
+    ):
+        """
+        Tenue de livres d'un tour (thread ChatPipeline)
+
+        Args:
+            turn: Tour terminé
+            response_text: Réponse générée
+            emotion: Émotion de la réponse
+            user_emotion: Émotion du message utilisateur
+        """
         # ⭐ PHASE 2 : Analyser feedback utilisateur (personnalité)
         if self.enable_advanced_ai and self.personality_engine:
             self.personality_engine.analyze_user_feedback(
-                user_input, user_emotion=user_emotion_result.emotion
+                turn.text, user_emotion=user_emotion
             )
 
         # ⭐ PHASE 3 : Vérifier si ajustement ton nécessaire
         if self.enable_advanced_ai:
-            tone_adjustment = self.emotion_analyzer.should_adjust_response_tone(user_id)
+            tone_adjustment = self.emotion_analyzer.should_adjust_response_tone(
+                turn.user_id
+            )
             if tone_adjustment:
                 logger.info(f"💡 Suggestion ajustement ton : {tone_adjustment}")
 
-        # 7. Sauvegarder l'interaction (mémoire court-terme)
+        # Sauvegarder l'interaction (mémoire court-terme)
         self.memory.save_interaction(
-            user_id=user_id,
-            source=source,
-            user_input=user_input,
+            user_id=turn.user_id,
+            source=turn.source,
+            user_input=turn.user_input,
             bot_response=response_text,
             emotion=emotion,
         )
 
         # ⭐ PHASE 1 : Sauvegarder dans mémoire long-terme (si activée)
         if self.enable_advanced_ai and self.memory_manager:
-            # Ajouter message utilisateur
-            self.memory_manager.add_message("user", user_input)
-
-            # Ajouter réponse assistant
-            self.memory_manager.add_message("assistant", response_text)
+            # Message utilisateur + réponse assistant : une seule transaction
+            self.memory_manager.add_exchange(
+                turn.text, response_text, user_id=turn.user_id, source=turn.source
+            )
 
             # Note : L'extraction de faits et résumés automatiques
             # sont gérés automatiquement par MemoryManager.add_message()
 
-        # 8. Calculer stats
-        processing_time = time.time() - start_time
-        tokens_used = len(response_text.split())  # Approximation
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Attend la fin des sauvegardes du dernier tour
 
-        logger.info(
-            f"✅ Réponse générée : {len(response_text)} chars, "
-            f"émotion assistant={emotion} ({assistant_emotion_result.intensity:.1f}%), "
-            f"émotion user={user_emotion_result.emotion} ({user_emotion_result.intensity:.1f}%), "
-            f"temps={processing_time:.2f}s"
-        )
+        Args:
+            timeout: Attente max en secondes (None = illimitée)
 
-        return ChatResponse(
-            response=response_text,
-            emotion=emotion,
-            tokens_used=tokens_used,
-            context_messages=len(history),
-            processing_time=processing_time,
-        )
+        Returns:
+            True si toutes les sauvegardes sont terminées
+        """
+        return self.pipeline.flush(timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Termine les sauvegardes en attente (tours, mémoire long-terme)
+
+        Args:
+            timeout: Attente max en secondes par étape (None = illimitée)
+        """
+        self.pipeline.shutdown(timeout)
+        if self.memory_manager:
+            self.memory_manager.close(timeout=timeout)
 
     def clear_user_history(self, user_id: str, source: Optional[str] = None) -> int:
         """
@@ -389,7 +947,17 @@ class ChatEngine:
         Returns:
             Nombre d'interactions supprimées
         """
+        self.pipeline.flush()  # Sinon un échange en attente réapparaîtrait
         deleted = self.memory.clear_user_history(user_id, source)
+        if self.memory_manager:
+            # Historique du prompt (cf. _get_history)
+            self.memory_manager.clear_history(user_id, source)
+
+        # États KV et ancres d'historique de ces conversations
+        for src in [source] if source else ["desktop", "discord"]:
+            cache_key = f"{src}:{user_id}"
+            self._history_anchors.pop(cache_key, None)
+            self.model_manager.forget_prompt_state(cache_key)
 
         logger.info(
             f"🗑️ Historique effacé : {deleted} interactions "
@@ -417,6 +985,11 @@ class ChatEngine:
                 "temperature": self.config.temperature,
                 "max_tokens": self.config.max_tokens,
             },
+            "token_cache": self.token_counter.get_stats(),
+            "pipeline": self.pipeline.get_stats(),
+            "response_cache": (
+                self.response_cache.get_stats() if self.response_cache else None
+            ),
         }
 
         # Ajouter stats mémoire long-terme si activée
@@ -0,0 +1,182 @@
+"""
+chat_pipeline.py - Exécution par étapes d'un tour de chat
+
+Un tour de ChatEngine enchaînait toutes ses étapes en séquence. Ici :
+- Étapes pré-génération indépendantes en parallèle (personnalité, mémoire
+  long-terme avec encodage d'embedding, émotion utilisateur) pendant que
+  historique → analyse contextuelle s'exécutent dans le thread appelant
+- Tenue de livres post-génération (sauvegardes SQLite, feedback personnalité)
+  hors du chemin de la réponse, sur un worker unique (ordre préservé)
+- Durée de chaque étape mesurée (dernier tour + moyennes)
+
+Latence d'un tour ≈ chemin critique des étapes + génération LLM.
+
+Author: Workly Team
+"""
+
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ChatPipeline:
+    """
+    Exécuteurs des étapes d'un tour et statistiques de durée par étape
+    """
+
+    def __init__(self, max_workers: int = 3):
+        """
+        Initialise les exécuteurs
+
+        Args:
+            max_workers: Étapes pré-génération exécutées simultanément
+        """
+        self._stages = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="chat-stage"
+        )
+        # Worker unique : les écritures d'un tour précèdent celles du suivant
+        self._bookkeeping = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="chat-bookkeeping"
+        )
+        self._pending: Optional[Future] = None
+        self._lock = threading.Lock()
+
+        self.turns = 0
+        self.bookkeeping_errors = 0
+        self.last_timings: Dict[str, float] = {}
+        self._totals: Dict[str, float] = defaultdict(float)
+        self._counts: Dict[str, int] = defaultdict(int)
+
+    # ========== ÉTAPES ==========
+
+    @staticmethod
+    def timed(timings: Dict[str, float], name: str, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Exécute une étape dans le thread courant en mesurant sa durée
+
+        Args:
+            timings: Durées du tour (secondes), complétées par l'étape
+            name: Nom de l'étape
+            fn: Fonction de l'étape
+
+        Returns:
+            Résultat de fn
+        """
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timings[name] = time.perf_counter() - start
+
+    def submit(
+        self, timings: Dict[str, float], name: str, fn: Callable, *args, **kwargs
+    ) -> Future:
+        """
+        Lance une étape en parallèle (résultat via Future.result())
+
+        Args:
+            timings: Durées du tour (secondes), complétées par l'étape
+            name: Nom de l'étape
+            fn: Fonction de l'étape
+
+        Returns:
+            Future de l'étape (les exceptions sont relevées par result())
+        """
+        return self._stages.submit(self.timed, timings, name, fn, *args, **kwargs)
+
+    # ========== TENUE DE LIVRES ==========
+
+    def defer(self, timings: Dict[str, float], fn: Callable, *args, **kwargs) -> Future:
+        """
+        Exécute la tenue de livres d'un tour en arrière-plan
+
+        Les durées du tour sont enregistrées une fois la tenue de livres
+        terminée (étape "bookkeeping" incluse). Une erreur est journalisée
+        et comptée : la réponse a déjà été rendue à l'appelant.
+
+        Args:
+            timings: Durées du tour (secondes)
+            fn: Fonction de tenue de livres
+
+        Returns:
+            Future (terminée quand les écritures sont faites)
+        """
+
+        def run():
+            try:
+                self.timed(timings, "bookkeeping", fn, *args, **kwargs)
+            except Exception as e:
+                with self._lock:
+                    self.bookkeeping_errors += 1
+                logger.error(f"❌ Erreur tenue de livres du tour : {e}")
+            finally:
+                self.record(timings)
+
+        future = self._bookkeeping.submit(run)
+        with self._lock:
+            self._pending = future
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Attend la fin de la tenue de livres en cours
+
+        Args:
+            timeout: Attente max en secondes (None = illimitée)
+
+        Returns:
+            True si toutes les écritures sont terminées
+        """
+        with self._lock:
+            pending = self._pending
+        if pending is None:
+            return True
+        try:
+            pending.result(timeout=timeout)
+        except FutureTimeoutError:
+            return False
+        except Exception:
+            pass  # Déjà journalisée par defer()
+        return True
+
+    def shutdown(self, timeout: Optional[float] = None):
+        """Termine la tenue de livres en attente puis arrête les exécuteurs"""
+        self.flush(timeout)
+        self._stages.shutdown(wait=False)
+        self._bookkeeping.shutdown(wait=False)
+
+    # ========== STATISTIQUES ==========
+
+    def record(self, timings: Dict[str, float]):
+        """Ajoute les durées d'un tour aux statistiques"""
+        with self._lock:
+            self.turns += 1
+            self.last_timings = dict(timings)
+            for name, seconds in timings.items():
+                self._totals[name] += seconds
+                self._counts[name] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Durées du dernier tour et moyennes par étape (ms)"""
+        with self._lock:
+            return {
+                "turns": self.turns,
+                "bookkeeping_errors": self.bookkeeping_errors,
+                "last_ms": {
+                    name: round(seconds * 1000, 1)
+                    for name, seconds in self.last_timings.items()
+                },
+                "avg_ms": {
+                    name: round(self._totals[name] / self._counts[name] * 1000, 1)
+                    for name in self._totals
+                },
+            }
+
+    def __repr__(self) -> str:
+        return f"<ChatPipeline: {self.turns} tours>"
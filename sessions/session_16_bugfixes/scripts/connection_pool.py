@@ -0,0 +1,193 @@
+"""
+connection_pool.py - Pool de connexions SQLite pour WorklyDatabase
+
+Une base workly.db est partagée par plusieurs threads (chat Qt, exécuteur
+du bot Discord, MemoryWorker, EmotionMemory). Une connexion sqlite3 unique
+avec check_same_thread=False ne sérialise rien : curseurs entrelacés,
+transactions mélangées, "database is locked".
+
+Organisation (mode WAL) :
+- 1 connexion d'écriture, protégée par un verrou (un seul écrivain)
+- 1 connexion de lecture par thread (PRAGMA query_only), créée à la demande :
+  en WAL les lectures ne bloquent pas l'écriture et inversement
+- Checkpoint WAL : TRUNCATE quand le fichier -wal dépasse une taille limite
+  (les lecteurs permanents empêchent l'autocheckpoint de le réduire)
+
+Author: Workly Team
+"""
+
+import os
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """
+    Connexions SQLite : un écrivain sérialisé + un lecteur par thread.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        busy_timeout: float = 5.0,
+        checkpoint_interval: int = 200,
+        wal_size_limit: int = 64 * 1024 * 1024,
+    ):
+        """
+        Ouvre la connexion d'écriture.
+
+        Args:
+            db_path: Chemin du fichier SQLite
+            busy_timeout: Attente max sur un verrou SQLite (secondes)
+            checkpoint_interval: Vérifier la taille du WAL tous les N commits
+            wal_size_limit: Taille du WAL (octets) déclenchant un checkpoint TRUNCATE
+        """
+        self.db_path = db_path
+        self.wal_path = f"{db_path}-wal"
+        self.busy_timeout = busy_timeout
+        self.checkpoint_interval = checkpoint_interval
+        self.wal_size_limit = wal_size_limit
+
+        self.writer = self._connect()
+        self.writer.execute("PRAGMA journal_mode=WAL")  # Lecteurs non bloquants
+        self.writer.execute("PRAGMA synchronous=NORMAL")  # Balance perf/sécurité
+        self.writer.execute("PRAGMA foreign_keys=ON")  # Intégrité référentielle
+        self.write_lock = threading.RLock()
+
+        self._local = threading.local()
+        self._readers: Dict[int, sqlite3.Connection] = {}
+        self._registry_lock = threading.Lock()
+        self._closed = False
+
+        self._commits_since_check = 0
+        self.checkpoint_count = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Nouvelle connexion (autocommit, résultats en dict)."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            check_same_thread=False,  # Fermeture possible depuis close_all()
+            isolation_level=None,  # Autocommit mode
+        )
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # ========================================================================
+    # LECTEURS (UN PAR THREAD)
+    # ========================================================================
+
+    def reader(self) -> sqlite3.Connection:
+        """
+        Connexion de lecture du thread courant (créée au premier appel).
+
+        Returns:
+            Connexion en lecture seule (PRAGMA query_only)
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        if self._closed:
+            raise sqlite3.ProgrammingError("Pool de connexions fermé")
+
+        conn = self._connect()
+        conn.execute("PRAGMA query_only=ON")
+        self._local.conn = conn
+
+        ident = threading.get_ident()
+        with self._registry_lock:
+            self._prune_dead_readers()
+            previous = self._readers.pop(ident, None)  # Ident réutilisé
+            if previous is not None:
+                previous.close()
+            self._readers[ident] = conn
+        return conn
+
+    def _prune_dead_readers(self):
+        """Ferme les lecteurs des threads terminés (un thread par message Qt)."""
+        alive = {thread.ident for thread in threading.enumerate()}
+        for ident in [i for i in self._readers if i not in alive]:
+            self._readers.pop(ident).close()
+
+    # ========================================================================
+    # CHECKPOINT WAL
+    # ========================================================================
+
+    def after_commit(self):
+        """
+        À appeler après chaque COMMIT (verrou d'écriture détenu).
+
+        Vérifie périodiquement la taille du WAL et le tronque si besoin.
+        """
+        self._commits_since_check += 1
+        if self._commits_since_check < self.checkpoint_interval:
+            return
+        self._commits_since_check = 0
+
+        try:
+            wal_size = os.path.getsize(self.wal_path)
+        except OSError:
+            return
+        if wal_size > self.wal_size_limit:
+            busy, _, _ = self.checkpoint("TRUNCATE")
+            if busy:
+                logger.warning(
+                    f"⚠️ Checkpoint WAL incomplet ({wal_size // 1024} Ko) : lecteurs actifs"
+                )
+
+    def checkpoint(self, mode: str = "PASSIVE") -> Tuple[int, int, int]:
+        """
+        Reporte le WAL dans la base principale.
+
+        Args:
+            mode: PASSIVE, FULL, RESTART ou TRUNCATE
+
+        Returns:
+            (busy, pages du WAL, pages reportées)
+        """
+        if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+            raise ValueError(f"Mode de checkpoint inconnu : {mode}")
+        with self.write_lock:
+            row = self.writer.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        self.checkpoint_count += 1
+        return tuple(row)
+
+    # ========================================================================
+    # FERMETURE / STATS
+    # ========================================================================
+
+    def close_all(self):
+        """Ferme tous les lecteurs puis l'écrivain (WAL tronqué)."""
+        with self._registry_lock:
+            for conn in self._readers.values():
+                conn.close()
+            self._readers.clear()
+            self._closed = True
+
+        with self.write_lock:
+            try:
+                self.writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Checkpoint final impossible : {e}")
+            self.writer.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Lecteurs ouverts, checkpoints et taille du WAL."""
+        try:
+            wal_size = os.path.getsize(self.wal_path)
+        except OSError:
+            wal_size = 0
+        with self._registry_lock:
+            readers = len(self._readers)
+        return {
+            "readers": readers,
+            "checkpoints": self.checkpoint_count,
+            "wal_size_kb": wal_size // 1024,
+        }
+
+    def __repr__(self):
+        return f"<ConnectionPool: {self.db_path}, {len(self._readers)} lecteurs>"
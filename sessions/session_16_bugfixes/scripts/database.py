@@ -6,15 +6,19 @@ Migration Phase 6 : Remplacement JSON → SQLite
 - Transactions ACID (pas de corruption)
 - Requêtes SQL optimisées
 - Index automatiques
+- Unités de travail : plusieurs écritures = une seule transaction
+- Pool de connexions : un écrivain sérialisé, un lecteur par thread (WAL)
 
 Tables :
 - conversations : Messages utilisateur/assistant
 - embeddings : Vecteurs sémantiques pour recherche
+- embedding_cache : Cache des embeddings calculés (hash texte + modèle)
 - facts : Faits extraits (noms, préférences, événements)
 - segments : Résumés de conversations
 - emotion_history : Historique émotionnel
 - personality_traits : Traits de personnalité
 - personality_evolution : Évolution personnalité
+- conversations_fts / segments_fts / facts_fts : Index plein texte (FTS5, BM25)
 
 Author: Workly Team
 Date: 17 novembre 2025
@@ -24,13 +28,45 @@ import sqlite3
 import json
 import os
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+import re
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
 import numpy as np
 
+try:
+    from .connection_pool import ConnectionPool
+    from .embedding_store import EmbeddingStore
+    from .schema_migrations import (
+        MIGRATIONS as SCHEMA_MIGRATIONS,
+        MigrationInterrupted,
+        MigrationRunner,
+        fact_search_text,
+    )
+except ImportError:
+    from connection_pool import ConnectionPool
+    from embedding_store import EmbeddingStore
+    from schema_migrations import (
+        MIGRATIONS as SCHEMA_MIGRATIONS,
+        MigrationInterrupted,
+        MigrationRunner,
+        fact_search_text,
+    )
+
 logger = logging.getLogger(__name__)
 
+# Mots vides ignorés par search_text (présents partout, BM25 ≈ 0)
+_FTS_STOPWORDS = frozenset(
+    """
+    les des une est pour que qui quoi dans avec pas sur mais son ses mon mes ton
+    tes nous vous ils elle elles leur aux par plus tout tous cette ces comme quand
+    aussi bien fait faire sont été être avoir suis ai the and you are what how
+    """.split()
+)
+_FTS_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
 
 class WorklyDatabase:
     """
@@ -38,41 +74,64 @@ class WorklyDatabase:
 
     Fonctionnalités :
     - Création/migration automatique du schéma
-    - Transactions ACID
-    - Méthodes CRUD optimisées
+    - Transactions ACID (unités de travail via transaction())
+    - Accès multi-thread (ConnectionPool : lectures concurrentes, écrivain unique)
+    - Méthodes CRUD optimisées (+ variantes *_batch en executemany)
     - Sérialisation numpy arrays (embeddings)
+    - Sidecar mmap optionnel des embeddings (lecture zéro copie)
     - Backward compatibility avec JSON
     """
 
-    def __init__(self, db_path: str = "data/memory/workly.db"):
+    def __init__(
+        self,
+        db_path: str = "data/memory/workly.db",
+        use_embedding_store: bool = False,
+        apply_migrations: bool = True,
+    ):
         """
         Initialise la connexion à la base de données.
 
         Args:
             db_path: Chemin vers le fichier SQLite
+            use_embedding_store: Maintient un sidecar mmap des embeddings
+            apply_migrations: Applique les migrations de schéma en attente
         """
         self.db_path = db_path
 
         # Créer dossier si nécessaire
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
-        # Connexion avec paramètres optimisés
-        self.conn = sqlite3.connect(
-            db_path,
-            check_same_thread=False,  # Pour utilisation multi-thread
-            isolation_level=None,  # Autocommit mode
-        )
-        self.conn.row_factory = sqlite3.Row  # Résultats en dict
-
-        # Optimisations SQLite
-        self.conn.execute(
-            "PRAGMA journal_mode=WAL"
-        )  # Write-Ahead Logging (performance)
-        self.conn.execute("PRAGMA synchronous=NORMAL")  # Balance perf/sécurité
-        self.conn.execute("PRAGMA foreign_keys=ON")  # Intégrité référentielle
-
-        # Créer schéma
+        # Pool : connexion d'écriture (WAL, synchronous=NORMAL, foreign_keys)
+        # + une connexion de lecture par thread
+        self.pool = ConnectionPool(db_path)
+        self.conn = self.pool.writer
+
+        # Unités de travail (transaction() imbriquable, un écrivain à la fois)
+        self._write_lock = self.pool.write_lock
+        self._writer_thread: Optional[int] = None
+        self._tx_depth = 0
+        self._pending_store: List[Tuple[int, np.ndarray]] = []
+        # États en mémoire à appliquer après COMMIT (ou à oublier après ROLLBACK)
+        self._after_commit: List[Tuple[Callable[[], Any], Optional[Callable[[], Any]]]] = []
+        self.commit_count = 0
+        self.rollback_count = 0
+        self._fts_enabled: Optional[bool] = None  # Mis en cache (cf. fts_enabled)
+
+        # Backfills des migrations hors démarrage (cf. migrate(background=True))
+        self._migration_thread: Optional[threading.Thread] = None
+        self._stop_migrations = threading.Event()
+
+        # Créer schéma puis appliquer les migrations en attente
+        # (base neuve : rien à réécrire, tout est appliqué tout de suite)
         self._create_schema()
+        if apply_migrations:
+            self.migrate(background=self._has_data())
+
+        # Sidecar mmap des embeddings (optionnel)
+        self.embedding_store: Optional[EmbeddingStore] = None
+        if use_embedding_store:
+            self.embedding_store = EmbeddingStore(db_path)
+            self._sync_embedding_store()
 
         logger.info(f"✅ Base de données SQLite initialisée : {db_path}")
 
@@ -126,6 +185,18 @@ class WorklyDatabase:
             "CREATE INDEX IF NOT EXISTS idx_embeddings_conversation ON embeddings(conversation_id)"
         )
 
+        # Table embedding_cache (vecteurs déjà calculés, clé = hash texte + modèle)
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                text_hash TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                created_at TEXT DEFAULT (datetime('now'))
+            )
+        """
+        )
+
         # Table facts (faits extraits)
         cursor.execute(
             """
@@ -238,6 +309,199 @@ class WorklyDatabase:
         self.conn.commit()
         logger.debug("✅ Schéma SQLite créé/vérifié")
 
+    @property
+    def schema_version(self) -> int:
+        """Version du schéma (PRAGMA user_version)."""
+        return self.conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def migrate(
+        self, progress_callback=None, batch_size: int = 2000, background: bool = False
+    ) -> int:
+        """
+        Applique les migrations de schéma en attente (cf. schema_migrations).
+
+        Args:
+            progress_callback: (version, description, lignes traitées, total)
+            batch_size: Lignes par transaction pour les réécritures de données
+            background: DDL (colonnes, index) tout de suite, réécritures de
+                données dans un thread (cf. wait_for_migrations)
+
+        Returns:
+            Nombre de migrations appliquées avant le retour
+        """
+        runner = MigrationRunner(
+            self,
+            progress_callback=progress_callback,
+            batch_size=batch_size,
+            stop_event=self._stop_migrations,
+        )
+        try:
+            applied = runner.run(defer_backfills=background)
+        finally:
+            self._fts_enabled = None  # Index FTS5 peut-être créés
+
+        if background and runner.pending():
+            self._migration_thread = threading.Thread(
+                target=self._migrate_in_background,
+                args=(runner,),
+                name="SchemaMigrations",
+                daemon=True,
+            )
+            self._migration_thread.start()
+            logger.info("🔧 Réécriture des données existantes en arrière-plan")
+        return applied
+
+    def _migrate_in_background(self, runner: MigrationRunner):
+        """Backfills en attente (thread SchemaMigrations)."""
+        try:
+            runner.run()
+        except MigrationInterrupted as e:
+            logger.info(f"⏹️ {e} : reprise au prochain démarrage")
+        except Exception as e:
+            logger.error(f"❌ Migration de schéma en arrière-plan échouée : {e}")
+        finally:
+            self._fts_enabled = None
+
+    def wait_for_migrations(self, timeout: Optional[float] = None) -> bool:
+        """
+        Attend la fin des réécritures de données en arrière-plan.
+
+        Args:
+            timeout: Attente max en secondes (None = illimitée)
+
+        Returns:
+            True si aucune migration n'est en cours
+        """
+        thread = self._migration_thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def _has_data(self) -> bool:
+        """True si une table réécrite par les migrations contient déjà des lignes."""
+        return any(
+            self.conn.execute(f"SELECT EXISTS(SELECT 1 FROM {table})").fetchone()[0]
+            for table in ("conversations", "facts", "segments", "embeddings")
+        )
+
+    # ========================================================================
+    # TRANSACTIONS (UNITÉ DE TRAVAIL)
+    # ========================================================================
+
+    @contextmanager
+    def transaction(self) -> Iterator["WorklyDatabase"]:
+        """
+        Regroupe plusieurs écritures dans une seule transaction.
+
+        Imbriquable : seul le bloc le plus externe exécute BEGIN/COMMIT,
+        les méthodes add_* appelées à l'intérieur ne committent pas.
+        En cas d'exception, toute l'unité est annulée (ROLLBACK).
+
+        Usage :
+            with db.transaction():
+                db.add_conversation(...)
+                db.add_fact(...)
+
+        Yields:
+            L'instance WorklyDatabase
+        """
+        callbacks: List[Callable[[], Any]] = []
+        try:
+            with self._write_lock:
+                if self._tx_depth == 0:
+                    self.conn.execute("BEGIN IMMEDIATE")
+                    self._writer_thread = threading.get_ident()
+                self._tx_depth += 1
+                try:
+                    yield self
+                except BaseException:
+                    self._tx_depth -= 1
+                    if self._tx_depth == 0:
+                        self._writer_thread = None
+                        self.conn.execute("ROLLBACK")
+                        self._pending_store.clear()
+                        self.rollback_count += 1
+                        callbacks = [undo for _, undo in self._after_commit if undo]
+                        self._after_commit = []
+                    raise
+                else:
+                    self._tx_depth -= 1
+                    if self._tx_depth == 0:
+                        self._writer_thread = None
+                        self.conn.execute("COMMIT")
+                        self.commit_count += 1
+                        self._flush_pending_store()
+                        self.pool.after_commit()
+                        callbacks = [apply for apply, _ in self._after_commit]
+                        self._after_commit = []
+        finally:
+            # Hors du verrou d'écriture : les callbacks prennent leurs propres verrous
+            self._run_callbacks(callbacks)
+
+    def call_after_commit(
+        self, apply: Callable[[], Any], on_rollback: Optional[Callable[[], Any]] = None
+    ):
+        """
+        Applique un changement en mémoire une fois la transaction validée.
+
+        Hors transaction (ou depuis un autre thread que l'écrivain), `apply`
+        est exécuté immédiatement. Après un ROLLBACK, `apply` n'est jamais
+        exécuté et `on_rollback` l'est à la place.
+
+        Args:
+            apply: Mise à jour de l'état en mémoire
+            on_rollback: Nettoyage si la transaction est annulée
+        """
+        if self._tx_depth and self._writer_thread == threading.get_ident():
+            self._after_commit.append((apply, on_rollback))
+        else:
+            apply()
+
+    @staticmethod
+    def _run_callbacks(callbacks: List[Callable[[], Any]]):
+        """Exécute les callbacks de fin de transaction (une erreur n'arrête pas les suivants)"""
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"❌ Erreur après transaction : {e}")
+
+    def _reader(self) -> sqlite3.Connection:
+        """
+        Connexion de lecture pour le thread courant.
+
+        Dans une transaction ouverte par ce thread : la connexion d'écriture
+        (pour voir ses propres écritures non validées).
+        """
+        if self._writer_thread == threading.get_ident():
+            return self.conn
+        return self.pool.reader()
+
+    def _flush_pending_store(self):
+        """Copie dans le sidecar les embeddings de la transaction validée."""
+        if not self._pending_store:
+            return
+        pending, self._pending_store = self._pending_store, []
+        if self.embedding_store is None:
+            return
+        try:
+            self.embedding_store.append(
+                [row_id for row_id, _ in pending],
+                np.vstack([vector for _, vector in pending]),
+            )
+        except (OSError, ValueError) as e:
+            # Rattrapé par _sync_embedding_store au prochain démarrage
+            logger.warning(f"⚠️ Sidecar embeddings non mis à jour : {e}")
+
+    def get_write_stats(self) -> Dict[str, int]:
+        """Compteurs de transactions (validées / annulées) et état du pool."""
+        return {
+            "commits": self.commit_count,
+            "rollbacks": self.rollback_count,
+            **self.pool.get_stats(),
+        }
+
     # ========================================================================
     # CONVERSATIONS
     # ========================================================================
@@ -265,24 +529,59 @@ class WorklyDatabase:
         Returns:
             ID du message inséré
         """
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO conversations (role, content, timestamp, user_id, source, metadata)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """,
-            (
-                role,
-                content,
-                timestamp,
-                user_id,
-                source,
-                json.dumps(metadata) if metadata else None,
-            ),
-        )
-        self.conn.commit()
+        with self.transaction():
+            cursor = self.conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO conversations (role, content, timestamp, user_id, source, metadata)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """,
+                (
+                    role,
+                    content,
+                    timestamp,
+                    user_id,
+                    source,
+                    json.dumps(metadata) if metadata else None,
+                ),
+            )
         return cursor.lastrowid
 
+    def add_conversations_batch(self, messages: List[Dict[str, Any]]) -> int:
+        """
+        Ajoute plusieurs messages en une seule transaction (executemany).
+
+        Args:
+            messages: Dicts avec les arguments de add_conversation
+                (role, content, timestamp, user_id, source, metadata)
+
+        Returns:
+            Nombre de messages insérés
+        """
+        rows = [
+            (
+                msg["role"],
+                msg["content"],
+                msg["timestamp"],
+                msg.get("user_id", "desktop_user"),
+                msg.get("source", "desktop"),
+                json.dumps(msg["metadata"]) if msg.get("metadata") else None,
+            )
+            for msg in messages
+        ]
+        if not rows:
+            return 0
+
+        with self.transaction():
+            self.conn.executemany(
+                """
+                INSERT INTO conversations (role, content, timestamp, user_id, source, metadata)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """,
+                rows,
+            )
+        return len(rows)
+
     def get_conversations(
         self,
         user_id: Optional[str] = None,
@@ -290,21 +589,28 @@ class WorklyDatabase:
         offset: int = 0,
         start_timestamp: Optional[str] = None,
         end_timestamp: Optional[str] = None,
+        source: Optional[str] = None,
     ) -> List[Dict]:
         """
         Récupère les conversations avec filtres.
 
+        Filtres user_id/source + tri (timestamp, id) servis par l'index
+        idx_conversations_user_source_ts (migration v1) : pas de tri temporaire.
+        OFFSET relit toutes les lignes sautées : pour parcourir un long
+        historique, get_conversations_page ; pour le prompt, get_recent_turns.
+
         Args:
             user_id: Filtrer par utilisateur
             limit: Nombre max de résultats
-            offset: Décalage pour pagination
+            offset: Décalage (ancienne pagination, cf. get_conversations_page)
             start_timestamp: Date de début
             end_timestamp: Date de fin
+            source: Filtrer par source ('desktop', 'discord', ...)
 
         Returns:
             Liste de conversations (dict)
         """
-        cursor = self.conn.cursor()
+        cursor = self._reader().cursor()
 
         query = "SELECT * FROM conversations WHERE 1=1"
         params = []
@@ -313,6 +619,10 @@ class WorklyDatabase:
             query += " AND user_id = ?"
             params.append(user_id)
 
+        if source:
+            query += " AND source = ?"
+            params.append(source)
+
         if start_timestamp:
             query += " AND timestamp >= ?"
             params.append(start_timestamp)
@@ -321,7 +631,7 @@ class WorklyDatabase:
             query += " AND timestamp <= ?"
             params.append(end_timestamp)
 
-        query += " ORDER BY timestamp DESC"
+        query += " ORDER BY timestamp DESC, id DESC"
 
         if limit:
             query += " LIMIT ? OFFSET ?"
@@ -332,9 +642,82 @@ class WorklyDatabase:
 
         return [dict(row) for row in rows]
 
+    def get_conversations_page(
+        self,
+        user_id: Optional[str] = None,
+        source: Optional[str] = None,
+        limit: int = 50,
+        before: Optional[Tuple[str, int]] = None,
+    ) -> Tuple[List[Dict], Optional[Tuple[str, int]]]:
+        """
+        Pagination par curseur (keyset) : du plus récent au plus ancien.
+
+        Chaque page reprend après (timestamp, id) de la dernière ligne
+        de la page précédente : coût O(log N + limit) quel que soit
+        la profondeur, via idx_conversations_user_source_ts.
+
+        Args:
+            user_id: Filtrer par utilisateur
+            source: Filtrer par source
+            limit: Taille de la page
+            before: Curseur retourné par l'appel précédent (None = début)
+
+        Returns:
+            (conversations, curseur de la page suivante ou None si fin)
+        """
+        query = "SELECT * FROM conversations WHERE 1=1"
+        params: List[Any] = []
+
+        if user_id:
+            query += " AND user_id = ?"
+            params.append(user_id)
+
+        if source:
+            query += " AND source = ?"
+            params.append(source)
+
+        if before is not None:
+            query += " AND (timestamp, id) < (?, ?)"
+            params.extend(before)
+
+        query += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+        params.append(limit)
+
+        rows = [dict(row) for row in self._reader().execute(query, params)]
+        next_cursor = (
+            (rows[-1]["timestamp"], rows[-1]["id"]) if len(rows) == limit else None
+        )
+        return rows, next_cursor
+
+    def get_recent_turns(self, user_id: str, source: str, n: int = 10) -> List[Dict]:
+        """
+        Derniers messages d'un utilisateur sur une source (historique de prompt).
+
+        Lecture directe de l'index (user_id, source, timestamp, id) :
+        n lignes lues, pas de tri.
+
+        Args:
+            user_id: ID utilisateur
+            source: Source ('desktop', 'discord', ...)
+            n: Nombre de messages
+
+        Returns:
+            Messages {role, content, timestamp} en ordre chronologique
+        """
+        rows = self._reader().execute(
+            """
+            SELECT role, content, timestamp FROM conversations
+            WHERE user_id = ? AND source = ?
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+        """,
+            (user_id, source, n),
+        ).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
     def get_conversation_count(self, user_id: Optional[str] = None) -> int:
         """Compte le nombre de conversations."""
-        cursor = self.conn.cursor()
+        cursor = self._reader().cursor()
         if user_id:
             cursor.execute(
                 "SELECT COUNT(*) FROM conversations WHERE user_id = ?", (user_id,)
@@ -343,11 +726,26 @@ class WorklyDatabase:
             cursor.execute("SELECT COUNT(*) FROM conversations")
         return cursor.fetchone()[0]
 
+    def delete_user_conversations(self, user_id: str, source: Optional[str] = None) -> int:
+        """Supprime les messages d'un utilisateur (toutes sources ou une seule)."""
+        query = "DELETE FROM conversations WHERE user_id = ?"
+        params: List[Any] = [user_id]
+        if source:
+            query += " AND source = ?"
+            params.append(source)
+        with self.transaction():
+            cursor = self.conn.cursor()
+            cursor.execute(query, params)
+        self._sync_embedding_store()
+        return cursor.rowcount
+
     def delete_conversations_before(self, timestamp: str) -> int:
         """Supprime conversations avant une date."""
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM conversations WHERE timestamp < ?", (timestamp,))
-        self.conn.commit()
+        with self.transaction():
+            cursor = self.conn.cursor()
+            cursor.execute("DELETE FROM conversations WHERE timestamp < ?", (timestamp,))
+        # ON DELETE CASCADE peut avoir supprimé des embeddings
+        self._sync_embedding_store()
         return cursor.rowcount
 
     # ========================================================================
@@ -360,6 +758,7 @@ class WorklyDatabase:
         embedding: np.ndarray,
         text: str,
         timestamp: str,
+        segment_id: Optional[str] = None,
     ) -> int:
         """
         Ajoute un embedding (vecteur sémantique).
@@ -369,25 +768,49 @@ class WorklyDatabase:
             embedding: Vecteur numpy
             text: Texte source
             timestamp: ISO format timestamp
+            segment_id: ID du segment résumé (optionnel)
 
         Returns:
             ID de l'embedding inséré
         """
-        cursor = self.conn.cursor()
+        with self.transaction():
+            cursor = self.conn.cursor()
 
-        # Sérialiser numpy array en bytes
-        embedding_bytes = embedding.tobytes()
+            # Sérialiser numpy array en bytes
+            embedding_bytes = embedding.tobytes()
+
+            cursor.execute(
+                """
+                INSERT INTO embeddings (conversation_id, embedding, text, timestamp, segment_id)
+                VALUES (?, ?, ?, ?, ?)
+            """,
+                (conversation_id, embedding_bytes, text, timestamp, segment_id),
+            )
+
+            # Copie dans le sidecar après COMMIT (rien en cas de ROLLBACK)
+            if self.embedding_store is not None:
+                self._pending_store.append(
+                    (cursor.lastrowid, np.asarray(embedding, dtype=np.float32))
+                )
 
-        cursor.execute(
-            """
-            INSERT INTO embeddings (conversation_id, embedding, text, timestamp)
-            VALUES (?, ?, ?, ?)
-        """,
-            (conversation_id, embedding_bytes, text, timestamp),
-        )
-        self.conn.commit()
         return cursor.lastrowid
 
+    def add_embeddings_batch(
+        self, rows: List[Tuple[Optional[int], np.ndarray, str, str]]
+    ) -> List[int]:
+        """
+        Ajoute plusieurs embeddings en une seule transaction.
+
+        Args:
+            rows: Liste de (conversation_id, embedding, text, timestamp[, segment_id])
+
+        Returns:
+            IDs des embeddings insérés (même ordre que rows)
+        """
+        # Pas d'executemany : les IDs sont nécessaires pour le sidecar
+        with self.transaction():
+            return [self.add_embedding(*row) for row in rows]
+
     def get_embeddings(self, limit: Optional[int] = None) -> List[Dict]:
         """
         Récupère tous les embeddings.
@@ -398,7 +821,7 @@ class WorklyDatabase:
         Returns:
             Liste d'embeddings avec numpy arrays désérialisés
         """
-        cursor = self.conn.cursor()
+        cursor = self._reader().cursor()
 
         query = "SELECT * FROM embeddings ORDER BY timestamp DESC"
         if limit:
@@ -421,18 +844,184 @@ class WorklyDatabase:
         """
         Récupère tous les embeddings comme matrice numpy.
 
+        Les BLOBs sont copiés directement dans une matrice float32
+        pré-allouée (pas de dict par ligne ni de np.vstack).
+
         Returns:
-            (embeddings_matrix, ids_list)
+            (embeddings_matrix, ids_list) dans l'ordre timestamp DESC
         """
-        embeddings_data = self.get_embeddings()
+        conn = self._reader()
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*), MAX(length(embedding)) FROM embeddings")
+        count, blob_size = cursor.fetchone()
 
-        if not embeddings_data:
+        if not count:
             return np.array([]), []
 
-        embeddings_matrix = np.vstack([e["embedding"] for e in embeddings_data])
-        ids = [e["id"] for e in embeddings_data]
+        dim = blob_size // np.dtype(np.float32).itemsize
+        matrix = np.empty((count, dim), dtype=np.float32)
+        ids = []
+
+        # Curseur brut (tuples) : évite la construction de sqlite3.Row
+        raw_cursor = conn.execute(
+            "SELECT id, embedding FROM embeddings ORDER BY timestamp DESC"
+        )
+        raw_cursor.row_factory = None
+        for row_id, blob in raw_cursor:
+            if len(ids) == count:
+                break  # Lignes insérées après le COUNT
+            if len(blob) != blob_size:
+                logger.warning(f"⚠️ Embedding {row_id} ignoré (taille inattendue)")
+                continue
+            matrix[len(ids)] = np.frombuffer(blob, dtype=np.float32)
+            ids.append(row_id)
+
+        return matrix[: len(ids)], ids
+
+    def get_embeddings_view(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vue zéro copie des embeddings (np.memmap), dans l'ordre des IDs.
+
+        Utilise le sidecar si activé, sinon retombe sur une matrice chargée
+        depuis SQLite (get_all_embeddings_matrix, remise dans l'ordre des IDs).
+
+        Returns:
+            (embeddings_matrix, ids_array)
+        """
+        if self.embedding_store is not None:
+            return self.embedding_store.view()
+
+        matrix, ids = self.get_all_embeddings_matrix()
+        if not ids:
+            return matrix, np.array(ids, dtype=np.int64)
+        order = np.argsort(ids)
+        return matrix[order], np.asarray(ids, dtype=np.int64)[order]
+
+    def rebuild_embedding_store(self) -> int:
+        """
+        Reconstruit le sidecar des embeddings depuis SQLite.
+
+        Returns:
+            Nombre d'embeddings écrits
+        """
+        with self._write_lock:
+            if self.embedding_store is None:
+                self.embedding_store = EmbeddingStore(self.db_path)
+            return self.embedding_store.rebuild(self.conn)
+
+    def _sync_embedding_store(self):
+        """Aligne le sidecar sur la table embeddings (si activé)."""
+        if self.embedding_store is None:
+            return
+        try:
+            with self._write_lock:
+                added = self.embedding_store.sync(self.conn)
+            if added:
+                logger.info(f"🔧 Sidecar embeddings : {added} vecteurs rattrapés")
+        except (OSError, ValueError) as e:
+            # Sidecar peut-être périmé : lectures depuis SQLite jusqu'au redémarrage
+            logger.error(f"❌ Synchronisation sidecar embeddings échouée, sidecar désactivé : {e}")
+            self.embedding_store = None
+
+    def get_embedding_texts(self) -> Dict[int, str]:
+        """Récupère les aperçus texte des embeddings (id → text), sans les BLOBs."""
+        cursor = self._reader().execute("SELECT id, text FROM embeddings")
+        cursor.row_factory = None
+        return dict(cursor.fetchall())
+
+    def get_embedding_payloads(self) -> Dict[int, Tuple[str, Optional[str]]]:
+        """Récupère aperçu et segment des embeddings (id → (text, segment_id))."""
+        cursor = self._reader().execute("SELECT id, text, segment_id FROM embeddings")
+        cursor.row_factory = None
+        return {row_id: (text, segment_id) for row_id, text, segment_id in cursor}
+
+    def get_cached_embeddings(self, text_hashes: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Récupère des embeddings du cache persistant.
+
+        Args:
+            text_hashes: Clés (hash texte normalisé + modèle)
+
+        Returns:
+            Dict clé → vecteur numpy (clés absentes omises)
+        """
+        results = {}
+        text_hashes = list(text_hashes)
+
+        # Par lots (limite SQLite sur le nombre de paramètres)
+        for start in range(0, len(text_hashes), 500):
+            chunk = text_hashes[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = self._reader().execute(
+                f"SELECT text_hash, embedding FROM embedding_cache "
+                f"WHERE text_hash IN ({placeholders})",
+                chunk,
+            )
+            cursor.row_factory = None
+            for text_hash, blob in cursor.fetchall():
+                results[text_hash] = np.frombuffer(blob, dtype=np.float32)
+
+        return results
+
+    def add_cached_embeddings(self, entries: List[Tuple[str, str, np.ndarray]]) -> int:
+        """
+        Ajoute des embeddings au cache persistant (une seule transaction).
+
+        Args:
+            entries: Liste de (text_hash, model, embedding)
+
+        Returns:
+            Nombre d'entrées écrites
+        """
+        if not entries:
+            return 0
+
+        with self.transaction():
+            self.conn.executemany(
+                """
+                INSERT OR REPLACE INTO embedding_cache (text_hash, model, embedding)
+                VALUES (?, ?, ?)
+            """,
+                [
+                    (text_hash, model, np.asarray(embedding, dtype=np.float32).tobytes())
+                    for text_hash, model, embedding in entries
+                ],
+            )
+        return len(entries)
 
-        return embeddings_matrix, ids
+    def count_cached_embeddings(self) -> int:
+        """Nombre de lignes du cache d'embeddings."""
+        return self._reader().execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+
+    def prune_embedding_cache(self, max_entries: int) -> int:
+        """
+        Supprime les entrées les plus anciennes du cache d'embeddings.
+
+        Args:
+            max_entries: Lignes conservées (les plus récemment écrites)
+
+        Returns:
+            Nombre de lignes restantes
+        """
+        with self.transaction():
+            # rowid croissant = ordre d'écriture (INSERT OR REPLACE réattribue le rowid)
+            self.conn.execute(
+                "DELETE FROM embedding_cache WHERE rowid IN ("
+                "SELECT rowid FROM embedding_cache ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+                (max(0, int(max_entries)),),
+            )
+            remaining = self.conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+        return remaining
+
+    def clear_embedding_cache(self, model: Optional[str] = None) -> int:
+        """Vide le cache d'embeddings (tout, ou un seul modèle)."""
+        with self.transaction():
+            cursor = self.conn.cursor()
+            if model:
+                cursor.execute("DELETE FROM embedding_cache WHERE model = ?", (model,))
+            else:
+                cursor.execute("DELETE FROM embedding_cache")
+        return cursor.rowcount
 
     # ========================================================================
     # FACTS
@@ -446,6 +1035,7 @@ class WorklyDatabase:
         confidence: float = 1.0,
         timestamp: str = None,
         source_message_id: Optional[int] = None,
+        user_id: str = "desktop_user",
     ) -> int:
         """
         Ajoute un fait extrait.
@@ -457,6 +1047,7 @@ class WorklyDatabase:
             confidence: Score de confiance
             timestamp: ISO format timestamp
             source_message_id: ID du message source
+            user_id: Utilisateur concerné
 
         Returns:
             ID du fait inséré
@@ -464,29 +1055,125 @@ class WorklyDatabase:
         if timestamp is None:
             timestamp = datetime.now().isoformat()
 
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO facts (category, type, data, confidence, timestamp, source_message_id)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """,
-            (
-                category,
-                type_,
-                json.dumps(data),
-                confidence,
-                timestamp,
-                source_message_id,
-            ),
-        )
-        self.conn.commit()
+        with self.transaction():
+            cursor = self.conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO facts (category, type, data, search_text, confidence,
+                                   timestamp, source_message_id, user_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                (
+                    category,
+                    type_,
+                    json.dumps(data, ensure_ascii=False),
+                    fact_search_text(data),
+                    confidence,
+                    timestamp,
+                    source_message_id,
+                    user_id,
+                ),
+            )
         return cursor.lastrowid
 
+    def add_facts_batch(self, facts: List[Dict[str, Any]]) -> int:
+        """
+        Ajoute plusieurs faits en une seule transaction (executemany).
+
+        Args:
+            facts: Dicts avec les arguments de add_fact
+                (category, type_, data, confidence, timestamp, source_message_id, user_id)
+
+        Returns:
+            Nombre de faits insérés
+        """
+        default_timestamp = datetime.now().isoformat()
+        rows = [
+            (
+                fact["category"],
+                fact["type_"],
+                json.dumps(fact["data"], ensure_ascii=False),
+                fact_search_text(fact["data"]),
+                fact.get("confidence", 1.0),
+                fact.get("timestamp") or default_timestamp,
+                fact.get("source_message_id"),
+                fact.get("user_id", "desktop_user"),
+            )
+            for fact in facts
+        ]
+        if not rows:
+            return 0
+
+        with self.transaction():
+            self.conn.executemany(
+                """
+                INSERT INTO facts (category, type, data, search_text, confidence,
+                                   timestamp, source_message_id, user_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                rows,
+            )
+        return len(rows)
+
+    def upsert_facts_batch(
+        self, facts: List[Dict[str, Any]], delete_ids: Iterable[int] = ()
+    ) -> List[int]:
+        """
+        Insère ou met à jour plusieurs faits en une seule transaction.
+
+        Un fait avec une clé "id" remplace data/confidence/timestamp de la
+        ligne existante (ex: entité revue, occurrences incrémentées) ; sans
+        "id", il est inséré.
+
+        Args:
+            facts: Dicts avec les arguments de add_fact, plus "id" optionnel
+            delete_ids: Lignes à supprimer dans la même transaction
+                (ex: doublons fusionnés)
+
+        Returns:
+            ID de la ligne de chaque fait, dans l'ordre de facts
+        """
+        default_timestamp = datetime.now().isoformat()
+        ids = []
+        with self.transaction():
+            cursor = self.conn.cursor()
+            delete_ids = [(row_id,) for row_id in delete_ids]
+            if delete_ids:
+                cursor.executemany("DELETE FROM facts WHERE id = ?", delete_ids)
+            for fact in facts:
+                values = (
+                    json.dumps(fact["data"], ensure_ascii=False),
+                    fact_search_text(fact["data"]),
+                    fact.get("confidence", 1.0),
+                    fact.get("timestamp") or default_timestamp,
+                )
+                if fact.get("id") is not None:
+                    cursor.execute(
+                        "UPDATE facts SET data = ?, search_text = ?, confidence = ?, timestamp = ? "
+                        "WHERE id = ?",
+                        values + (fact["id"],),
+                    )
+                    ids.append(fact["id"])
+                    continue
+                cursor.execute(
+                    """
+                    INSERT INTO facts (category, type, data, search_text, confidence,
+                                       timestamp, source_message_id, user_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                    (fact["category"], fact["type_"])
+                    + values
+                    + (fact.get("source_message_id"), fact.get("user_id", "desktop_user")),
+                )
+                ids.append(cursor.lastrowid)
+        return ids
+
     def get_facts(
         self,
         category: Optional[str] = None,
         type_: Optional[str] = None,
         min_confidence: float = 0.0,
+        user_id: Optional[str] = None,
     ) -> List[Dict]:
         """
         Récupère les faits avec filtres.
@@ -495,11 +1182,12 @@ class WorklyDatabase:
             category: Filtrer par catégorie
             type_: Filtrer par type
             min_confidence: Confiance minimum
+            user_id: Filtrer par utilisateur
 
         Returns:
             Liste de faits
         """
-        cursor = self.conn.cursor()
+        cursor = self._reader().cursor()
 
         query = "SELECT * FROM facts WHERE confidence >= ?"
         params = [min_confidence]
@@ -512,6 +1200,10 @@ class WorklyDatabase:
             query += " AND type = ?"
             params.append(type_)
 
+        if user_id:
+            query += " AND user_id = ?"
+            params.append(user_id)
+
         query += " ORDER BY timestamp DESC"
 
         cursor.execute(query, params)
@@ -540,27 +1232,27 @@ class WorklyDatabase:
         metadata: Optional[Dict] = None,
     ) -> int:
         """Ajoute un segment (résumé de conversation)."""
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO segments (summary, message_count, start_timestamp, end_timestamp, topics, metadata)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """,
-            (
-                summary,
-                message_count,
-                start_timestamp,
-                end_timestamp,
-                json.dumps(topics) if topics else None,
-                json.dumps(metadata) if metadata else None,
-            ),
-        )
-        self.conn.commit()
+        with self.transaction():
+            cursor = self.conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO segments (summary, message_count, start_timestamp, end_timestamp, topics, metadata)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """,
+                (
+                    summary,
+                    message_count,
+                    start_timestamp,
+                    end_timestamp,
+                    json.dumps(topics) if topics else None,
+                    json.dumps(metadata) if metadata else None,
+                ),
+            )
         return cursor.lastrowid
 
     def get_segments(self, limit: Optional[int] = None) -> List[Dict]:
         """Récupère les segments."""
-        cursor = self.conn.cursor()
+        cursor = self._reader().cursor()
 
         query = "SELECT * FROM segments ORDER BY start_timestamp DESC"
         if limit:
@@ -596,27 +1288,64 @@ class WorklyDatabase:
         user_id: str = "desktop_user",
     ) -> int:
         """Ajoute une émotion à l'historique."""
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO emotion_history (emotion, intensity, confidence, source,
-                                        message_preview, context, timestamp, user_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-            (
-                emotion,
-                intensity,
-                confidence,
-                source,
-                message_preview,
-                context,
-                timestamp,
-                user_id,
-            ),
-        )
-        self.conn.commit()
+        with self.transaction():
+            cursor = self.conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO emotion_history (emotion, intensity, confidence, source,
+                                            message_preview, context, timestamp, user_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                (
+                    emotion,
+                    intensity,
+                    confidence,
+                    source,
+                    message_preview,
+                    context,
+                    timestamp,
+                    user_id,
+                ),
+            )
         return cursor.lastrowid
 
+    def add_emotions_batch(self, emotions: List[Dict[str, Any]]) -> int:
+        """
+        Ajoute plusieurs émotions en une seule transaction (executemany).
+
+        Args:
+            emotions: Dicts avec les arguments de add_emotion
+
+        Returns:
+            Nombre d'émotions insérées
+        """
+        rows = [
+            (
+                emo["emotion"],
+                emo["intensity"],
+                emo["confidence"],
+                emo["source"],
+                emo["message_preview"],
+                emo["context"],
+                emo["timestamp"],
+                emo.get("user_id", "desktop_user"),
+            )
+            for emo in emotions
+        ]
+        if not rows:
+            return 0
+
+        with self.transaction():
+            self.conn.executemany(
+                """
+                INSERT INTO emotion_history (emotion, intensity, confidence, source,
+                                            message_preview, context, timestamp, user_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                rows,
+            )
+        return len(rows)
+
     def get_emotions(
         self,
         user_id: Optional[str] = None,
@@ -624,7 +1353,7 @@ class WorklyDatabase:
         limit: int = 100,
     ) -> List[Dict]:
         """Récupère l'historique émotionnel."""
-        cursor = self.conn.cursor()
+        cursor = self._reader().cursor()
 
         query = "SELECT * FROM emotion_history WHERE 1=1"
         params = []
@@ -647,7 +1376,7 @@ class WorklyDatabase:
 
     def get_emotion_count(self, user_id: Optional[str] = None) -> int:
         """Compte le nombre d'émotions."""
-        cursor = self.conn.cursor()
+        cursor = self._reader().cursor()
         if user_id:
             cursor.execute(
                 "SELECT COUNT(*) FROM emotion_history WHERE user_id = ?", (user_id,)
@@ -677,40 +1406,39 @@ class WorklyDatabase:
             last_updated: Timestamp personnalisé (optionnel, sinon utilise maintenant)
         """
         timestamp = last_updated or datetime.now().isoformat()
-        cursor = self.conn.cursor()
-
-        # Vérifier si existe
-        cursor.execute(
-            "SELECT score FROM personality_traits WHERE trait_name = ?", (trait_name,)
-        )
-        row = cursor.fetchone()
+        with self.transaction():
+            cursor = self.conn.cursor()
 
-        if row:
-            # Update (sans créer d'évolution ici, ça sera fait par add_personality_evolution)
+            # Vérifier si existe
             cursor.execute(
-                """
-                UPDATE personality_traits
-                SET score = ?, description = ?, last_updated = ?
-                WHERE trait_name = ?
-            """,
-                (score, description, timestamp, trait_name),
+                "SELECT score FROM personality_traits WHERE trait_name = ?", (trait_name,)
             )
-        else:
-            # Insert
-            cursor.execute(
-                """
-                INSERT INTO personality_traits (trait_name, score, description, last_updated)
-                VALUES (?, ?, ?, ?)
-            """,
-                (trait_name, score, description, timestamp),
-            )
-
-        self.conn.commit()
+            row = cursor.fetchone()
+
+            if row:
+                # Update (sans créer d'évolution ici, ça sera fait par add_personality_evolution)
+                cursor.execute(
+                    """
+                    UPDATE personality_traits
+                    SET score = ?, description = ?, last_updated = ?
+                    WHERE trait_name = ?
+                """,
+                    (score, description, timestamp, trait_name),
+                )
+            else:
+                # Insert
+                cursor.execute(
+                    """
+                    INSERT INTO personality_traits (trait_name, score, description, last_updated)
+                    VALUES (?, ?, ?, ?)
+                """,
+                    (trait_name, score, description, timestamp),
+                )
         return cursor.lastrowid
 
     def get_personality_traits(self) -> Dict[str, Dict]:
         """Récupère tous les traits de personnalité."""
-        cursor = self.conn.cursor()
+        cursor = self._reader().cursor()
         cursor.execute("SELECT * FROM personality_traits")
         rows = cursor.fetchall()
 
@@ -720,7 +1448,7 @@ class WorklyDatabase:
         self, trait_name: Optional[str] = None, limit: int = 100
     ) -> List[Dict]:
         """Récupère l'historique d'évolution de la personnalité."""
-        cursor = self.conn.cursor()
+        cursor = self._reader().cursor()
 
         if trait_name:
             cursor.execute(
@@ -760,42 +1488,180 @@ class WorklyDatabase:
         Returns:
             ID de l'entrée créée
         """
-        cursor = self.conn.cursor()
-        timestamp = datetime.utcnow().isoformat()
+        with self.transaction():
+            cursor = self.conn.cursor()
+            timestamp = datetime.utcnow().isoformat()
 
-        cursor.execute(
-            """
-            INSERT INTO personality_evolution
-            (trait_name, old_score, new_score, reason, timestamp, created_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """,
-            (trait_name, old_score, new_score, reason, timestamp, timestamp),
-        )
-        self.conn.commit()
+            cursor.execute(
+                """
+                INSERT INTO personality_evolution
+                (trait_name, old_score, new_score, reason, timestamp, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """,
+                (trait_name, old_score, new_score, reason, timestamp, timestamp),
+            )
 
         return cursor.lastrowid
 
+    def add_personality_evolutions_batch(
+        self, changes: List[Tuple[str, float, float, str]]
+    ) -> int:
+        """
+        Ajoute plusieurs évolutions de personnalité en une seule transaction.
+
+        Args:
+            changes: Liste de (trait_name, old_score, new_score, reason)
+
+        Returns:
+            Nombre d'entrées insérées
+        """
+        if not changes:
+            return 0
+
+        timestamp = datetime.utcnow().isoformat()
+        with self.transaction():
+            self.conn.executemany(
+                """
+                INSERT INTO personality_evolution
+                (trait_name, old_score, new_score, reason, timestamp, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """,
+                [
+                    (trait_name, old_score, new_score, reason, timestamp, timestamp)
+                    for trait_name, old_score, new_score, reason in changes
+                ],
+            )
+        return len(changes)
+
+    # ========================================================================
+    # RECHERCHE PLEIN TEXTE (FTS5)
+    # ========================================================================
+
+    @property
+    def fts_enabled(self) -> bool:
+        """True si les index FTS5 existent (migration v4 sur SQLite avec FTS5)."""
+        if self._fts_enabled is None:
+            row = self._reader().execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'conversations_fts'"
+            ).fetchone()
+            self._fts_enabled = row is not None
+        return self._fts_enabled
+
+    @staticmethod
+    def build_fts_query(text: str, max_terms: int = 16) -> str:
+        """
+        Convertit un texte libre en requête FTS5 sûre (termes entre guillemets, OR).
+
+        Args:
+            text: Texte utilisateur (ponctuation et opérateurs ignorés)
+            max_terms: Nombre max de termes
+
+        Returns:
+            Requête MATCH, ou "" si aucun terme significatif
+        """
+        terms = []
+        for token in _FTS_TOKEN_RE.findall(text.lower()):
+            if len(token) < 3 or token in _FTS_STOPWORDS or token in terms:
+                continue
+            terms.append(token)
+            if len(terms) >= max_terms:
+                break
+        return " OR ".join(f'"{term}"' for term in terms)
+
+    def search_text(
+        self,
+        query: str,
+        user_id: Optional[str] = None,
+        k: int = 10,
+        kinds: Tuple[str, ...] = ("conversation", "segment", "fact"),
+    ) -> List[Dict[str, Any]]:
+        """
+        Recherche lexicale classée par BM25 (une requête indexée par type).
+
+        Args:
+            query: Texte libre
+            user_id: Filtrer conversations et faits par utilisateur
+            k: Nombre max de résultats
+            kinds: Types à interroger ('conversation', 'segment', 'fact')
+
+        Returns:
+            Résultats triés par pertinence décroissante :
+            {kind, id, text, timestamp, score, segment_id?, category?}
+        """
+        match = self.build_fts_query(query)
+        if not match or not self.fts_enabled:
+            return []
+
+        user_filter = " AND t.user_id = ?" if user_id else ""
+        statements = {
+            "conversation": (
+                "SELECT t.id, t.content AS text, t.timestamp, "
+                "bm25(conversations_fts) AS rank "
+                "FROM conversations_fts JOIN conversations t ON t.id = conversations_fts.rowid "
+                f"WHERE conversations_fts MATCH ?{user_filter} ORDER BY rank LIMIT ?",
+                bool(user_id),
+            ),
+            "segment": (
+                "SELECT t.id, t.summary AS text, t.start_timestamp AS timestamp, "
+                "json_extract(t.metadata, '$.segment_id') AS segment_id, "
+                "bm25(segments_fts) AS rank "
+                "FROM segments_fts JOIN segments t ON t.id = segments_fts.rowid "
+                "WHERE segments_fts MATCH ? ORDER BY rank LIMIT ?",
+                False,
+            ),
+            "fact": (
+                "SELECT t.id, t.data AS text, t.timestamp, t.category, "
+                "bm25(facts_fts) AS rank "
+                "FROM facts_fts JOIN facts t ON t.id = facts_fts.rowid "
+                f"WHERE facts_fts MATCH ?{user_filter} ORDER BY rank LIMIT ?",
+                bool(user_id),
+            ),
+        }
+
+        reader = self._reader()
+        results = []
+        for kind in kinds:
+            sql, filter_user = statements[kind]
+            params = [match] + ([user_id] if filter_user else []) + [k]
+            for row in reader.execute(sql, params):
+                hit = dict(row)
+                hit["kind"] = kind
+                hit["score"] = -hit.pop("rank")  # bm25() : plus petit = meilleur
+                results.append(hit)
+
+        results.sort(key=lambda hit: hit["score"], reverse=True)
+        return results[:k]
+
     # ========================================================================
     # UTILITY
     # ========================================================================
 
     def execute_raw(self, query: str, params: Tuple = ()) -> List[Dict]:
-        """Exécute une requête SQL brute."""
-        cursor = self.conn.cursor()
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+        """Exécute une requête SQL brute (connexion d'écriture, sérialisée)."""
+        with self._write_lock:
+            cursor = self.conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
         return [dict(row) for row in rows]
 
     def vacuum(self):
         """Optimise la base de données (compression, réindexation)."""
-        self.conn.execute("VACUUM")
+        with self._write_lock:
+            self.conn.execute("VACUUM")
         logger.info("✅ Base de données optimisée (VACUUM)")
 
     def close(self):
-        """Ferme la connexion à la base de données."""
-        self.conn.close()
+        """Ferme toutes les connexions (lecteurs + écrivain)."""
+        # Backfill en cours : arrêté au prochain lot, repris au prochain démarrage
+        self._stop_migrations.set()
+        self.wait_for_migrations()
+        self.pool.close_all()
         logger.info("✅ Connexion base de données fermée")
 
+    def checkpoint(self, mode: str = "PASSIVE") -> Tuple[int, int, int]:
+        """Reporte le WAL dans la base (cf. ConnectionPool.checkpoint)."""
+        return self.pool.checkpoint(mode)
+
     def __repr__(self):
         return f"<WorklyDatabase: {self.db_path}>"
 
@@ -807,7 +1673,9 @@ class WorklyDatabase:
 _db_instances: Dict[str, WorklyDatabase] = {}
 
 
-def get_database(db_path: str = "data/memory/workly.db") -> WorklyDatabase:
+def get_database(
+    db_path: str = "data/memory/workly.db", use_embedding_store: bool = False
+) -> WorklyDatabase:
     """
     Récupère l'instance de base de données pour un chemin donné.
 
@@ -816,6 +1684,7 @@ def get_database(db_path: str = "data/memory/workly.db") -> WorklyDatabase:
 
     Args:
         db_path: Chemin vers le fichier SQLite
+        use_embedding_store: Active le sidecar mmap (création ou instance existante)
 
     Returns:
         Instance WorklyDatabase
@@ -826,6 +1695,8 @@ def get_database(db_path: str = "data/memory/workly.db") -> WorklyDatabase:
     db_path_abs = os.path.abspath(db_path)
 
     if db_path_abs not in _db_instances:
-        _db_instances[db_path_abs] = WorklyDatabase(db_path)
+        _db_instances[db_path_abs] = WorklyDatabase(db_path, use_embedding_store)
+    elif use_embedding_store and _db_instances[db_path_abs].embedding_store is None:
+        _db_instances[db_path_abs].rebuild_embedding_store()
 
     return _db_instances[db_path_abs]
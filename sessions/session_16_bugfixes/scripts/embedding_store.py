@@ -0,0 +1,324 @@
+"""
+embedding_store.py - Sidecar mmap des embeddings pour workly.db
+
+Copie append-only de la table `embeddings` dans des fichiers binaires :
+- workly.db.emb.f32  : vecteurs float32 bruts (N × dim), ordre d'insertion (id)
+- workly.db.emb.ids  : IDs SQLite int64 correspondants
+- workly.db.emb.json : en-tête {dim, count} = longueur validée
+
+Les lecteurs obtiennent une vue np.memmap (zéro copie) au lieu de
+SELECT + np.frombuffer : la RAM résidente reste plate quand l'historique
+atteint des centaines de MB (le système de fichiers gère le cache de pages).
+
+Sécurité crash :
+- Les données sont écrites et fsync AVANT la mise à jour de l'en-tête
+- L'en-tête est remplacé atomiquement (fichier temporaire + os.replace)
+- À l'ouverture, tout octet au-delà de `count` (écriture interrompue) est tronqué
+- Si le sidecar est incohérent avec SQLite, il est reconstruit
+- Avant reconstruction, les détenteurs d'une vue la lâchent (on_release) :
+  Windows refuse de remplacer un fichier encore mappé
+
+Usage (reconstruction manuelle) :
+    python src/ai/embedding_store.py data/memory/workly.db --rebuild
+
+Author: Workly Team
+"""
+
+import json
+import os
+import logging
+import sqlite3
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_ID_DTYPE = np.dtype(np.int64)
+_VECTOR_DTYPE = np.dtype(np.float32)
+
+
+class EmbeddingStore:
+    """
+    Sidecar append-only des embeddings, lisible par np.memmap.
+
+    SQLite reste la source de vérité : le sidecar peut toujours être
+    supprimé puis reconstruit avec rebuild().
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Ouvre (ou crée) le sidecar associé à une base SQLite.
+
+        Args:
+            db_path: Chemin du fichier workly.db
+        """
+        base = f"{db_path}.emb"
+        self.vectors_path = f"{base}.f32"
+        self.ids_path = f"{base}.ids"
+        self.meta_path = f"{base}.json"
+
+        self.dim: Optional[int] = None
+        self.count = 0
+        self._view: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._release_callbacks: List[Callable[[], None]] = []
+
+        self._load_meta()
+        self._recover()
+
+    # ========================================================================
+    # EN-TÊTE ET RÉCUPÉRATION
+    # ========================================================================
+
+    def _load_meta(self):
+        """Lit l'en-tête validé (dim, count)."""
+        if not os.path.exists(self.meta_path):
+            return
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.dim = meta.get("dim")
+            self.count = int(meta.get("count", 0))
+        except (ValueError, OSError) as e:
+            logger.warning(f"⚠️ En-tête sidecar illisible, réinitialisation : {e}")
+            self.dim, self.count = None, 0
+
+    def _write_meta(self):
+        """Remplace l'en-tête de façon atomique."""
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "count": self.count}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.meta_path)
+
+    def _recover(self):
+        """Tronque les écritures non validées (crash entre données et en-tête)."""
+        expected = {self.ids_path: self.count * _ID_DTYPE.itemsize}
+        if self.dim:
+            expected[self.vectors_path] = self.count * self.dim * _VECTOR_DTYPE.itemsize
+
+        for path, size in expected.items():
+            actual = os.path.getsize(path) if os.path.exists(path) else 0
+            if actual < size:
+                # Fichier plus court que l'en-tête : sidecar inutilisable
+                logger.warning(f"⚠️ Sidecar tronqué ({path}), réinitialisation")
+                self.reset()
+                return
+            if actual > size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+                logger.info(f"🔧 Sidecar : {actual - size} octets non validés tronqués")
+
+    def on_release(self, callback: Callable[[], None]):
+        """
+        Enregistre un détenteur de vue (cf. view()) à prévenir avant reset().
+
+        Args:
+            callback: Doit lâcher toute référence aux tableaux memmap
+        """
+        self._release_callbacks.append(callback)
+
+    def _release_views(self):
+        """Fait lâcher les vues memmap (détenteurs enregistrés + la nôtre)."""
+        for callback in self._release_callbacks:
+            callback()
+        self._view = None
+
+    def reset(self, dim: Optional[int] = None):
+        """
+        Vide le sidecar (les fichiers sont recréés vides).
+
+        Raises:
+            OSError: Fichier impossible à remplacer (vue encore mappée
+                ailleurs sous Windows) ; le sidecar est laissé intact
+        """
+        self._release_views()
+        for path in (self.vectors_path, self.ids_path):
+            # Remplacement plutôt que troncature : une vue memmap oubliée
+            # garde l'ancien fichier (POSIX) au lieu de lire hors limites
+            try:
+                open(f"{path}.tmp", "wb").close()
+                os.replace(f"{path}.tmp", path)
+            except OSError as e:
+                logger.error(f"❌ Sidecar embeddings non réinitialisé ({path}) : {e}")
+                raise
+        self.dim = dim
+        self.count = 0
+        self._view = None
+        self._write_meta()
+
+    # ========================================================================
+    # ÉCRITURE
+    # ========================================================================
+
+    @property
+    def last_id(self) -> int:
+        """Dernier ID SQLite présent dans le sidecar (0 si vide)."""
+        if self.count == 0:
+            return 0
+        _, ids = self.view()
+        return int(ids[-1])
+
+    def append(self, ids: List[int], vectors: np.ndarray):
+        """
+        Ajoute des embeddings à la fin du sidecar.
+
+        Args:
+            ids: IDs SQLite (croissants)
+            vectors: Matrice (n, dim) ou vecteur (dim,)
+
+        Raises:
+            ValueError: Si la dimension ne correspond pas au sidecar
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=_VECTOR_DTYPE)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if len(ids) != vectors.shape[0]:
+            raise ValueError(f"{vectors.shape[0]} vecteurs mais {len(ids)} IDs")
+        if not len(ids):
+            return
+
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(
+                f"Dimension incompatible : {vectors.shape[1]} (sidecar: {self.dim})"
+            )
+
+        # 1. Données (fsync) → 2. En-tête : un crash entre les deux est tronqué
+        for path, data in (
+            (self.vectors_path, vectors.tobytes()),
+            (self.ids_path, np.asarray(ids, dtype=_ID_DTYPE).tobytes()),
+        ):
+            with open(path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+        self.count += len(ids)
+        self._view = None
+        self._write_meta()
+
+    # ========================================================================
+    # LECTURE
+    # ========================================================================
+
+    def view(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vue zéro copie sur les embeddings validés.
+
+        Returns:
+            (vecteurs np.memmap (count, dim) en lecture seule, ids (count,))
+        """
+        if self.count == 0 or not self.dim:
+            return np.empty((0, self.dim or 0), dtype=_VECTOR_DTYPE), np.empty(
+                0, dtype=_ID_DTYPE
+            )
+
+        if self._view is None:
+            vectors = np.memmap(
+                self.vectors_path,
+                dtype=_VECTOR_DTYPE,
+                mode="r",
+                shape=(self.count, self.dim),
+            )
+            ids = np.memmap(
+                self.ids_path, dtype=_ID_DTYPE, mode="r", shape=(self.count,)
+            )
+            self._view = (vectors, ids)
+
+        return self._view
+
+    # ========================================================================
+    # SYNCHRONISATION AVEC SQLITE
+    # ========================================================================
+
+    def rebuild(self, conn: sqlite3.Connection) -> int:
+        """
+        Reconstruit entièrement le sidecar depuis la table SQLite.
+
+        Args:
+            conn: Connexion SQLite ouverte sur workly.db
+
+        Returns:
+            Nombre d'embeddings écrits
+        """
+        self.reset()
+        written = self._append_from(conn, after_id=0)
+        logger.info(f"✅ Sidecar embeddings reconstruit : {written} vecteurs")
+        return written
+
+    def sync(self, conn: sqlite3.Connection) -> int:
+        """
+        Rattrape les lignes SQLite absentes du sidecar (crash après commit).
+
+        Reconstruit si des lignes ont été supprimées côté SQLite.
+
+        Returns:
+            Nombre d'embeddings ajoutés
+        """
+        last_id = self.last_id
+        known = conn.execute(
+            "SELECT COUNT(*) FROM embeddings WHERE id <= ?", (last_id,)
+        ).fetchone()[0]
+        if known != self.count:
+            return self.rebuild(conn)
+        return self._append_from(conn, after_id=last_id)
+
+    def _append_from(
+        self, conn: sqlite3.Connection, after_id: int, batch_size: int = 1024
+    ) -> int:
+        """Copie les embeddings d'ID > after_id, par lots, dans l'ordre des IDs."""
+        cursor = conn.execute(
+            "SELECT id, embedding FROM embeddings WHERE id > ? ORDER BY id",
+            (after_id,),
+        )
+        cursor.row_factory = None
+
+        written = 0
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            if self.dim is None:
+                self.dim = len(rows[0][1]) // _VECTOR_DTYPE.itemsize
+            row_bytes = self.dim * _VECTOR_DTYPE.itemsize
+            rows = [(row_id, blob) for row_id, blob in rows if len(blob) == row_bytes]
+            if not rows:
+                continue
+            vectors = np.frombuffer(b"".join(blob for _, blob in rows), _VECTOR_DTYPE)
+            self.append([row_id for row_id, _ in rows], vectors.reshape(-1, self.dim))
+            written += len(rows)
+        return written
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __repr__(self):
+        return f"<EmbeddingStore: {self.count} vecteurs, dim={self.dim}>"
+
+
+# Pour reconstruction manuelle
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+    parser = argparse.ArgumentParser(description="Sidecar mmap des embeddings Workly")
+    parser.add_argument("db_path", nargs="?", default="data/memory/workly.db")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="Reconstruire depuis SQLite"
+    )
+    args = parser.parse_args()
+
+    store = EmbeddingStore(args.db_path)
+    connection = sqlite3.connect(args.db_path)
+    try:
+        if args.rebuild:
+            store.rebuild(connection)
+        else:
+            added = store.sync(connection)
+            print(f"✅ Sidecar synchronisé (+{added}) : {store}")
+    finally:
+        connection.close()
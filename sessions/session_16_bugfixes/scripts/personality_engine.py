@@ -17,14 +17,16 @@ Migration Phase 6 : JSON → SQLite (performance + ACID)
 
 import json
 import os
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Union
 from datetime import datetime
 from dataclasses import dataclass, asdict
 
 try:
     from .database import get_database
+    from .analyzed_text import AnalyzedText, as_analyzed_text
 except ImportError:
     from database import get_database
+    from analyzed_text import AnalyzedText, as_analyzed_text
 
 
 @dataclass
@@ -180,14 +182,15 @@ class PersonalityEngine:
     def _save_personality(self) -> None:
         """Sauvegarde la personnalité dans SQLite"""
         try:
-            # Sauvegarder chaque trait dans SQLite
-            for trait_name, trait in self.personality.items():
-                self.db.set_personality_trait(
-                    trait_name=trait_name,
-                    score=trait.score,
-                    description=trait.description,
-                    last_updated=trait.last_updated,
-                )
+            # Sauvegarder chaque trait dans SQLite (une seule transaction)
+            with self.db.transaction():
+                for trait_name, trait in self.personality.items():
+                    self.db.set_personality_trait(
+                        trait_name=trait_name,
+                        score=trait.score,
+                        description=trait.description,
+                        last_updated=trait.last_updated,
+                    )
 
         except Exception as e:
             print(f"⚠️ Erreur sauvegarde personnalité dans SQLite : {e}")
@@ -256,21 +259,22 @@ class PersonalityEngine:
 
             # Sauvegarder dans SQLite
             try:
-                # Mettre à jour le trait
-                self.db.set_personality_trait(
-                    trait_name=trait_name,
-                    score=new_score,
-                    description=trait.description,
-                    last_updated=trait.last_updated,
-                )
-
-                # Enregistrer l'évolution dans personality_evolution
-                self.db.add_personality_evolution(
-                    trait_name=trait_name,
-                    old_score=old_score,
-                    new_score=new_score,
-                    reason=reason,
-                )
+                # Trait + évolution dans la même transaction
+                with self.db.transaction():
+                    self.db.set_personality_trait(
+                        trait_name=trait_name,
+                        score=new_score,
+                        description=trait.description,
+                        last_updated=trait.last_updated,
+                    )
+
+                    # Enregistrer l'évolution dans personality_evolution
+                    self.db.add_personality_evolution(
+                        trait_name=trait_name,
+                        old_score=old_score,
+                        new_score=new_score,
+                        reason=reason,
+                    )
             except Exception as e:
                 print(f"⚠️ Erreur sauvegarde évolution personnalité : {e}")
                 # Fallback sur sauvegarde complète
@@ -294,16 +298,18 @@ class PersonalityEngine:
         self.context_modifiers.clear()
 
     def analyze_user_feedback(
-        self, user_message: str, user_emotion: Optional[str] = None
+        self,
+        user_message: Union[str, AnalyzedText],
+        user_emotion: Optional[str] = None,
     ) -> None:
         """
         Analyse le feedback utilisateur et ajuste personnalité
 
         Args:
-            user_message: Message utilisateur
+            user_message: Message utilisateur (brut ou déjà prétraité)
             user_emotion: Émotion détectée (optionnel)
         """
-        message_lower = user_message.lower()
+        message_lower = as_analyzed_text(user_message).lower
 
         # Détection de feedback positif → augmenter traits utilisés
         positive_indicators = [
@@ -0,0 +1,253 @@
+"""
+prompt_budget.py - Budget de tokens pour l'assemblage des prompts
+
+ChatEngine._build_prompt ne vérifiait pas la taille totale du prompt
+contre n_ctx (2048 tokens en profils balanced / cpu_fallback) :
+un long historique débordait silencieusement ou forçait llama.cpp à
+tout ré-évaluer. Ce module fournit :
+- TokenCounter : comptage via le tokenizer du modèle, mémoïsé par texte (LRU)
+- PromptBudgeter : budgets fixes (système, mémoire, réponse), historique
+  dans le reste, en évinçant les tours les plus anciens d'abord (par paliers,
+  pour garder un début de prompt stable et réutiliser le KV-cache)
+
+Author: Workly Team
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+
+def approximate_tokens(text: str) -> int:
+    """Approximation sans tokenizer : 1 token ≈ 4 caractères"""
+    return len(text) // 4 + 1
+
+
+class TokenCounter:
+    """
+    Compteur de tokens mémoïsé (un message d'historique n'est tokenisé qu'une fois)
+
+    La fonction de tokenisation peut retourner None (modèle non chargé) :
+    l'approximation est alors utilisée, sans être mise en cache.
+    """
+
+    def __init__(
+        self,
+        tokenize_fn: Optional[Callable[[str], Optional[int]]] = None,
+        max_entries: int = 4096,
+    ):
+        """
+        Initialise le compteur
+
+        Args:
+            tokenize_fn: Texte → nombre de tokens (ex: ModelManager.count_tokens)
+            max_entries: Taille du cache LRU
+        """
+        self.tokenize_fn = tokenize_fn
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()  # Partagé entre threads Qt / Discord
+
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, text: str) -> int:
+        """Nombre de tokens de `text`"""
+        with self._lock:
+            count = self._cache.get(text)
+            if count is not None:
+                self._cache.move_to_end(text)
+                self.hits += 1
+                return count
+
+        count = self.tokenize_fn(text) if self.tokenize_fn else None
+        if count is None:
+            return approximate_tokens(text)
+
+        with self._lock:
+            self.misses += 1
+            self._cache[text] = count
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return count
+
+    def reset(self):
+        """Vide le cache (à appeler après changement de modèle)"""
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Taille du cache et hits/misses"""
+        return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+class PromptBudgeter:
+    """
+    Répartit la fenêtre de contexte entre les sections du prompt
+
+    n_ctx = réponse + marge + système + mémoire + historique + question.
+    Système et mémoire ont un plafond fixe ; l'historique reçoit le reste
+    (y compris ce que système et mémoire n'ont pas utilisé).
+    """
+
+    def __init__(
+        self,
+        count_tokens: Callable[[str], int],
+        n_ctx: int = 2048,
+        reply_tokens: int = 512,
+        system_share: float = 0.2,
+        memory_share: float = 0.25,
+        safety_margin: int = 32,
+        min_reply_tokens: int = 64,
+    ):
+        """
+        Initialise le budgeteur
+
+        Args:
+            count_tokens: Compteur de tokens (TokenCounter)
+            n_ctx: Fenêtre de contexte du modèle chargé
+            reply_tokens: Tokens réservés à la réponse (max_tokens)
+            system_share: Part max (entrée) pour system prompt + personnalité + contexte
+            memory_share: Part max (entrée) pour le contexte long-terme
+            safety_margin: Tokens de marge (séparateurs, BOS, arrondis)
+            min_reply_tokens: Plancher de reply_budget (llama.cpp traite
+                max_tokens <= 0 comme illimité)
+        """
+        self.count_tokens = count_tokens
+        self.n_ctx = n_ctx
+        self.reply_tokens = max(min(reply_tokens, n_ctx // 2), 1)
+        self.system_share = system_share
+        self.memory_share = memory_share
+        self.safety_margin = safety_margin
+        self.min_reply_tokens = max(min(min_reply_tokens, self.reply_tokens), 1)
+
+    @property
+    def input_budget(self) -> int:
+        """Tokens disponibles pour le prompt (fenêtre - réponse - marge)"""
+        return self.n_ctx - self.reply_tokens - self.safety_margin
+
+    def allocate(self) -> Dict[str, int]:
+        """
+        Plafonds par section
+
+        Returns:
+            {"input", "system", "memory", "reply"} en tokens
+        """
+        return {
+            "input": self.input_budget,
+            "system": int(self.input_budget * self.system_share),
+            "memory": int(self.input_budget * self.memory_share),
+            "reply": self.reply_tokens,
+        }
+
+    def fit_history(self, turns: List[str], budget_tokens: int) -> List[str]:
+        """
+        Garde les tours les plus récents qui tiennent dans le budget
+
+        Les tours sont évincés du plus ancien au plus récent ; l'historique
+        conservé reste contigu (pas de trou au milieu de la conversation).
+
+        Args:
+            turns: Tours rendus, ordre chronologique
+            budget_tokens: Budget de l'historique
+
+        Returns:
+            Tours conservés, ordre chronologique
+        """
+        kept = []
+        remaining = budget_tokens
+        for turn in reversed(turns):
+            cost = self.count_tokens(turn) + 1  # Séparateur "\n"
+            if cost > remaining:
+                break
+            kept.append(turn)
+            remaining -= cost
+        kept.reverse()
+        return kept
+
+    def fit_history_stable(
+        self,
+        turns: List[str],
+        budget_tokens: int,
+        anchor: Optional[str] = None,
+        max_turns: Optional[int] = None,
+        headroom: float = 0.75,
+    ) -> List[str]:
+        """
+        Comme fit_history, mais garde le même premier tour tant qu'il tient
+
+        Un historique qui glisse d'un tour à chaque message change le début
+        du prompt et invalide le KV-cache. L'historique grandit donc depuis
+        `anchor` ; quand il déborde (tokens ou max_turns), il est recoupé à
+        `headroom` du budget : l'éviction n'a lieu que tous les quelques tours.
+
+        Args:
+            turns: Tours rendus, ordre chronologique
+            budget_tokens: Budget de l'historique
+            anchor: Premier tour retenu au tour précédent
+            max_turns: Nombre max de tours (context_limit)
+            headroom: Fraction du budget conservée après un recoupage
+
+        Returns:
+            Tours conservés, ordre chronologique
+        """
+        if anchor is not None and anchor in turns:
+            kept = turns[len(turns) - 1 - turns[::-1].index(anchor):]
+            fits = sum(self.count_tokens(turn) + 1 for turn in kept) <= budget_tokens
+            if fits and (max_turns is None or len(kept) <= max_turns):
+                return kept
+
+        kept = self.fit_history(turns, budget_tokens)
+        if max_turns is not None:
+            kept = kept[-max_turns:]
+        if len(kept) < len(turns):
+            # Éviction : recouper avec de la marge pour les tours suivants
+            kept = self.fit_history(kept, int(budget_tokens * headroom))
+            if max_turns is not None:
+                kept = kept[-max(int(max_turns * headroom), 1):]
+        return kept
+
+    def reply_budget(self, prompt_tokens: int) -> int:
+        """
+        Tokens de réponse possibles pour un prompt donné
+
+        Args:
+            prompt_tokens: Taille du prompt assemblé
+
+        Returns:
+            reply_tokens, réduit si le prompt dépasse son budget, jamais
+            sous min_reply_tokens (toujours > 0)
+        """
+        available = self.n_ctx - prompt_tokens - self.safety_margin
+        return max(min(self.reply_tokens, available), self.min_reply_tokens)
+
+    def truncate(self, text: str, budget_tokens: int, marker: str = " […] ") -> str:
+        """
+        Raccourcit un texte trop long en gardant son début et sa fin
+
+        Un long collage suivi d'une question garde ainsi la question.
+        Recherche dichotomique sur le nombre de caractères conservés.
+
+        Args:
+            text: Texte à raccourcir (ex: message utilisateur)
+            budget_tokens: Taille max en tokens
+            marker: Inséré à la place du milieu retiré
+
+        Returns:
+            Le texte intact s'il tient, sinon début + marker + fin
+        """
+        if self.count_tokens(text) <= budget_tokens:
+            return text
+
+        def cut(keep: int) -> str:
+            head = keep - keep // 2
+            return text[:head] + marker + (text[-(keep // 2):] if keep // 2 else "")
+
+        low, high = 0, len(text) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count_tokens(cut(middle)) <= budget_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        return cut(low)
@@ -0,0 +1,293 @@
+"""
+response_cache.py - Cache des réponses pour les prompts répétés
+
+Les salons Discord en réponse automatique reçoivent beaucoup de messages
+courts identiques ("salut", "bonjour", "merci") : chacun coûtait une
+génération LLM complète. Ce cache (opt-in, cf. AIConfig.response_cache)
+renvoie une réponse déjà générée quand :
+- L'entrée normalisée est identique, ou son embedding suffisamment proche
+  (similarity_threshold, si un encodeur est disponible)
+- L'état de personnalité est dans le même palier (traits arrondis)
+- Le contexte récent (canal + derniers messages de l'utilisateur, sans les
+  réponses générées) a la même empreinte
+- L'entrée a moins de `ttl_seconds`
+
+Température élevée = variété attendue : au-delà de `max_temperature`,
+le cache est contourné (ni lecture ni écriture).
+
+Author: Workly Team
+"""
+
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_EDGE_PUNCTUATION_RE = re.compile(r"^[\W_]+|[\W_]+$")
+
+# Palier des traits de personnalité (0.0-1.0) : 0.25 → 5 paliers par trait
+_PERSONALITY_STEP = 0.25
+
+
+def normalize_input(text: str) -> str:
+    """
+    Normalise une entrée utilisateur pour la clé de cache
+
+    NFC + minuscules + espaces compactés + ponctuation/emojis de bord
+    retirés : "Salut !", "salut" et "  SALUT 👋" partagent la même entrée.
+    """
+    text = unicodedata.normalize("NFC", text)
+    text = _WHITESPACE_RE.sub(" ", text).strip().lower()
+    return _EDGE_PUNCTUATION_RE.sub("", text)
+
+
+def personality_bucket(traits: Dict[str, float]) -> str:
+    """
+    Palier de personnalité : traits arrondis à _PERSONALITY_STEP
+
+    Args:
+        traits: Nom du trait → score (0.0-1.0)
+
+    Returns:
+        Représentation stable (vide si pas de personnalité)
+    """
+    return ",".join(
+        f"{name}={round(score / _PERSONALITY_STEP)}"
+        for name, score in sorted(traits.items())
+    )
+
+
+def context_hash(messages: List[str]) -> str:
+    """Empreinte des messages récents (ordre significatif)"""
+    digest = hashlib.sha256()
+    for message in messages:
+        digest.update(normalize_input(message).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+@dataclass
+class CachedResponse:
+    """Réponse mémorisée"""
+
+    text: str  # Réponse générée
+    created_at: float  # time.monotonic() à la mise en cache
+    generation_s: float  # Durée de la génération d'origine (économisée à chaque hit)
+    embedding: Optional[np.ndarray] = None  # Embedding de l'entrée (recherche sémantique)
+
+
+class ResponseCache:
+    """
+    Réponses par (palier de personnalité, contexte récent, entrée normalisée)
+
+    Éviction : expiration (TTL) puis LRU au-delà de `max_entries`.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 600.0,
+        similarity_threshold: float = 0.95,
+        max_temperature: float = 1.0,
+        max_entries: int = 256,
+        max_input_chars: int = 200,
+        encode_fn: Optional[Callable[[List[str]], np.ndarray]] = None,
+    ):
+        """
+        Initialise le cache
+
+        Args:
+            ttl_seconds: Durée de vie d'une réponse
+            similarity_threshold: Similarité cosinus minimale (entrées non identiques)
+            max_temperature: Au-delà, cache contourné
+            max_entries: Nombre maximal de réponses (LRU)
+            max_input_chars: Entrées plus longues jamais mises en cache
+            encode_fn: Textes → embeddings (None = correspondance exacte uniquement)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.max_temperature = max_temperature
+        self.max_entries = max_entries
+        self.max_input_chars = max_input_chars
+        self.encode_fn = encode_fn
+
+        # (personnalité, contexte) → entrée normalisée → réponse
+        self._entries: "OrderedDict[Tuple[str, str, str], CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.saved_gpu_seconds = 0.0
+
+    def is_cacheable(self, user_input: str, temperature: float) -> bool:
+        """
+        Le cache s'applique-t-il à cette requête ?
+
+        Args:
+            user_input: Message de l'utilisateur
+            temperature: Température de génération
+
+        Returns:
+            False si température trop élevée ou entrée trop longue / vide
+        """
+        normalized = normalize_input(user_input)
+        return (
+            temperature <= self.max_temperature
+            and 0 < len(normalized) <= self.max_input_chars
+        )
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Embedding normalisé (norme 1) de l'entrée, None si indisponible"""
+        if self.encode_fn is None:
+            return None
+        try:
+            vector = np.asarray(self.encode_fn([text]), dtype=np.float32).reshape(-1)
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding cache réponses indisponible : {e}")
+            return None
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else None
+
+    def _expire(self, now: float):
+        """Supprime les réponses expirées (verrou détenu)"""
+        expired = [
+            key for key, entry in self._entries.items()
+            if now - entry.created_at > self.ttl_seconds
+        ]
+        for key in expired:
+            del self._entries[key]
+        self.expirations += len(expired)
+
+    def get(
+        self, user_input: str, personality: str, context: str, temperature: float
+    ) -> Optional[CachedResponse]:
+        """
+        Cherche une réponse pour cette entrée
+
+        Args:
+            user_input: Message de l'utilisateur
+            personality: Palier de personnalité (personality_bucket)
+            context: Empreinte du contexte récent (context_hash)
+            temperature: Température de génération
+
+        Returns:
+            Réponse mémorisée, ou None
+        """
+        if not self.is_cacheable(user_input, temperature):
+            with self._lock:
+                self.bypassed += 1
+            return None
+
+        normalized = normalize_input(user_input)
+        key = (personality, context, normalized)
+
+        with self._lock:
+            self._expire(time.monotonic())
+            entry = self._entries.get(key)
+            candidates = [] if entry else [
+                (k, e) for k, e in self._entries.items()
+                if k[:2] == key[:2] and e.embedding is not None
+            ]
+
+        if entry is None and candidates:
+            # Recherche sémantique dans la même partition (personnalité, contexte)
+            query = self._embed(normalized)
+            if query is not None:
+                matrix = np.vstack([e.embedding for _, e in candidates])
+                scores = matrix @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    key, entry = candidates[best]
+                    with self._lock:
+                        self.semantic_hits += 1
+
+        with self._lock:
+            if entry is None or key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_gpu_seconds += entry.generation_s
+
+        logger.debug(f"♻️ Réponse en cache pour '{normalized[:30]}'")
+        return entry
+
+    def put(
+        self,
+        user_input: str,
+        personality: str,
+        context: str,
+        temperature: float,
+        response: str,
+        generation_s: float,
+    ) -> bool:
+        """
+        Mémorise une réponse générée
+
+        Args:
+            user_input: Message de l'utilisateur
+            personality: Palier de personnalité
+            context: Empreinte du contexte récent (avant cet échange)
+            temperature: Température de génération
+            response: Réponse générée
+            generation_s: Durée de la génération
+
+        Returns:
+            True si la réponse a été mise en cache
+        """
+        if not response.strip() or not self.is_cacheable(user_input, temperature):
+            return False
+
+        normalized = normalize_input(user_input)
+        entry = CachedResponse(
+            text=response,
+            created_at=time.monotonic(),
+            generation_s=generation_s,
+            embedding=self._embed(normalized),
+        )
+
+        with self._lock:
+            key = (personality, context, normalized)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        """Vide le cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Taux de hit, secondes GPU économisées, évictions"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_gpu_seconds": round(self.saved_gpu_seconds, 2),
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+            }
+
+    def __repr__(self) -> str:
+        return f"<ResponseCache: {len(self._entries)} réponses, ttl={self.ttl_seconds:.0f}s>"
@@ -0,0 +1,624 @@
+"""
+schema_migrations.py - Migrations versionnées du schéma workly.db
+
+_create_schema ne fait que des CREATE ... IF NOT EXISTS : une colonne ou
+un index ajouté plus tard n'atteint jamais les bases existantes. Ce module
+applique des migrations numérotées, suivies par PRAGMA user_version :
+
+- DDL (colonnes, index) + version : une transaction par migration
+- Réécritures de données (backfill) : par lots, une transaction par lot ;
+  le verrou d'écriture est relâché entre les lots (le chat continue d'écrire)
+- Au démarrage (WorklyDatabase) : DDL tout de suite, backfills dans un
+  thread d'arrière-plan (run(defer_backfills=True) puis run()), arrêtable
+  entre deux lots
+- Idempotent : une migration interrompue reprend au démarrage suivant
+- Prérequis absent (ex: SQLite sans FTS5) : version non validée, migration
+  retentée au démarrage suivant
+- Progression : callback(version, description, lignes traitées, total)
+
+Usage (état / application manuelle) :
+    python src/ai/schema_migrations.py data/memory/workly.db --status
+    python src/ai/schema_migrations.py data/memory/workly.db
+
+Author: Workly Team
+"""
+
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, str, int, int], None]
+
+
+class MigrationInterrupted(Exception):
+    """Backfill arrêté entre deux lots (fermeture de la base) : repris au prochain run()"""
+
+
+class Migration:
+    """
+    Une migration de schéma.
+
+    Attributs :
+        version: Numéro (PRAGMA user_version après application)
+        description: Résumé lisible
+        columns: Colonnes à ajouter [(table, colonne, déclaration SQL)]
+        statements: Instructions SQL idempotentes (CREATE INDEX IF NOT EXISTS...)
+        backfill: Réécriture des données existantes, appelée avec le runner ;
+            retourne False si la migration ne peut pas s'appliquer
+    """
+
+    def __init__(
+        self,
+        version: int,
+        description: str,
+        columns: Sequence[Tuple[str, str, str]] = (),
+        statements: Sequence[str] = (),
+        backfill: Optional[Callable[["MigrationRunner"], None]] = None,
+    ):
+        self.version = version
+        self.description = description
+        self.columns = list(columns)
+        self.statements = list(statements)
+        self.backfill = backfill
+
+    def __repr__(self):
+        return f"<Migration v{self.version}: {self.description}>"
+
+
+class MigrationRunner:
+    """
+    Applique les migrations en attente sur une WorklyDatabase.
+    """
+
+    def __init__(
+        self,
+        db,
+        migrations: Optional[List[Migration]] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        batch_size: int = 2000,
+        stop_event: Optional[threading.Event] = None,
+    ):
+        """
+        Args:
+            db: Instance WorklyDatabase (transaction() + connexion d'écriture)
+            migrations: Liste ordonnée (défaut : MIGRATIONS)
+            progress_callback: Appelé après chaque lot de backfill
+            batch_size: Lignes par transaction lors des backfills
+            stop_event: Positionné → backfill arrêté au lot suivant (MigrationInterrupted)
+        """
+        self.db = db
+        self.migrations = sorted(
+            MIGRATIONS if migrations is None else migrations, key=lambda m: m.version
+        )
+        self.progress_callback = progress_callback
+        self.batch_size = batch_size
+        self.stop_event = stop_event
+        self._current: Optional[Migration] = None
+
+    @property
+    def reader(self):
+        """Connexion de lecture (données validées, hors verrou d'écriture)."""
+        return self.db.pool.reader()
+
+    @property
+    def current_version(self) -> int:
+        """Version actuelle du schéma (PRAGMA user_version)."""
+        return self.reader.execute("PRAGMA user_version").fetchone()[0]
+
+    def pending(self) -> List[Migration]:
+        """Migrations non encore appliquées."""
+        version = self.current_version
+        return [m for m in self.migrations if m.version > version]
+
+    def run(self, defer_backfills: bool = False) -> int:
+        """
+        Applique toutes les migrations en attente, dans l'ordre.
+
+        Args:
+            defer_backfills: DDL seulement (colonnes, index) pour toutes les
+                migrations ; versions validées jusqu'à la première migration
+                avec backfill, le reste par un run() ultérieur
+
+        Returns:
+            Nombre de migrations appliquées (version validée)
+        """
+        applied = 0
+        deferred = False
+        for migration in self.pending():
+            if defer_backfills and (deferred or migration.backfill is not None):
+                # Les écritures utilisent déjà les nouvelles colonnes
+                self._apply_ddl(migration, set_version=False)
+                deferred = True
+                continue
+            if not self._apply(migration):
+                # Les suivantes supposent celle-ci : retentées au prochain démarrage
+                break
+            applied += 1
+        return applied
+
+    def _apply(self, migration: Migration) -> bool:
+        """
+        DDL (transaction) → backfill par lots → version (transaction).
+
+        Returns:
+            False si le backfill a refusé (version non validée)
+        """
+        logger.info(f"🔧 Migration schéma v{migration.version} : {migration.description}")
+        self._current = migration
+
+        self._apply_ddl(migration, set_version=migration.backfill is None)
+
+        if migration.backfill is not None:
+            if migration.backfill(self) is False:
+                self._current = None
+                logger.warning(f"⚠️ Schéma v{migration.version} non appliqué (prérequis absent)")
+                return False
+            with self.db.transaction():
+                self._set_version(migration.version)
+
+        self._current = None
+        logger.info(f"✅ Schéma v{migration.version} appliqué")
+        return True
+
+    def _apply_ddl(self, migration: Migration, set_version: bool):
+        """Colonnes + instructions idempotentes (une transaction), version en option."""
+        with self.db.transaction():
+            for table, column, declaration in migration.columns:
+                self._add_column(table, column, declaration)
+            for statement in migration.statements:
+                self.db.conn.execute(statement)
+            if set_version:
+                self._set_version(migration.version)
+
+    def _set_version(self, version: int):
+        # PRAGMA n'accepte pas de paramètre lié
+        self.db.conn.execute(f"PRAGMA user_version = {int(version)}")
+
+    def _add_column(self, table: str, column: str, declaration: str):
+        """ALTER TABLE ADD COLUMN, ignoré si la colonne existe (reprise)."""
+        existing = {row[1] for row in self.db.conn.execute(f"PRAGMA table_info({table})")}
+        if column not in existing:
+            self.db.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+    # ========================================================================
+    # BACKFILL PAR LOTS
+    # ========================================================================
+
+    def update_in_batches(
+        self,
+        table: str,
+        where: str,
+        columns: str,
+        update_sql: str,
+        make_params: Callable[[Tuple], Optional[Tuple]],
+    ) -> int:
+        """
+        Réécrit les lignes d'une table par lots (parcours par id croissant).
+
+        Chaque lot est une transaction : les autres écritures passent
+        entre deux lots, et un arrêt en cours de route est repris au
+        prochain démarrage (la clause where exclut les lignes déjà traitées).
+
+        Args:
+            table: Table à parcourir
+            where: Filtre des lignes à traiter (ex: "segment_id IS NULL")
+            columns: Colonnes lues en plus de id (ex: "text")
+            update_sql: UPDATE paramétré exécuté par executemany
+            make_params: (id, *colonnes) → paramètres de update_sql, ou None
+
+        Returns:
+            Nombre de lignes mises à jour
+        """
+        reader = self.reader
+        total = reader.execute(f"SELECT COUNT(*) FROM {table} WHERE {where}").fetchone()[0]
+        done = updated = 0
+        last_id = 0
+
+        while True:
+            if self.stop_event is not None and self.stop_event.is_set():
+                raise MigrationInterrupted(f"Backfill {table} interrompu ({done}/{total})")
+            rows = reader.execute(
+                f"SELECT id, {columns} FROM {table} "
+                f"WHERE id > ? AND ({where}) ORDER BY id LIMIT ?",
+                (last_id, self.batch_size),
+            ).fetchall()
+            if not rows:
+                break
+
+            params = [p for p in (make_params(tuple(row)) for row in rows) if p is not None]
+            if params:
+                with self.db.transaction():
+                    self.db.conn.executemany(update_sql, params)
+            updated += len(params)
+            done += len(rows)
+            last_id = rows[-1][0]
+            self._report(done, total)
+
+        return updated
+
+    def _report(self, done: int, total: int):
+        migration = self._current
+        if self.progress_callback and migration is not None:
+            self.progress_callback(migration.version, migration.description, done, total)
+        logger.debug(f"   v{migration.version if migration else '?'} : {done}/{total} lignes")
+
+
+# ============================================================================
+# BACKFILLS
+# ============================================================================
+
+
+def _backfill_embedding_segments(runner: MigrationRunner):
+    """Relie les embeddings de résumés à leur segment (aperçu = summary[:200])."""
+    segment_by_preview: Dict[str, str] = {}
+    for summary, metadata in runner.reader.execute(
+        "SELECT summary, metadata FROM segments WHERE metadata IS NOT NULL"
+    ):
+        try:
+            segment_id = json.loads(metadata).get("segment_id")
+        except (ValueError, AttributeError):
+            continue
+        if segment_id and summary:
+            segment_by_preview.setdefault(summary[:200], segment_id)
+
+    if not segment_by_preview:
+        return
+
+    def make_params(row: Tuple[Any, ...]) -> Optional[Tuple]:
+        row_id, text = row
+        segment_id = segment_by_preview.get(text)
+        return (segment_id, row_id) if segment_id else None
+
+    runner.update_in_batches(
+        "embeddings",
+        "segment_id IS NULL",
+        "text",
+        "UPDATE embeddings SET segment_id = ? WHERE id = ?",
+        make_params,
+    )
+
+
+def _backfill_fact_users(runner: MigrationRunner):
+    """Attribue aux faits l'utilisateur du message source."""
+    runner.update_in_batches(
+        "facts",
+        "source_message_id IS NOT NULL",
+        "source_message_id",
+        """
+        UPDATE facts
+        SET user_id = COALESCE((SELECT user_id FROM conversations WHERE id = ?), user_id)
+        WHERE id = ?
+        """,
+        lambda row: (row[1], row[0]),
+    )
+
+
+# Index plein texte : (table FTS, table source, colonne indexée)
+FTS_TABLES: List[Tuple[str, str, str]] = [
+    ("conversations_fts", "conversations", "content"),
+    ("segments_fts", "segments", "summary"),
+    ("facts_fts", "facts", "search_text"),
+]
+
+# Champs de faits non indexés : types/énumérations et horodatages (mêmes
+# valeurs dans presque tous les faits)
+_FACT_META_FIELDS = frozenset(
+    {
+        "entity_type",
+        "category",
+        "sentiment",
+        "event_type",
+        "status",
+        "relation_type",
+        "first_seen",
+        "last_seen",
+        "timestamp",
+        "extracted_at",
+    }
+)
+
+
+def fact_search_text(data: Any) -> str:
+    """
+    Texte indexé d'un fait : ses valeurs textuelles seulement.
+
+    Ni clés JSON, ni énumérations, ni nombres ; accents conservés
+    (l'ancien index portait sur json.dumps, où "café" devenait "caf\\u00e9").
+
+    Args:
+        data: Données du fait (dict FactExtractor)
+
+    Returns:
+        Valeurs séparées par des espaces
+    """
+    values: List[str] = []
+
+    def collect(value: Any):
+        if isinstance(value, str):
+            if value:
+                values.append(value)
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                if key not in _FACT_META_FIELDS:
+                    collect(item)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                collect(item)
+
+    collect(data)
+    return " ".join(values)
+
+
+def fts5_available(conn) -> bool:
+    """True si SQLite est compilé avec FTS5."""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp.fts5_probe")
+        return True
+    except Exception:
+        return False
+
+
+def _backfill_fact_text(runner: MigrationRunner):
+    """Remplit facts.search_text (valeurs des faits) par lots."""
+
+    def make_params(row: Tuple[Any, ...]) -> Tuple:
+        row_id, data = row
+        try:
+            text = fact_search_text(json.loads(data))
+        except ValueError:
+            text = ""
+        return (text, row_id)
+
+    runner.update_in_batches(
+        "facts",
+        "search_text IS NULL",
+        "data",
+        "UPDATE facts SET search_text = ? WHERE id = ?",
+        make_params,
+    )
+
+
+def _fts_triggers(fts: str, table: str, column: str, guarded: bool) -> List[str]:
+    """
+    Triggers de synchronisation d'une table FTS5 à contenu externe.
+
+    guarded : pendant l'indexation par lots, 'delete' ignoré pour les lignes
+    existantes pas encore indexées (cf. fts_backfill) — elles seront
+    indexées avec leur valeur courante par le lot qui les couvre.
+    """
+    when = (
+        f"WHEN NOT EXISTS (SELECT 1 FROM fts_backfill WHERE fts = '{fts}' "
+        f"AND old.id > indexed_up_to AND old.id <= max_id) "
+        if guarded
+        else ""
+    )
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} {when}BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column}) "
+        f"VALUES ('delete', old.id, old.{column}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column} ON {table} {when}BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column}) "
+        f"VALUES ('delete', old.id, old.{column}); "
+        f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END",
+    ]
+
+
+def _index_existing_rows(runner: MigrationRunner, fts: str, table: str, column: str):
+    """
+    Indexe les lignes antérieures aux triggers, par plages d'id.
+
+    Une transaction par lot (le verrou d'écriture est relâché entre deux
+    lots) ; la progression est enregistrée dans fts_backfill, un arrêt est
+    donc repris au lot suivant.
+    """
+    row = runner.reader.execute(
+        "SELECT indexed_up_to, max_id FROM fts_backfill WHERE fts = ?", (fts,)
+    ).fetchone()
+    if row is None:
+        return
+    indexed_up_to, max_id = row
+
+    while indexed_up_to < max_id:
+        if runner.stop_event is not None and runner.stop_event.is_set():
+            raise MigrationInterrupted(f"Index {fts} interrompu ({indexed_up_to}/{max_id})")
+        upper = min(indexed_up_to + runner.batch_size, max_id)
+        with runner.db.transaction():
+            runner.db.conn.execute(
+                f"INSERT INTO {fts}(rowid, {column}) "
+                f"SELECT id, {column} FROM {table} WHERE id > ? AND id <= ?",
+                (indexed_up_to, upper),
+            )
+            runner.db.conn.execute(
+                "UPDATE fts_backfill SET indexed_up_to = ? WHERE fts = ?", (upper, fts)
+            )
+        indexed_up_to = upper
+        runner._report(indexed_up_to, max_id)
+
+    # Indexation terminée : triggers sans garde
+    with runner.db.transaction():
+        for suffix in ("_ad", "_au"):
+            runner.db.conn.execute(f"DROP TRIGGER IF EXISTS {fts}{suffix}")
+        for statement in _fts_triggers(fts, table, column, guarded=False):
+            runner.db.conn.execute(statement)
+        runner.db.conn.execute("DELETE FROM fts_backfill WHERE fts = ?", (fts,))
+
+
+def _create_fts(runner: MigrationRunner, tables: Sequence[Tuple[str, str, str]]) -> bool:
+    """
+    Tables FTS5 à contenu externe + triggers de synchronisation.
+
+    Le texte n'est pas dupliqué (content=table source) ; les triggers
+    répercutent INSERT/UPDATE/DELETE dès la création de la table, puis
+    l'existant est indexé par lots d'id (cf. _index_existing_rows) : les
+    écritures du chat passent entre deux lots.
+
+    Returns:
+        False si SQLite n'a pas FTS5 (rien n'est créé)
+    """
+    with runner.db.transaction():
+        if not fts5_available(runner.db.conn):
+            logger.warning("⚠️ SQLite sans FTS5 : recherche plein texte désactivée")
+            return False
+
+    if any(table == "facts" for _, table, _ in tables):
+        _backfill_fact_text(runner)
+
+    for fts, table, column in tables:
+        with runner.db.transaction():
+            conn = runner.db.conn
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fts_backfill ("
+                "fts TEXT PRIMARY KEY, indexed_up_to INTEGER NOT NULL, max_id INTEGER NOT NULL)"
+            )
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)
+            ).fetchone()
+            if not exists:
+                conn.execute(
+                    f"CREATE VIRTUAL TABLE {fts} USING fts5("
+                    f"{column}, content='{table}', content_rowid='id', "
+                    f"tokenize='unicode61 remove_diacritics 2')"
+                )
+                # Lignes existantes (id <= max_id) : indexées par lots ;
+                # lignes suivantes : par le trigger d'insertion
+                max_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                conn.execute("INSERT INTO fts_backfill VALUES (?, 0, ?)", (fts, max_id))
+                for statement in _fts_triggers(fts, table, column, guarded=True):
+                    conn.execute(statement)
+        _index_existing_rows(runner, fts, table, column)
+
+    with runner.db.transaction():
+        if not runner.db.conn.execute("SELECT 1 FROM fts_backfill").fetchone():
+            runner.db.conn.execute("DROP TABLE fts_backfill")
+    return True
+
+
+def _create_fts_indexes(runner: MigrationRunner) -> bool:
+    """Index plein texte des trois tables."""
+    return _create_fts(runner, FTS_TABLES)
+
+
+def _reindex_fact_text(runner: MigrationRunner) -> bool:
+    """
+    Reconstruit facts_fts sur facts.search_text.
+
+    Bases passées en v4 avant l'ajout de search_text : facts_fts indexait
+    la colonne data (JSON brut, clés et énumérations comprises).
+    """
+    columns = [row[1] for row in runner.reader.execute("PRAGMA table_info(facts_fts)")]
+    if not columns:
+        # v4 validée sans FTS5 : tout créer si FTS5 est désormais disponible
+        return _create_fts_indexes(runner)
+    if columns == ["search_text"]:
+        return True
+
+    with runner.db.transaction():
+        for suffix in ("_ai", "_ad", "_au"):
+            runner.db.conn.execute(f"DROP TRIGGER IF EXISTS facts_fts{suffix}")
+        runner.db.conn.execute("DROP TABLE facts_fts")
+    return _create_fts(runner, [fts for fts in FTS_TABLES if fts[1] == "facts"])
+
+
+# ============================================================================
+# MIGRATIONS
+# ============================================================================
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1,
+        "Index composites historique (user_id, source, timestamp, id)",
+        statements=[
+            # Pagination par curseur et derniers tours : recherche O(log N)
+            "CREATE INDEX IF NOT EXISTS idx_conversations_user_source_ts "
+            "ON conversations(user_id, source, timestamp DESC, id DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_conversations_user_ts "
+            "ON conversations(user_id, timestamp DESC, id DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_emotions_user_source_ts "
+            "ON emotion_history(user_id, source, timestamp DESC)",
+            "ANALYZE",
+        ],
+    ),
+    Migration(
+        2,
+        "Colonne segment_id sur embeddings",
+        columns=[("embeddings", "segment_id", "TEXT")],
+        statements=[
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_segment ON embeddings(segment_id)"
+        ],
+        backfill=_backfill_embedding_segments,
+    ),
+    Migration(
+        3,
+        "Colonne user_id sur facts",
+        columns=[("facts", "user_id", "TEXT DEFAULT 'desktop_user'")],
+        statements=[
+            "CREATE INDEX IF NOT EXISTS idx_facts_user_category "
+            "ON facts(user_id, category, timestamp DESC)"
+        ],
+        backfill=_backfill_fact_users,
+    ),
+    Migration(
+        4,
+        "Index plein texte FTS5 (conversations, segments, facts)",
+        columns=[("facts", "search_text", "TEXT")],
+        backfill=_create_fts_indexes,
+    ),
+    Migration(
+        5,
+        "Index facts_fts sur le texte des faits (sans clés JSON)",
+        columns=[("facts", "search_text", "TEXT")],
+        backfill=_reindex_fact_text,
+    ),
+]
+
+
+def format_progress(version: int, description: str, done: int, total: int) -> str:
+    """Ligne de progression lisible (CLI / logs)."""
+    percent = 100.0 * done / total if total else 100.0
+    return f"v{version} {description} : {done}/{total} ({percent:.0f}%)"
+
+
+def describe(migrations: Iterable[Migration]) -> List[str]:
+    """Liste lisible de migrations."""
+    return [f"v{m.version} - {m.description}" for m in migrations]
+
+
+# Pour application / inspection manuelle
+if __name__ == "__main__":
+    import argparse
+
+    try:
+        from .database import WorklyDatabase
+    except ImportError:
+        from database import WorklyDatabase
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+    parser = argparse.ArgumentParser(description="Migrations du schéma Workly")
+    parser.add_argument("db_path", nargs="?", default="data/memory/workly.db")
+    parser.add_argument(
+        "--status", action="store_true", help="Afficher la version sans migrer"
+    )
+    args = parser.parse_args()
+
+    database = WorklyDatabase(args.db_path, apply_migrations=False)
+    runner = MigrationRunner(
+        database,
+        progress_callback=lambda *p: print(f"   {format_progress(*p)}"),
+    )
+    try:
+        print(f"📊 Version du schéma : {runner.current_version}")
+        pending = runner.pending()
+        for line in describe(pending):
+            print(f"   ⏳ {line}")
+        if not args.status:
+            count = runner.run()
+            print(f"✅ {count} migration(s) appliquée(s), version {runner.current_version}")
+    finally:
+        database.close()
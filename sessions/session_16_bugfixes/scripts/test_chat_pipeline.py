@@ -0,0 +1,98 @@
+"""
+Tests unitaires pour le pipeline des tours de chat
+
+Tests :
+- Étapes en parallèle (durée ≈ étape la plus longue)
+- Tenue de livres en arrière-plan : ordre préservé, flush, erreurs
+- Statistiques par étape
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.ai.chat_pipeline import ChatPipeline
+
+
+@pytest.fixture
+def pipeline():
+    """Fixture : pipeline arrêté en fin de test"""
+    pipeline = ChatPipeline(max_workers=3)
+    yield pipeline
+    pipeline.shutdown(timeout=5)
+
+
+def test_stages_run_concurrently(pipeline):
+    """Test trois étapes de 0.1s : ~0.1s au total, durée de chacune mesurée"""
+    timings = {}
+    start = time.perf_counter()
+
+    futures = [
+        pipeline.submit(timings, name, time.sleep, 0.1)
+        for name in ("personality", "long_term_memory", "user_emotion")
+    ]
+    for future in futures:
+        future.result()
+
+    assert time.perf_counter() - start < 0.25
+    assert set(timings) == {"personality", "long_term_memory", "user_emotion"}
+    assert all(seconds >= 0.09 for seconds in timings.values())
+
+
+def test_stage_exception_raised_by_result(pipeline):
+    """Test erreur d'une étape relevée par Future.result()"""
+
+    def failing():
+        raise ValueError("boom")
+
+    timings = {}
+    future = pipeline.submit(timings, "history", failing)
+
+    with pytest.raises(ValueError):
+        future.result()
+    assert "history" in timings
+
+
+def test_bookkeeping_order_and_flush(pipeline):
+    """Test écritures exécutées dans l'ordre, flush attend la dernière"""
+    written = []
+    release = threading.Event()
+
+    def save(value):
+        release.wait(5)
+        written.append(value)
+
+    for value in range(3):
+        pipeline.defer({}, save, value)
+
+    assert not pipeline.flush(timeout=0.05)
+    release.set()
+
+    assert pipeline.flush(timeout=5)
+    assert written == [0, 1, 2]
+    assert pipeline.get_stats()["turns"] == 3
+
+
+def test_bookkeeping_error_counted(pipeline):
+    """Test erreur de sauvegarde : journalisée et comptée, pas relevée"""
+
+    def failing():
+        raise OSError("database is locked")
+
+    pipeline.defer({}, failing)
+
+    assert pipeline.flush(timeout=5)
+    assert pipeline.get_stats()["bookkeeping_errors"] == 1
+
+
+def test_stats_last_and_average(pipeline):
+    """Test durées du dernier tour et moyennes en millisecondes"""
+    pipeline.record({"generation": 1.0, "history": 0.010})
+    pipeline.record({"generation": 3.0, "history": 0.030})
+
+    stats = pipeline.get_stats()
+
+    assert stats["turns"] == 2
+    assert stats["last_ms"] == {"generation": 3000.0, "history": 30.0}
+    assert stats["avg_ms"] == {"generation": 2000.0, "history": 20.0}
@@ -0,0 +1,125 @@
+"""
+Tests unitaires pour ConnectionPool / accès multi-thread de WorklyDatabase
+
+Tests :
+- Un lecteur par thread, fermé à la fin du thread
+- Lectures non bloquées par une transaction d'écriture en cours
+- Écritures concurrentes sérialisées (aucune perte, aucun "database is locked")
+- Checkpoint WAL
+"""
+
+import threading
+
+import pytest
+
+from src.ai.database import WorklyDatabase
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Fixture : base SQLite temporaire"""
+    database = WorklyDatabase(str(tmp_path / "workly.db"))
+    yield database
+    database.close()
+
+
+def _add(db, i: int, user_id: str = "u"):
+    db.add_conversation("user", f"Message {i}", f"2025-01-01T00:{i // 60:02d}:{i % 60:02d}", user_id)
+
+
+# ========== TESTS LECTEURS ==========
+
+
+def test_reader_per_thread(db):
+    """Test connexion de lecture distincte par thread"""
+    main_reader = db.pool.reader()
+    other = []
+
+    thread = threading.Thread(target=lambda: other.append(db.pool.reader()))
+    thread.start()
+    thread.join()
+
+    assert db.pool.reader() is main_reader
+    assert other[0] is not main_reader
+
+
+def test_dead_thread_readers_pruned(db):
+    """Test lecteurs des threads terminés fermés"""
+    for _ in range(5):
+        thread = threading.Thread(target=db.get_conversation_count)
+        thread.start()
+        thread.join()
+
+    db.get_conversation_count()  # Nouveau lecteur → nettoyage
+    assert db.get_write_stats()["readers"] <= 2
+
+
+def test_read_during_open_write(db):
+    """Test lecture depuis un autre thread pendant une transaction"""
+    _add(db, 0)
+    counts = []
+
+    with db.transaction():
+        _add(db, 1)
+        # Le thread écrivain voit sa propre écriture non validée
+        assert db.get_conversation_count() == 2
+
+        thread = threading.Thread(target=lambda: counts.append(db.get_conversation_count()))
+        thread.start()
+        thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert counts == [1]  # Instantané validé, sans attendre le COMMIT
+    assert db.get_conversation_count() == 2
+
+
+# ========== TESTS CONCURRENCE ==========
+
+
+def test_concurrent_writers_and_readers(db):
+    """Test écritures + lectures concurrentes sans erreur ni perte"""
+    errors = []
+
+    def writer(user_id):
+        try:
+            for i in range(50):
+                _add(db, i, user_id)
+        except Exception as e:  # pragma: no cover - échec du test
+            errors.append(e)
+
+    def reader():
+        try:
+            for _ in range(50):
+                db.get_conversations(limit=10)
+        except Exception as e:  # pragma: no cover - échec du test
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(f"user{i}",)) for i in range(4)]
+    threads += [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert db.get_conversation_count() == 200
+
+
+# ========== TESTS CHECKPOINT ==========
+
+
+def test_checkpoint_truncate(db):
+    """Test checkpoint TRUNCATE vide le WAL"""
+    for i in range(20):
+        _add(db, i)
+
+    busy, _, _ = db.checkpoint("TRUNCATE")
+
+    assert busy == 0
+    assert db.get_write_stats()["wal_size_kb"] == 0
+
+
+def test_checkpoint_invalid_mode(db):
+    """Test mode de checkpoint inconnu refusé"""
+    with pytest.raises(ValueError):
+        db.checkpoint("FAST")
@@ -0,0 +1,126 @@
+"""
+Tests unitaires pour la pagination de l'historique (WorklyDatabase)
+
+Tests :
+- Migration des index composites (PRAGMA user_version)
+- Pagination par curseur (keyset) : pages complètes, sans doublon
+- get_recent_turns : ordre chronologique, filtres user_id/source
+- get_conversations : filtres user_id/source, ordre (timestamp, id) stable
+- Plan de requête : index composite, sans tri temporaire
+- delete_user_conversations : une conversation effacée, les autres intactes
+"""
+
+import pytest
+
+from src.ai.database import WorklyDatabase, SCHEMA_MIGRATIONS
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Fixture : base avec 2 utilisateurs sur 2 sources"""
+    database = WorklyDatabase(str(tmp_path / "workly.db"))
+    database.add_conversations_batch(
+        [
+            {
+                "role": "user" if i % 2 == 0 else "assistant",
+                "content": f"Message {i}",
+                # Horodatages en double : le départage se fait par id
+                "timestamp": f"2025-01-01T00:00:{i // 2:02d}",
+                "user_id": f"user{i % 2}",
+                "source": "discord" if i % 4 < 2 else "desktop",
+            }
+            for i in range(40)
+        ]
+    )
+    yield database
+    database.close()
+
+
+def test_migrations_applied(db):
+    """Test index composites créés et version enregistrée"""
+    indexes = {
+        row["name"]
+        for row in db.execute_raw("SELECT name FROM sqlite_master WHERE type = 'index'")
+    }
+
+    assert db.schema_version == SCHEMA_MIGRATIONS[-1].version
+    assert "idx_conversations_user_source_ts" in indexes
+
+
+def test_keyset_pagination_covers_all_rows(db):
+    """Test pages successives = requête complète, sans doublon"""
+    expected = [row["id"] for row in db.get_conversations(user_id="user0")]
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = db.get_conversations_page(user_id="user0", limit=7, before=cursor)
+        seen.extend(row["id"] for row in rows)
+        if cursor is None:
+            break
+
+    assert seen == expected
+    assert len(seen) == 20
+
+
+def test_keyset_pagination_source_filter(db):
+    """Test filtre source"""
+    rows, _ = db.get_conversations_page(user_id="user0", source="desktop", limit=100)
+
+    assert len(rows) == 10
+    assert {row["source"] for row in rows} == {"desktop"}
+
+
+def test_get_recent_turns(db):
+    """Test derniers tours en ordre chronologique"""
+    turns = db.get_recent_turns("user1", "discord", n=3)
+
+    assert [t["content"] for t in turns] == ["Message 29", "Message 33", "Message 37"]
+    assert set(turns[0]) == {"role", "content", "timestamp"}
+
+
+def test_get_conversations_filters_and_order(db):
+    """Test filtres user_id/source, plus récent d'abord"""
+    rows = db.get_conversations(user_id="user1", source="discord", limit=3)
+
+    assert [row["content"] for row in rows] == ["Message 37", "Message 33", "Message 29"]
+    assert {(row["user_id"], row["source"]) for row in rows} == {("user1", "discord")}
+
+
+def test_history_query_uses_composite_index(db):
+    """Test plan : recherche dans l'index composite, pas de B-tree temporaire"""
+    plan = " ".join(
+        row["detail"]
+        for row in db.execute_raw(
+            "EXPLAIN QUERY PLAN SELECT * FROM conversations "
+            "WHERE user_id = ? AND source = ? ORDER BY timestamp DESC, id DESC LIMIT ?",
+            ("user1", "discord", 10),
+        )
+    )
+
+    assert "idx_conversations_user_source_ts" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_keyset_page_query_uses_composite_index(db):
+    """Test plan de la page suivante : recherche dans l'index, pas de tri"""
+    plan = " ".join(
+        row["detail"]
+        for row in db.execute_raw(
+            "EXPLAIN QUERY PLAN SELECT * FROM conversations "
+            "WHERE user_id = ? AND source = ? AND (timestamp, id) < (?, ?) "
+            "ORDER BY timestamp DESC, id DESC LIMIT ?",
+            ("user1", "discord", "2025-01-01T00:00:10", 21, 10),
+        )
+    )
+
+    assert "idx_conversations_user_source_ts" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_delete_user_conversations(db):
+    """Test suppression limitée à un utilisateur et une source"""
+    assert db.delete_user_conversations("user1", source="discord") == 10
+
+    assert db.get_recent_turns("user1", "discord") == []
+    assert len(db.get_recent_turns("user1", "desktop", n=100)) == 10
+    assert db.get_conversation_count("user0") == 20
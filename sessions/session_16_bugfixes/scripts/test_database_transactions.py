@@ -0,0 +1,148 @@
+"""
+Tests unitaires pour les unités de travail de WorklyDatabase
+
+Tests :
+- transaction() : un seul COMMIT, imbrication, ROLLBACK sur exception
+- Variantes *_batch (executemany)
+- Sidecar mmap mis à jour uniquement après COMMIT
+- call_after_commit : état en mémoire appliqué au COMMIT, oublié au ROLLBACK
+"""
+
+import numpy as np
+import pytest
+
+from src.ai.database import WorklyDatabase
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Fixture : base SQLite temporaire"""
+    database = WorklyDatabase(str(tmp_path / "workly.db"))
+    yield database
+    database.close()
+
+
+def _message(i: int) -> dict:
+    return {"role": "user", "content": f"Message {i}", "timestamp": f"2025-01-01T00:00:{i:02d}"}
+
+
+# ========== TESTS TRANSACTION ==========
+
+
+def test_single_write_commits_once(db):
+    """Test écriture isolée = une transaction"""
+    before = db.commit_count
+    db.add_conversation(**_message(0))
+
+    assert db.commit_count == before + 1
+
+
+def test_transaction_groups_writes(db):
+    """Test plusieurs écritures = un seul COMMIT"""
+    before = db.commit_count
+    with db.transaction():
+        db.add_conversation(**_message(0))
+        db.add_fact("preferences", "likes", {"value": "python"})
+        with db.transaction():  # Imbrication : pas de COMMIT intermédiaire
+            db.add_conversation(**_message(1))
+
+    assert db.commit_count == before + 1
+    assert db.get_conversation_count() == 2
+
+
+def test_transaction_rollback(db):
+    """Test exception : toutes les écritures annulées"""
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.add_conversation(**_message(0))
+            raise RuntimeError("échec")
+
+    assert db.get_conversation_count() == 0
+    assert db.get_write_stats()["rollbacks"] == 1
+
+    # La base reste utilisable
+    db.add_conversation(**_message(1))
+    assert db.get_conversation_count() == 1
+
+
+def test_call_after_commit(db):
+    """Test callbacks : exécutés après le COMMIT externe, annulés au ROLLBACK"""
+    applied, undone = [], []
+
+    db.call_after_commit(lambda: applied.append("hors transaction"))
+    with db.transaction():
+        with db.transaction():
+            db.call_after_commit(lambda: applied.append("validé"), lambda: undone.append("validé"))
+        assert applied == ["hors transaction"]
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.call_after_commit(lambda: applied.append("annulé"), lambda: undone.append("annulé"))
+            raise RuntimeError("échec")
+
+    assert applied == ["hors transaction", "validé"]
+    assert undone == ["annulé"]
+
+
+# ========== TESTS BATCH ==========
+
+
+def test_batch_variants(db):
+    """Test insertions par lot"""
+    db.set_personality_trait("humor", 0.5)
+
+    assert db.add_conversations_batch([_message(i) for i in range(5)]) == 5
+    assert (
+        db.add_facts_batch(
+            [{"category": "events", "type_": "general", "data": {"i": i}} for i in range(3)]
+        )
+        == 3
+    )
+    assert (
+        db.add_emotions_batch(
+            [
+                {
+                    "emotion": "joy",
+                    "intensity": 50.0,
+                    "confidence": 0.9,
+                    "source": "user",
+                    "message_preview": "",
+                    "context": "",
+                    "timestamp": "2025-01-01",
+                }
+            ]
+        )
+        == 1
+    )
+    assert db.add_personality_evolutions_batch([("humor", 0.5, 0.6, "test")]) == 1
+
+    assert db.get_conversation_count() == 5
+    assert len(db.get_facts(category="events")) == 3
+    assert db.get_emotion_count() == 1
+    assert len(db.get_personality_evolution("humor")) == 1
+
+
+def test_batch_empty(db):
+    """Test lot vide : aucune transaction"""
+    before = db.commit_count
+    assert db.add_conversations_batch([]) == 0
+    assert db.commit_count == before
+
+
+# ========== TESTS SIDECAR ==========
+
+
+def test_embedding_store_after_commit(tmp_path):
+    """Test sidecar : ajouté au COMMIT, ignoré au ROLLBACK"""
+    database = WorklyDatabase(str(tmp_path / "workly.db"), use_embedding_store=True)
+    vectors = np.eye(4, dtype=np.float32)
+
+    with pytest.raises(RuntimeError):
+        with database.transaction():
+            database.add_embedding(None, vectors[0], "annulé", "t0")
+            raise RuntimeError("échec")
+    assert len(database.embedding_store) == 0
+
+    ids = database.add_embeddings_batch([(None, vec, f"t{i}", f"t{i}") for i, vec in enumerate(vectors[1:])])
+    assert len(database.embedding_store) == 3
+    assert list(database.get_embeddings_view()[1]) == ids
+    database.close()
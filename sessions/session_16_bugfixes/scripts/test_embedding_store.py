@@ -0,0 +1,169 @@
+"""
+Tests unitaires pour EmbeddingStore (sidecar mmap des embeddings)
+
+Tests :
+- Écriture append-only et lecture np.memmap
+- Récupération après écriture interrompue (crash)
+- Rattrapage et reconstruction depuis SQLite
+- Vues lâchées avant reset (fichier mappé non remplaçable sous Windows),
+  échec de remplacement signalé
+"""
+
+import os
+import numpy as np
+import pytest
+
+from src.ai.database import WorklyDatabase
+from src.ai.embedding_store import EmbeddingStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Fixture : chemin de base temporaire"""
+    return str(tmp_path / "workly.db")
+
+
+def _vec(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=8).astype(np.float32)
+
+
+def test_append_and_view(db_path):
+    """Test écriture puis vue zéro copie"""
+    store = EmbeddingStore(db_path)
+    store.append([1, 2], np.vstack([_vec(1), _vec(2)]))
+
+    vectors, ids = store.view()
+
+    assert isinstance(vectors, np.memmap)
+    assert vectors.shape == (2, 8)
+    assert list(ids) == [1, 2]
+    assert np.array_equal(vectors[1], _vec(2))
+
+
+def test_reopen_keeps_data(db_path):
+    """Test persistance entre deux ouvertures"""
+    EmbeddingStore(db_path).append([7], _vec(7))
+
+    store = EmbeddingStore(db_path)
+
+    assert len(store) == 1
+    assert store.last_id == 7
+
+
+def test_recover_truncates_uncommitted_bytes(db_path):
+    """Test crash entre données et en-tête : octets non validés tronqués"""
+    store = EmbeddingStore(db_path)
+    store.append([1], _vec(1))
+
+    # Simuler une écriture interrompue (données sans en-tête)
+    with open(store.vectors_path, "ab") as f:
+        f.write(_vec(2).tobytes()[:10])
+
+    reopened = EmbeddingStore(db_path)
+
+    assert len(reopened) == 1
+    assert os.path.getsize(reopened.vectors_path) == 8 * 4
+
+
+def test_dimension_mismatch(db_path):
+    """Test dimension incompatible refusée"""
+    store = EmbeddingStore(db_path)
+    store.append([1], _vec(1))
+
+    with pytest.raises(ValueError):
+        store.append([2], np.zeros(4, dtype=np.float32))
+
+
+def test_database_writes_sidecar(db_path):
+    """Test add_embedding alimente le sidecar"""
+    db = WorklyDatabase(db_path, use_embedding_store=True)
+    for i in range(3):
+        db.add_embedding(None, _vec(i), f"texte {i}", f"2025-01-0{i + 1}")
+
+    vectors, ids = db.get_embeddings_view()
+
+    assert list(ids) == [1, 2, 3]
+    assert np.array_equal(vectors[2], _vec(2))
+    db.close()
+
+
+def test_sync_catches_up_missing_rows(db_path):
+    """Test rattrapage des lignes SQLite absentes du sidecar"""
+    db = WorklyDatabase(db_path)
+    for i in range(4):
+        db.add_embedding(None, _vec(i), f"texte {i}", f"2025-01-0{i + 1}")
+    db.close()
+
+    # Sidecar activé après coup : rattrapage complet à l'ouverture
+    db = WorklyDatabase(db_path, use_embedding_store=True)
+
+    assert len(db.embedding_store) == 4
+    db.close()
+
+
+def test_rebuild_from_sqlite(db_path):
+    """Test reconstruction complète du sidecar"""
+    db = WorklyDatabase(db_path, use_embedding_store=True)
+    db.add_embedding(None, _vec(1), "a", "2025-01-01")
+    db.add_embedding(None, _vec(2), "b", "2025-01-02")
+
+    written = db.rebuild_embedding_store()
+
+    assert written == 2
+    assert list(db.get_embeddings_view()[1]) == [1, 2]
+    db.close()
+
+
+def test_reset_releases_views_first(db_path, monkeypatch):
+    """Test reset : détenteurs de vues prévenus avant le remplacement des fichiers"""
+    store = EmbeddingStore(db_path)
+    store.append([1], _vec(1).reshape(1, -1))
+    held = {"view": store.view()}
+    events = []
+    store.on_release(lambda: events.append("release") or held.clear())
+
+    real_replace = os.replace
+    monkeypatch.setattr(
+        os, "replace", lambda src, dst: events.append("replace") or real_replace(src, dst)
+    )
+    store.reset()
+
+    assert events[:3] == ["release", "replace", "replace"]  # Puis l'en-tête
+    assert held == {}
+    assert len(store) == 0
+
+
+def test_reset_failure_propagates(db_path, monkeypatch):
+    """Test fichier encore mappé (Windows) : erreur remontée, sidecar intact"""
+    store = EmbeddingStore(db_path)
+    store.append([1, 2], np.vstack([_vec(1), _vec(2)]))
+
+    def locked(src, dst):
+        raise PermissionError("fichier utilisé par un autre processus")
+
+    monkeypatch.setattr(os, "replace", locked)
+    with pytest.raises(PermissionError):
+        store.reset()
+    monkeypatch.undo()
+
+    assert len(store) == 2
+    assert list(EmbeddingStore(db_path).view()[1]) == [1, 2]
+
+
+def test_sync_failure_disables_sidecar(db_path, monkeypatch):
+    """Test reconstruction impossible à l'ouverture : lectures depuis SQLite"""
+    db = WorklyDatabase(db_path, use_embedding_store=True)
+    for i in range(3):
+        db.add_embedding(None, _vec(i), f"texte {i}", f"2025-01-0{i + 1}")
+    db.execute_raw("DELETE FROM embeddings WHERE id = 2")  # Reconstruction requise
+    db.close()
+
+    def locked(self, dim=None):
+        raise PermissionError("fichier encore mappé")
+
+    monkeypatch.setattr(EmbeddingStore, "reset", locked)
+    db = WorklyDatabase(db_path, use_embedding_store=True)
+
+    assert db.embedding_store is None
+    assert list(db.get_embeddings_view()[1]) == [1, 3]
+    db.close()
@@ -0,0 +1,156 @@
+"""
+Tests unitaires pour la recherche plein texte (FTS5) de WorklyDatabase
+
+Tests :
+- Migration v4 : tables virtuelles + triggers de synchronisation
+- search_text() : classement BM25, accents, filtre utilisateur
+- Faits : valeurs indexées sans clés JSON ni énumérations
+- Synchronisation sur UPDATE / DELETE
+- build_fts_query() : mots vides et ponctuation
+"""
+
+import pytest
+
+from src.ai.database import WorklyDatabase
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Fixture : base SQLite temporaire (migrations appliquées)"""
+    database = WorklyDatabase(str(tmp_path / "workly.db"))
+    if not database.fts_enabled:
+        database.close()
+        pytest.skip("SQLite compilé sans FTS5")
+    yield database
+    database.close()
+
+
+def _add(db, content: str, user_id: str = "desktop_user") -> int:
+    return db.add_conversation("user", content, "2025-01-01T00:00:00", user_id=user_id)
+
+
+# ========== TESTS SCHÉMA ==========
+
+
+def test_fts_tables_and_triggers(db):
+    """Test tables FTS5 et triggers créés par la migration"""
+    names = {
+        row["name"]
+        for row in db.execute_raw("SELECT name FROM sqlite_master WHERE name LIKE '%_fts%'")
+    }
+
+    for table in ("conversations_fts", "segments_fts", "facts_fts"):
+        assert table in names
+        assert f"{table}_ai" in names
+        assert f"{table}_ad" in names
+        assert f"{table}_au" in names
+
+
+# ========== TESTS RECHERCHE ==========
+
+
+def test_search_ranks_best_match_first(db):
+    """Test le message le plus pertinent arrive en tête"""
+    _add(db, "J'ai mangé une pizza hier soir")
+    best = _add(db, "Mon chat Minou adore dormir, Minou est un chat roux")
+    _add(db, "Le chat du voisin est noir")
+
+    hits = db.search_text("chat Minou", kinds=("conversation",))
+
+    assert hits[0]["id"] == best
+    assert hits[0]["kind"] == "conversation"
+    assert len(hits) == 2
+    assert hits[0]["score"] >= hits[1]["score"]
+
+
+def test_search_ignores_accents(db):
+    """Test recherche insensible aux accents"""
+    row_id = _add(db, "Je vais au théâtre vendredi")
+
+    hits = db.search_text("theatre", kinds=("conversation",))
+
+    assert [hit["id"] for hit in hits] == [row_id]
+
+
+def test_search_user_filter(db):
+    """Test filtre par utilisateur"""
+    _add(db, "Réunion projet Workly", user_id="alice")
+    bob = _add(db, "Réunion projet Workly", user_id="bob")
+
+    hits = db.search_text("projet workly", user_id="bob", kinds=("conversation",))
+
+    assert [hit["id"] for hit in hits] == [bob]
+
+
+def test_search_segments_and_facts(db):
+    """Test segments et faits indexés"""
+    db.add_segment(
+        "Discussion sur le voyage au Japon", 6, "t0", "t1", metadata={"segment_id": "seg_0"}
+    )
+    db.add_fact("preferences", "likes", {"subject": "sushis", "sentiment": "positive"})
+
+    segment = db.search_text("japon", kinds=("segment",))
+    fact = db.search_text("sushis", kinds=("fact",))
+
+    assert segment[0]["segment_id"] == "seg_0"
+    assert fact[0]["category"] == "preferences"
+
+
+def test_fact_index_values_only(db):
+    """Test faits : valeurs indexées (accents compris), pas les clés ni les énumérations"""
+    db.add_fact("preferences", "food", {"category": "food", "subject": "café", "sentiment": "positive"})
+    db.add_fact("entities", "person", {"entity_type": "person", "value": "Zoé", "occurrences": 2})
+
+    assert db.search_text("café", kinds=("fact",))[0]["category"] == "preferences"
+    assert db.search_text("zoe", kinds=("fact",))[0]["category"] == "entities"
+    for term in ("subject", "positive", "person", "occurrences", "u00e9"):
+        assert db.search_text(term, kinds=("fact",)) == []
+
+
+def test_index_follows_updates_and_deletes(db):
+    """Test triggers : index à jour après UPDATE et DELETE"""
+    row_id = _add(db, "Rendez-vous chez le dentiste")
+    db.execute_raw("UPDATE conversations SET content = ? WHERE id = ?", ("Rendez-vous au garage", row_id))
+
+    assert db.search_text("dentiste", kinds=("conversation",)) == []
+    assert db.search_text("garage", kinds=("conversation",))[0]["id"] == row_id
+
+    db.delete_conversations_before("2100-01-01")
+    assert db.search_text("garage", kinds=("conversation",)) == []
+
+
+# ========== TESTS REQUÊTE ==========
+
+
+def test_build_fts_query():
+    """Test mots vides, ponctuation et opérateurs FTS5 neutralisés"""
+    query = WorklyDatabase.build_fts_query('Est-ce que tu aimes "le" café OR NEAR(thé) ?')
+
+    assert query == '"aimes" OR "café" OR "near" OR "thé"'
+    assert WorklyDatabase.build_fts_query("et le la ?") == ""
+
+
+# ========== TESTS MEMORYMANAGER ==========
+
+
+def test_memory_manager_lexical_fallback(tmp_path):
+    """Test contexte retrouvé par FTS5 sans modèle d'embeddings"""
+    from src.ai.memory_manager import MemoryManager
+
+    manager = MemoryManager(storage_dir=str(tmp_path))
+    manager.embedding_model = None
+    if not manager.db.fts_enabled:
+        pytest.skip("SQLite compilé sans FTS5")
+    manager.db.add_segment(
+        "L'utilisateur prépare un voyage au Japon", 6, "t0", "t1", metadata={"segment_id": "seg_7"}
+    )
+    manager.db.add_fact("preferences", "likes", {"subject": "sushis", "sentiment": "positive"})
+
+    results = manager.search_relevant_context("Des idées pour mon voyage au Japon ?")
+    context = manager.get_context_for_prompt("Tu te souviens des sushis et du Japon ?")
+
+    assert results[0]["segment_id"] == "seg_7"
+    assert results[0]["metadata"]["type"] == "lexical"
+    assert "voyage au Japon" in context
+    assert "aime sushis" in context
+    manager.close()
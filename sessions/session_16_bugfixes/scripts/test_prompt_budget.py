@@ -0,0 +1,128 @@
+"""
+Tests unitaires pour le budget de tokens des prompts
+
+Tests :
+- TokenCounter : mémoïsation, approximation sans modèle, LRU
+- PromptBudgeter : plafonds par section, éviction des tours anciens,
+  réduction de la réponse (avec plancher), troncature d'un message
+"""
+
+import pytest
+
+from src.ai.prompt_budget import PromptBudgeter, TokenCounter, approximate_tokens
+
+
+class CountingTokenizer:
+    """Tokenizer factice : un token par mot, compte les appels"""
+
+    def __init__(self):
+        self.calls = 0
+        self.loaded = True
+
+    def __call__(self, text):
+        if not self.loaded:
+            return None
+        self.calls += 1
+        return len(text.split())
+
+
+@pytest.fixture
+def tokenizer():
+    """Fixture : tokenizer factice"""
+    return CountingTokenizer()
+
+
+# ========== TESTS TOKENCOUNTER ==========
+
+
+def test_counter_memoizes(tokenizer):
+    """Test un message n'est tokenisé qu'une fois"""
+    counter = TokenCounter(tokenizer)
+
+    assert counter("un deux trois") == 3
+    assert counter("un deux trois") == 3
+    assert tokenizer.calls == 1
+    assert counter.get_stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+
+def test_counter_approximation_not_cached(tokenizer):
+    """Test modèle non chargé : approximation, sans polluer le cache"""
+    counter = TokenCounter(tokenizer)
+    tokenizer.loaded = False
+
+    assert counter("x" * 40) == approximate_tokens("x" * 40)
+    assert counter.get_stats()["entries"] == 0
+
+    tokenizer.loaded = True
+    assert counter("x" * 40) == 1
+
+
+def test_counter_lru_eviction(tokenizer):
+    """Test taille du cache bornée"""
+    counter = TokenCounter(tokenizer, max_entries=2)
+    for text in ("a", "b", "c"):
+        counter(text)
+
+    assert counter.get_stats()["entries"] == 2
+    counter("a")  # Évincé : re-tokenisé
+    assert tokenizer.calls == 4
+
+
+# ========== TESTS PROMPTBUDGETER ==========
+
+
+def test_allocate_respects_window(tokenizer):
+    """Test plafonds : réponse + marge + entrée = n_ctx"""
+    budgeter = PromptBudgeter(TokenCounter(tokenizer), n_ctx=2048, reply_tokens=512)
+    limits = budgeter.allocate()
+
+    assert limits["input"] + limits["reply"] + budgeter.safety_margin == 2048
+    assert limits["system"] + limits["memory"] < limits["input"]
+
+
+def test_fit_history_evicts_oldest(tokenizer):
+    """Test les tours les plus anciens sont évincés d'abord"""
+    budgeter = PromptBudgeter(TokenCounter(tokenizer))
+    turns = [" ".join(["mot"] * 10) + f" tour{i}" for i in range(5)]  # 11 tokens + séparateur
+
+    kept = budgeter.fit_history(turns, budget_tokens=30)
+
+    assert kept == turns[-2:]
+    assert budgeter.fit_history(turns, budget_tokens=1000) == turns
+    assert budgeter.fit_history(turns, budget_tokens=5) == []
+
+
+def test_reply_budget_shrinks_for_long_prompt(tokenizer):
+    """Test la réponse est réduite plutôt que de dépasser n_ctx"""
+    budgeter = PromptBudgeter(TokenCounter(tokenizer), n_ctx=2048, reply_tokens=512)
+
+    assert budgeter.reply_budget(1000) == 512
+    assert budgeter.reply_budget(1800) == 2048 - 1800 - budgeter.safety_margin
+    assert budgeter.reply_budget(4000) == budgeter.min_reply_tokens > 0  # Plancher
+
+
+def test_truncate_keeps_head_and_tail(tokenizer):
+    """Test message trop long : début et fin gardés, budget respecté"""
+    budgeter = PromptBudgeter(TokenCounter(tokenizer))
+    text = "début " + " ".join(["collage"] * 200) + " question finale ?"
+
+    short = budgeter.truncate(text, 20)
+
+    assert budgeter.count_tokens(short) <= 20
+    assert short.startswith("début") and short.endswith("?")
+    assert budgeter.truncate("court", 20) == "court"
+
+
+def test_fit_history_stable_keeps_anchor(tokenizer):
+    """Test même premier tour d'un appel à l'autre, éviction par paliers"""
+    budgeter = PromptBudgeter(TokenCounter(tokenizer))
+    turns = [f"tour {i}" for i in range(20)]
+
+    first = budgeter.fit_history_stable(turns[:12], 1000, max_turns=8)
+    assert first == turns[6:12]  # Recoupé à 75 % de max_turns
+
+    second = budgeter.fit_history_stable(turns[:13], 1000, anchor=first[0], max_turns=8)
+    assert second[0] == first[0]  # Préfixe inchangé
+
+    third = budgeter.fit_history_stable(turns[:15], 1000, anchor=first[0], max_turns=8)
+    assert third == turns[9:15]  # Débordement : nouveau palier
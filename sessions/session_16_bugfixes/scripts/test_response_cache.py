@@ -0,0 +1,129 @@
+"""
+Tests unitaires pour le cache de réponses
+
+Tests :
+- Normalisation des entrées et partitions (personnalité, contexte)
+- TTL, éviction LRU, contournement par température
+- Correspondance sémantique (seuil de similarité)
+- Statistiques (taux de hit, secondes GPU économisées)
+"""
+
+import numpy as np
+import pytest
+
+from src.ai import response_cache as response_cache_module
+from src.ai.response_cache import (
+    ResponseCache,
+    context_hash,
+    normalize_input,
+    personality_bucket,
+)
+
+
+class FakeEncoder:
+    """Encodeur factice : vecteurs fixés par texte normalisé"""
+
+    VECTORS = {
+        "salut": [1.0, 0.0, 0.0],
+        "salut kira": [0.98, 0.2, 0.0],
+        "bonjour": [0.0, 1.0, 0.0],
+    }
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, texts):
+        self.calls += 1
+        return np.array([self.VECTORS.get(t, [0.0, 0.0, 1.0]) for t in texts])
+
+
+@pytest.fixture
+def cache():
+    """Fixture : cache avec encodeur factice"""
+    return ResponseCache(ttl_seconds=60, similarity_threshold=0.95, encode_fn=FakeEncoder())
+
+
+def test_normalize_input():
+    """Test casse, espaces et ponctuation de bord ignorés"""
+    assert normalize_input("  Salut   Kira !! 👋") == "salut kira"
+    assert normalize_input("Merci.") == normalize_input("merci")
+    assert normalize_input("c'est ok?") == "c'est ok"
+
+
+def test_personality_bucket_tolerates_small_drift():
+    """Test petites variations de traits : même palier"""
+    assert personality_bucket({"humor": 0.8, "empathy": 0.6}) == personality_bucket(
+        {"empathy": 0.61, "humor": 0.79}
+    )
+    assert personality_bucket({"humor": 0.8}) != personality_bucket({"humor": 0.3})
+
+
+def test_exact_hit_and_stats(cache):
+    """Test entrée identique (après normalisation) : réponse réutilisée"""
+    key = ("p", context_hash([]))
+    assert cache.get("Salut !", *key, temperature=0.7) is None
+    cache.put("Salut !", *key, temperature=0.7, response="Coucou ! 😊", generation_s=2.5)
+
+    entry = cache.get("salut", *key, temperature=0.7)
+
+    assert entry.text == "Coucou ! 😊"
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["saved_gpu_seconds"] == 2.5
+
+
+def test_partitions_isolated(cache):
+    """Test autre personnalité ou autre contexte : pas de réutilisation"""
+    cache.put("salut", "p1", context_hash([]), 0.7, "Coucou !", 1.0)
+
+    assert cache.get("salut", "p2", context_hash([]), 0.7) is None
+    assert cache.get("salut", "p1", context_hash(["Il pleut", "Dommage"]), 0.7) is None
+
+
+def test_semantic_hit(cache):
+    """Test entrée proche (cosinus >= seuil) : réutilisée, entrée éloignée : non"""
+    key = ("p", "ctx")
+    cache.put("salut", *key, temperature=0.7, response="Coucou !", generation_s=1.0)
+
+    assert cache.get("Salut Kira", *key, temperature=0.7).text == "Coucou !"
+    assert cache.get("bonjour", *key, temperature=0.7) is None
+    assert cache.get_stats()["semantic_hits"] == 1
+
+
+def test_ttl_expiration(cache, monkeypatch):
+    """Test réponse expirée : supprimée et comptée"""
+    now = [1000.0]
+    monkeypatch.setattr(response_cache_module.time, "monotonic", lambda: now[0])
+    cache.put("merci", "p", "ctx", 0.7, "Avec plaisir !", 1.0)
+
+    now[0] += 61
+    assert cache.get("merci", "p", "ctx", 0.7) is None
+    assert cache.get_stats()["expirations"] == 1
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_lru_eviction():
+    """Test au-delà de max_entries : la moins récemment utilisée est évincée"""
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "p", "ctx", 0.7, "A", 1.0)
+    cache.put("b", "p", "ctx", 0.7, "B", 1.0)
+    cache.get("a", "p", "ctx", 0.7)
+    cache.put("c", "p", "ctx", 0.7, "C", 1.0)
+
+    assert cache.get("b", "p", "ctx", 0.7) is None
+    assert cache.get("a", "p", "ctx", 0.7).text == "A"
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_bypass_high_temperature_and_long_input(cache):
+    """Test température élevée ou entrée longue : ni lecture ni écriture"""
+    assert not cache.put("salut", "p", "ctx", 1.5, "Coucou !", 1.0)
+    assert not cache.put("x" * 500, "p", "ctx", 0.7, "Réponse", 1.0)
+    cache.put("salut", "p", "ctx", 0.7, "Coucou !", 1.0)
+
+    assert cache.get("salut", "p", "ctx", 1.5) is None
+    stats = cache.get_stats()
+    assert stats["bypassed"] == 1
+    assert stats["misses"] == 0
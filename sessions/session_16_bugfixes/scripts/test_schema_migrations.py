@@ -0,0 +1,269 @@
+"""
+Tests unitaires pour les migrations de schéma (PRAGMA user_version)
+
+Tests :
+- Base neuve : toutes les migrations appliquées
+- Base existante (v0) : colonnes ajoutées + backfill par lots avec progression
+- Reprise après une migration interrompue
+- Ouverture d'une base existante : DDL immédiat, backfills en arrière-plan
+- FTS5 : v4 non validée sans FTS5, v5 réindexe facts_fts sur search_text
+- FTS5 : existant indexé par lots, écritures entre deux lots prises en compte
+"""
+
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from src.ai.database import WorklyDatabase
+from src.ai import schema_migrations
+from src.ai.schema_migrations import (
+    MIGRATIONS,
+    Migration,
+    MigrationInterrupted,
+    MigrationRunner,
+    fts5_available,
+)
+
+
+def _columns(db, table):
+    return {row["name"] for row in db.execute_raw(f"PRAGMA table_info({table})")}
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """Fixture : base au schéma d'origine (v0) avec données"""
+    db = WorklyDatabase(str(tmp_path / "workly.db"), apply_migrations=False)
+    with db.transaction():
+        for i in range(10):
+            db.conn.execute(
+                "INSERT INTO conversations (role, content, timestamp, user_id) VALUES (?, ?, ?, ?)",
+                ("user", f"Message {i}", f"2025-01-01T00:00:{i:02d}", f"user{i % 2}"),
+            )
+            db.conn.execute(
+                "INSERT INTO facts (category, type, data, timestamp, source_message_id) "
+                "VALUES ('events', 'general', '{}', ?, ?)",
+                (f"2025-01-01T00:00:{i:02d}", i + 1),
+            )
+            summary = f"Résumé du segment {i}"
+            db.conn.execute(
+                "INSERT INTO segments (summary, message_count, start_timestamp, end_timestamp, metadata) "
+                "VALUES (?, 20, 't0', 't1', ?)",
+                (summary, json.dumps({"segment_id": f"segment_{i:03d}"})),
+            )
+            db.conn.execute(
+                "INSERT INTO embeddings (embedding, text, timestamp) VALUES (?, ?, 't')",
+                (np.zeros(4, dtype=np.float32).tobytes(), summary),
+            )
+    yield db
+    db.close()
+
+
+def test_fresh_database_up_to_date(tmp_path):
+    """Test base neuve au dernier schéma"""
+    db = WorklyDatabase(str(tmp_path / "workly.db"))
+
+    assert db.schema_version == MIGRATIONS[-1].version
+    assert "segment_id" in _columns(db, "embeddings")
+    assert "user_id" in _columns(db, "facts")
+    assert MigrationRunner(db).pending() == []
+    db.close()
+
+
+def test_legacy_database_backfill(legacy_db):
+    """Test migration d'une base existante avec progression par lots"""
+    progress = []
+
+    applied = legacy_db.migrate(progress_callback=lambda *p: progress.append(p), batch_size=3)
+
+    assert applied == len(MIGRATIONS)
+    assert legacy_db.schema_version == MIGRATIONS[-1].version
+    # Backfill embeddings → segments (aperçu du résumé)
+    payloads = legacy_db.get_embedding_payloads()
+    assert payloads[1] == ("Résumé du segment 0", "segment_000")
+    # Backfill facts → utilisateur du message source
+    assert len(legacy_db.get_facts(user_id="user1")) == 5
+    # Progression : 4 lots de 3 lignes par table, dernier rapport complet
+    assert [p[2:] for p in progress if p[0] == 3][-1] == (10, 10)
+    assert len([p for p in progress if p[0] == 3]) == 4
+
+
+def test_interrupted_migration_resumes(legacy_db):
+    """Test migration interrompue : reprise au prochain lancement"""
+    calls = []
+
+    def failing_backfill(runner):
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("arrêt brutal")
+
+    migrations = [
+        Migration(
+            1,
+            "Colonne test",
+            columns=[("conversations", "extra", "TEXT")],
+            backfill=failing_backfill,
+        )
+    ]
+
+    with pytest.raises(RuntimeError):
+        MigrationRunner(legacy_db, migrations).run()
+    assert legacy_db.schema_version == 0  # Version non validée
+    assert "extra" in _columns(legacy_db, "conversations")  # DDL validé
+
+    # Reprise : colonne déjà présente, backfill relancé, version validée
+    assert MigrationRunner(legacy_db, migrations).run() == 1
+    assert legacy_db.schema_version == 1
+
+
+def test_open_existing_database_backfills_in_background(legacy_db, tmp_path):
+    """Test ouverture d'une base avec données : colonnes tout de suite, backfill après"""
+    legacy_db.close()
+
+    db = WorklyDatabase(str(tmp_path / "workly.db"))
+    try:
+        # DDL appliqué avant le retour du constructeur (écritures possibles)
+        assert "user_id" in _columns(db, "facts")
+        assert "search_text" in _columns(db, "facts")
+
+        assert db.wait_for_migrations(timeout=10)
+        assert db.schema_version == MIGRATIONS[-1].version
+        assert len(db.get_facts(user_id="user1")) == 5
+    finally:
+        db.close()
+
+
+def test_stop_event_interrupts_backfill(legacy_db):
+    """Test arrêt demandé entre deux lots : version non validée, reprise ensuite"""
+    stop = threading.Event()
+
+    def stop_after_first_batch(version, description, done, total):
+        stop.set()
+
+    runner = MigrationRunner(
+        legacy_db, progress_callback=stop_after_first_batch, batch_size=3, stop_event=stop
+    )
+    with pytest.raises(MigrationInterrupted):
+        runner.run()
+    assert legacy_db.schema_version < MIGRATIONS[-1].version
+
+    assert legacy_db.migrate() > 0
+    assert legacy_db.schema_version == MIGRATIONS[-1].version
+    assert len(legacy_db.get_facts(user_id="user1")) == 5
+
+
+# ========== TESTS FTS5 ==========
+
+
+def test_fts_migration_waits_for_fts5(legacy_db, monkeypatch):
+    """Test SQLite sans FTS5 : v4 non validée, appliquée quand FTS5 est là"""
+    if not fts5_available(legacy_db.conn):
+        pytest.skip("SQLite compilé sans FTS5")
+    monkeypatch.setattr(schema_migrations, "fts5_available", lambda conn: False)
+
+    assert legacy_db.migrate() == 3
+    assert legacy_db.schema_version == 3
+    assert not legacy_db.fts_enabled
+
+    monkeypatch.undo()
+    assert legacy_db.migrate() == 2
+    assert legacy_db.schema_version == MIGRATIONS[-1].version
+    assert legacy_db.fts_enabled
+
+
+def test_v4_fact_index_rebuilt_on_values(legacy_db):
+    """Test facts_fts de l'ancienne v4 (JSON brut) reconstruit sur search_text"""
+    if not fts5_available(legacy_db.conn):
+        pytest.skip("SQLite compilé sans FTS5")
+    fact = {"category": "food", "subject": "café", "sentiment": "positive"}
+    with legacy_db.transaction():
+        legacy_db.conn.execute(
+            "INSERT INTO facts (category, type, data, timestamp) VALUES ('preferences', 'food', ?, 't')",
+            (json.dumps(fact),),
+        )
+    MigrationRunner(legacy_db, MIGRATIONS[:4]).run()
+    # facts_fts tel que créé par l'ancienne v4 (colonne data)
+    with legacy_db.transaction():
+        for suffix in ("_ai", "_ad", "_au"):
+            legacy_db.conn.execute(f"DROP TRIGGER facts_fts{suffix}")
+        legacy_db.conn.execute("DROP TABLE facts_fts")
+        legacy_db.conn.execute("UPDATE facts SET search_text = NULL")
+        legacy_db.conn.execute(
+            "CREATE VIRTUAL TABLE facts_fts USING fts5(data, content='facts', content_rowid='id')"
+        )
+        legacy_db.conn.execute("INSERT INTO facts_fts(facts_fts) VALUES ('rebuild')")
+    assert legacy_db.search_text("positive", kinds=("fact",))  # Bug d'origine
+
+    assert legacy_db.migrate() == 1
+
+    assert legacy_db.search_text("cafe", kinds=("fact",))[0]["category"] == "preferences"
+    assert legacy_db.search_text("positive subject", kinds=("fact",)) == []
+
+
+def _fts_backfill_exists(db):
+    return bool(db.execute_raw("SELECT 1 FROM sqlite_master WHERE name = 'fts_backfill'"))
+
+
+def test_fts_index_built_in_batches(legacy_db):
+    """Test index FTS de l'existant par lots : écritures entre deux lots cohérentes"""
+    if not fts5_available(legacy_db.conn):
+        pytest.skip("SQLite compilé sans FTS5")
+    v4 = []
+
+    def write_between_batches(version, description, done, total):
+        indexing = legacy_db.execute_raw(
+            "SELECT indexed_up_to FROM fts_backfill WHERE fts = 'conversations_fts'"
+        ) if version == 4 and _fts_backfill_exists(legacy_db) else []
+        if not indexing:
+            return
+        v4.append(done)
+        if len(v4) == 1:
+            # Verrou d'écriture libre entre deux lots : le chat continue d'écrire
+            legacy_db.add_conversation("user", "Nouveau message pendant l'index", "t")
+            with legacy_db.transaction():
+                legacy_db.conn.execute(
+                    "UPDATE conversations SET content = 'Message modifié' WHERE id = 8"
+                )
+                legacy_db.conn.execute("DELETE FROM conversations WHERE id = 9")
+                legacy_db.conn.execute("UPDATE conversations SET content = 'Déjà indexé' WHERE id = 1")
+
+    legacy_db.migrate(progress_callback=write_between_batches, batch_size=3)
+
+    assert v4 == [3, 6, 9, 10]  # Lots de 3 ids, pas un 'rebuild' unique
+    for fts, _, _ in schema_migrations.FTS_TABLES:
+        legacy_db.execute_raw(f"INSERT INTO {fts}({fts}, rank) VALUES ('integrity-check', 1)")
+    assert legacy_db.search_text("pendant", kinds=("conversation",))
+    assert legacy_db.search_text("modifié", kinds=("conversation",))
+    assert legacy_db.search_text("indexé", kinds=("conversation",))
+    assert not legacy_db.execute_raw(
+        "SELECT name FROM sqlite_master WHERE name = 'fts_backfill'"
+    )
+
+
+def test_fts_index_resumes_after_stop(legacy_db):
+    """Test arrêt pendant l'indexation FTS : reprise sans doublon"""
+    if not fts5_available(legacy_db.conn):
+        pytest.skip("SQLite compilé sans FTS5")
+    stop = threading.Event()
+
+    def stop_during_fts(version, description, done, total):
+        if version == 4 and _fts_backfill_exists(legacy_db):
+            stop.set()  # Premier lot de conversations_fts indexé
+
+    runner = MigrationRunner(
+        legacy_db, progress_callback=stop_during_fts, batch_size=3, stop_event=stop
+    )
+    with pytest.raises(MigrationInterrupted):
+        runner.run()
+    assert legacy_db.schema_version == 3
+    assert legacy_db.execute_raw("SELECT indexed_up_to FROM fts_backfill") == [
+        {"indexed_up_to": 3}
+    ]
+
+    legacy_db.migrate(batch_size=3)
+
+    assert legacy_db.schema_version == MIGRATIONS[-1].version
+    for fts, _, _ in schema_migrations.FTS_TABLES:
+        legacy_db.execute_raw(f"INSERT INTO {fts}({fts}, rank) VALUES ('integrity-check', 1)")
+    assert len(legacy_db.search_text("Message", kinds=("conversation",), k=50)) == 10